@@ -0,0 +1,122 @@
+"""
+data_cleaner 测试：融合执行的 clean_data 与逐步清洗一致、流式清洗
+
+运行：python -m pytest skills/basic_data_processing
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Dict, Tuple
+
+from data_cleaner import (clean_data, clean_data_streaming, standardize_column_names,
+                          handle_missing_values, remove_outliers_zscore)
+
+
+def _mixed_frame() -> pd.DataFrame:
+    """含字符串列、整数列、缺失值、重复行和异常值的数据"""
+    rng = np.random.default_rng(1)
+    n = 200
+    df = pd.DataFrame({
+        'Stock Name ': rng.choice(['平安银行', '万科A', '浦发银行'], n),
+        'Close Price': rng.normal(10, 1, n).round(2),
+        'Volume': rng.integers(1000, 2000, n),
+        'Turn-Over': rng.normal(0.5, 0.1, n).round(3),
+    })
+    df.loc[rng.choice(n, 15, replace=False), 'Close Price'] = np.nan
+    df.loc[rng.choice(n, 10, replace=False), 'Turn-Over'] = np.nan
+    df.loc[[3, 50], 'Close Price'] = 100.0
+    df.loc[[7], 'Volume'] = 10 ** 6
+    return pd.concat([df, df.iloc[10:30]], ignore_index=True)
+
+
+def _stepwise(df: pd.DataFrame, drop_duplicates=True, handle_missing='drop', standardize_columns=True,
+              remove_outliers=False, outlier_threshold=3.0) -> pd.DataFrame:
+    """原来的逐步实现：标准化列名 → 去重 → 缺失值 → 异常值"""
+    if standardize_columns:
+        df = standardize_column_names(df)
+    if drop_duplicates:
+        df = df.drop_duplicates()
+    if handle_missing != 'keep':
+        df = handle_missing_values(df, method=handle_missing)
+    if remove_outliers:
+        df = remove_outliers_zscore(df, threshold=outlier_threshold)
+    return df
+
+
+@pytest.mark.parametrize('handle_missing', ['drop', 'fill_mean', 'fill_median', 'fill_zero', 'fill_forward', 'keep'])
+@pytest.mark.parametrize('remove_outliers', [False, True])
+@pytest.mark.parametrize('drop_duplicates', [False, True])
+def test_fused_plan_matches_stepwise(handle_missing, remove_outliers, drop_duplicates):
+    df = _mixed_frame()
+    original = df.copy()
+    options = dict(drop_duplicates=drop_duplicates, handle_missing=handle_missing,
+                   remove_outliers=remove_outliers, outlier_threshold=2.5)
+
+    result = clean_data(df, **options)
+
+    pd.testing.assert_frame_equal(result, _stepwise(df, **options))
+    pd.testing.assert_frame_equal(df, original)
+
+
+@pytest.mark.parametrize('handle_missing', ['drop', 'fill_median', 'fill_forward'])
+def test_inplace_matches_copy(handle_missing):
+    df = _mixed_frame()
+    expected = clean_data(df, handle_missing=handle_missing, remove_outliers=True)
+
+    assert clean_data(df, handle_missing=handle_missing, remove_outliers=True, inplace=True) is None
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_no_rows_removed_keeps_unfilled_columns_shared():
+    """没有行被删除时只为被填充的列分配新数组"""
+    df = pd.DataFrame({'a': [1.0, np.nan, 3.0], 'b': [4.0, 5.0, 6.0]})
+    result = clean_data(df, handle_missing='fill_zero', standardize_columns=False)
+
+    assert result['a'].tolist() == [1.0, 0.0, 3.0]
+    assert np.shares_memory(result['b'].to_numpy(), df['b'].to_numpy())
+    assert df['a'].isna().sum() == 1
+
+
+def _stream(df: pd.DataFrame, **kwargs) -> Tuple[pd.DataFrame, Dict]:
+    chunks = []
+    summary = clean_data_streaming(df, chunks.append, **kwargs)
+    return pd.concat(chunks).reset_index(drop=True), summary
+
+
+def test_all_duplicate_chunk_followed_by_new_rows():
+    """整块都是重复行时不能追加空层，否则下一块查重时越界"""
+    df = pd.DataFrame({'a': [1, 2, 1, 2, 3, 4], 'b': [1., 2., 1., 2., 3., 4.]})
+    result, summary = _stream(df, chunksize=2)
+
+    assert summary['duplicates_removed'] == 2
+    assert summary['rows_out'] == 4
+    assert result['a'].tolist() == [1, 2, 3, 4]
+
+
+def test_leading_and_repeated_duplicate_chunks():
+    df = pd.DataFrame({'a': [1, 1, 1, 1, 1, 1, 2, 2, 3]})
+    result, summary = _stream(df, chunksize=2)
+
+    assert result['a'].tolist() == [1, 2, 3]
+    assert summary['duplicates_removed'] == 6
+
+
+@pytest.mark.parametrize('handle_missing', ['drop', 'fill_mean', 'fill_median', 'fill_zero', 'fill_forward', 'keep'])
+@pytest.mark.parametrize('remove_outliers', [False, True])
+def test_streaming_matches_clean_data(handle_missing, remove_outliers):
+    """分块结果与一次性 clean_data 相同（中位数草图在值数不超过 sketch_size 时精确）"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Open Price': rng.normal(10, 1, 300).round(1),
+        'Volume': rng.normal(1000, 50, 300).round(),
+    })
+    df.loc[rng.choice(300, 20, replace=False), 'Open Price'] = np.nan
+    df.loc[[5, 77], 'Volume'] = 1e6
+    df = pd.concat([df, df.iloc[:40]], ignore_index=True)
+
+    expected = clean_data(df, handle_missing=handle_missing, remove_outliers=remove_outliers)
+    result, summary = _stream(df, handle_missing=handle_missing, remove_outliers=remove_outliers, chunksize=37)
+
+    assert summary['rows_out'] == len(expected)
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,175 @@
+"""
+常驻分析服务客户端
+
+analysis_daemon.py 的轻量客户端，只依赖标准库。daily_recommendation.py 和
+run_feedback_analysis.py 通过 --daemon 参数使用它，服务不可用时回退到本地冷启动流程。
+
+使用方法：
+    python analysis_client.py health
+    python analysis_client.py scan [--backtest] [--mode loose]
+    python analysis_client.py features sh.600000 20260209
+    python analysis_client.py recommendations
+    python analysis_client.py refresh
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Tuple
+
+
+# 服务默认监听地址（只监听本机）
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class AnalysisClientError(Exception):
+    """分析服务请求失败"""
+
+
+class AnalysisClient:
+    """常驻分析服务客户端"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 300):
+        """
+        初始化客户端
+
+        Args:
+            host: 服务地址
+            port: 服务端口
+            timeout: 请求超时（秒），全市场扫描可能需要较长时间
+        """
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Dict[str, Any] = None, timeout: float = None) -> Dict[str, Any]:
+        """发送请求并解析JSON响应（payload非空时使用POST）"""
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={'Content-Type': 'application/json'},
+            method='POST' if data is not None else 'GET'
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                body = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get('error', str(e))
+            except Exception:
+                message = str(e)
+            raise AnalysisClientError(f"{path}: {message}") from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise AnalysisClientError(f"{path}: {e}") from e
+
+        return body
+
+    def health(self) -> Dict[str, Any]:
+        """获取服务状态（缓存股票数、最近刷新时间等）"""
+        return self._request('/health', timeout=5)
+
+    def is_available(self) -> bool:
+        """服务是否在运行"""
+        try:
+            return self.health().get('status') == 'ok'
+        except AnalysisClientError:
+            return False
+
+    def scan(self, enable_future_validation: bool = False, filter_mode: str = None,
+             overrides: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        在服务缓存上执行全市场信号扫描
+
+        Args:
+            enable_future_validation: 是否回测模式（验证未来涨幅）
+            filter_mode: 筛选模式（strict/standard/loose），None使用服务默认配置
+            overrides: 其他Config参数覆盖，如 {'VOLUME_RATIO_THRESHOLD': 1.8}
+
+        Returns:
+            Dict: {'summary': 分析汇总, 'signals': 信号明细（trend_signals CSV列格式）, 'refreshed_at': ...}
+        """
+        return self._request('/scan', {
+            'enable_future_validation': enable_future_validation,
+            'filter_mode': filter_mode,
+            'overrides': overrides or {},
+        })
+
+    def features(self, items: List[Tuple[str, str]], filter_mode: str = None,
+                 overrides: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        批量提取 (股票代码, 日期YYYYMMDD) 的技术指标特征
+
+        Args:
+            items: (股票代码, 日期YYYYMMDD) 列表
+            filter_mode: 筛选模式（strict/standard/loose），None使用服务默认配置
+            overrides: 其他Config参数覆盖，同 scan
+
+        Returns:
+            List[Dict]: 与输入顺序一致的特征列表，无法计算的项为None
+        """
+        response = self._request('/features', {
+            'items': [list(item) for item in items],
+            'filter_mode': filter_mode,
+            'overrides': overrides or {},
+        })
+        return response['features']
+
+    def recommendations(self) -> Dict[str, Any]:
+        """获取服务按当前调优配置筛选出的推荐股票（不写报告文件）"""
+        return self._request('/recommendations')
+
+    def refresh(self) -> Dict[str, Any]:
+        """让服务立即增量刷新行情缓存"""
+        return self._request('/refresh', {})
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常驻分析服务客户端')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='服务地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='服务端口')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('health', help='查看服务状态')
+    scan_parser = subparsers.add_parser('scan', help='全市场信号扫描')
+    scan_parser.add_argument('--backtest', action='store_true', help='回测模式（验证未来涨幅）')
+    scan_parser.add_argument('--mode', choices=['strict', 'standard', 'loose'], help='筛选模式')
+    features_parser = subparsers.add_parser('features', help='提取指定日期的特征')
+    features_parser.add_argument('stock_code', help='股票代码，如 sh.600000')
+    features_parser.add_argument('date', help='日期，格式YYYYMMDD')
+    subparsers.add_parser('recommendations', help='查看当前推荐')
+    subparsers.add_parser('refresh', help='立即刷新行情缓存')
+
+    args = parser.parse_args()
+    client = AnalysisClient(args.host, args.port)
+
+    try:
+        if args.command == 'health':
+            result = client.health()
+        elif args.command == 'scan':
+            result = client.scan(args.backtest, args.mode)
+            result = {'summary': result['summary'], 'refreshed_at': result['refreshed_at'],
+                      'signals': result['signals'][:20]}
+        elif args.command == 'features':
+            result = client.features([(args.stock_code, args.date)])[0]
+        elif args.command == 'recommendations':
+            result = client.recommendations()
+        else:
+            result = client.refresh()
+    except AnalysisClientError as e:
+        print(f"请求失败: {e}")
+        return 1
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
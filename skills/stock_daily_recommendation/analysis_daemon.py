@@ -0,0 +1,371 @@
+"""
+常驻分析服务
+
+把全市场行情和技术指标常驻内存（MarketCache），通过本机HTTP接口提供信号扫描、
+特征提取和推荐查询。每日推荐、反馈分析等工具不再每次冷启动重新读取5000+个CSV
+并重新计算指标；行情文件追加新K线后，服务只增量读取新增的行。
+
+接口（只监听127.0.0.1，JSON格式）：
+    GET  /health            服务状态
+    POST /scan              全市场信号扫描 {"enable_future_validation", "filter_mode", "overrides"}
+    POST /features          批量特征提取 {"items": [["sh.600000", "20260209"], ...], "filter_mode", "overrides"}
+    GET  /recommendations   按当前调优配置筛选的推荐股票
+    POST /refresh           立即增量刷新行情缓存（调优配置文件有变化时同时重新加载）
+
+调优配置（tuning_config.json）在启动时加载一次，之后只在刷新时（定期或 /refresh）检测到
+文件变化才重新加载。加载和推荐筛选都持有服务锁，并发请求不会看到只应用了一部分的阈值。
+
+使用方法：
+    python analysis_daemon.py                      # 默认端口8765，每5分钟检查一次数据更新
+    python analysis_daemon.py --port 9000 --refresh-interval 60
+    python analysis_client.py health               # 查看服务状态
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import sys
+import json
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# 添加stock_macd_volumn到路径
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+macd_dir = os.path.join(parent_dir, 'stock_macd_volumn')
+sys.path.insert(0, macd_dir)
+
+from config import Config
+from market_cache import MarketCache
+from stock_trend_analyzer import analyze_market_cache, build_signal_table
+from enhanced_feedback_analyzer import extract_features_batch, feature_row_to_dict
+from daily_recommendation import (
+    RecommendationConfig, EnhancedDetailsLookup, select_recommendations, build_recommendations
+)
+from analysis_client import DEFAULT_HOST, DEFAULT_PORT
+
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    """JSON序列化兜底：处理numpy标量和时间类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime('%Y-%m-%d')
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class RequestError(Exception):
+    """请求参数错误（返回400）"""
+
+
+class AnalysisService:
+    """常驻分析服务：行情缓存 + 扫描结果缓存"""
+
+    def __init__(self, data_dir: str = None, limit: int = None, skip_quarantined: bool = True):
+        """
+        初始化服务并加载行情缓存
+
+        Args:
+            data_dir: 数据目录，默认使用Config.DATA_DIR
+            limit: 只加载前N只股票（测试用）
+            skip_quarantined: 扫描时是否跳过数据质量隔离名单中的股票
+        """
+        self.cache = MarketCache(data_dir, Config, skip_quarantined=skip_quarantined)
+        self.lock = threading.RLock()
+        self.started_at = datetime.now()
+        self.refreshed_at = None
+        self.generation = 0  # 行情数据每变化一次加1，用于使扫描结果缓存失效
+        self._scan_cache: Dict[Any, Dict[str, Any]] = {}
+        self._tuning_mtime = None  # 已加载的调优配置文件修改时间
+
+        with self.lock:
+            self.cache.load(limit)
+            self.refreshed_at = datetime.now()
+            self.reload_tuning()
+
+    def health(self) -> Dict[str, Any]:
+        """服务状态"""
+        return {
+            'status': 'ok',
+            'stocks': len(self.cache),
+            'quarantined': self.cache.quarantined_count(),
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'refreshed_at': self.refreshed_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'generation': self.generation,
+        }
+
+    def reload_tuning(self, force: bool = True) -> bool:
+        """
+        加载调优配置到 RecommendationConfig（持有服务锁，与推荐筛选互斥）
+
+        Args:
+            force: False时只在配置文件修改时间变化时重新加载
+
+        Returns:
+            bool: 是否重新加载
+        """
+        path = RecommendationConfig.TUNING_CONFIG_PATH
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        with self.lock:
+            if not force and mtime == self._tuning_mtime:
+                return False
+            RecommendationConfig.load_tuning_config()
+            self._tuning_mtime = mtime
+        return True
+
+    def refresh(self) -> Dict[str, Any]:
+        """增量刷新行情缓存，调优配置文件有变化时重新加载"""
+        with self.lock:
+            self.reload_tuning(force=False)
+            stats = self.cache.refresh()
+            self.refreshed_at = datetime.now()
+            if any(stats[key] for key in ('appended', 'reloaded', 'added', 'removed', 'quarantine_changed')):
+                self.generation += 1
+                self._scan_cache.clear()
+                logger.info(f"行情缓存已刷新: {stats}")
+        return {'stats': stats, **self.health()}
+
+    def _make_config(self, filter_mode: str = None, overrides: Dict[str, Any] = None):
+        """基于Config派生本次请求使用的配置类（不修改全局Config）"""
+        attrs = dict(overrides or {})
+        if filter_mode:
+            if filter_mode not in Config.FILTER_MODES:
+                raise RequestError(f"未知的筛选模式: {filter_mode}")
+            attrs['FILTER_MODE'] = filter_mode
+
+        unknown = [key for key in attrs if not key.isupper() or not hasattr(Config, key)]
+        if unknown:
+            raise RequestError(f"未知的配置参数: {', '.join(unknown)}")
+
+        return type('RequestConfig', (Config,), attrs) if attrs else Config
+
+    def scan(self, enable_future_validation: bool = False, filter_mode: str = None,
+             overrides: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        在缓存上执行全市场信号扫描
+
+        与 analyze_all_stocks 使用相同的数据质量检查、预筛选和信号检测逻辑。
+        指标参数被覆盖时，对每只股票基于原始数据重新计算指标。
+
+        Returns:
+            Dict: {'summary': 分析汇总, 'signals': 信号明细行, 'refreshed_at': 数据刷新时间}
+        """
+        config = self._make_config(filter_mode, overrides)
+        key = (bool(enable_future_validation), filter_mode,
+               json.dumps(overrides or {}, sort_keys=True, default=str))
+
+        with self.lock:
+            cached = self._scan_cache.get(key)
+            if cached is not None and cached['generation'] == self.generation:
+                return cached['response']
+
+            start = datetime.now()
+            result = analyze_market_cache(self.cache, config, enable_future_validation)
+
+            signal_table = build_signal_table(result['all_signals'], enable_future_validation)
+            response = {
+                'summary': {
+                    'total_stocks': result['total_stocks'],
+                    'stocks_with_signals': result['stocks_with_signals'],
+                    'total_signals': result['total_signals'],
+                    'filter_mode': config.FILTER_MODE,
+                    'mode': 'backtest' if enable_future_validation else 'realtime',
+                    'elapsed_seconds': round((datetime.now() - start).total_seconds(), 2),
+                },
+                'signals': signal_table.to_dict('records'),
+                'refreshed_at': self.refreshed_at.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._scan_cache[key] = {'generation': self.generation, 'response': response}
+
+        logger.info(f"扫描完成: {response['summary']['total_signals']} 个信号, "
+                    f"耗时 {response['summary']['elapsed_seconds']}秒")
+        return response
+
+    def features(self, items: List[List[str]], filter_mode: str = None,
+                 overrides: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        批量提取 (股票代码, 日期YYYYMMDD) 的技术指标特征
+
+        filter_mode / overrides 与 /scan 相同：条件阈值、评级、是否产生信号按本次请求的配置计算，
+        指标参数被覆盖时基于原始数据重新计算指标。
+
+        Returns:
+            Dict: {'features': 与输入顺序一致的特征列表，无法计算的项为None}
+        """
+        if not isinstance(items, list) or not all(isinstance(i, list) and len(i) == 2 for i in items):
+            raise RequestError("items 格式应为 [[股票代码, 日期YYYYMMDD], ...]")
+        config = self._make_config(filter_mode, overrides)
+
+        def load_frame(stock_code: str) -> Optional[pd.DataFrame]:
+            entry = self.cache.get(str(stock_code))
+            if entry is None:
+                logger.warning(f"未找到股票数据: {stock_code}")
+                return None
+            return self.cache.get_frame(entry, config)
+
+        # 按股票分组批量提取，每只股票的全部日期一次性定位
+        pairs = pd.DataFrame(items, columns=['stock_code', 'target_date']).astype(str)
+        with self.lock:
+            feature_matrix = extract_features_batch(pairs, load_frame, config=config)
+
+        return {'features': [feature_row_to_dict(row) for _, row in feature_matrix.iterrows()]}
+
+    def recommendations(self) -> Dict[str, Any]:
+        """按已加载的调优配置筛选推荐股票（实盘模式）"""
+        with self.lock:
+            response = self.scan(enable_future_validation=False)
+
+            df = pd.DataFrame(response['signals'])
+            if df.empty:
+                return {'summary': response['summary'], 'recommendations': []}
+
+            _, top_stocks = select_recommendations(df)
+            return {
+                'summary': response['summary'],
+                'recommendations': build_recommendations(top_stocks, EnhancedDetailsLookup(self.cache)),
+                'refreshed_at': response['refreshed_at'],
+            }
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """HTTP请求处理"""
+
+    service: AnalysisService = None
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            raise RequestError("请求体不是合法的JSON")
+
+    def _dispatch(self, routes: Dict[str, Any]):
+        handler = routes.get(self.path.split('?')[0])
+        if handler is None:
+            self._send_json(404, {'error': f"未知接口: {self.path}"})
+            return
+        try:
+            self._send_json(200, handler())
+        except RequestError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"{self.path}: 处理失败 - {str(e)}", exc_info=True)
+            self._send_json(500, {'error': str(e)})
+
+    def do_GET(self):
+        self._dispatch({
+            '/health': self.service.health,
+            '/recommendations': self.service.recommendations,
+        })
+
+    def do_POST(self):
+        def scan():
+            payload = self._read_json()
+            return self.service.scan(
+                enable_future_validation=bool(payload.get('enable_future_validation', False)),
+                filter_mode=payload.get('filter_mode'),
+                overrides=payload.get('overrides')
+            )
+
+        def features():
+            payload = self._read_json()
+            return self.service.features(
+                payload.get('items', []),
+                filter_mode=payload.get('filter_mode'),
+                overrides=payload.get('overrides')
+            )
+
+        self._dispatch({
+            '/scan': scan,
+            '/features': features,
+            '/refresh': self.service.refresh,
+        })
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def _refresh_loop(service: AnalysisService, interval: float, stop_event: threading.Event):
+    """定期检查行情文件更新"""
+    while not stop_event.wait(interval):
+        try:
+            service.refresh()
+        except Exception as e:
+            logger.error(f"定期刷新失败: {str(e)}")
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常驻分析服务')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='监听地址（默认只监听本机）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--limit', type=int, help='只加载前N只股票（测试用）')
+    parser.add_argument('--refresh-interval', type=float, default=300,
+                        help='检查行情文件更新的间隔（秒），0表示不自动刷新')
+    parser.add_argument('--no-quarantine', action='store_true', help='不跳过数据质量隔离名单中的股票')
+    args = parser.parse_args()
+
+    # 配置日志（覆盖被导入模块的日志配置；只在作为服务启动时配置，导入本模块不改变日志输出）
+    log_dir = os.path.join(os.path.dirname(__file__), 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, 'analysis_daemon.log')),
+            logging.StreamHandler()
+        ],
+        force=True
+    )
+
+    logger.info("=" * 60)
+    logger.info("常驻分析服务启动")
+    logger.info("=" * 60)
+
+    service = AnalysisService(args.data_dir, args.limit, skip_quarantined=not args.no_quarantine)
+    AnalysisRequestHandler.service = service
+
+    server = ThreadingHTTPServer((args.host, args.port), AnalysisRequestHandler)
+    server.daemon_threads = True
+
+    stop_event = threading.Event()
+    if args.refresh_interval > 0:
+        threading.Thread(target=_refresh_loop, args=(service, args.refresh_interval, stop_event),
+                         name='refresh', daemon=True).start()
+
+    logger.info(f"服务已就绪: http://{args.host}:{args.port} ({len(service.cache)} 只股票)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("收到中断信号，服务退出")
+    finally:
+        stop_event.set()
+        server.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,394 @@
+"""
+端到端基准测试
+
+用合成行情（stock_macd_volumn/synthetic_market.py，固定种子）在多个规模下逐阶段计时：
+
+    load → quality → pre_filter → indicators → detection → save_results → recommendation
+
+    - load / quality / pre_filter / indicators / detection：逐只股票计时，输出总耗时和单只股票 p50/p99
+    - save_results：构建信号明细表并写出 trend_signals / analysis_report（写入临时目录）
+    - recommendation：带类型信号表 → select_recommendations → build_recommendations（含补充特征明细点查）
+
+结果写成JSON（含提交号、Python/pandas/numpy版本和各规模的阶段耗时、漏斗计数），
+用 --compare 与另一次的结果逐阶段对比，超过阈值的退化以非零退出码返回，便于在提交之间比较。
+
+推荐阶段使用 RecommendationConfig 的默认阈值，不加载 tuning_config.json，保证不同提交之间口径一致。
+
+使用方法:
+    python benchmark.py
+    python benchmark.py --scales 200x250,1000x500 --repeat 3
+    python benchmark.py --output bench_new.json --compare bench_old.json
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+from daily_recommendation import select_recommendations, build_recommendations, EnhancedDetailsLookup
+from config import Config
+from stock_trend_analyzer import (
+    extract_stock_info, pre_filter, build_signal_table, to_typed_signal_table, save_results
+)
+from technical_indicators import calculate_all_indicators, check_data_quality
+from signal_detector import detect_uptrend_signals
+from synthetic_market import generate_market, open_market_store, MARKET_STORES
+
+
+logger = logging.getLogger(__name__)
+
+# 结果文件格式版本（字段含义变化时递增，--compare 只比较相同版本）
+BENCHMARK_VERSION = 1
+
+# 阶段顺序
+PER_STOCK_STAGES = ['load', 'quality', 'pre_filter', 'indicators', 'detection']
+STAGES = PER_STOCK_STAGES + ['save_results', 'recommendation']
+
+
+def parse_scales(text: str) -> List[Tuple[int, int]]:
+    """解析规模参数，如 "200x250,1000x500" → [(200, 250), (1000, 500)]"""
+    scales = []
+    for item in text.split(','):
+        stocks, days = item.lower().strip().split('x')
+        scales.append((int(stocks), int(days)))
+    return scales
+
+
+def _stage_stats(durations: List[float]) -> Dict[str, Any]:
+    """单个阶段的统计：总耗时（秒）、调用次数、单次 p50/p99（毫秒）"""
+    if not durations:
+        return {'total_s': 0.0, 'calls': 0, 'p50_ms': None, 'p99_ms': None}
+    values = np.asarray(durations)
+    return {
+        'total_s': round(float(values.sum()), 4),
+        'calls': len(values),
+        'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(values, 99)) * 1000, 3),
+    }
+
+
+def run_scale_once(market_store, output_dir: str, as_of: datetime, config: Config = None) -> Dict[str, Any]:
+    """
+    对一个已生成的行情存储跑一遍全部阶段
+
+    Args:
+        market_store: 行情存储（synthetic_market.MarketStore）
+        output_dir: save_results 的输出目录
+        as_of: 推荐日期（合成行情的最后一个交易日）
+        config: 配置对象，默认使用Config
+
+    Returns:
+        Dict: {'stages': 各阶段统计, 'funnel': 漏斗计数, 'pre_filter_rejects': 预筛选未通过原因计数}
+    """
+    config = config or Config
+    timer = time.perf_counter
+    durations = {stage: [] for stage in STAGES}
+    reject_reasons = Counter()
+    funnel = Counter()
+
+    all_signals = []
+    stock_results = []
+    for path in market_store.paths():
+        funnel['stocks'] += 1
+        stock_code, stock_name = extract_stock_info(path)
+
+        start = timer()
+        df = market_store.read(path)
+        durations['load'].append(timer() - start)
+
+        start = timer()
+        is_valid, _ = check_data_quality(df)
+        durations['quality'].append(timer() - start)
+        if not is_valid:
+            funnel['quality_rejected'] += 1
+            continue
+
+        start = timer()
+        passed, reason = pre_filter(df, config)
+        durations['pre_filter'].append(timer() - start)
+        if not passed:
+            # 价格原因带具体价格（"价格(1.50)超出范围"），按括号前归类
+            reject_reasons[reason.split('(')[0]] += 1
+            funnel['pre_filter_rejected'] += 1
+            continue
+
+        start = timer()
+        df = calculate_all_indicators(df, config)
+        durations['indicators'].append(timer() - start)
+
+        start = timer()
+        signals = detect_uptrend_signals(df, config, True)
+        durations['detection'].append(timer() - start)
+
+        if signals:
+            funnel['stocks_with_signals'] += 1
+            stock_results.append({'stock_code': stock_code, 'stock_name': stock_name,
+                                  'signal_count': len(signals)})
+            all_signals.extend({'stock_code': stock_code, 'stock_name': stock_name, **signal}
+                               for signal in signals)
+    funnel['signals'] = len(all_signals)
+
+    signal_table = None
+    if all_signals:
+        start = timer()
+        signal_table = build_signal_table(all_signals, True)
+        save_results(all_signals, stock_results, output_dir, config, True, signal_table)
+        durations['save_results'].append(timer() - start)
+
+        start = timer()
+        _, top_stocks = select_recommendations(to_typed_signal_table(signal_table), as_of=as_of)
+        recommendations = build_recommendations(
+            top_stocks, EnhancedDetailsLookup(data_dir=market_store.root, config=config))
+        durations['recommendation'].append(timer() - start)
+        funnel['recommended'] = len(recommendations)
+
+    return {
+        'stages': {stage: _stage_stats(values) for stage, values in durations.items()},
+        'funnel': dict(funnel),
+        'pre_filter_rejects': dict(reject_reasons),
+    }
+
+
+def run_benchmark(
+    scales: List[Tuple[int, int]] = None,
+    repeat: int = 1,
+    seed: int = None,
+    store: str = 'csv',
+    work_dir: str = None,
+    config: Config = None
+) -> Dict[str, Any]:
+    """
+    运行多规模基准测试
+
+    每个规模只生成一次行情，重复运行 repeat 次，各阶段取总耗时最短的一次
+    （排除偶发的系统干扰；各次总耗时另行保留）。
+
+    Args:
+        scales: 规模列表 [(股票数, 交易日数)]，默认使用Config.BENCHMARK_SCALES
+        repeat: 每个规模的重复次数
+        seed: 合成行情随机种子，默认使用Config.SYNTHETIC_SEED
+        store: 行情存储格式（synthetic_market.MARKET_STORES 的键）
+        work_dir: 合成数据和输出的工作目录，None表示使用临时目录并在结束后删除
+        config: 配置对象，默认使用Config
+
+    Returns:
+        Dict: 基准测试结果
+    """
+    config = config or Config
+    scales = scales or config.BENCHMARK_SCALES
+    seed = config.SYNTHETIC_SEED if seed is None else seed
+    as_of = pd.Timestamp(config.SYNTHETIC_END_DATE).to_pydatetime()
+    timer = time.perf_counter
+
+    cleanup = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='stock_benchmark_')
+    results = []
+    try:
+        for n_stocks, n_days in scales:
+            scale_dir = os.path.join(work_dir, f"{n_stocks}x{n_days}")
+            data_dir = os.path.join(scale_dir, 'data')
+            output_dir = os.path.join(scale_dir, 'output')
+            os.makedirs(output_dir, exist_ok=True)
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+            logger.info(f"生成合成行情: {n_stocks} 只 × {n_days} 天 (种子={seed}, 格式={store})")
+            start = timer()
+            generated = generate_market(data_dir, n_stocks, n_days, seed, store=store, config=config)
+            generate_seconds = timer() - start
+            market_store = open_market_store(data_dir, store, config)
+
+            runs = []
+            for round_index in range(repeat):
+                start = timer()
+                run = run_scale_once(market_store, output_dir, as_of, config)
+                run['total_s'] = round(timer() - start, 4)
+                runs.append(run)
+                logger.info(f"  第{round_index + 1}/{repeat}轮: {run['total_s']:.2f}秒")
+
+            stages = {stage: min((run['stages'][stage] for run in runs), key=lambda s: s['total_s'])
+                      for stage in STAGES}
+            results.append({
+                'n_stocks': n_stocks,
+                'n_days': n_days,
+                'rows': generated['rows'],
+                'generate_s': round(generate_seconds, 4),
+                'total_s': round(sum(s['total_s'] for s in stages.values()), 4),
+                'run_totals_s': [run['total_s'] for run in runs],
+                'stages': stages,
+                'funnel': runs[0]['funnel'],
+                'pre_filter_rejects': runs[0]['pre_filter_rejects'],
+            })
+    finally:
+        if cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'benchmark_version': BENCHMARK_VERSION,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'git_commit': _git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'params': {
+            'seed': seed,
+            'store': store,
+            'repeat': repeat,
+            'end_date': config.SYNTHETIC_END_DATE,
+            'filter_mode': config.FILTER_MODE,
+        },
+        'scales': results,
+    }
+
+
+def _git_commit() -> str:
+    """当前提交号，不在git仓库中时返回None"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 1.2) -> List[Dict[str, Any]]:
+    """
+    逐规模、逐阶段对比两次基准测试结果
+
+    只比较两边都有的规模（按 股票数×交易日数 匹配），合成数据由种子决定，两边的输入相同。
+
+    Args:
+        baseline: 基准结果（旧提交）
+        current: 当前结果
+        threshold: 耗时比值超过该值视为退化
+
+    Returns:
+        List[Dict]: 对比行（scale, stage, baseline_s, current_s, ratio, regression）
+    """
+    if baseline.get('benchmark_version') != current.get('benchmark_version'):
+        raise ValueError(f"结果格式版本不同: {baseline.get('benchmark_version')} vs "
+                         f"{current.get('benchmark_version')}")
+    if baseline.get('params', {}).get('seed') != current.get('params', {}).get('seed'):
+        logger.warning("两次结果的随机种子不同，输入数据不一致，对比仅供参考")
+
+    baseline_scales = {(s['n_stocks'], s['n_days']): s for s in baseline['scales']}
+    rows = []
+    for scale in current['scales']:
+        key = (scale['n_stocks'], scale['n_days'])
+        if key not in baseline_scales:
+            continue
+        old = baseline_scales[key]
+        for stage in STAGES + ['total']:
+            old_s = old['total_s'] if stage == 'total' else old['stages'][stage]['total_s']
+            new_s = scale['total_s'] if stage == 'total' else scale['stages'][stage]['total_s']
+            ratio = new_s / old_s if old_s > 0 else None
+            rows.append({
+                'scale': f"{key[0]}x{key[1]}",
+                'stage': stage,
+                'baseline_s': old_s,
+                'current_s': new_s,
+                'ratio': round(ratio, 3) if ratio is not None else None,
+                'regression': ratio is not None and ratio > threshold,
+            })
+    return rows
+
+
+def log_results(result: Dict[str, Any]):
+    """输出各规模的阶段耗时表"""
+    for scale in result['scales']:
+        logger.info("=" * 72)
+        logger.info(f"规模 {scale['n_stocks']} 只 × {scale['n_days']} 天 ({scale['rows']} 行), "
+                    f"合计 {scale['total_s']:.2f}秒")
+        logger.info(f"  {'阶段':<14}{'总耗时(秒)':>12}{'次数':>8}{'p50(ms)':>10}{'p99(ms)':>10}")
+        for stage in STAGES:
+            stats = scale['stages'][stage]
+            p50 = f"{stats['p50_ms']:.2f}" if stats['p50_ms'] is not None else '-'
+            p99 = f"{stats['p99_ms']:.2f}" if stats['p99_ms'] is not None else '-'
+            logger.info(f"  {stage:<14}{stats['total_s']:>12.3f}{stats['calls']:>8}{p50:>10}{p99:>10}")
+        logger.info(f"  漏斗: {scale['funnel']}")
+        logger.info(f"  预筛选未通过: {scale['pre_filter_rejects']}")
+    logger.info("=" * 72)
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    parser = argparse.ArgumentParser(description='端到端基准测试（合成行情，逐阶段计时）')
+    parser.add_argument('--scales', help='规模列表，如 200x250,1000x500（股票数x交易日数），'
+                                         '默认使用Config.BENCHMARK_SCALES')
+    parser.add_argument('--repeat', type=int, default=1, help='每个规模的重复次数（各阶段取最短）')
+    parser.add_argument('--seed', type=int, help='合成行情随机种子，默认使用Config.SYNTHETIC_SEED')
+    parser.add_argument('--store', choices=sorted(MARKET_STORES), default='csv', help='行情存储格式')
+    parser.add_argument('--work-dir', help='合成数据工作目录（保留数据），默认使用临时目录')
+    parser.add_argument('--output', help='结果JSON路径，默认 benchmarks/benchmark_<提交号>_<时间>.json')
+    parser.add_argument('--compare', help='对比的基准结果JSON')
+    parser.add_argument('--threshold', type=float, default=1.2, help='退化阈值（当前/基准耗时比）')
+    args = parser.parse_args()
+
+    # 阶段明细由本工具输出，关闭推荐模块的逐次筛选日志
+    logging.getLogger('daily_recommendation').setLevel(logging.WARNING)
+
+    result = run_benchmark(
+        scales=parse_scales(args.scales) if args.scales else None,
+        repeat=max(1, args.repeat),
+        seed=args.seed,
+        store=args.store,
+        work_dir=args.work_dir
+    )
+    log_results(result)
+
+    output_path = args.output
+    if output_path is None:
+        output_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'benchmarks',
+            f"benchmark_{result['git_commit'] or 'nogit'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    logger.info(f"结果已保存: {output_path}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows = compare_results(baseline, result, args.threshold)
+    logger.info(f"对比基准: {args.compare} (提交 {baseline.get('git_commit')})")
+    logger.info(f"  {'规模':<12}{'阶段':<14}{'基准(秒)':>10}{'当前(秒)':>10}{'比值':>8}")
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else '-'
+        flag = '  ← 退化' if row['regression'] else ''
+        logger.info(f"  {row['scale']:<12}{row['stage']:<14}{row['baseline_s']:>10.3f}"
+                    f"{row['current_s']:>10.3f}{ratio:>8}{flag}")
+
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        logger.warning(f"{len(regressions)} 项耗时超过基准的 {args.threshold} 倍")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
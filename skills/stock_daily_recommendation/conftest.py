@@ -0,0 +1,7 @@
+"""pytest 配置：测试直接导入本目录和 stock_macd_volumn 中的模块（与各脚本的 sys.path 设置一致）"""
+
+import os
+import sys
+
+# 不带 '..' 的路径：config.py 按 __file__ 逐级取上层目录定位数据目录
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stock_macd_volumn'))
@@ -0,0 +1,218 @@
+"""
+每日单进程流水线：数据更新 → 信号分析 → 生成推荐
+
+原来的每日流程分为数据更新、趋势分析、推荐生成三个独立步骤，每一步都重新读取
+全部CSV，推荐生成还要再读一遍刚写出的 trend_signals_*.csv。本流水线在一个进程内
+完成全部步骤，数据只读取一次：
+
+1. 加载行情：读取全部CSV并计算技术指标（MarketCache）
+2. 数据更新：从Baostock获取当日K线并追加到CSV，新K线同步到内存并增量计算指标
+3. 信号分析：在内存数据上检测信号（实盘模式）
+4. 保存分析结果：trend_signals_*.csv / analysis_report_*.json
+5. 生成推荐：扫描过程中流式筛选（每只股票只保留最近的合格信号，堆取前N只）并写出报告
+
+文件只作为最终产物写出，每个阶段的耗时记录在日志中。
+
+使用方法：
+    python daily_pipeline.py                    # 完整流程
+    python daily_pipeline.py --date 2026-02-09  # 指定更新日期
+    python daily_pipeline.py --skip-update      # 跳过数据更新（数据已是最新）
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict
+
+# 添加stock_macd_volumn到路径
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+macd_dir = os.path.join(parent_dir, 'stock_macd_volumn')
+sys.path.insert(0, macd_dir)
+
+from config import Config
+from market_cache import MarketCache
+from stock_trend_analyzer import analyze_market_cache, build_signal_table, save_results
+from daily_recommendation import (
+    RecommendationConfig, StreamingRecommendationSelector, EnhancedDetailsLookup,
+    build_recommendations, write_reports
+)
+
+
+# 配置日志（覆盖被导入模块的日志配置）
+log_dir = os.path.join(os.path.dirname(__file__), 'logs')
+os.makedirs(log_dir, exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(os.path.join(log_dir, 'daily_pipeline.log')),
+        logging.StreamHandler()
+    ],
+    force=True
+)
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """记录流水线各阶段耗时"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时一个阶段，结束时输出耗时"""
+        logger.info(f"▶ {name}")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = elapsed
+            logger.info(f"✓ {name} 完成，耗时 {elapsed:.2f}秒")
+
+    def log_summary(self):
+        """输出各阶段耗时汇总"""
+        total = sum(self.timings.values())
+        logger.info("=" * 60)
+        logger.info("各阶段耗时:")
+        for name, elapsed in self.timings.items():
+            share = elapsed / total * 100 if total > 0 else 0
+            logger.info(f"  {name:<10} {elapsed:>8.2f}秒  ({share:.1f}%)")
+        logger.info(f"  {'合计':<10} {total:>8.2f}秒")
+        logger.info("=" * 60)
+
+
+def run_daily_pipeline(
+    data_dir: str = None,
+    target_date: str = None,
+    skip_update: bool = False,
+    limit: int = None,
+    skip_quarantined: bool = True
+) -> bool:
+    """
+    运行每日单进程流水线
+
+    Args:
+        data_dir: 数据目录，默认使用Config.DATA_DIR
+        target_date: 数据更新日期（YYYY-MM-DD），默认使用最近交易日
+        skip_update: 跳过数据更新
+        limit: 只处理前N只股票（测试用）
+        skip_quarantined: 是否跳过数据质量隔离名单中的股票
+
+    Returns:
+        bool: 是否成功生成推荐
+    """
+    data_dir = data_dir or Config.DATA_DIR
+    timer = StageTimer()
+
+    logger.info("=" * 60)
+    logger.info("每日单进程流水线：数据更新 → 信号分析 → 生成推荐")
+    logger.info("=" * 60)
+    logger.info(f"运行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # 1. 加载行情
+    cache = MarketCache(data_dir, Config, skip_quarantined=skip_quarantined)
+    with timer.stage("加载行情"):
+        loaded = cache.load(limit)
+    if loaded == 0:
+        logger.error(f"未加载到任何股票数据: {data_dir}")
+        return False
+
+    # 2. 数据更新（新K线追加到CSV的同时同步到内存缓存）
+    if not skip_update:
+        # 数据更新依赖baostock，只在需要时导入
+        from daily_data_updater import update_all_stocks
+
+        with timer.stage("数据更新"):
+            update_result = update_all_stocks(
+                data_dir=data_dir,
+                target_date=target_date,
+                last_dates=cache.last_dates(),
+                on_append=cache.append_rows
+            )
+        if not update_result['success']:
+            logger.error(f"数据更新失败: {update_result.get('error', '未知错误')}")
+            return False
+
+    # 3. 信号分析（实盘模式）
+    # 推荐配置在扫描前加载，扫描过程中流式筛选推荐
+    RecommendationConfig.load_tuning_config()
+    selector = StreamingRecommendationSelector()
+    with timer.stage("信号分析"):
+        analysis_result = analyze_market_cache(cache, Config, enable_future_validation=False,
+                                               on_stock_result=selector.offer_stock)
+    logger.info(f"发现 {analysis_result['total_signals']} 个信号 "
+                f"({analysis_result['stocks_with_signals']}/{analysis_result['total_stocks']} 只股票)")
+
+    if analysis_result['total_signals'] == 0:
+        logger.warning("未发现任何信号，无法生成推荐")
+        timer.log_summary()
+        return False
+
+    # 4. 保存分析结果
+    with timer.stage("保存分析结果"):
+        os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
+        signal_table = build_signal_table(analysis_result['all_signals'], enable_future_validation=False)
+        csv_path, json_path = save_results(
+            analysis_result['all_signals'], analysis_result['stock_results'],
+            Config.OUTPUT_DIR, Config, False, signal_table
+        )
+    logger.info(f"  CSV: {csv_path}")
+    logger.info(f"  JSON: {json_path}")
+
+    # 5. 生成推荐（扫描时已流式筛选，这里只取前N只）
+    with timer.stage("生成推荐"):
+        os.makedirs(RecommendationConfig.OUTPUT_DIR, exist_ok=True)
+
+        recommendations = build_recommendations(selector.top_stocks(), EnhancedDetailsLookup(cache))
+
+        summary = {
+            'total_stocks': analysis_result['total_stocks'],
+            'total_signals': analysis_result['total_signals'],
+            'stocks_with_signals': analysis_result['stocks_with_signals'],
+            'filter_mode': Config.FILTER_MODE,
+            'rating_distribution': selector.rating_distribution()
+        }
+        write_reports(recommendations, summary)
+
+    timer.log_summary()
+    logger.info("✅ 每日流水线完成!")
+    return True
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='每日单进程流水线：数据更新 → 信号分析 → 生成推荐')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--date', help='数据更新日期（YYYY-MM-DD），默认为最近交易日')
+    parser.add_argument('--skip-update', action='store_true', help='跳过数据更新')
+    parser.add_argument('--limit', type=int, help='只处理前N只股票（测试用）')
+    parser.add_argument('--no-quarantine', action='store_true', help='不跳过数据质量隔离名单中的股票')
+    args = parser.parse_args()
+
+    try:
+        success = run_daily_pipeline(
+            data_dir=args.data_dir,
+            target_date=args.date,
+            skip_update=args.skip_update,
+            limit=args.limit,
+            skip_quarantined=not args.no_quarantine
+        )
+        return 0 if success else 1
+    except Exception as e:
+        logger.error(f"流水线执行失败: {str(e)}", exc_info=True)
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())
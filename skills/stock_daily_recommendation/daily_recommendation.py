@@ -9,6 +9,8 @@
 
 使用方法：
     python daily_recommendation.py
+    python daily_recommendation.py --as-of 2025-06-03                        # 回放历史某日的推荐
+    python daily_recommendation.py --as-of 2025-06-01 --end-date 2025-06-30  # 批量回放日期区间
 
 定时任务配置（每天22:00执行）：
     0 22 * * * cd /Users/ellen_li/2026projects/my-skills/skills/stock_daily_recommendation && source ../../venv/bin/activate && python daily_recommendation.py >> logs/recommendation.log 2>&1
@@ -19,11 +21,14 @@ Date: 2026-02-09
 
 import os
 import sys
+import glob
 import json
+import heapq
 import logging
 import pandas as pd
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 # 添加stock_macd_volumn到路径
 parent_dir = os.path.dirname(os.path.dirname(__file__))
@@ -31,7 +36,13 @@ macd_dir = os.path.join(parent_dir, 'stock_macd_volumn')
 sys.path.insert(0, macd_dir)
 
 from config import Config
-from stock_trend_analyzer import analyze_all_stocks
+from stock_trend_analyzer import analyze_all_stocks, load_stock_file
+from technical_indicators import calculate_all_indicators
+from signal_detector import calculate_enhanced_score
+from analysis_client import AnalysisClient, AnalysisClientError
+from market_cache import MarketCache
+from point_in_time import PointInTimeScanner
+from recommendation_history import RecommendationHistory
 
 
 # 配置日志
@@ -54,6 +65,9 @@ class RecommendationConfig:
 
     # 输出目录
     OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'recommendations')
+    REPLAY_DIR = os.path.join(OUTPUT_DIR, 'replay')  # 历史回放结果（与实盘报告分开存放）
+    HISTORY_DB_PATH = os.path.join(OUTPUT_DIR, 'recommendation_history.db')  # 推荐历史库
+    TUNING_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'tuning_config.json')  # 反馈调优配置
 
     # 推荐数量
     TOP_N_STOCKS = 20  # 推荐前20只股票
@@ -67,13 +81,16 @@ class RecommendationConfig:
     # 补充特征分数要求
     MIN_ENHANCED_SCORE = 20  # A级≥30, B级≥20
 
+    # MA60距离阈值（过滤已经涨幅过大的股票），可由调优配置覆盖
+    MA_DISTANCE_THRESHOLD = Config.MA_DISTANCE_THRESHOLD
+
     # 报告格式
     REPORT_FORMAT = 'both'  # 'text', 'html', 'both'
 
     @classmethod
     def load_tuning_config(cls):
         """从tuning_config.json加载调优参数"""
-        config_path = os.path.join(os.path.dirname(__file__), 'tuning_config.json')
+        config_path = cls.TUNING_CONFIG_PATH
         if os.path.exists(config_path):
             try:
                 with open(config_path, 'r', encoding='utf-8') as f:
@@ -104,6 +121,11 @@ class RecommendationConfig:
                     cls.TOP_N_STOCKS = tuning['TOP_N_STOCKS']
                     logger.info(f"✅ 推荐股票数量: {old_value} → {cls.TOP_N_STOCKS}")
 
+                if 'MA_DISTANCE_THRESHOLD' in tuning:
+                    old_value = cls.MA_DISTANCE_THRESHOLD
+                    cls.MA_DISTANCE_THRESHOLD = tuning['MA_DISTANCE_THRESHOLD']
+                    logger.info(f"✅ MA60距离阈值: {old_value} → {cls.MA_DISTANCE_THRESHOLD}")
+
                 # 显示调优依据
                 if 'tuning_date' in tuning:
                     logger.info(f"📅 调优日期: {tuning['tuning_date']}")
@@ -204,13 +226,14 @@ def generate_buy_reason(signal: Dict[str, Any]) -> str:
     return "\n   ".join(reasons)
 
 
-def format_text_report(recommendations: List[Dict], summary: Dict) -> str:
+def format_text_report(recommendations: List[Dict], summary: Dict, report_date: datetime = None) -> str:
     """
     生成文本格式报告
 
     Args:
         recommendations: 推荐列表
         summary: 汇总信息
+        report_date: 报告日期（历史回放时为回放日期），默认今天
 
     Returns:
         str: 文本报告
@@ -218,7 +241,7 @@ def format_text_report(recommendations: List[Dict], summary: Dict) -> str:
     report_lines = []
 
     # 标题
-    today = datetime.now().strftime('%Y年%m月%d日')
+    today = (report_date or datetime.now()).strftime('%Y年%m月%d日')
     report_lines.append("=" * 80)
     report_lines.append(f"📊 {today} 股票买入推荐报告")
     report_lines.append("=" * 80)
@@ -280,18 +303,19 @@ def format_text_report(recommendations: List[Dict], summary: Dict) -> str:
     return "\n".join(report_lines)
 
 
-def format_html_report(recommendations: List[Dict], summary: Dict) -> str:
+def format_html_report(recommendations: List[Dict], summary: Dict, report_date: datetime = None) -> str:
     """
     生成HTML格式报告
 
     Args:
         recommendations: 推荐列表
         summary: 汇总信息
+        report_date: 报告日期（历史回放时为回放日期），默认今天
 
     Returns:
         str: HTML报告
     """
-    today = datetime.now().strftime('%Y年%m月%d日')
+    today = (report_date or datetime.now()).strftime('%Y年%m月%d日')
 
     html = f"""
 <!DOCTYPE html>
@@ -545,64 +569,22 @@ def format_html_report(recommendations: List[Dict], summary: Dict) -> str:
     return html
 
 
-def generate_recommendations():
-    """
-    生成每日推荐
-    """
-    logger.info("=" * 60)
-    logger.info("每日股票推荐工具")
-    logger.info("=" * 60)
-    logger.info(f"运行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+def composite_score(macd_score, volume_ratio, enhanced_score):
+    """综合得分 = MACD评分*0.3 + 成交量比率*10 + 补充特征分*0.4（标量或Series）"""
+    return macd_score * 0.3 + volume_ratio * 10 + enhanced_score * 0.4
 
-    # 加载调优配置
-    RecommendationConfig.load_tuning_config()
-
-    # 确保输出目录存在
-    os.makedirs(RecommendationConfig.OUTPUT_DIR, exist_ok=True)
-
-    # 1. 运行分析（实盘模式，不验证未来涨幅）
-    logger.info("正在运行股票趋势分析...")
-    analysis_result = analyze_all_stocks(
-        data_dir=Config.DATA_DIR,
-        output_dir=Config.OUTPUT_DIR,
-        config=Config,
-        enable_future_validation=False  # 实盘模式
-    )
-
-    if not analysis_result or analysis_result['total_signals'] == 0:
-        logger.warning("未发现任何信号，无法生成推荐")
-        return False
 
-    logger.info(f"分析完成: 发现 {analysis_result['total_signals']} 个信号")
-
-    # 2. 读取分析结果
-    from datetime import datetime as dt
-    today_str = dt.now().strftime('%Y%m%d')
-
-    # 查找最新的CSV文件
-    import glob
-    csv_pattern = os.path.join(Config.OUTPUT_DIR, f"trend_signals_{today_str}.csv")
-    csv_files = glob.glob(csv_pattern)
-
-    if not csv_files:
-        # 如果今天的不存在，找最新的
-        csv_pattern = os.path.join(Config.OUTPUT_DIR, "trend_signals_*.csv")
-        csv_files = sorted(glob.glob(csv_pattern), reverse=True)
-
-    if not csv_files:
-        logger.error("未找到分析结果CSV文件")
-        return False
-
-    latest_csv = csv_files[0]
-    logger.info(f"读取分析结果: {latest_csv}")
-
-    df = pd.read_csv(latest_csv)
+def select_recommendations(df: pd.DataFrame, as_of: datetime = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    筛选和排序推荐股票
 
-    if df.empty:
-        logger.warning("分析结果为空")
-        return False
+    Args:
+        df: 信号明细表（trend_signals_*.csv 的列格式）
+        as_of: 推荐日期（历史回放），信号回溯窗口以该日期为准；默认今天
 
-    # 3. 筛选和排序
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: (筛选后的全部信号, 前N只推荐股票)
+    """
     logger.info("筛选推荐股票...")
 
     # 评级过滤
@@ -614,29 +596,20 @@ def generate_recommendations():
     # 补充特征分数过滤
     df = df[df['补充特征分'] >= RecommendationConfig.MIN_ENHANCED_SCORE]
 
-    # MA60距离过滤 - 过滤掉价格已经涨幅过大的股票
-    # 从配置或调优配置中获取阈值
-    ma_threshold = Config.MA_DISTANCE_THRESHOLD  # 默认0.5%
-    tuning_config_path = os.path.join(os.path.dirname(__file__), 'tuning_config.json')
-    if os.path.exists(tuning_config_path):
-        try:
-            with open(tuning_config_path, 'r', encoding='utf-8') as f:
-                tuning = json.load(f)
-                if 'MA_DISTANCE_THRESHOLD' in tuning:
-                    ma_threshold = tuning['MA_DISTANCE_THRESHOLD']
-        except:
-            pass
-
+    # MA60距离过滤 - 过滤掉价格已经涨幅过大的股票（阈值由 load_tuning_config 加载）
+    ma_threshold = RecommendationConfig.MA_DISTANCE_THRESHOLD
     df = df[df['MA60距离%'] <= ma_threshold]
     logger.info(f"MA60距离过滤（阈值≤{ma_threshold}%）: 剩余 {len(df)} 只股票")
 
-    # 转换日期格式
-    df['信号日期'] = pd.to_datetime(df['信号日期'])
+    # 转换日期格式（内存信号表已是datetime64，只有CSV/JSON来源的表需要解析）
+    if not pd.api.types.is_datetime64_any_dtype(df['信号日期']):
+        df = df.assign(信号日期=pd.to_datetime(df['信号日期']))
 
     # 只保留信号日期是最近N天的股票
-    today = pd.Timestamp.now().normalize()
+    today = pd.Timestamp(as_of or datetime.now()).normalize()
     lookback_date = today - pd.Timedelta(days=RecommendationConfig.SIGNAL_LOOKBACK_DAYS)
-    df = df[df['信号日期'].dt.normalize() >= lookback_date]
+    signal_days = df['信号日期'].dt.normalize()
+    df = df[(signal_days >= lookback_date) & (signal_days <= today)]
 
     logger.info(f"最近{RecommendationConfig.SIGNAL_LOOKBACK_DAYS}天信号数: {len(df)}")
 
@@ -652,10 +625,7 @@ def generate_recommendations():
     df = df.drop_duplicates(subset=['股票代码'], keep='first')
 
     # 综合评分排序
-    # 评分公式：MACD评分*0.3 + 成交量比率*10 + 补充特征分*0.4
-    df['综合得分'] = (df['MACD评分'] * 0.3 +
-                     df['成交量比率'] * 10 +
-                     df['补充特征分'] * 0.4)
+    df['综合得分'] = composite_score(df['MACD评分'], df['成交量比率'], df['补充特征分'])
 
     df = df.sort_values('综合得分', ascending=False)
 
@@ -664,7 +634,165 @@ def generate_recommendations():
 
     logger.info(f"筛选出 {len(top_stocks)} 只推荐股票")
 
-    # 4. 生成推荐列表
+    return df, top_stocks
+
+
+class StreamingRecommendationSelector:
+    """
+    流式推荐筛选器
+
+    与 select_recommendations 的筛选和排序规则相同，但不需要先汇总全部信号：
+    扫描每完成一只股票就调用 offer_stock，筛选器只保留该股票最近的合格信号，
+    扫描结束时用大小为N的堆取出综合得分最高的前N只。内存占用为 O(股票数 + N)。
+    """
+
+    def __init__(self, as_of: datetime = None):
+        """
+        Args:
+            as_of: 推荐日期（历史回放），信号回溯窗口以该日期为准；默认今天
+        """
+        self.today = pd.Timestamp(as_of or datetime.now()).normalize()
+        self.lookback_date = self.today - pd.Timedelta(days=RecommendationConfig.SIGNAL_LOOKBACK_DAYS)
+        self.allowed_ratings = {
+            'A': ('A级',),
+            'B': ('A级', 'B级'),
+        }.get(RecommendationConfig.MIN_RATING)
+        self.latest: Dict[str, Dict[str, Any]] = {}  # 股票代码 → 最近的合格信号
+        self.offered = 0
+
+    def offer(self, stock_code: str, stock_name: str, signal: Dict[str, Any]):
+        """接收一个信号（detect_uptrend_signals 的信号字典）"""
+        self.offered += 1
+
+        if self.allowed_ratings and signal['rating'] not in self.allowed_ratings:
+            return
+        if signal['enhanced_score'] < RecommendationConfig.MIN_ENHANCED_SCORE:
+            return
+        # 与信号明细表一致，按保留两位小数后的值筛选和打分
+        ma60_distance = round(signal['ma60_distance'], 2)
+        if not ma60_distance <= RecommendationConfig.MA_DISTANCE_THRESHOLD:
+            return
+        signal_date = pd.Timestamp(signal['date'])
+        if not self.lookback_date <= signal_date.normalize() <= self.today:
+            return
+
+        current = self.latest.get(stock_code)
+        if current is not None and current['信号日期'] >= signal_date:
+            return
+
+        volume_ratio = round(signal['volume_ratio'], 2)
+        self.latest[stock_code] = {
+            '股票代码': stock_code,
+            '股票名称': stock_name,
+            '信号日期': signal_date,
+            '收盘价': round(signal['close'], 2),
+            'MACD评分': signal['macd_score'],
+            '成交量比率': volume_ratio,
+            'MA60距离%': ma60_distance,
+            '评级': signal['rating'],
+            '补充特征分': signal['enhanced_score'],
+            '综合得分': composite_score(signal['macd_score'], volume_ratio, signal['enhanced_score']),
+        }
+
+    def offer_stock(self, result: Dict[str, Any]):
+        """接收一只股票的分析结果（{'stock_code', 'stock_name', 'signals'}），可作为扫描回调"""
+        for signal in result['signals']:
+            self.offer(result['stock_code'], result['stock_name'], signal)
+
+    def top_stocks(self, top_n: int = None) -> pd.DataFrame:
+        """综合得分最高的前N只股票（列格式与 select_recommendations 返回的一致）"""
+        top_n = top_n or RecommendationConfig.TOP_N_STOCKS
+        best = heapq.nlargest(top_n, self.latest.values(), key=lambda row: row['综合得分'])
+        logger.info(f"流式筛选: 接收 {self.offered} 个信号, {len(self.latest)} 只股票合格, "
+                    f"推荐 {len(best)} 只")
+        return pd.DataFrame(best)
+
+    def rating_distribution(self) -> Dict[str, int]:
+        """合格股票（每只取最近信号）的评级分布"""
+        return dict(Counter(row['评级'] for row in self.latest.values()).most_common())
+
+
+class EnhancedDetailsLookup:
+    """
+    补充特征明细的按需查询
+
+    全市场扫描和推荐筛选只保留补充特征分，不保留 RSI/KDJ/布林带/形态/量价 明细；
+    最终入选的前N只股票再按信号日期点查指标行，用 calculate_enhanced_score 重新计算明细。
+    技术指标只依赖当天及之前的数据，在完整数据上点查历史日期与当天扫描的结果一致。
+
+    有行情缓存（MarketCache）时直接使用缓存中的指标，否则只读取这N只股票的CSV。
+    """
+
+    def __init__(self, cache: MarketCache = None, data_dir: str = None, config=None):
+        """
+        Args:
+            cache: 已加载的行情缓存，None表示从CSV读取
+            data_dir: 数据目录（缓存中没有该股票时使用），默认使用Config.DATA_DIR
+            config: 配置对象，默认使用Config
+        """
+        self.cache = cache
+        self.data_dir = data_dir or Config.DATA_DIR
+        self.config = config or Config
+
+    def _load_frame(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """获取单只股票的指标DataFrame"""
+        if self.cache is not None:
+            with self.cache.lock:
+                entry = self.cache.get(stock_code)
+                if entry is not None:
+                    return self.cache.get_frame(entry, self.config)
+
+        files = glob.glob(os.path.join(self.data_dir, f"{stock_code}_*.csv"))
+        if not files:
+            return None
+        return calculate_all_indicators(load_stock_file(files[0]), self.config)
+
+    def get(self, stock_code: str, signal_date) -> Dict[str, Any]:
+        """
+        查询某只股票在信号日期的补充特征明细
+
+        Args:
+            stock_code: 股票代码
+            signal_date: 信号日期（字符串或Timestamp）
+
+        Returns:
+            Dict: calculate_enhanced_score 的明细字典，查不到时返回空字典
+        """
+        try:
+            frame = self._load_frame(stock_code)
+        except Exception as e:
+            logger.warning(f"{stock_code}: 读取行情失败，买入理由不含补充特征 - {e}")
+            return {}
+        if frame is None:
+            logger.warning(f"{stock_code}: 未找到行情数据，买入理由不含补充特征")
+            return {}
+
+        dates = pd.to_datetime(frame['date']).values
+        target = pd.Timestamp(signal_date).to_datetime64()
+        index = int(dates.searchsorted(target))
+        if index >= len(dates) or dates[index] != target:
+            logger.warning(f"{stock_code}: 行情中没有信号日期 {signal_date}，买入理由不含补充特征")
+            return {}
+
+        _, details = calculate_enhanced_score(frame, index, self.config)
+        return details
+
+
+def build_recommendations(top_stocks: pd.DataFrame,
+                          details_lookup: EnhancedDetailsLookup = None) -> List[Dict]:
+    """
+    生成推荐列表（含买入理由）
+
+    补充特征明细只对入选的股票按需计算（EnhancedDetailsLookup）。
+
+    Args:
+        top_stocks: select_recommendations 返回的前N只股票
+        details_lookup: 补充特征明细查询，默认从 Config.DATA_DIR 读取入选股票的CSV
+
+    Returns:
+        List[Dict]: 推荐列表
+    """
+    details_lookup = details_lookup or EnhancedDetailsLookup()
     recommendations = []
     for _, row in top_stocks.iterrows():
         signal = {
@@ -677,7 +805,7 @@ def generate_recommendations():
             'ma60_distance': row['MA60距离%'],
             'rating': row['评级'],
             'enhanced_score': row['补充特征分'],
-            'enhanced_details': {}  # 简化版本，实际应该从分析结果中获取
+            'enhanced_details': details_lookup.get(row['股票代码'], row['信号日期'])
         }
 
         # 生成买入理由
@@ -686,22 +814,30 @@ def generate_recommendations():
 
         recommendations.append(signal)
 
-    # 5. 生成报告
-    summary = {
-        'total_stocks': analysis_result['total_stocks'],
-        'total_signals': analysis_result['total_signals'],
-        'stocks_with_signals': analysis_result['stocks_with_signals'],
-        'filter_mode': Config.FILTER_MODE,
-        'rating_distribution': df['评级'].value_counts().to_dict()
-    }
+    return recommendations
+
+
+def write_reports(recommendations: List[Dict], summary: Dict, report_date: datetime = None,
+                  output_dir: str = None, record_history: bool = True):
+    """
+    保存推荐报告（文本/HTML/JSON/CSV），并追加到推荐历史库
 
-    timestamp = datetime.now().strftime('%Y%m%d')
+    Args:
+        recommendations: 推荐列表
+        summary: 汇总信息
+        report_date: 报告日期（决定文件名），默认今天
+        output_dir: 输出目录，默认 RecommendationConfig.OUTPUT_DIR
+        record_history: 是否写入推荐历史库（历史回放、从历史库重新生成报告时为False）
+    """
+    timestamp = (report_date or datetime.now()).strftime('%Y%m%d')
+    output_dir = output_dir or RecommendationConfig.OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
 
     # 文本报告
     if RecommendationConfig.REPORT_FORMAT in ['text', 'both']:
-        text_report = format_text_report(recommendations, summary)
+        text_report = format_text_report(recommendations, summary, report_date)
         text_path = os.path.join(
-            RecommendationConfig.OUTPUT_DIR,
+            output_dir,
             f'recommendation_{timestamp}.txt'
         )
         with open(text_path, 'w', encoding='utf-8') as f:
@@ -713,9 +849,9 @@ def generate_recommendations():
 
     # HTML报告
     if RecommendationConfig.REPORT_FORMAT in ['html', 'both']:
-        html_report = format_html_report(recommendations, summary)
+        html_report = format_html_report(recommendations, summary, report_date)
         html_path = os.path.join(
-            RecommendationConfig.OUTPUT_DIR,
+            output_dir,
             f'recommendation_{timestamp}.html'
         )
         with open(html_path, 'w', encoding='utf-8') as f:
@@ -724,7 +860,7 @@ def generate_recommendations():
 
     # JSON数据
     json_path = os.path.join(
-        RecommendationConfig.OUTPUT_DIR,
+        output_dir,
         f'recommendation_{timestamp}.json'
     )
     with open(json_path, 'w', encoding='utf-8') as f:
@@ -737,7 +873,7 @@ def generate_recommendations():
 
     # CSV格式数据（新增）
     csv_path = os.path.join(
-        RecommendationConfig.OUTPUT_DIR,
+        output_dir,
         f'recommendation_{timestamp}.csv'
     )
 
@@ -761,6 +897,104 @@ def generate_recommendations():
     df_csv.to_csv(csv_path, index=False, encoding='utf-8-sig')
     logger.info(f"CSV数据已保存: {csv_path}")
 
+    # 推荐历史库（写入失败不影响报告）
+    if record_history:
+        try:
+            with RecommendationHistory(RecommendationConfig.HISTORY_DB_PATH) as history:
+                history.record(timestamp, recommendations, summary)
+        except Exception as e:
+            logger.warning(f"写入推荐历史库失败: {e}")
+
+
+def _scan_via_daemon() -> Tuple[Dict, pd.DataFrame]:
+    """
+    通过常驻分析服务获取实盘信号
+
+    Returns:
+        Tuple[Dict, pd.DataFrame]: (分析汇总, 信号明细表)，服务不可用返回 (None, None)
+    """
+    client = AnalysisClient()
+    if not client.is_available():
+        logger.warning(f"分析服务不可用({client.base_url})，改为本地全量分析")
+        return None, None
+
+    try:
+        response = client.scan(enable_future_validation=False)
+    except AnalysisClientError as e:
+        logger.warning(f"分析服务请求失败: {e}，改为本地全量分析")
+        return None, None
+
+    logger.info(f"已从分析服务获取信号（数据刷新于 {response['refreshed_at']}）")
+    return response['summary'], pd.DataFrame(response['signals'])
+
+
+def generate_recommendations(use_daemon: bool = False, skip_quarantined: bool = True):
+    """
+    生成每日推荐
+
+    Args:
+        use_daemon: 优先使用常驻分析服务（analysis_daemon.py），不可用时回退到本地全量分析
+        skip_quarantined: 本地分析时是否跳过数据质量隔离名单中的股票（常驻服务按其启动参数）
+    """
+    logger.info("=" * 60)
+    logger.info("每日股票推荐工具")
+    logger.info("=" * 60)
+    logger.info(f"运行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # 加载调优配置
+    RecommendationConfig.load_tuning_config()
+
+    # 确保输出目录存在
+    os.makedirs(RecommendationConfig.OUTPUT_DIR, exist_ok=True)
+
+    analysis_result, df = _scan_via_daemon() if use_daemon else (None, None)
+
+    if analysis_result is None:
+        # 1. 运行分析（实盘模式，不验证未来涨幅），扫描过程中流式筛选推荐：
+        #    每只股票完成后只保留其最近的合格信号，结束时用堆取前N只
+        logger.info("正在运行股票趋势分析...")
+        selector = StreamingRecommendationSelector()
+        analysis_result = analyze_all_stocks(
+            data_dir=Config.DATA_DIR,
+            output_dir=Config.OUTPUT_DIR,
+            config=Config,
+            enable_future_validation=False,  # 实盘模式
+            on_stock_result=selector.offer_stock,
+            skip_quarantined=skip_quarantined
+        )
+
+        if not analysis_result or analysis_result['total_signals'] == 0:
+            logger.warning("未发现任何信号，无法生成推荐")
+            return False
+
+        logger.info(f"分析完成: 发现 {analysis_result['total_signals']} 个信号")
+
+        # 2. 取前N只（trend_signals_*.csv 只作为输出产物，不再回读）
+        top_stocks = selector.top_stocks()
+        rating_distribution = selector.rating_distribution()
+    else:
+        if df.empty:
+            logger.warning("分析结果为空")
+            return False
+
+        # 3. 筛选和排序（常驻服务返回的是完整信号表）
+        df, top_stocks = select_recommendations(df)
+        rating_distribution = df['评级'].value_counts().to_dict()
+
+    # 4. 生成推荐列表
+    recommendations = build_recommendations(top_stocks)
+
+    # 5. 生成报告
+    summary = {
+        'total_stocks': analysis_result['total_stocks'],
+        'total_signals': analysis_result['total_signals'],
+        'stocks_with_signals': analysis_result['stocks_with_signals'],
+        'filter_mode': Config.FILTER_MODE,
+        'rating_distribution': rating_distribution
+    }
+
+    write_reports(recommendations, summary)
+
     logger.info("=" * 60)
     logger.info("✅ 推荐报告生成完成!")
     logger.info("=" * 60)
@@ -768,10 +1002,129 @@ def generate_recommendations():
     return True
 
 
+def replay_recommendations(
+    start_date: str,
+    end_date: str = None,
+    data_dir: str = None,
+    limit: int = None,
+    skip_quarantined: bool = True
+) -> bool:
+    """
+    回放历史日期的推荐（时点回放，只使用当天及之前的数据）
+
+    行情只读取一次（MarketCache），每只股票的信号特征只计算一次，之后每个回放日期
+    只是截取截至该日期的数据重新筛选。单个日期写出完整报告，日期区间写出推荐历史表。
+    回放使用当前的调优配置（tuning_config.json）。
+
+    Args:
+        start_date: 回放日期（YYYY-MM-DD），指定 end_date 时为区间起点
+        end_date: 区间终点（含），区间内的每个交易日各回放一次
+        data_dir: 数据目录，默认使用Config.DATA_DIR
+        limit: 只加载前N只股票（测试用）
+        skip_quarantined: 是否跳过数据质量隔离名单中的股票
+
+    Returns:
+        bool: 是否至少生成了一个日期的推荐
+    """
+    logger.info("=" * 60)
+    logger.info(f"历史推荐回放: {start_date}" + (f" ~ {end_date}" if end_date else ""))
+    logger.info("=" * 60)
+
+    RecommendationConfig.load_tuning_config()
+    os.makedirs(RecommendationConfig.REPLAY_DIR, exist_ok=True)
+
+    cache = MarketCache(data_dir or Config.DATA_DIR, Config, skip_quarantined=skip_quarantined)
+    if cache.load(limit) == 0:
+        logger.error("未加载到任何股票数据")
+        return False
+
+    scanner = PointInTimeScanner(cache, Config)
+    details_lookup = EnhancedDetailsLookup(cache)
+    if end_date:
+        replay_dates = scanner.trading_dates(start_date, end_date)
+    else:
+        replay_dates = [pd.Timestamp(start_date)]
+    if not replay_dates:
+        logger.error(f"{start_date} ~ {end_date} 之间没有交易日")
+        return False
+
+    history = []
+    for as_of in replay_dates:
+        result = scanner.scan(as_of)
+        date_str = as_of.strftime('%Y-%m-%d')
+        if result['total_signals'] == 0:
+            logger.warning(f"{date_str}: 未发现任何信号")
+            continue
+
+        df, top_stocks = select_recommendations(result['signal_table'], as_of)
+        recommendations = build_recommendations(top_stocks, details_lookup)
+        logger.info(f"{date_str}: {result['total_signals']} 个信号, 推荐 {len(recommendations)} 只")
+
+        if not end_date:
+            summary = {
+                'total_stocks': result['total_stocks'],
+                'total_signals': result['total_signals'],
+                'stocks_with_signals': result['stocks_with_signals'],
+                'filter_mode': Config.FILTER_MODE,
+                'rating_distribution': df['评级'].value_counts().to_dict(),
+                'as_of': date_str,
+            }
+            write_reports(recommendations, summary, as_of.to_pydatetime(), RecommendationConfig.REPLAY_DIR,
+                          record_history=False)
+
+        for rank, rec in enumerate(recommendations, 1):
+            history.append({
+                '推荐日期': date_str,
+                '排名': rank,
+                '股票代码': rec['stock_code'],
+                '股票名称': rec['stock_name'],
+                '信号日期': rec['date'],
+                '收盘价': rec['close'],
+                'MACD评分': rec['macd_score'],
+                '成交量比率': rec['volume_ratio'],
+                'MA60距离%': rec['ma60_distance'],
+                '评级': rec['rating'],
+                '补充特征分': rec['enhanced_score'],
+            })
+
+    if not history:
+        logger.warning("回放期间没有生成任何推荐")
+        return False
+
+    if end_date:
+        history_path = os.path.join(
+            RecommendationConfig.REPLAY_DIR,
+            f"replay_history_{replay_dates[0].strftime('%Y%m%d')}_{replay_dates[-1].strftime('%Y%m%d')}.csv"
+        )
+        pd.DataFrame(history).to_csv(history_path, index=False, encoding='utf-8-sig')
+        logger.info(f"回放 {len(replay_dates)} 个交易日, 推荐历史已保存: {history_path}")
+
+    return True
+
+
 def main():
     """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='每日股票推荐工具')
+    parser.add_argument('--daemon', action='store_true',
+                        help='使用常驻分析服务（analysis_daemon.py）获取信号，不可用时回退到本地分析')
+    parser.add_argument('--as-of', help='回放历史日期的推荐（YYYY-MM-DD），只使用该日期及之前的数据')
+    parser.add_argument('--end-date', help='与 --as-of 一起使用，批量回放日期区间内的每个交易日')
+    parser.add_argument('--data-dir', help='数据目录路径（回放模式）')
+    parser.add_argument('--limit', type=int, help='只加载前N只股票（回放模式，测试用）')
+    parser.add_argument('--no-quarantine', action='store_true', help='不跳过数据质量隔离名单中的股票')
+    args = parser.parse_args()
+
+    if args.end_date and not args.as_of:
+        parser.error('--end-date 需要与 --as-of 一起使用')
+
     try:
-        success = generate_recommendations()
+        if args.as_of:
+            success = replay_recommendations(args.as_of, args.end_date, args.data_dir, args.limit,
+                                             skip_quarantined=not args.no_quarantine)
+        else:
+            success = generate_recommendations(use_daemon=args.daemon, skip_quarantined=not args.no_quarantine)
         return 0 if success else 1
     except Exception as e:
         logger.error(f"生成推荐失败: {str(e)}", exc_info=True)
@@ -18,24 +18,331 @@ import sys
 import glob
 import logging
 import json
+import pickle
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 # 添加 stock_macd_volumn 到路径以导入配置和技术指标计算函数
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'stock_macd_volumn'))
 
 from config import Config
-from technical_indicators import calculate_all_indicators
-from signal_detector import calculate_macd_score
+from technical_indicators import calculate_all_indicators, get_indicator_params
+from data_profile import file_fingerprint
+from signal_detector import (
+    RISK_FLAG_NAMES, compute_signal_features, compute_risk_flags, get_ratings, match_signal_conditions
+)
 
 # 导入基础类
 from feedback_analyzer import FeedbackAnalyzer
+from tuning_history import TuningHistoryLog
+from threshold_search import current_thresholds, search_thresholds
+from memory_tracking import track_memory
 
 logger = logging.getLogger(__name__)
 
 
+# 特征提取状态
+STATUS_OK = 'ok'                        # 已定位到交易日
+STATUS_MISSING_STOCK = 'missing_stock'  # 没有该股票的数据
+STATUS_OUT_OF_RANGE = 'out_of_range'    # 目标日期在数据范围之外（超出容忍天数）
+STATUS_UNAVAILABLE = 'unavailable'      # 分析服务无法计算该项
+
+# 目标日期与最近交易日相差超过该天数时警告；早于首个/晚于最后一个交易日超过该天数视为超出范围
+MAX_DATE_GAP_DAYS = 7
+
+# 特征矩阵中的特征列（缺失值按 extract_features_at 的默认值填充）
+# 补充特征分、评级、核心条件、风险项与信号检测器（detect_uptrend_signals）的判断一致
+CONDITION_COLUMNS = ['macd_uptrend', 'volume_surge', 'below_ma60']
+RISK_COLUMNS = [f'risk_{name}' for name in RISK_FLAG_NAMES]
+FEATURE_COLUMNS = (['date', 'date_diff_days', 'close', 'macd_score', 'volume_ratio',
+                    'ma60_distance', 'rsi', 'enhanced_score', 'rating']
+                   + CONDITION_COLUMNS + ['pass_count'] + RISK_COLUMNS + ['risk_passed', 'signal'])
+
+
+def extract_stock_features(df: pd.DataFrame, stock_code: str, target_dates,
+                           max_gap_days: int = MAX_DATE_GAP_DAYS, config=None) -> pd.DataFrame:
+    """
+    向量化提取一只股票在多个日期的特征
+
+    每个目标日期用 np.searchsorted 在已排序的交易日中定位，取最接近的交易日（前后距离
+    相同时取较早的一天）。不修改传入的DataFrame，可直接作用于缓存中的数据。
+
+    补充特征分、评级、核心条件（MACD/放量/MA60，按config阈值）、风险项和"当天是否产生
+    实盘信号"由 compute_signal_features 对整只股票一次性向量化计算后按行取出，
+    与信号检测器逐行计算的结果一致。
+
+    Args:
+        df: 包含所有技术指标的DataFrame（按日期升序）
+        stock_code: 股票代码（用于日志）
+        target_dates: 目标日期序列，格式 'YYYYMMDD'
+        max_gap_days: 目标日期早于首个交易日或晚于最后一个交易日超过该天数时视为超出范围
+        config: 配置对象（信号阈值、评级、筛选模式），默认使用Config
+
+    Returns:
+        pd.DataFrame: 与 target_dates 逐行对齐，列为 actual_date、status 及 FEATURE_COLUMNS；
+            status 不是 ok 的行特征为空
+    """
+    config = config or Config
+    target_dates = [str(d) for d in target_dates]
+    targets = pd.to_datetime(pd.Series(target_dates), format='%Y%m%d').to_numpy()
+    result = pd.DataFrame({'actual_date': target_dates, 'status': STATUS_OUT_OF_RANGE})
+    for column in FEATURE_COLUMNS:
+        result[column] = None
+    if len(df) == 0:
+        result['status'] = STATUS_MISSING_STOCK
+        return result
+
+    dates = pd.to_datetime(df['date']).to_numpy()
+    n = len(dates)
+
+    # 最接近的交易日：searchsorted 给出右侧候选，与左侧候选比较距离
+    right = np.searchsorted(dates, targets, side='left')
+    left = np.clip(right - 1, 0, n - 1)
+    right = np.clip(right, 0, n - 1)
+    left_gap = np.abs((targets - dates[left]) / np.timedelta64(1, 'D'))
+    right_gap = np.abs((dates[right] - targets) / np.timedelta64(1, 'D'))
+    position = np.where(right_gap < left_gap, right, left)
+    gap_days = np.minimum(left_gap, right_gap).astype(int)
+
+    tolerance = np.timedelta64(max_gap_days, 'D')
+    in_range = (targets >= dates[0] - tolerance) & (targets <= dates[-1] + tolerance)
+    for target_date in result.loc[~in_range, 'actual_date']:
+        logger.warning(f"股票 {stock_code} 的数据范围 {pd.Timestamp(dates[0]).strftime('%Y-%m-%d')} ~ "
+                       f"{pd.Timestamp(dates[-1]).strftime('%Y-%m-%d')} 不包含 {target_date}")
+    for target_date, row_date in zip(result.loc[in_range & (gap_days > max_gap_days), 'actual_date'],
+                                     dates[position[in_range & (gap_days > max_gap_days)]]):
+        logger.warning(f"股票 {stock_code} 在 {target_date} 附近无交易数据，"
+                       f"最近交易日为 {pd.Timestamp(row_date).strftime('%Y-%m-%d')}")
+
+    if not in_range.any():
+        return result
+
+    def column_at(name: str, default: float) -> np.ndarray:
+        if name not in df.columns:
+            return np.full(in_range.sum(), default, dtype=float)
+        values = df[name].to_numpy(dtype=float)[position[in_range]]
+        return np.where(np.isnan(values), default, values)
+
+    # 信号特征（整只股票向量化计算一次），按目标行取出
+    signal_features = compute_signal_features(df, config)
+    picked = signal_features.iloc[position[in_range]]
+    enhanced_score = picked['enhanced_score'].to_numpy()
+    conditions = {
+        'macd_uptrend': picked['macd_score'].to_numpy() >= config.MACD_SCORE_THRESHOLD,
+        'volume_surge': picked['volume_ratio'].to_numpy() >= config.VOLUME_RATIO_THRESHOLD,
+        'below_ma60': picked['ma60_distance'].to_numpy() <= config.MA_DISTANCE_THRESHOLD,
+    }
+    risk_flags = compute_risk_flags(picked, config)
+    would_signal = ((position[in_range] >= 60)
+                    & match_signal_conditions(picked, config, enable_future_validation=False))
+
+    # MACD评分（需要历史数据，前26个交易日记为0）
+    macd_scores = np.where(position >= 26, signal_features['macd_score'].to_numpy()[position], 0)
+
+    result.loc[in_range, 'status'] = STATUS_OK
+    result.loc[in_range, 'date'] = pd.DatetimeIndex(dates[position[in_range]]).strftime('%Y-%m-%d')
+    result.loc[in_range, 'date_diff_days'] = gap_days[in_range]
+    result.loc[in_range, 'close'] = column_at('close', 0)
+    result.loc[in_range, 'macd_score'] = macd_scores[in_range]
+    result.loc[in_range, 'volume_ratio'] = column_at('volume_ratio', 0)
+    result.loc[in_range, 'ma60_distance'] = column_at('ma60_distance', 100)
+    result.loc[in_range, 'rsi'] = column_at('rsi', 50)
+    result.loc[in_range, 'enhanced_score'] = enhanced_score
+    result.loc[in_range, 'rating'] = np.char.rstrip(get_ratings(enhanced_score, config).astype(str), '级')
+    for name, values in conditions.items():
+        result.loc[in_range, name] = values
+    result.loc[in_range, 'pass_count'] = np.sum(list(conditions.values()), axis=0)
+    for name, values in risk_flags.items():
+        result.loc[in_range, f'risk_{name}'] = values
+    result.loc[in_range, 'risk_passed'] = ~np.logical_or.reduce(list(risk_flags.values()))
+    result.loc[in_range, 'signal'] = would_signal
+    return result
+
+
+def extract_features_batch(pairs: pd.DataFrame,
+                           load_frame: Callable[[str], Optional[pd.DataFrame]],
+                           max_gap_days: int = MAX_DATE_GAP_DAYS, config=None) -> pd.DataFrame:
+    """
+    批量提取 (股票代码, 日期) 的特征矩阵
+
+    按股票分组，每只股票只加载一次，该股票的全部日期一次性向量化定位和提取。
+
+    Args:
+        pairs: 包含 stock_code、target_date（YYYYMMDD）两列的表
+        load_frame: 按股票代码加载指标DataFrame的函数，没有数据时返回None
+        max_gap_days: 见 extract_stock_features
+        config: 配置对象，见 extract_stock_features
+
+    Returns:
+        pd.DataFrame: 与 pairs 逐行对齐（索引相同），列为 stock_code、target_date、status
+            及 FEATURE_COLUMNS；没有数据的股票 status 为 missing_stock
+    """
+    parts = []
+    for stock_code, rows in pairs.groupby('stock_code', sort=False).indices.items():
+        target_dates = pairs['target_date'].iloc[rows].astype(str).tolist()
+        with track_memory('stock', stock_code):
+            with track_memory('load'):
+                frame = load_frame(stock_code)
+            with track_memory('features'):
+                if frame is None:
+                    part = extract_stock_features(pd.DataFrame(), stock_code, target_dates, max_gap_days, config)
+                else:
+                    part = extract_stock_features(frame, stock_code, target_dates, max_gap_days, config)
+        part.index = pairs.index[rows]
+        parts.append(part.drop(columns='actual_date'))
+
+    if not parts:
+        return pd.DataFrame(columns=['stock_code', 'target_date', 'status'] + FEATURE_COLUMNS)
+
+    features = pd.concat(parts).reindex(pairs.index)
+    features.insert(0, 'stock_code', pairs['stock_code'])
+    features.insert(1, 'target_date', pairs['target_date'].astype(str))
+    return features
+
+
+def feature_row_to_dict(row) -> Optional[Dict]:
+    """把特征矩阵的一行转换成 extract_features_at 格式的特征字典，status 不是 ok 时返回None"""
+    if row['status'] != STATUS_OK:
+        return None
+    features = {
+        'date': row['date'],
+        'actual_date': row['target_date'] if 'target_date' in row else row['actual_date'],
+        'date_diff_days': int(row['date_diff_days']),
+        'close': float(row['close']),
+        'macd_score': int(row['macd_score']),
+        'volume_ratio': float(row['volume_ratio']),
+        'ma60_distance': float(row['ma60_distance']),
+        'rsi': float(row['rsi']),
+        'enhanced_score': int(row['enhanced_score']),
+        'rating': row['rating'],
+    }
+    for column in CONDITION_COLUMNS + RISK_COLUMNS + ['risk_passed', 'signal']:
+        features[column] = bool(row[column])
+    features['pass_count'] = int(row['pass_count'])
+    features['risks'] = [label for name, label in RISK_FLAG_NAMES.items() if features[f'risk_{name}']]
+    return features
+
+
+def extract_features_at(df: pd.DataFrame, stock_code: str, target_date: str, config=None) -> Optional[Dict]:
+    """
+    从已计算技术指标的DataFrame中提取指定日期的特征
+
+    取与目标日期最接近的交易日（考虑停牌、节假日），不修改传入的DataFrame，
+    因此可以直接作用于常驻缓存中的数据。
+
+    Args:
+        df: 包含所有技术指标的DataFrame
+        stock_code: 股票代码（用于日志）
+        target_date: 目标日期，格式 'YYYYMMDD'
+        config: 配置对象，见 extract_stock_features
+
+    Returns:
+        特征字典，包含 macd_score, volume_ratio, ma60_distance 等；
+        目标日期超出数据范围或计算失败时返回None
+    """
+    try:
+        return feature_row_to_dict(extract_stock_features(df, stock_code, [target_date], config=config).iloc[0])
+    except Exception as e:
+        logger.error(f"计算特征失败 {stock_code} @ {target_date}: {str(e)}")
+        return None
+
+
+class IndicatorFrameCache:
+    """
+    指标DataFrame缓存（LRU）
+
+    同一只股票在一份反馈里出现多次、或在多份反馈里重复出现时，只读取一次CSV、
+    计算一次指标。内存中最多保留 max_size 只股票，超出时淘汰最久未使用的。
+
+    指定 disk_dir 时同时使用磁盘缓存（每只股票一个pickle，可在多次运行、多个工具间共享），
+    CSV文件指纹（大小 + 末尾字节CRC，与 data_profile 相同）或指标参数变化时磁盘缓存自动失效。
+    """
+
+    def __init__(self, max_size: int = 64, disk_dir: str = None, config=None):
+        """
+        Args:
+            max_size: 内存中最多缓存的股票数
+            disk_dir: 磁盘缓存目录，None表示不使用磁盘缓存
+            config: 配置对象（决定指标参数），默认使用Config
+        """
+        self.max_size = max(1, max_size)
+        self.disk_dir = disk_dir
+        self.indicator_params = get_indicator_params(config or Config)
+        self.frames: 'OrderedDict[str, pd.DataFrame]' = OrderedDict()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_meta(self, file_path: str) -> Dict:
+        return {**file_fingerprint(file_path), 'params': self.indicator_params}
+
+    def _disk_path(self, file_path: str) -> str:
+        return os.path.join(self.disk_dir, os.path.basename(file_path) + '.pkl')
+
+    def _read_disk(self, file_path: str) -> Optional[pd.DataFrame]:
+        disk_path = self._disk_path(file_path)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            with open(disk_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('meta') == self._disk_meta(file_path):
+                return cached['frame']
+        except Exception as e:
+            logger.debug(f"磁盘指标缓存读取失败 {disk_path}: {str(e)}")
+        return None
+
+    def _write_disk(self, file_path: str, frame: pd.DataFrame):
+        disk_path = self._disk_path(file_path)
+        tmp_path = disk_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'meta': self._disk_meta(file_path), 'frame': frame}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, disk_path)
+        except Exception as e:
+            logger.warning(f"磁盘指标缓存写入失败 {disk_path}: {str(e)}")
+
+    def get(self, file_path: str, loader: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """
+        获取指标DataFrame，未缓存时调用 loader(file_path) 读取并计算
+
+        返回的DataFrame在多次调用间共享，调用方不应修改。
+        """
+        frame = self.frames.get(file_path)
+        if frame is not None:
+            self.frames.move_to_end(file_path)
+            self.stats['hits'] += 1
+            return frame
+
+        frame = self._read_disk(file_path) if self.disk_dir else None
+        if frame is not None:
+            self.stats['disk_hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            frame = loader(file_path)
+            if self.disk_dir:
+                self._write_disk(file_path, frame)
+
+        self.frames[file_path] = frame
+        if len(self.frames) > self.max_size:
+            self.frames.popitem(last=False)
+            self.stats['evictions'] += 1
+        return frame
+
+    def log_stats(self):
+        """在日志中输出命中统计"""
+        total = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+        if total == 0:
+            return
+        logger.info(f"指标缓存: 请求 {total} 次, 内存命中 {self.stats['hits']}, "
+                    f"磁盘命中 {self.stats['disk_hits']}, 未命中 {self.stats['misses']}, "
+                    f"淘汰 {self.stats['evictions']} (命中率 {1 - self.stats['misses'] / total:.1%})")
+
+
 class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
     """
     增强版反馈分析器
@@ -44,7 +351,10 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
 
     def __init__(self, data_dir=None, learning_rate=0.15,
                  feedback_dir='turning_feedback',
-                 recommendation_dir='recommendations'):
+                 recommendation_dir='recommendations',
+                 daemon_client=None,
+                 frame_cache_size=64,
+                 indicator_cache_dir=None):
         """
         初始化增强版反馈分析器
 
@@ -53,6 +363,9 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             learning_rate: 学习率，默认0.15（保守调整）
             feedback_dir: 反馈文件目录
             recommendation_dir: 推荐报告目录
+            daemon_client: 常驻分析服务客户端（AnalysisClient），提供时从服务的缓存中提取特征
+            frame_cache_size: 内存中最多缓存的股票指标数（LRU）
+            indicator_cache_dir: 磁盘指标缓存目录（可在多次运行间共享），None表示不使用
         """
         super().__init__(feedback_dir, recommendation_dir)
 
@@ -72,11 +385,19 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         # 学习率
         self.learning_rate = learning_rate
 
-        # 历史追踪文件
+        # 常驻分析服务客户端（请求失败后自动回退到本地计算）
+        self.daemon_client = daemon_client
+
+        # 指标DataFrame缓存（本分析器实例内有效，可选磁盘缓存）
+        self.frame_cache = IndicatorFrameCache(frame_cache_size, indicator_cache_dir)
+        self._stock_files: Dict[str, Optional[str]] = {}  # 股票代码 → CSV路径
+
+        # 历史追踪日志（只追加的JSONL + 增量总结，旧的 tuning_history.json 自动迁移）
         self.history_path = os.path.join(
             os.path.dirname(__file__),
-            'tuning_history.json'
+            'tuning_history.jsonl'
         )
+        self.tuning_history = TuningHistoryLog(self.history_path)
 
         logger.info(f"增强版反馈分析器已初始化")
         logger.info(f"  数据目录: {self.data_dir}")
@@ -92,35 +413,40 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             stock_code: 股票代码，如 '600000' 或 'sh.600000'
 
         Returns:
-            包含所有技术指标的DataFrame，如果文件不存在则返回None
+            包含所有技术指标的DataFrame（来自缓存，调用方不应修改），如果文件不存在则返回None
         """
         # 提取纯数字代码
         code = stock_code.split('.')[-1] if '.' in stock_code else stock_code
 
-        # 查找股票文件（支持 sh.XXXXXX*.csv 和 sz.XXXXXX*.csv）
-        pattern = os.path.join(self.data_dir, f"*.{code}*.csv")
-        files = glob.glob(pattern)
-
-        if not files:
-            logger.warning(f"未找到股票数据: {stock_code} (pattern: {pattern})")
+        # 查找股票文件（支持 sh.XXXXXX*.csv 和 sz.XXXXXX*.csv），每个代码只查找一次
+        if code not in self._stock_files:
+            pattern = os.path.join(self.data_dir, f"*.{code}*.csv")
+            files = glob.glob(pattern)
+            if not files:
+                logger.warning(f"未找到股票数据: {stock_code} (pattern: {pattern})")
+            # 读取第一个匹配的文件
+            self._stock_files[code] = files[0] if files else None
+
+        file_path = self._stock_files[code]
+        if file_path is None:
             return None
 
-        # 读取第一个匹配的文件
-        file_path = files[0]
-        logger.debug(f"加载股票数据: {os.path.basename(file_path)}")
-
         try:
-            df = pd.read_csv(file_path)
-            df['date'] = pd.to_datetime(df['date'])
-
-            # 计算所有技术指标（复用现有函数）
-            df = calculate_all_indicators(df, Config)
-
-            return df
+            return self.frame_cache.get(file_path, self._read_indicator_frame)
         except Exception as e:
             logger.error(f"加载股票数据失败 {stock_code}: {str(e)}")
             return None
 
+    @staticmethod
+    def _read_indicator_frame(file_path: str) -> pd.DataFrame:
+        """读取CSV并计算所有技术指标"""
+        logger.debug(f"加载股票数据: {os.path.basename(file_path)}")
+        df = pd.read_csv(file_path)
+        df['date'] = pd.to_datetime(df['date'])
+
+        # 计算所有技术指标（复用现有函数）
+        return calculate_all_indicators(df, Config)
+
     def calculate_features_for_date(self, stock_code: str, target_date: str) -> Optional[Dict]:
         """
         计算指定日期的技术指标特征
@@ -132,53 +458,47 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         Returns:
             特征字典，包含 macd_score, volume_ratio, ma60_distance 等
         """
+        if self.daemon_client is not None:
+            try:
+                return self.daemon_client.features([(stock_code, target_date)])[0]
+            except Exception as e:
+                logger.warning(f"分析服务请求失败: {e}，改为本地计算")
+                self.daemon_client = None
+
         df = self.load_stock_data(stock_code)
         if df is None or len(df) == 0:
             return None
 
-        try:
-            # 转换日期格式
-            target_date_obj = pd.to_datetime(target_date, format='%Y%m%d')
-
-            # 查找最接近的交易日（考虑停牌、节假日）
-            df['date_diff'] = abs((df['date'] - target_date_obj).dt.days)
-            closest_idx = df['date_diff'].idxmin()
-            row = df.loc[closest_idx]
-
-            # 检查日期差异（如果超过7天则警告）
-            if row['date_diff'] > 7:
-                logger.warning(f"股票 {stock_code} 在 {target_date} 附近无交易数据，最近交易日为 {row['date'].strftime('%Y-%m-%d')}")
-
-            # 计算MACD评分（需要历史数据）
-            macd_score = calculate_macd_score(df, closest_idx, Config) if closest_idx >= 26 else 0
-
-            # 提取特征
-            features = {
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'actual_date': target_date,
-                'date_diff_days': int(row['date_diff']),
-                'close': float(row['close']) if pd.notna(row['close']) else 0,
-                'macd_score': macd_score,
-                'volume_ratio': float(row.get('volume_ratio', 0)) if pd.notna(row.get('volume_ratio')) else 0,
-                'ma60_distance': float(row.get('ma60_distance', 100)) if pd.notna(row.get('ma60_distance')) else 100,
-                'rsi': float(row.get('rsi', 50)) if pd.notna(row.get('rsi')) else 50,
-                'enhanced_score': float(row.get('enhanced_score', 0)) if pd.notna(row.get('enhanced_score')) else 0,
-            }
+        return extract_features_at(df, stock_code, target_date)
 
-            # 计算评级
-            enhanced_score = features['enhanced_score']
-            if enhanced_score >= 30:
-                features['rating'] = 'A'
-            elif enhanced_score >= 20:
-                features['rating'] = 'B'
-            else:
-                features['rating'] = 'C'
+    def calculate_features_batch(self, pairs: pd.DataFrame) -> pd.DataFrame:
+        """
+        批量计算 (股票代码, 日期) 的技术指标特征矩阵
 
-            return features
+        按股票分组，每只股票只加载一次（经过指标缓存），该股票的全部日期一次性定位。
 
-        except Exception as e:
-            logger.error(f"计算特征失败 {stock_code} @ {target_date}: {str(e)}")
-            return None
+        Args:
+            pairs: 包含 stock_code、target_date（YYYYMMDD）两列的表
+
+        Returns:
+            pd.DataFrame: 与 pairs 逐行对齐，列为 stock_code、target_date、status
+                （ok / missing_stock / out_of_range / unavailable）及特征列
+        """
+        if self.daemon_client is not None:
+            try:
+                records = self.daemon_client.features(
+                    list(zip(pairs['stock_code'], pairs['target_date'].astype(str))))
+                features = pd.DataFrame([record or {} for record in records],
+                                        index=pairs.index, columns=FEATURE_COLUMNS)
+                features.insert(0, 'stock_code', pairs['stock_code'])
+                features.insert(1, 'target_date', pairs['target_date'].astype(str))
+                features.insert(2, 'status', [STATUS_OK if record else STATUS_UNAVAILABLE for record in records])
+                return features
+            except Exception as e:
+                logger.warning(f"分析服务请求失败: {e}，改为本地计算")
+                self.daemon_client = None
+
+        return extract_features_batch(pairs, self.load_stock_data)
 
     # ========== 模块2：Gap分析 ==========
 
@@ -248,6 +568,10 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         if enhanced_score < 25:
             blocked.append(f'补充特征分{enhanced_score:.0f}<25')
 
+        # 风险控制拦截
+        if features.get('risks'):
+            blocked.append('风险控制：' + '、'.join(features['risks']))
+
         return '被阻塞：' + '; '.join(blocked) if blocked else '未知原因'
 
     def _diagnose_success(self, features: Dict, is_tp: bool) -> str:
@@ -293,19 +617,17 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         """
         logger.info("开始逐支股票Gap分析...")
 
-        # 读取当日推荐CSV（用于判断TP/FP）
-        recommendation_csv = self._find_recommendation_csv(date_str)
-        recommended_stocks = set()
+        # 读取当日推荐（优先查询推荐历史库，用于判断TP/FP）
+        recommended_stocks = None
+        try:
+            recommended_stocks = self.load_recommended_stocks(date_str)
+        except Exception as e:
+            logger.warning(f"读取当日推荐失败: {str(e)}")
 
-        if recommendation_csv and os.path.exists(recommendation_csv):
-            try:
-                rec_df = pd.read_csv(recommendation_csv)
-                recommended_stocks = set(rec_df['股票代码'].values)
-                logger.info(f"找到推荐CSV: {len(recommended_stocks)}支股票")
-            except Exception as e:
-                logger.warning(f"读取推荐CSV失败: {str(e)}")
+        if recommended_stocks is not None:
+            logger.info(f"找到当日推荐: {len(recommended_stocks)}支股票")
         else:
-            logger.warning("未找到推荐CSV文件，无法进行完整Gap分析")
+            logger.warning("未找到当日推荐（历史库和报告文件），无法进行完整Gap分析")
             return {
                 'error': 'no_recommendation_csv',
                 'message': '未找到推荐CSV文件，请先生成推荐报告'
@@ -319,8 +641,18 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             'true_negatives': []     # 正确不推荐（暂不分析）
         }
 
+        # 需要计算特征的 (股票, 日期)：FP取反馈日期，其余取最佳买入日；按股票分组批量计算
+        not_recommended = feedback_df['Best recommendation buy day'] == 'not recommended'
+        needs_features = ~not_recommended | feedback_df['stock'].isin(recommended_stocks)
+        pairs = pd.DataFrame({
+            'stock_code': feedback_df['stock'],
+            'target_date': feedback_df['Best recommendation buy day'].where(~not_recommended, date_str),
+        })[needs_features]
+        feature_matrix = self.calculate_features_batch(pairs)
+        feature_by_row = {index: feature_row_to_dict(row) for index, row in feature_matrix.iterrows()}
+
         # 分析每支反馈股票
-        for _, row in feedback_df.iterrows():
+        for index, row in feedback_df.iterrows():
             stock_code = row['stock']
             best_date = row['Best recommendation buy day']
 
@@ -328,7 +660,7 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             if best_date == 'not recommended':
                 # 如果被推荐了，则是FP
                 if stock_code in recommended_stocks:
-                    features = self.calculate_features_for_date(stock_code, date_str)
+                    features = feature_by_row.get(index)
                     if features:
                         gap_analysis['false_positives'].append({
                             'stock_code': stock_code,
@@ -338,8 +670,8 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
                 # 否则是TN（正确不推荐，暂不记录）
                 continue
 
-            # 计算该股票在最佳买入日的特征
-            features = self.calculate_features_for_date(stock_code, best_date)
+            # 该股票在最佳买入日的特征
+            features = feature_by_row.get(index)
 
             if features is None:
                 logger.warning(f"无法计算特征: {stock_code} @ {best_date}")
@@ -370,26 +702,23 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         logger.info(f"  正确推荐 (TP): {len(gap_analysis['true_positives'])}")
         logger.info(f"  错误推荐 (FP): {len(gap_analysis['false_positives'])}")
         logger.info(f"  遗漏推荐 (FN): {len(gap_analysis['false_negatives'])}")
+        self.frame_cache.log_stats()
 
         return gap_analysis
 
-    def _find_recommendation_csv(self, date_str: str) -> Optional[str]:
-        """查找推荐CSV文件"""
-        csv_pattern = os.path.join(
-            os.path.dirname(__file__),
-            self.recommendation_dir,
-            f'recommendation_{date_str}.csv'
-        )
-        return csv_pattern if os.path.exists(csv_pattern) else None
-
     # ========== 模块3：特征模式分析 ==========
 
-    def analyze_feature_patterns(self, gap_analysis: Dict) -> Dict:
+    def analyze_feature_patterns(self, gap_analysis: Dict, case_matrix: Optional[pd.DataFrame] = None) -> Dict:
         """
         分析成功/失败案例的特征分布模式
 
+        提供全部历史反馈案例的特征矩阵（threshold_search.load_case_matrix）时，阈值建议由
+        联合网格搜索度量得到（整组阈值一起评估，步长受限，组合F1优于当前配置才调整）；
+        案例不足或未提供时使用阈值附近FP/FN计数的经验规则。
+
         Args:
             gap_analysis: Gap分析结果
+            case_matrix: 有标签反馈案例的特征矩阵，None表示不做网格搜索
 
         Returns:
             特征模式分析结果，包含统计信息和阈值建议
@@ -431,7 +760,21 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             'threshold_analysis': {}
         }
 
-        # 阈值分析
+        # 阈值分析：优先使用网格搜索的度量结果
+        tuning_config = {}
+        if os.path.exists(self.tuning_config_path):
+            try:
+                with open(self.tuning_config_path, 'r') as f:
+                    tuning_config = json.load(f)
+            except Exception:
+                pass
+        if case_matrix is not None and len(case_matrix) > 0:
+            threshold_analysis = search_thresholds(case_matrix, current_thresholds(tuning_config))
+            if threshold_analysis:
+                pattern_analysis['threshold_analysis'] = threshold_analysis
+                logger.info("特征模式分析完成（阈值网格搜索）")
+                return pattern_analysis
+
         threshold_analysis = {}
 
         # 1. MACD_SCORE_THRESHOLD (当前50)
@@ -489,15 +832,8 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             'reason': reason
         }
 
-        # 3. MIN_ENHANCED_SCORE (当前25，如果有tuning_config则使用调优值)
-        current_enhanced_threshold = 25
-        if os.path.exists(self.tuning_config_path):
-            try:
-                with open(self.tuning_config_path, 'r') as f:
-                    tuning_config = json.load(f)
-                    current_enhanced_threshold = tuning_config.get('MIN_ENHANCED_SCORE', 25)
-            except:
-                pass
+        # 3. MIN_ENHANCED_SCORE (RecommendationConfig默认值，如果有tuning_config则使用调优值)
+        current_enhanced_threshold = current_thresholds(tuning_config)['MIN_ENHANCED_SCORE']
 
         fp_enhanced = [f.get('enhanced_score', 0) for f in fp_features]
         fn_enhanced = [f.get('enhanced_score', 0) for f in fn_features]
@@ -611,9 +947,12 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
                 logger.info(f"  {param}: 无需调整 (当前值: {current})")
                 continue
 
-            # 应用学习率做小幅调整
+            # 网格搜索给出的是步长受限、整组评估过的阈值组合，直接采用；经验规则的建议按学习率做小幅调整
             delta = suggested - current
-            actual_value = current + delta * self.learning_rate
+            if analysis.get('method') == 'grid_search':
+                actual_value = suggested
+            else:
+                actual_value = current + delta * self.learning_rate
 
             # 四舍五入
             if param == 'MACD_SCORE_THRESHOLD':
@@ -631,7 +970,13 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             # 注意：MA_DISTANCE_THRESHOLD的逻辑与其他阈值相反
             # 降低MA距离阈值 = 更严格（过滤涨幅过大的股票）→ precision↑, recall↓
             # 提高MA距离阈值 = 更宽松（允许涨幅更大的股票）→ precision↓, recall↑
-            if param == 'MA_DISTANCE_THRESHOLD':
+            if analysis.get('method') == 'grid_search':
+                # 网格搜索：直接给出实测的变化
+                arrows = {True: '↑', False: '↓'}
+                current_metrics, best_metrics = analysis['current_metrics'], analysis['best_metrics']
+                expected_impact = ', '.join(
+                    f"{name} {arrows[best_metrics[name] >= current_metrics[name]]}" for name in ('precision', 'recall'))
+            elif param == 'MA_DISTANCE_THRESHOLD':
                 # MA距离阈值：降低=更严格
                 if suggested < current:
                     expected_impact = 'precision ↑, recall ↓'
@@ -644,10 +989,13 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
                 else:
                     expected_impact = 'precision ↓, recall ↑'
 
-            # 计算置信度
-            fp_count = analysis.get('fp_near_threshold', 0) + analysis.get('fp_below_threshold', 0)
-            fn_count = analysis.get('fn_near_threshold', 0) + analysis.get('fn_above_threshold', 0)
-            total_evidence = fp_count + fn_count
+            # 计算置信度（网格搜索按案例数，经验规则按阈值附近的FP/FN数）
+            if analysis.get('method') == 'grid_search':
+                total_evidence = analysis['cases'] / 5
+            else:
+                fp_count = analysis.get('fp_near_threshold', 0) + analysis.get('fp_below_threshold', 0)
+                fn_count = analysis.get('fn_near_threshold', 0) + analysis.get('fn_above_threshold', 0)
+                total_evidence = fp_count + fn_count
             confidence = min(0.95, 0.5 + total_evidence * 0.05)
 
             adjustments.append({
@@ -658,7 +1006,8 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
                 'delta': actual_value - current,
                 'reason': analysis['reason'],
                 'expected_impact': expected_impact,
-                'confidence': confidence
+                'confidence': confidence,
+                'method': analysis.get('method', 'heuristic')
             })
 
             logger.info(f"  {param}: {current} → {actual_value} (建议: {suggested})")
@@ -670,7 +1019,7 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
     def track_improvement(self, accuracy: Dict, adjustments: List,
                          gap_analysis: Dict, date_str: str):
         """
-        追踪改进历史，记录到tuning_history.json
+        追踪改进历史，追加到tuning_history.jsonl（只追加一行并更新增量总结）
 
         Args:
             accuracy: 准确性统计
@@ -680,15 +1029,6 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         """
         logger.info("记录改进历史...")
 
-        # 读取历史记录
-        history_data = {'history': [], 'summary': {}}
-        if os.path.exists(self.history_path):
-            try:
-                with open(self.history_path, 'r', encoding='utf-8') as f:
-                    history_data = json.load(f)
-            except Exception as e:
-                logger.warning(f"读取历史记录失败: {str(e)}")
-
         # 构建当前记录
         current_record = {
             'date': date_str,
@@ -716,8 +1056,8 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
         }
 
         # 计算改进情况（与上一次对比）
-        if history_data['history']:
-            prev_record = history_data['history'][-1]
+        prev_record = self.tuning_history.latest()
+        if prev_record:
             prev_metrics = prev_record['metrics']
 
             current_record['improvement'] = {
@@ -728,31 +1068,9 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
                 'fn_reduction': prev_record['error_patterns']['false_negatives'] - current_record['error_patterns']['false_negatives']
             }
 
-        # 添加到历史
-        history_data['history'].append(current_record)
-
-        # 更新总结
-        if len(history_data['history']) >= 2:
-            first_metrics = history_data['history'][0]['metrics']
-            latest_metrics = current_record['metrics']
-
-            history_data['summary'] = {
-                'total_tunings': len(history_data['history']),
-                'first_date': history_data['history'][0]['date'],
-                'latest_date': date_str,
-                'overall_improvement': {
-                    'precision': f"{(latest_metrics['precision'] - first_metrics['precision']):.2%}",
-                    'recall': f"{(latest_metrics['recall'] - first_metrics['recall']):.2%}",
-                    'f1_score': f"{(latest_metrics['f1_score'] - first_metrics['f1_score']):.2%}"
-                },
-                'best_f1_score': max(r['metrics']['f1_score'] for r in history_data['history']),
-                'best_f1_date': max(history_data['history'], key=lambda r: r['metrics']['f1_score'])['date']
-            }
-
-        # 保存
+        # 追加到历史（总结增量更新）
         try:
-            with open(self.history_path, 'w', encoding='utf-8') as f:
-                json.dump(history_data, f, indent=2, ensure_ascii=False)
+            self.tuning_history.append(current_record)
             logger.info(f"改进历史已保存到: {os.path.basename(self.history_path)}")
         except Exception as e:
             logger.error(f"保存改进历史失败: {str(e)}")
@@ -768,9 +1086,7 @@ class EnhancedFeedbackAnalyzer(FeedbackAnalyzer):
             return None
 
         try:
-            with open(self.history_path, 'r', encoding='utf-8') as f:
-                history_data = json.load(f)
-            return history_data.get('summary')
+            return self.tuning_history.summary()
         except Exception as e:
             logger.error(f"读取改进总结失败: {str(e)}")
             return None
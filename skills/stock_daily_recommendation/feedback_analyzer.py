@@ -29,6 +29,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import json
 
+from recommendation_history import RecommendationHistory
+
 # 配置日志
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
 os.makedirs(log_dir, exist_ok=True)
@@ -44,6 +46,64 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 反馈标签
+LABEL_BUY = 'buy'                          # 应该推荐（有最佳买入日）
+LABEL_NOT_RECOMMENDED = 'not_recommended'  # 不应推荐
+LABEL_UNKNOWN = 'unknown'                  # 无法识别
+NOT_RECOMMENDED = 'not recommended'
+
+# 反馈行：股票代码 + 分隔符（制表符/逗号/空格，用户填写时常混用）+ 自由文本
+FEEDBACK_LINE_PATTERN = r'^\s*(?P<stock>(?:sh|sz|bj)\.\d{6})[\s，,;；]*(?P<text>.*?)\s*$'
+# 自由文本中的买入日期："比较合适的买入时间是YYYYMMDD"（可能写在#之后）
+BUY_DATE_PATTERN = r'买入时间是\s*(\d{8})'
+
+
+def parse_feedback_file(feedback_file: str) -> pd.DataFrame:
+    """
+    解析反馈文件为规范化的表（向量化处理全部行）
+
+    识别规则（按优先级）：
+        1. #之前是 not recommended → 不应推荐
+        2. #之前是8位日期，或文本中任意位置有"买入时间是YYYYMMDD" → 应该推荐，取该日期
+        3. 文本中任意位置有 not recommended → 不应推荐
+        4. 其他（含无法解析的日期）→ unknown
+
+    Args:
+        feedback_file: 反馈文件路径（tuning_feedback_YYYYMMDD.csv）
+
+    Returns:
+        pd.DataFrame: stock、label、best_date（YYYYMMDD，仅应该推荐的行）、note（#之后的说明）、
+            text（原始文本）
+    """
+    with open(feedback_file, 'r', encoding='utf-8-sig') as f:
+        lines = pd.Series(f.read().splitlines(), dtype=object)
+
+    parsed = lines.str.extract(FEEDBACK_LINE_PATTERN).dropna(subset=['stock'])
+    text = parsed['text'].fillna('')
+    head = text.str.split('#', n=1).str[0].str.strip()
+    note = text.str.split('#', n=1).str[1].fillna('').str.strip()
+
+    head_not_recommended = head.str.lower().str.startswith(NOT_RECOMMENDED)
+    head_date = head.str.extract(r'^(\d{8})$')[0]
+    phrase_date = text.str.extract(BUY_DATE_PATTERN)[0]
+    best_date = head_date.fillna(phrase_date)
+    best_date = best_date.where(pd.to_datetime(best_date, format='%Y%m%d', errors='coerce').notna())
+    any_not_recommended = text.str.lower().str.contains(NOT_RECOMMENDED, regex=False)
+
+    label = np.select(
+        [head_not_recommended, best_date.notna(), any_not_recommended],
+        [LABEL_NOT_RECOMMENDED, LABEL_BUY, LABEL_NOT_RECOMMENDED],
+        LABEL_UNKNOWN
+    )
+    return pd.DataFrame({
+        'stock': parsed['stock'],
+        'label': label,
+        'best_date': best_date.where(label == LABEL_BUY),
+        'note': note,
+        'text': text,
+    }).reset_index(drop=True)
+
+
 class FeedbackAnalyzer:
     """反馈分析器"""
 
@@ -67,22 +127,20 @@ class FeedbackAnalyzer:
         return max(feedback_files, key=os.path.getmtime)
 
     def read_feedback(self, feedback_file: str) -> pd.DataFrame:
-        """读取反馈文件"""
-        try:
-            df = pd.read_csv(feedback_file, sep='\t')  # 使用tab分隔
-
-            # 清理列名：去除空格和中英文标点符号
-            df.columns = df.columns.str.strip()  # 去除前后空格
-            df.columns = df.columns.str.rstrip('，,;；')  # 去除尾部的中英文逗号和分号
+        """
+        读取反馈文件
 
-            # 清理数据值：去除注释（#后面的内容）
-            if 'Best recommendation buy day' in df.columns:
-                # 提取#之前的内容并去除空格
-                df['Best recommendation buy day'] = df['Best recommendation buy day'].astype(str).str.split('#').str[0].str.strip()
-
-            # 清理stock列的中文逗号
-            if 'stock' in df.columns:
-                df['stock'] = df['stock'].astype(str).str.rstrip('，,')
+        Best recommendation buy day 列规范化为 YYYYMMDD 日期或 'not recommended'，
+        #后面的说明保存在 note 列；无法识别的行记录警告后丢弃（见 parse_feedback_file）。
+        """
+        try:
+            df = parse_feedback_file(feedback_file)
+            unknown = df['label'] == LABEL_UNKNOWN
+            for _, row in df[unknown].iterrows():
+                logger.warning(f"无法识别的反馈: {row['stock']} -> {row['text']}")
+            df = df[~unknown].reset_index(drop=True)
+            df['Best recommendation buy day'] = df['best_date'].where(df['label'] == LABEL_BUY, NOT_RECOMMENDED)
+            df = df[['stock', 'Best recommendation buy day', 'note']]
 
             logger.info(f"成功读取反馈文件: {feedback_file}")
             logger.info(f"反馈条目数: {len(df)}")
@@ -106,22 +164,43 @@ class FeedbackAnalyzer:
 
         return None
 
-    def analyze_accuracy(self, feedback_df: pd.DataFrame, date_str: str) -> Dict:
-        """分析推荐准确率"""
-        recommendation_file = self.get_recommendation_file(date_str)
+    def load_recommended_stocks(self, date_str: str) -> Optional[set]:
+        """
+        获取某天推荐的股票代码集合
+
+        优先查询推荐历史库（按日期索引），历史库中没有该日期时读取报告文件。
+
+        Returns:
+            Optional[set]: 股票代码集合，找不到当天推荐时返回None
+        """
+        history_path = os.path.join(self.recommendation_dir, 'recommendation_history.db')
+        if os.path.exists(history_path):
+            try:
+                with RecommendationHistory(history_path) as history:
+                    recommended_stocks = history.recommended_stocks(date_str)
+                if recommended_stocks is not None:
+                    return recommended_stocks
+            except Exception as e:
+                logger.warning(f"查询推荐历史库失败: {str(e)}，改为读取报告文件")
 
+        recommendation_file = self.get_recommendation_file(date_str)
         if not recommendation_file:
-            logger.warning(f"未找到{date_str}的推荐文件")
             return None
 
-        # 读取推荐文件
         if recommendation_file.endswith('.csv'):
             rec_df = pd.read_csv(recommendation_file, encoding='utf-8-sig')
-            recommended_stocks = set(rec_df['股票代码'].values)
-        else:  # JSON
-            with open(recommendation_file, 'r', encoding='utf-8') as f:
-                rec_data = json.load(f)
-            recommended_stocks = set([r['stock_code'] for r in rec_data['recommendations']])
+            return set(rec_df['股票代码'].values)
+        with open(recommendation_file, 'r', encoding='utf-8') as f:
+            rec_data = json.load(f)
+        return set([r['stock_code'] for r in rec_data['recommendations']])
+
+    def analyze_accuracy(self, feedback_df: pd.DataFrame, date_str: str) -> Dict:
+        """分析推荐准确率"""
+        recommended_stocks = self.load_recommended_stocks(date_str)
+
+        if recommended_stocks is None:
+            logger.warning(f"未找到{date_str}的推荐文件")
+            return None
 
         # 分析准确性
         feedback_df['was_recommended'] = feedback_df['stock'].apply(
@@ -0,0 +1,330 @@
+"""
+反馈历史回填与回放
+
+run_feedback_analysis.py 只分析最新的一个反馈文件；本工具把 turning_feedback/ 下全部
+tuning_feedback_*.csv 合并成一张规范化的反馈表，逐个反馈日期关联当天的推荐结果
+（优先查推荐历史库，历史库中没有的日期读取报告文件），然后一次性向量化计算：
+
+1. 每个反馈日期及全部历史的混淆矩阵、精确率、召回率、F1
+2. 按结果类别（TP/FP/FN/TN）和反馈标签统计的技术指标特征分布
+
+特征提取与Gap分析相同：应该推荐的股票取最佳买入日，不应推荐的股票取反馈日期，
+按股票分组批量计算（每只股票只加载一次）。
+
+使用方法：
+    python feedback_backfill.py                     # 回放全部反馈，输出到 logs/
+    python feedback_backfill.py --no-features       # 只计算准确率，不提取特征
+    python feedback_backfill.py --indicator-cache /tmp/indicator_cache
+
+输出：
+    logs/feedback_history.csv            规范化反馈表（含推荐关联结果和特征）
+    logs/feedback_backfill_report.json   分日期/全部历史的准确率和特征分布
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import re
+import glob
+import json
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from feedback_analyzer import (
+    FeedbackAnalyzer, parse_feedback_file, LABEL_BUY, LABEL_NOT_RECOMMENDED, LABEL_UNKNOWN
+)
+from recommendation_history import RecommendationHistory
+
+
+logger = logging.getLogger(__name__)
+
+# 结果类别
+OUTCOME_TP = 'TP'
+OUTCOME_FP = 'FP'
+OUTCOME_FN = 'FN'
+OUTCOME_TN = 'TN'
+OUTCOME_NO_RECOMMENDATION = 'no_recommendation'  # 找不到当天的推荐，不参与准确率统计
+
+# 参与分布统计的数值特征和布尔特征
+NUMERIC_FEATURES = ['macd_score', 'volume_ratio', 'ma60_distance', 'rsi', 'enhanced_score', 'pass_count']
+FLAG_FEATURES = ['macd_uptrend', 'volume_surge', 'below_ma60', 'risk_passed', 'signal']
+
+
+def load_feedback_history(feedback_dir: str) -> pd.DataFrame:
+    """
+    读取全部反馈文件，合并为规范化的反馈表
+
+    Args:
+        feedback_dir: 反馈文件目录
+
+    Returns:
+        pd.DataFrame: feedback_date、stock_code、label、best_date、note、source_file，
+            按反馈日期排序；无法识别的行记录警告后丢弃
+    """
+    parts = []
+    for path in sorted(glob.glob(os.path.join(feedback_dir, 'tuning_feedback_*.csv'))):
+        match = re.search(r'tuning_feedback_(\d{8})\.csv$', path)
+        if not match:
+            continue
+        try:
+            df = parse_feedback_file(path)
+        except Exception as e:
+            logger.warning(f"读取反馈文件失败 {os.path.basename(path)}: {e}")
+            continue
+        df.insert(0, 'feedback_date', match.group(1))
+        df['source_file'] = os.path.basename(path)
+        parts.append(df)
+
+    if not parts:
+        return pd.DataFrame(columns=['feedback_date', 'stock_code', 'label', 'best_date', 'note', 'source_file'])
+
+    table = pd.concat(parts, ignore_index=True).rename(columns={'stock': 'stock_code'})
+    unknown = table['label'] == LABEL_UNKNOWN
+    for _, row in table[unknown].iterrows():
+        logger.warning(f"无法识别的反馈 {row['source_file']}: {row['stock_code']} -> {row['text']}")
+    table = table[~unknown].drop(columns='text').reset_index(drop=True)
+
+    # 同一反馈日期重复填写的股票以最后一条为准
+    table = table.drop_duplicates(['feedback_date', 'stock_code'], keep='last').reset_index(drop=True)
+    logger.info(f"读取 {len(parts)} 个反馈文件, 共 {len(table)} 条反馈"
+                f"（应该推荐 {(table['label'] == LABEL_BUY).sum()}, "
+                f"不应推荐 {(table['label'] == LABEL_NOT_RECOMMENDED).sum()}）")
+    return table
+
+
+def attach_recommendations(table: pd.DataFrame, analyzer: FeedbackAnalyzer) -> pd.DataFrame:
+    """
+    关联每条反馈在反馈日期当天是否被推荐，并标出结果类别
+
+    推荐历史库一次查询反馈日期区间内的全部推荐；历史库中没有的日期逐个读取报告文件。
+
+    Args:
+        table: load_feedback_history 返回的反馈表
+        analyzer: 反馈分析器（提供推荐目录和报告文件读取）
+
+    Returns:
+        pd.DataFrame: 增加 has_recommendation、was_recommended、outcome 列
+    """
+    table = table.copy()
+    feedback_dates = sorted(table['feedback_date'].unique())
+    recommended = pd.DataFrame(columns=['report_date', 'stock_code'])
+
+    history_path = os.path.join(analyzer.recommendation_dir, 'recommendation_history.db')
+    if feedback_dates and os.path.exists(history_path):
+        try:
+            with RecommendationHistory(history_path) as history:
+                recommended = history.to_frame(feedback_dates[0], feedback_dates[-1])[['report_date', 'stock_code']]
+        except Exception as e:
+            logger.warning(f"查询推荐历史库失败: {str(e)}，改为读取报告文件")
+
+    known_dates = set(recommended['report_date'])
+    extra = []
+    for date_str in feedback_dates:
+        if date_str in known_dates:
+            continue
+        stocks = analyzer.load_recommended_stocks(date_str)
+        if stocks is None:
+            logger.warning(f"未找到 {date_str} 的推荐，该日反馈不参与准确率统计")
+            continue
+        known_dates.add(date_str)
+        extra.append(pd.DataFrame({'report_date': date_str, 'stock_code': sorted(stocks)}))
+    if extra:
+        recommended = pd.concat([recommended] + extra, ignore_index=True)
+
+    keys = pd.MultiIndex.from_frame(table[['feedback_date', 'stock_code']])
+    recommended_keys = pd.MultiIndex.from_frame(recommended[['report_date', 'stock_code']].astype(str))
+    table['has_recommendation'] = table['feedback_date'].isin(known_dates)
+    table['was_recommended'] = keys.isin(recommended_keys)
+
+    should = (table['label'] == LABEL_BUY).to_numpy()
+    was = table['was_recommended'].to_numpy()
+    table['outcome'] = np.where(
+        table['has_recommendation'],
+        np.select([should & was, ~should & was, should & ~was], [OUTCOME_TP, OUTCOME_FP, OUTCOME_FN], OUTCOME_TN),
+        OUTCOME_NO_RECOMMENDATION
+    )
+    return table
+
+
+def compute_metrics(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    向量化计算每个反馈日期及全部历史的混淆矩阵和准确率指标
+
+    Args:
+        table: attach_recommendations 返回的反馈表
+
+    Returns:
+        pd.DataFrame: 索引为反馈日期，最后一行 'all' 为全部历史汇总；列为 true_positives、
+            false_positives、false_negatives、true_negatives、total_feedback、precision、recall、
+            f1_score、accuracy
+    """
+    scored = table[table['outcome'] != OUTCOME_NO_RECOMMENDATION]
+    counts = pd.crosstab(scored['feedback_date'], scored['outcome']).reindex(
+        columns=[OUTCOME_TP, OUTCOME_FP, OUTCOME_FN, OUTCOME_TN], fill_value=0)
+    counts.loc['all'] = counts.sum()
+    counts.columns = ['true_positives', 'false_positives', 'false_negatives', 'true_negatives']
+
+    tp, fp, fn, tn = (counts[column].to_numpy(dtype=float) for column in counts.columns)
+    total = tp + fp + fn + tn
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1_score = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        accuracy = np.where(total > 0, (tp + tn) / total, 0.0)
+
+    metrics = counts.copy()
+    metrics['total_feedback'] = total.astype(int)
+    metrics['precision'] = precision
+    metrics['recall'] = recall
+    metrics['f1_score'] = f1_score
+    metrics['accuracy'] = accuracy
+    metrics.index.name = 'feedback_date'
+    return metrics
+
+
+def attach_features(table: pd.DataFrame, analyzer) -> pd.DataFrame:
+    """
+    批量提取每条反馈的技术指标特征（应该推荐取最佳买入日，不应推荐取反馈日期）
+
+    Args:
+        table: 反馈表
+        analyzer: EnhancedFeedbackAnalyzer（经过指标缓存/分析服务计算特征）
+
+    Returns:
+        pd.DataFrame: 增加 feature_status 及特征列
+    """
+    pairs = pd.DataFrame({
+        'stock_code': table['stock_code'],
+        'target_date': table['best_date'].where(table['label'] == LABEL_BUY, table['feedback_date']),
+    })
+    features = analyzer.calculate_features_batch(pairs)
+    features = features.drop(columns=['stock_code', 'target_date']).rename(
+        columns={'status': 'feature_status', 'date': 'feature_date'})
+    return table.join(features)
+
+
+def feature_distributions(table: pd.DataFrame) -> Dict[str, Dict]:
+    """
+    按结果类别和反馈标签统计特征分布（一次 groupby 完成）
+
+    Args:
+        table: attach_features 返回的反馈表（只统计特征提取成功的行）
+
+    Returns:
+        Dict: {'by_outcome': {类别: {特征: 统计}}, 'by_label': {...}}；数值特征给出
+            count/mean/std/min/25%/50%/75%/max，布尔特征给出满足比例
+    """
+    valid = table[table['feature_status'] == 'ok']
+    numeric = valid[NUMERIC_FEATURES].astype(float)
+    flags = valid[FLAG_FEATURES].astype(bool)
+
+    result = {}
+    for key, group_column in (('by_outcome', 'outcome'), ('by_label', 'label')):
+        keys = valid[group_column]
+        described = numeric.groupby(keys).describe()
+        rates = flags.groupby(keys).mean()
+        groups = {}
+        for group in described.index:
+            stats = {feature: _clean_stats(described.loc[group, feature].to_dict()) for feature in NUMERIC_FEATURES}
+            stats['rates'] = {flag: round(float(rates.loc[group, flag]), 4) for flag in FLAG_FEATURES}
+            groups[group] = stats
+        result[key] = groups
+    return result
+
+
+def _clean_stats(stats: Dict) -> Dict:
+    """统计值保留4位小数，NaN转换为None（便于写入JSON）"""
+    return {name: (None if pd.isna(value) else round(float(value), 4)) for name, value in stats.items()}
+
+
+def run_backfill(output_dir: str = None, with_features: bool = True,
+                 indicator_cache_dir: str = None, feedback_dir: str = 'turning_feedback',
+                 recommendation_dir: str = 'recommendations') -> Optional[Dict]:
+    """
+    回放全部反馈历史
+
+    Args:
+        output_dir: 输出目录，默认 logs/
+        with_features: 是否提取特征并统计特征分布
+        indicator_cache_dir: 磁盘指标缓存目录
+        feedback_dir: 反馈文件目录
+        recommendation_dir: 推荐报告目录
+
+    Returns:
+        Dict: 报告内容，没有反馈文件时返回None
+    """
+    output_dir = output_dir or os.path.join(os.path.dirname(__file__), 'logs')
+    os.makedirs(output_dir, exist_ok=True)
+
+    if with_features:
+        from enhanced_feedback_analyzer import EnhancedFeedbackAnalyzer
+        analyzer = EnhancedFeedbackAnalyzer(feedback_dir=feedback_dir, recommendation_dir=recommendation_dir,
+                                            indicator_cache_dir=indicator_cache_dir)
+    else:
+        analyzer = FeedbackAnalyzer(feedback_dir=feedback_dir, recommendation_dir=recommendation_dir)
+
+    table = load_feedback_history(analyzer.feedback_dir)
+    if table.empty:
+        logger.warning("未找到反馈文件")
+        return None
+
+    table = attach_recommendations(table, analyzer)
+    metrics = compute_metrics(table)
+
+    report = {
+        'feedback_files': int(table['source_file'].nunique()),
+        'total_feedback': len(table),
+        'dates_without_recommendation': sorted(
+            table.loc[table['outcome'] == OUTCOME_NO_RECOMMENDATION, 'feedback_date'].unique().tolist()),
+        'metrics': {date: {name: (round(float(value), 4) if isinstance(value, float) else int(value))
+                           for name, value in row.items()}
+                    for date, row in metrics.astype(object).iterrows()},
+    }
+
+    if with_features:
+        table = attach_features(table, analyzer)
+        report['feature_status'] = table['feature_status'].value_counts().to_dict()
+        report['feature_distributions'] = feature_distributions(table)
+        analyzer.frame_cache.log_stats()
+
+    table.to_csv(os.path.join(output_dir, 'feedback_history.csv'), index=False, encoding='utf-8-sig')
+    with open(os.path.join(output_dir, 'feedback_backfill_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    overall = report['metrics'].get('all')
+    if overall:
+        logger.info(f"全部历史: TP {overall['true_positives']}, FP {overall['false_positives']}, "
+                    f"FN {overall['false_negatives']}, TN {overall['true_negatives']} | "
+                    f"精确率 {overall['precision']:.2%}, 召回率 {overall['recall']:.2%}, F1 {overall['f1_score']:.2%}")
+    logger.info(f"反馈历史已保存到: {output_dir}")
+    return report
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='反馈历史回填：合并全部反馈文件，计算准确率和特征分布')
+    parser.add_argument('--output-dir', help='输出目录（默认 logs/）')
+    parser.add_argument('--no-features', action='store_true', help='只计算准确率，不提取技术指标特征')
+    parser.add_argument('--indicator-cache', metavar='DIR', help='磁盘指标缓存目录')
+    parser.add_argument('--feedback-dir', default='turning_feedback', help='反馈文件目录')
+    parser.add_argument('--recommendation-dir', default='recommendations', help='推荐报告目录')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+
+    try:
+        report = run_backfill(args.output_dir, not args.no_features, args.indicator_cache,
+                              args.feedback_dir, args.recommendation_dir)
+    except FileNotFoundError as e:
+        logger.error(f"初始化分析器失败: {str(e)}")
+        return 1
+    return 0 if report else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,400 @@
+"""
+推荐历史库
+
+把每天的推荐结果追加写入一个SQLite库（recommendations/recommendation_history.db），
+每只推荐股票每天一行，保存全部评分、补充特征明细和买入理由。反馈分析、准确率追踪
+和报告重新生成都从这里按日期或股票代码查询，不再遍历/解析每天的
+.txt/.html/.json/.csv 报告文件。
+
+表结构：
+    runs             每次生成推荐一行（run_id自增，report_date建索引，保存汇总信息）
+    recommendations  每只推荐股票一行（(run_id, rank) 主键，stock_code建索引）
+
+只追加不修改：同一天重新生成推荐会追加一个新的run，查询时取该日期最新的run，
+早先的结果仍保留可查。日期和股票代码查询都走B树索引，复杂度 O(log n)。
+
+使用方法：
+    python recommendation_history.py --backfill              # 从已有JSON/CSV报告导入历史
+    python recommendation_history.py --date 20260210         # 查看某天的推荐
+    python recommendation_history.py --stock sh.600072       # 查看某只股票的推荐记录
+    python recommendation_history.py --regenerate 20260210   # 从历史库重新生成当天报告
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import re
+import glob
+import json
+import sqlite3
+import logging
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'recommendations', 'recommendation_history.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_report_date ON runs (report_date, run_id);
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    rank INTEGER NOT NULL,
+    report_date TEXT NOT NULL,
+    stock_code TEXT NOT NULL,
+    stock_name TEXT,
+    signal_date TEXT,
+    close REAL,
+    macd_score INTEGER,
+    volume_ratio REAL,
+    ma60_distance REAL,
+    rating TEXT,
+    enhanced_score INTEGER,
+    composite_score REAL,
+    enhanced_details TEXT,
+    buy_reason TEXT,
+    PRIMARY KEY (run_id, rank)
+);
+CREATE INDEX IF NOT EXISTS idx_recommendations_stock ON recommendations (stock_code, report_date);
+"""
+
+# recommendations 表中直接对应推荐字典字段的列
+RECORD_COLUMNS = [
+    'stock_code', 'stock_name', 'signal_date', 'close', 'macd_score', 'volume_ratio',
+    'ma60_distance', 'rating', 'enhanced_score', 'composite_score', 'enhanced_details', 'buy_reason'
+]
+
+# 只取每个推荐日期最新一次run的条件（按 idx_runs_report_date 逐行点查）
+LATEST_RUN_CONDITION = (
+    "run_id = (SELECT MAX(r.run_id) FROM runs r WHERE r.report_date = recommendations.report_date)"
+)
+
+
+def _composite_score(rec: Dict[str, Any]) -> Optional[float]:
+    """综合得分（与 daily_recommendation.composite_score 公式一致）"""
+    try:
+        return rec['macd_score'] * 0.3 + rec['volume_ratio'] * 10 + rec['enhanced_score'] * 0.4
+    except (KeyError, TypeError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def _to_int(value) -> Optional[int]:
+    return None if value is None or pd.isna(value) else int(round(value))
+
+
+class RecommendationHistory:
+    """推荐历史库（SQLite）"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Args:
+            db_path: 数据库路径，默认 recommendations/recommendation_history.db
+        """
+        self.db_path = db_path or DEFAULT_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ========== 写入 ==========
+
+    def record(self, report_date: str, recommendations: List[Dict[str, Any]],
+               summary: Dict[str, Any] = None, source: str = 'daily') -> int:
+        """
+        追加一次推荐结果
+
+        Args:
+            report_date: 推荐日期（YYYYMMDD，与报告文件名一致）
+            recommendations: build_recommendations 生成的推荐列表（按排名顺序）
+            summary: 汇总信息
+            source: 来源（daily / pipeline / backfill 等）
+
+        Returns:
+            int: run_id
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (report_date, created_at, source, summary) VALUES (?, ?, ?, ?)",
+                (report_date, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), source,
+                 json.dumps(summary, ensure_ascii=False, default=str) if summary is not None else None)
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO recommendations (run_id, rank, report_date, {', '.join(RECORD_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(RECORD_COLUMNS) + 3))})",
+                [(run_id, rank, report_date,
+                  rec['stock_code'],
+                  rec.get('stock_name'),
+                  str(rec['date'])[:10] if rec.get('date') is not None else None,
+                  _to_float(rec.get('close')),
+                  _to_int(rec.get('macd_score')),
+                  _to_float(rec.get('volume_ratio')),
+                  _to_float(rec.get('ma60_distance')),
+                  rec.get('rating'),
+                  _to_int(rec.get('enhanced_score')),
+                  _to_float(_composite_score(rec)),
+                  json.dumps(rec.get('enhanced_details') or {}, ensure_ascii=False, default=float),
+                  rec.get('buy_reason'))
+                 for rank, rec in enumerate(recommendations, 1)]
+            )
+        logger.info(f"推荐历史已记录: {report_date} ({len(recommendations)} 只, run_id={run_id})")
+        return run_id
+
+    def has_date(self, report_date: str) -> bool:
+        """该日期是否已有记录"""
+        row = self.conn.execute("SELECT 1 FROM runs WHERE report_date = ? LIMIT 1", (report_date,)).fetchone()
+        return row is not None
+
+    def backfill(self, recommendation_dir: str) -> Dict[str, int]:
+        """
+        从已有报告文件导入历史（已有记录的日期跳过）
+
+        优先读取 recommendation_YYYYMMDD.json（含汇总和补充特征明细），没有JSON时读取CSV。
+
+        Args:
+            recommendation_dir: 报告目录
+
+        Returns:
+            Dict: imported（导入天数）、skipped（已存在跳过天数）、failed（读取失败天数）
+        """
+        stats = {'imported': 0, 'skipped': 0, 'failed': 0}
+        dates = sorted({m.group(1) for path in glob.glob(os.path.join(recommendation_dir, 'recommendation_*'))
+                        for m in [re.search(r'recommendation_(\d{8})\.(json|csv)$', path)] if m})
+
+        for report_date in dates:
+            if self.has_date(report_date):
+                stats['skipped'] += 1
+                continue
+            try:
+                recommendations, summary = _read_report_files(recommendation_dir, report_date)
+            except Exception as e:
+                logger.warning(f"读取 {report_date} 的推荐报告失败: {e}")
+                stats['failed'] += 1
+                continue
+            self.record(report_date, recommendations, summary, source='backfill')
+            stats['imported'] += 1
+
+        logger.info(f"历史导入完成: 导入 {stats['imported']} 天, 跳过 {stats['skipped']} 天, "
+                    f"失败 {stats['failed']} 天")
+        return stats
+
+    # ========== 查询 ==========
+
+    def _latest_run(self, report_date: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT * FROM runs WHERE report_date = ? ORDER BY run_id DESC LIMIT 1", (report_date,)
+        ).fetchone()
+
+    def dates(self) -> List[str]:
+        """有记录的全部推荐日期（升序）"""
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT report_date FROM runs ORDER BY report_date")]
+
+    def get_day(self, report_date: str) -> Optional[Dict[str, Any]]:
+        """
+        查询某天最新一次的推荐
+
+        Args:
+            report_date: 推荐日期（YYYYMMDD）
+
+        Returns:
+            Dict: date、summary、recommendations（与 recommendation_*.json 结构相同），无记录返回None
+        """
+        run = self._latest_run(report_date)
+        if run is None:
+            return None
+        rows = self.conn.execute(
+            "SELECT * FROM recommendations WHERE run_id = ? ORDER BY rank", (run['run_id'],)
+        ).fetchall()
+        return {
+            'date': report_date,
+            'summary': json.loads(run['summary']) if run['summary'] else {},
+            'recommendations': [_row_to_recommendation(row) for row in rows],
+        }
+
+    def recommended_stocks(self, report_date: str) -> Optional[set]:
+        """某天推荐的股票代码集合，无记录返回None"""
+        run = self._latest_run(report_date)
+        if run is None:
+            return None
+        return {row[0] for row in self.conn.execute(
+            "SELECT stock_code FROM recommendations WHERE run_id = ?", (run['run_id'],))}
+
+    def get_stock(self, stock_code: str) -> pd.DataFrame:
+        """
+        查询某只股票的全部推荐记录（每个推荐日期只取最新一次）
+
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            pd.DataFrame: 按推荐日期升序，含 report_date、rank 及全部评分列
+        """
+        return pd.read_sql_query(
+            f"SELECT report_date, rank, {', '.join(RECORD_COLUMNS)} FROM recommendations "
+            f"WHERE stock_code = ? AND {LATEST_RUN_CONDITION} "
+            "ORDER BY report_date",
+            self.conn, params=(stock_code,)
+        )
+
+    def to_frame(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        导出日期区间内的推荐记录（每个推荐日期只取最新一次）
+
+        Args:
+            start_date: 起始日期（YYYYMMDD，含），None表示不限制
+            end_date: 结束日期（YYYYMMDD，含），None表示不限制
+        """
+        return pd.read_sql_query(
+            f"SELECT report_date, rank, {', '.join(RECORD_COLUMNS)} FROM recommendations "
+            "WHERE report_date BETWEEN ? AND ? "
+            f"AND {LATEST_RUN_CONDITION} "
+            "ORDER BY report_date, rank",
+            self.conn, params=(start_date or '00000000', end_date or '99999999')
+        )
+
+
+def _row_to_recommendation(row: sqlite3.Row) -> Dict[str, Any]:
+    """把数据库行还原成推荐字典（build_recommendations 的格式）"""
+    return {
+        'stock_code': row['stock_code'],
+        'stock_name': row['stock_name'],
+        'date': row['signal_date'],
+        'close': row['close'],
+        'macd_score': row['macd_score'],
+        'volume_ratio': row['volume_ratio'],
+        'ma60_distance': row['ma60_distance'],
+        'rating': row['rating'],
+        'enhanced_score': row['enhanced_score'],
+        'enhanced_details': json.loads(row['enhanced_details']) if row['enhanced_details'] else {},
+        'buy_reason': row['buy_reason'],
+    }
+
+
+def _read_report_files(recommendation_dir: str, report_date: str):
+    """读取某天的JSON报告（没有时读取CSV报告），返回 (推荐列表, 汇总)"""
+    json_path = os.path.join(recommendation_dir, f'recommendation_{report_date}.json')
+    if os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data['recommendations'], data.get('summary')
+
+    csv_path = os.path.join(recommendation_dir, f'recommendation_{report_date}.csv')
+    df = pd.read_csv(csv_path, encoding='utf-8-sig')
+    recommendations = [{
+        'stock_code': row['股票代码'],
+        'stock_name': row['股票名称'],
+        'date': row['信号日期'],
+        'close': row['收盘价'],
+        'macd_score': row['MACD评分'],
+        'volume_ratio': row['成交量比率'],
+        'ma60_distance': row['MA60距离%'],
+        'rating': row['评级'],
+        'enhanced_score': row['补充特征分'],
+        'enhanced_details': {},
+        'buy_reason': str(row['买入理由']).replace(' | ', '\n   '),
+    } for _, row in df.iterrows()]
+    return recommendations, None
+
+
+def regenerate_reports(report_date: str, db_path: str = None, output_dir: str = None) -> bool:
+    """
+    从历史库重新生成某天的推荐报告（文本/HTML/JSON/CSV）
+
+    Args:
+        report_date: 推荐日期（YYYYMMDD）
+        db_path: 数据库路径
+        output_dir: 输出目录，默认 RecommendationConfig.OUTPUT_DIR
+
+    Returns:
+        bool: 是否生成成功
+    """
+    # 报告格式化依赖推荐模块，只在需要时导入
+    from daily_recommendation import write_reports
+
+    with RecommendationHistory(db_path) as history:
+        day = history.get_day(report_date)
+    if day is None:
+        logger.error(f"历史库中没有 {report_date} 的推荐")
+        return False
+
+    write_reports(day['recommendations'], day['summary'], datetime.strptime(report_date, '%Y%m%d'),
+                  output_dir, record_history=False)
+    return True
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='推荐历史库：导入、查询和重新生成报告')
+    parser.add_argument('--db', help='数据库路径（默认 recommendations/recommendation_history.db）')
+    parser.add_argument('--backfill', action='store_true', help='从已有JSON/CSV报告导入历史')
+    parser.add_argument('--recommendation-dir', default=os.path.dirname(DEFAULT_DB_PATH),
+                        help='导入时读取的报告目录')
+    parser.add_argument('--date', help='查看某天的推荐（YYYYMMDD）')
+    parser.add_argument('--stock', help='查看某只股票的推荐记录')
+    parser.add_argument('--regenerate', metavar='DATE', help='从历史库重新生成某天的报告（YYYYMMDD）')
+    parser.add_argument('--output-dir', help='重新生成报告的输出目录')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+
+    if args.regenerate:
+        return 0 if regenerate_reports(args.regenerate, args.db, args.output_dir) else 1
+
+    with RecommendationHistory(args.db) as history:
+        if args.backfill:
+            history.backfill(args.recommendation_dir)
+
+        if args.date:
+            day = history.get_day(args.date)
+            if day is None:
+                print(f"没有 {args.date} 的推荐记录")
+            else:
+                for rank, rec in enumerate(day['recommendations'], 1):
+                    print(f"{rank:>3}. {rec['stock_code']} {rec['stock_name']}  信号日期 {rec['date']}  "
+                          f"{rec['rating']}  MACD {rec['macd_score']:.0f}  量比 {rec['volume_ratio']:.2f}  "
+                          f"补充 {rec['enhanced_score']:.0f}")
+
+        if args.stock:
+            df = history.get_stock(args.stock)
+            if df.empty:
+                print(f"{args.stock} 没有推荐记录")
+            else:
+                print(df[['report_date', 'rank', 'signal_date', 'rating', 'macd_score',
+                          'volume_ratio', 'enhanced_score', 'composite_score']].to_string(index=False))
+
+        if not (args.backfill or args.date or args.stock):
+            dates = history.dates()
+            print(f"历史库: {history.db_path}")
+            print(f"推荐日期: {len(dates)} 天" + (f"（{dates[0]} ~ {dates[-1]}）" if dates else ""))
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -27,6 +27,9 @@ import json
 import numpy as np
 from datetime import datetime
 from enhanced_feedback_analyzer import EnhancedFeedbackAnalyzer
+from analysis_client import AnalysisClient
+from threshold_search import load_case_matrix
+from memory_tracking import mark_phase, start_profiling, finish_profiling, default_report_path
 
 # 配置日志
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -43,8 +46,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """主函数"""
+def main(use_daemon: bool = False, indicator_cache_dir: str = None, frame_cache_size: int = 64):
+    """
+    主函数
+
+    Args:
+        use_daemon: 优先从常驻分析服务（analysis_daemon.py）提取特征，不可用时本地计算
+        indicator_cache_dir: 磁盘指标缓存目录（多次运行间共享），None表示只使用内存缓存
+        frame_cache_size: 内存中最多缓存的股票指标数
+    """
     logger.info("=" * 80)
     logger.info("📊 增强版反馈分析工具")
     logger.info("=" * 80)
@@ -52,14 +62,26 @@ def main():
     logger.info("")
 
     # 1. 创建增强版分析器
+    daemon_client = None
+    if use_daemon:
+        daemon_client = AnalysisClient()
+        if daemon_client.is_available():
+            logger.info(f"✅ 使用常驻分析服务: {daemon_client.base_url}")
+        else:
+            logger.warning(f"⚠️  分析服务不可用({daemon_client.base_url})，改为本地计算特征")
+            daemon_client = None
+
     try:
-        analyzer = EnhancedFeedbackAnalyzer(learning_rate=0.15)
+        analyzer = EnhancedFeedbackAnalyzer(learning_rate=0.15, daemon_client=daemon_client,
+                                            frame_cache_size=frame_cache_size,
+                                            indicator_cache_dir=indicator_cache_dir)
     except FileNotFoundError as e:
         logger.error(f"❌ 初始化分析器失败: {str(e)}")
         logger.info("请确保数据目录存在")
         return False
 
     # 2. 查找反馈文件
+    mark_phase('read_feedback')
     feedback_file = analyzer.get_latest_feedback_file()
     if not feedback_file:
         logger.error("❌ 未找到反馈文件")
@@ -89,6 +111,7 @@ def main():
     logger.info(f"反馈日期: {date_str}")
 
     # 5. 分析准确性
+    mark_phase('accuracy')
     logger.info("🎯 分析推荐准确性...")
     accuracy = analyzer.analyze_accuracy(feedback_df, date_str)
 
@@ -117,6 +140,7 @@ def main():
     logger.info("")
 
     # 6. 【新增】逐支股票Gap分析
+    mark_phase('gap_analysis')
     logger.info("🔍 进行逐支股票Gap分析...")
     gap_analysis = analyzer.analyze_stock_gaps(feedback_df, date_str)
 
@@ -172,9 +196,15 @@ def main():
         logger.info("")
 
     # 7. 【新增】特征模式分析
+    mark_phase('tuning')
     if gap_analysis:
         logger.info("📊 分析特征模式...")
-        pattern_analysis = analyzer.analyze_feature_patterns(gap_analysis)
+        try:
+            case_matrix = load_case_matrix(analyzer)
+        except Exception as e:
+            logger.warning(f"⚠️  构建反馈案例特征矩阵失败: {str(e)}，使用经验规则调整阈值")
+            case_matrix = None
+        pattern_analysis = analyzer.analyze_feature_patterns(gap_analysis, case_matrix)
 
         logger.info("=" * 80)
         logger.info("🎯 特征模式分析结果")
@@ -186,6 +216,12 @@ def main():
             logger.info(f"📌 {param}")
             logger.info(f"   当前阈值: {analysis['current']}")
             logger.info(f"   建议阈值: {analysis['suggested']}")
+            if analysis.get('method') == 'grid_search':
+                current_metrics, best_metrics = analysis['current_metrics'], analysis['best_metrics']
+                logger.info(f"   当前组合: P={current_metrics['precision']:.2%} R={current_metrics['recall']:.2%} "
+                            f"F1={current_metrics['f1_score']:.2%}")
+                logger.info(f"   建议组合: P={best_metrics['precision']:.2%} R={best_metrics['recall']:.2%} "
+                            f"F1={best_metrics['f1_score']:.2%}")
             logger.info(f"   分析结果: {analysis['reason']}")
             logger.info("")
 
@@ -204,7 +240,10 @@ def main():
                 logger.info(f"📌 {adj['parameter']}")
                 logger.info(f"   当前值: {adj['current']}")
                 logger.info(f"   建议值: {adj['suggested']}")
-                logger.info(f"   实际调整: {adj['actual_adjustment']} (学习率: {analyzer.learning_rate})")
+                if adj.get('method') == 'grid_search':
+                    logger.info(f"   实际调整: {adj['actual_adjustment']} (联合网格搜索，整组阈值实测)")
+                else:
+                    logger.info(f"   实际调整: {adj['actual_adjustment']} (学习率: {analyzer.learning_rate})")
                 logger.info(f"   调整幅度: {adj['delta']:+.2f}")
                 logger.info(f"   原因: {adj['reason']}")
                 logger.info(f"   预期影响: {adj['expected_impact']}")
@@ -253,6 +292,7 @@ def main():
         logger.info("")
 
     # 9. 应用调优
+    mark_phase('apply')
     if tuning_recommendations['adjustments']:
         logger.info("✅ 应用调优参数...")
 
@@ -313,7 +353,7 @@ def main():
     logger.info("📝 下次运行推荐工具时将自动使用新的参数配置")
     logger.info("📊 调优配置文件: tuning_config.json")
     if gap_analysis:
-        logger.info("📈 改进历史文件: tuning_history.json")
+        logger.info("📈 改进历史文件: tuning_history.jsonl（总结: tuning_history_summary.json）")
     logger.info("🔄 如需恢复默认配置，删除 tuning_config.json 即可")
     logger.info("=" * 80)
 
@@ -321,11 +361,32 @@ def main():
 
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='增强版反馈分析工具')
+    parser.add_argument('--daemon', action='store_true',
+                        help='使用常驻分析服务（analysis_daemon.py）提取特征，不可用时回退到本地计算')
+    parser.add_argument('--indicator-cache', metavar='DIR',
+                        help='磁盘指标缓存目录，多次运行间共享已计算的技术指标')
+    parser.add_argument('--frame-cache-size', type=int, default=64,
+                        help='内存中最多缓存的股票指标数（默认64）')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='内存分析：记录峰值RSS、各阶段tracemalloc分配位置和单只股票最大分配（运行变慢）')
+    parser.add_argument('--memory-report', help='内存分析报告路径，默认 logs/memory_profile_feedback_<时间>.json')
+    args = parser.parse_args()
+
+    if args.profile_memory:
+        start_profiling('feedback', args.memory_report or default_report_path(log_dir, 'feedback'))
+
     try:
-        success = main()
-        sys.exit(0 if success else 1)
+        success = main(use_daemon=args.daemon, indicator_cache_dir=args.indicator_cache,
+                       frame_cache_size=args.frame_cache_size)
     except Exception as e:
         logger.error(f"❌ 执行失败: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
-        sys.exit(1)
+        success = False
+    finally:
+        # 失败时也停止内存分析并写出报告
+        finish_profiling()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,78 @@
+"""
+analysis_daemon 测试：调优配置只在启动和刷新时加载，特征提取按请求配置计算
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from analysis_daemon import AnalysisService, RequestError
+from daily_recommendation import RecommendationConfig
+from synthetic_market import generate_market
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=3, n_days=120)
+    tuning_path = tmp_path / 'tuning_config.json'
+    tuning_path.write_text(json.dumps({'MIN_ENHANCED_SCORE': 21}), encoding='utf-8')
+
+    # 测试结束后恢复被调优配置改写的类属性
+    for name in ('TUNING_CONFIG_PATH', 'MIN_ENHANCED_SCORE'):
+        monkeypatch.setattr(RecommendationConfig, name, getattr(RecommendationConfig, name))
+    monkeypatch.setattr(RecommendationConfig, 'TUNING_CONFIG_PATH', str(tuning_path))
+    return AnalysisService(data_dir), tuning_path
+
+
+def test_tuning_loaded_at_startup(service):
+    assert RecommendationConfig.MIN_ENHANCED_SCORE == 21
+
+
+def test_recommendations_do_not_reload_tuning(service, monkeypatch):
+    svc, _ = service
+    calls = []
+    monkeypatch.setattr(RecommendationConfig, 'load_tuning_config', classmethod(lambda cls: calls.append(1)))
+
+    svc.recommendations()
+    svc.recommendations()
+    assert calls == []
+
+
+def test_refresh_reloads_only_changed_tuning(service):
+    svc, tuning_path = service
+    assert not svc.reload_tuning(force=False)
+
+    tuning_path.write_text(json.dumps({'MIN_ENHANCED_SCORE': 27}), encoding='utf-8')
+    stat = os.stat(tuning_path)
+    os.utime(tuning_path, (stat.st_atime, stat.st_mtime + 10))
+
+    svc.refresh()
+    assert RecommendationConfig.MIN_ENHANCED_SCORE == 27
+
+
+def test_features_use_request_config(service):
+    svc, _ = service
+    entry = next(svc.cache.iter_entries())
+    dates = pd.to_datetime(entry.frame['date']).dt.strftime('%Y%m%d').iloc[70:110].tolist()
+    items = [[entry.stock_code, date] for date in dates]
+
+    default = svc.features(items)['features']
+    overrides = {'VOLUME_RATIO_THRESHOLD': 0.0, 'MACD_SCORE_THRESHOLD': 0,
+                 'RATING_THRESHOLDS': {'A': 0, 'B': 0, 'C': 0}}
+    relaxed = svc.features(items, filter_mode='loose', overrides=overrides)['features']
+
+    assert all(f['volume_surge'] and f['macd_uptrend'] and f['rating'] == 'A' for f in relaxed)
+    assert any(not f['volume_surge'] for f in default)
+    assert [f['enhanced_score'] for f in relaxed] == [f['enhanced_score'] for f in default]
+
+    # 指标参数覆盖时基于原始数据重新计算指标
+    window = svc.features(items, overrides={'VOLUME_BASELINE_DAYS': 3})['features']
+    assert [f['volume_ratio'] for f in window] != [f['volume_ratio'] for f in default]
+
+    with pytest.raises(RequestError, match='NOT_A_PARAM'):
+        svc.features(items, overrides={'NOT_A_PARAM': 1})
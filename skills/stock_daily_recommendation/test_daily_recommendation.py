@@ -0,0 +1,129 @@
+"""
+daily_recommendation 测试：流式前N筛选与 select_recommendations 一致、内存信号表与CSV一致、按需计算的补充特征明细
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from config import Config
+from daily_recommendation import (EnhancedDetailsLookup, RecommendationConfig, StreamingRecommendationSelector,
+                                  build_recommendations, select_recommendations)
+from market_cache import MarketCache
+from stock_trend_analyzer import analyze_all_stocks
+from synthetic_market import generate_market
+
+
+@pytest.fixture(scope='module')
+def scan(tmp_path_factory):
+    """合成行情扫描一次，同时通过回调把每只股票的结果流式交给筛选器"""
+    root = tmp_path_factory.mktemp('market')
+    data_dir = str(root / 'data')
+    generate_market(data_dir, n_stocks=40, n_days=250)
+    results = []
+    summary = analyze_all_stocks(data_dir, str(root / 'out'), enable_future_validation=False,
+                                 return_signal_table=True, on_stock_result=results.append,
+                                 use_profiles=False)
+    csv_path, = glob.glob(os.path.join(summary['output_dir'], 'trend_signals_*.csv'))
+    return summary['signal_table'], results, csv_path, data_dir
+
+
+def _ranked(df: pd.DataFrame) -> pd.DataFrame:
+    """按综合得分排序（得分相同按代码），忽略同分时的先后"""
+    return (df.sort_values(['综合得分', '股票代码'], ascending=[False, True])
+              .reset_index(drop=True))
+
+
+def _assert_same_top(top: pd.DataFrame, expected: pd.DataFrame, eligible: pd.DataFrame):
+    """前N只相同；第N名有并列时两边都是从并列股票中任取，只要求取自同一组"""
+    assert top['综合得分'].tolist() == expected['综合得分'].tolist()
+    cutoff = expected['综合得分'].min()
+    above = lambda df: _ranked(df[df['综合得分'] > cutoff])
+    pd.testing.assert_frame_equal(above(top), above(expected[top.columns]), check_dtype=False)
+
+    tied = eligible[eligible['综合得分'] == cutoff].set_index('股票代码')[top.columns.drop('股票代码')]
+    for _, row in top[top['综合得分'] == cutoff].iterrows():
+        pd.testing.assert_series_equal(row.drop('股票代码'), tied.loc[row['股票代码']],
+                                       check_dtype=False, check_names=False)
+
+
+@pytest.mark.parametrize('min_rating, min_score, lookback_days, top_n', [
+    ('B', 20, 7, 20),
+    ('B', 0, 60, 5),
+    ('A', 0, 120, 3),
+    (None, 10, 30, 10),
+])
+def test_streaming_matches_select_recommendations(scan, monkeypatch, min_rating, min_score, lookback_days, top_n):
+    signal_table, results, _, _ = scan
+    monkeypatch.setattr(RecommendationConfig, 'MIN_RATING', min_rating)
+    monkeypatch.setattr(RecommendationConfig, 'MIN_ENHANCED_SCORE', min_score)
+    monkeypatch.setattr(RecommendationConfig, 'SIGNAL_LOOKBACK_DAYS', lookback_days)
+    monkeypatch.setattr(RecommendationConfig, 'TOP_N_STOCKS', top_n)
+    as_of = pd.Timestamp(Config.SYNTHETIC_END_DATE)
+
+    eligible, expected = select_recommendations(signal_table, as_of=as_of)
+    selector = StreamingRecommendationSelector(as_of=as_of)
+    for result in results:
+        selector.offer_stock(result)
+    top = selector.top_stocks()
+
+    assert len(top) == len(expected) > 0
+    _assert_same_top(top, expected, eligible)
+    assert selector.rating_distribution() == eligible['评级'].value_counts().to_dict()
+
+
+def _loosen(monkeypatch):
+    monkeypatch.setattr(RecommendationConfig, 'MIN_ENHANCED_SCORE', 0)
+    monkeypatch.setattr(RecommendationConfig, 'SIGNAL_LOOKBACK_DAYS', 60)
+    monkeypatch.setattr(RecommendationConfig, 'TOP_N_STOCKS', 10)
+
+
+def test_in_memory_table_matches_csv(scan, monkeypatch):
+    """推荐直接使用扫描返回的带类型信号表，结果与回读 trend_signals_*.csv 相同"""
+    signal_table, _, csv_path, _ = scan
+    _loosen(monkeypatch)
+    as_of = pd.Timestamp(Config.SYNTHETIC_END_DATE)
+    from_csv = pd.read_csv(csv_path, encoding=Config.CSV_ENCODING)
+
+    assert pd.api.types.is_datetime64_any_dtype(signal_table['信号日期'])
+    pd.testing.assert_frame_equal(signal_table.assign(信号日期=signal_table['信号日期'].dt.strftime('%Y-%m-%d')),
+                                  from_csv, check_dtype=False)
+    for memory, disk in zip(select_recommendations(signal_table, as_of=as_of),
+                            select_recommendations(from_csv, as_of=as_of)):
+        assert len(memory) > 0
+        pd.testing.assert_frame_equal(memory, disk, check_dtype=False)
+
+
+def test_details_lookup_matches_detector(scan):
+    """缓存和CSV两种来源点查的补充特征明细，与扫描时检测器给出的明细相同"""
+    _, results, _, data_dir = scan
+    cache = MarketCache(data_dir)
+    cache.load()
+    lookups = [EnhancedDetailsLookup(cache=cache), EnhancedDetailsLookup(data_dir=data_dir)]
+
+    checked = 0
+    for result in results[::3]:
+        for signal in result['signals'][::4]:
+            for lookup in lookups:
+                assert lookup.get(result['stock_code'], signal['date']) == signal['enhanced_details']
+            checked += 1
+    assert checked > 0
+
+    code = results[0]['stock_code']
+    assert lookups[1].get(code, '2000-01-03') == {}
+    assert lookups[1].get('sh.699999', Config.SYNTHETIC_END_DATE) == {}
+
+
+def test_buy_reasons_include_details(scan, monkeypatch):
+    signal_table, _, _, data_dir = scan
+    _loosen(monkeypatch)
+    _, top = select_recommendations(signal_table, as_of=pd.Timestamp(Config.SYNTHETIC_END_DATE))
+
+    recommendations = build_recommendations(top, EnhancedDetailsLookup(data_dir=data_dir))
+
+    assert len(recommendations) == len(top) > 0
+    assert all(r['enhanced_details'] for r in recommendations)
@@ -0,0 +1,203 @@
+"""
+enhanced_feedback_analyzer 测试：指标缓存、批量特征提取、与信号检测器一致的特征
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import Config
+from enhanced_feedback_analyzer import (EnhancedFeedbackAnalyzer, IndicatorFrameCache, MAX_DATE_GAP_DAYS,
+                                        STATUS_MISSING_STOCK, STATUS_OK, STATUS_OUT_OF_RANGE,
+                                        extract_features_at, extract_features_batch, feature_row_to_dict)
+from signal_detector import (calculate_enhanced_score, calculate_macd_score, check_below_ma60,
+                             check_risk_control, check_volume_surge, detect_uptrend_signals, get_rating)
+from synthetic_market import generate_market
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = str(tmp_path / 'data')
+    generate_market(path, n_stocks=4, n_days=150)
+    return path
+
+
+def _stock_codes(data_dir):
+    return [os.path.basename(path).split('_')[0] for path in sorted(glob.glob(os.path.join(data_dir, '*.csv')))]
+
+
+def test_cached_frames_match_uncached(data_dir, tmp_path):
+    disk_dir = str(tmp_path / 'indicator_cache')
+    analyzer = EnhancedFeedbackAnalyzer(data_dir=data_dir, frame_cache_size=2, indicator_cache_dir=disk_dir)
+    codes = _stock_codes(data_dir)
+
+    for code in codes + codes:
+        path = glob.glob(os.path.join(data_dir, f'{code}_*.csv'))[0]
+        expected = EnhancedFeedbackAnalyzer._read_indicator_frame(path)
+        pd.testing.assert_frame_equal(analyzer.load_stock_data(code), expected)
+    assert analyzer.frame_cache.stats == {'hits': 0, 'disk_hits': 4, 'misses': 4, 'evictions': 6}
+
+    # 另一个分析器实例共享磁盘缓存；纯数字代码与带前缀的代码解析到同一文件
+    other = EnhancedFeedbackAnalyzer(data_dir=data_dir, indicator_cache_dir=disk_dir)
+    pd.testing.assert_frame_equal(other.load_stock_data(codes[0].split('.')[-1]),
+                                  analyzer.load_stock_data(codes[0]))
+    assert other.frame_cache.stats['disk_hits'] == 1
+    assert other.load_stock_data('sh.699999') is None
+
+
+def test_memory_lru_hits(data_dir):
+    analyzer = EnhancedFeedbackAnalyzer(data_dir=data_dir, frame_cache_size=2)
+    a, b, c = _stock_codes(data_dir)[:3]
+
+    for code in (a, b, a, c, a, b):
+        analyzer.load_stock_data(code)
+
+    # b 在加载 c 时被淘汰（a 刚被使用过）
+    assert analyzer.frame_cache.stats == {'hits': 2, 'disk_hits': 0, 'misses': 4, 'evictions': 2}
+
+
+def test_disk_cache_invalidated_when_csv_changes(data_dir, tmp_path):
+    disk_dir = str(tmp_path / 'indicator_cache')
+    path = sorted(glob.glob(os.path.join(data_dir, '*.csv')))[0]
+    IndicatorFrameCache(disk_dir=disk_dir).get(path, EnhancedFeedbackAnalyzer._read_indicator_frame)
+
+    df = pd.read_csv(path)
+    df.iloc[:-1].to_csv(path, index=False, encoding='utf-8-sig')
+    cache = IndicatorFrameCache(disk_dir=disk_dir)
+    frame = cache.get(path, EnhancedFeedbackAnalyzer._read_indicator_frame)
+
+    assert cache.stats['misses'] == 1 and cache.stats['disk_hits'] == 0
+    assert len(frame) == len(df) - 1
+    assert not glob.glob(os.path.join(disk_dir, '*.tmp'))
+
+
+def test_disk_cache_keyed_on_content_not_mtime(data_dir, tmp_path):
+    disk_dir = str(tmp_path / 'indicator_cache')
+    path = sorted(glob.glob(os.path.join(data_dir, '*.csv')))[0]
+    IndicatorFrameCache(disk_dir=disk_dir).get(path, EnhancedFeedbackAnalyzer._read_indicator_frame)
+
+    # 重新检出只改变修改时间，缓存仍然有效
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 3600))
+    cache = IndicatorFrameCache(disk_dir=disk_dir)
+    cache.get(path, EnhancedFeedbackAnalyzer._read_indicator_frame)
+    assert cache.stats['disk_hits'] == 1
+
+    # 大小不变、末尾内容改变（最后一天成交额被修正），缓存失效；修改时间保持不变
+    with open(path, 'rb') as f:
+        content = f.read()
+    digit = content.rstrip().rfind(b',') - 1
+    patched = content[:digit] + (b'1' if content[digit:digit + 1] != b'1' else b'2') + content[digit + 1:]
+    with open(path, 'wb') as f:
+        f.write(patched)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 3600))
+    cache = IndicatorFrameCache(disk_dir=disk_dir)
+    cache.get(path, EnhancedFeedbackAnalyzer._read_indicator_frame)
+    assert cache.stats['misses'] == 1 and cache.stats['disk_hits'] == 0
+
+
+def _nearest_row(frame: pd.DataFrame, target_date: str) -> int:
+    """原来逐次查找的定位方式：距离最小的交易日，距离相同取较早的一天"""
+    gaps = (frame['date'] - pd.Timestamp(target_date)).abs()
+    return int(gaps.idxmin())
+
+
+def test_batch_matches_single_lookups(data_dir):
+    analyzer = EnhancedFeedbackAnalyzer(data_dir=data_dir)
+    codes = _stock_codes(data_dir)
+    frame = analyzer.load_stock_data(codes[0])
+    first, last = frame['date'].iloc[0], frame['date'].iloc[-1]
+    snapshot = frame.copy()
+
+    targets = [d.strftime('%Y%m%d') for d in pd.date_range(first - pd.Timedelta(days=10),
+                                                         last + pd.Timedelta(days=10), freq='D')]
+    rng = np.random.default_rng(0)
+    pairs = pd.DataFrame({'stock_code': rng.choice(codes[:3] + ['sz.399999'], 200),
+                          'target_date': rng.choice(targets, 200)},
+                         index=rng.permutation(np.arange(1000, 1200)))
+
+    features = extract_features_batch(pairs, analyzer.load_stock_data)
+
+    assert features.index.equals(pairs.index)
+    assert (features['stock_code'] == pairs['stock_code']).all()
+    for index, pair in pairs.iterrows():
+        row = features.loc[index]
+        stock_frame = analyzer.load_stock_data(pair['stock_code'])
+        if stock_frame is None:
+            assert row['status'] == STATUS_MISSING_STOCK
+            continue
+        target = pd.Timestamp(pair['target_date'])
+        tolerance = pd.Timedelta(days=MAX_DATE_GAP_DAYS)
+        if target < stock_frame['date'].iloc[0] - tolerance or target > stock_frame['date'].iloc[-1] + tolerance:
+            assert row['status'] == STATUS_OUT_OF_RANGE
+            assert extract_features_at(stock_frame, pair['stock_code'], pair['target_date']) is None
+            continue
+        assert row['status'] == STATUS_OK
+        single = extract_features_at(stock_frame, pair['stock_code'], pair['target_date'])
+        assert feature_row_to_dict(row) == single
+        expected_row = _nearest_row(stock_frame, pair['target_date'])
+        assert single['date'] == stock_frame['date'].iloc[expected_row].strftime('%Y-%m-%d')
+    assert set(features['status']) == {STATUS_OK, STATUS_OUT_OF_RANGE, STATUS_MISSING_STOCK}
+    pd.testing.assert_frame_equal(frame, snapshot)
+
+
+def test_equidistant_target_takes_earlier_day(data_dir):
+    analyzer = EnhancedFeedbackAnalyzer(data_dir=data_dir)
+    code = _stock_codes(data_dir)[0]
+    frame = analyzer.load_stock_data(code)
+    # 去掉一个周三，周二和周四与它的距离相同
+    wednesday = int(frame.index[(frame['date'].dt.dayofweek == 2)
+                                & (frame['date'].diff().dt.days == 1)
+                                & (frame['date'].diff(-1).dt.days == -1)][5])
+    target = frame['date'].iloc[wednesday]
+    gapped = frame.drop(index=wednesday).reset_index(drop=True)
+
+    result = extract_features_at(gapped, code, target.strftime('%Y%m%d'))
+
+    assert result['date'] == (target - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    assert result['date_diff_days'] == 1
+
+
+def test_features_match_detector(data_dir, monkeypatch):
+    """补充特征分、评级、核心条件、风险项和"当天是否出信号"与逐行检测一致"""
+    for name, value in {'MACD_SCORE_THRESHOLD': 40, 'VOLUME_RATIO_THRESHOLD': 1.2, 'MA_DISTANCE_THRESHOLD': 3.0,
+                        'MAX_SHORT_TERM_GAIN': 4.0, 'MAX_MA20_DEVIATION': 4.0}.items():
+        monkeypatch.setattr(Config, name, value)
+    analyzer = EnhancedFeedbackAnalyzer(data_dir=data_dir)
+    signal_days = risk_days = 0
+
+    for code in _stock_codes(data_dir):
+        frame = analyzer.load_stock_data(code)
+        if len(frame) <= 60:
+            continue
+        pairs = pd.DataFrame({'stock_code': code, 'target_date': frame['date'].dt.strftime('%Y%m%d')})
+        features = extract_features_batch(pairs, analyzer.load_stock_data)
+        signals = {signal['date']: signal for signal in detect_uptrend_signals(frame, Config, False)}
+
+        for i in range(60, len(frame)):
+            row = features.iloc[i]
+            enhanced_score, _ = calculate_enhanced_score(frame, i, Config)
+            risk_passed, risks = check_risk_control(frame, i, Config)
+            expected_flags = {
+                'macd_uptrend': calculate_macd_score(frame, i, Config) >= Config.MACD_SCORE_THRESHOLD,
+                'volume_surge': check_volume_surge(frame, i, Config)[0],
+                'below_ma60': check_below_ma60(frame, i, Config)[0],
+            }
+            result = feature_row_to_dict(row)
+
+            assert result['enhanced_score'] == enhanced_score
+            assert result['rating'] == get_rating(enhanced_score, Config).rstrip('级')
+            assert {name: result[name] for name in expected_flags} == expected_flags
+            assert result['pass_count'] == sum(expected_flags.values())
+            assert result['risk_passed'] == risk_passed
+            assert result['risks'] == [risk.rstrip('0123456789.%天') for risk in risks]
+            assert result['signal'] == (frame['date'].iloc[i] in signals)
+            signal_days += result['signal']
+            risk_days += not risk_passed
+
+    assert signal_days > 0 and risk_days > 0
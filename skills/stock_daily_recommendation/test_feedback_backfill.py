@@ -0,0 +1,121 @@
+"""
+feedback_backfill 测试：反馈文本解析、全部反馈的回放指标与逐个文件分析一致
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import pandas as pd
+import pytest
+
+from feedback_analyzer import (FeedbackAnalyzer, LABEL_BUY, LABEL_NOT_RECOMMENDED, LABEL_UNKNOWN,
+                               parse_feedback_file)
+from feedback_backfill import (OUTCOME_NO_RECOMMENDATION, attach_recommendations, compute_metrics,
+                               load_feedback_history)
+
+FEEDBACK_20260210 = """stock,\tBest recommendation buy day
+sh.603826,\tnot recommended #原本推荐的2月9日价格已经过高
+sh.600072,\t比较合适的买入时间是20260202 #0202刚刚放量阳线
+sz.000056\t20260204
+sh.600727,  #比较合适的买入时间是20260106，买入理由是成交量放大
+sz.301210 Not Recommended
+sz.000719,\t#唯一相对比较适合的买入点是0106，但是 not recommended
+sz.000822,\t20261399
+bj.830799,\t还没想好
+
+sh.603848,\t20260129 # 放量阳线
+"""
+
+FEEDBACK_20260211 = """stock,Best recommendation buy day
+sh.603826,20260211
+sz.000999,not recommended
+sz.000999,20260205
+sh.600000,not recommended
+"""
+
+
+def _write(path, text: str, encoding: str = 'utf-8') -> str:
+    path.write_text(text, encoding=encoding)
+    return str(path)
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    feedback_dir, recommendation_dir = tmp_path / 'turning_feedback', tmp_path / 'recommendations'
+    feedback_dir.mkdir()
+    recommendation_dir.mkdir()
+    _write(feedback_dir / 'tuning_feedback_20260210.csv', FEEDBACK_20260210, encoding='utf-8-sig')
+    _write(feedback_dir / 'tuning_feedback_20260211.csv', FEEDBACK_20260211)
+    _write(feedback_dir / 'tuning_feedback_20260212.csv', "stock,Best recommendation buy day\nsh.600000,20260212\n")
+    for date_str, stocks in (('20260210', ['sh.603826', 'sh.600072', 'sz.000056']),
+                             ('20260211', ['sh.603826', 'sh.600000'])):
+        pd.DataFrame({'股票代码': stocks}).to_csv(recommendation_dir / f'recommendation_{date_str}.csv',
+                                              index=False, encoding='utf-8-sig')
+    return str(feedback_dir), str(recommendation_dir)
+
+
+def test_parse_feedback_file(dirs):
+    feedback_dir, _ = dirs
+    df = parse_feedback_file(f"{feedback_dir}/tuning_feedback_20260210.csv").set_index('stock')
+
+    assert df.loc['sh.603826', ['label', 'note']].tolist() == [LABEL_NOT_RECOMMENDED, '原本推荐的2月9日价格已经过高']
+    assert df.loc['sh.600072', ['label', 'best_date']].tolist() == [LABEL_BUY, '20260202']
+    assert df.loc['sz.000056', ['label', 'best_date']].tolist() == [LABEL_BUY, '20260204']
+    # 日期只写在#之后
+    assert df.loc['sh.600727', ['label', 'best_date']].tolist() == [LABEL_BUY, '20260106']
+    # 空格分隔、大小写不同
+    assert df.loc['sz.301210', 'label'] == LABEL_NOT_RECOMMENDED
+    assert df.loc['sz.000719', 'label'] == LABEL_NOT_RECOMMENDED
+    assert pd.isna(df.loc['sz.000719', 'best_date'])
+    # 无效日期和无法识别的文本
+    assert df.loc['sz.000822', 'label'] == LABEL_UNKNOWN
+    assert df.loc['bj.830799', 'label'] == LABEL_UNKNOWN
+    assert df.loc['sh.603848', ['best_date', 'note']].tolist() == ['20260129', '放量阳线']
+    assert len(df) == 9
+
+
+def test_read_feedback_drops_unknown_rows(dirs):
+    feedback_dir, recommendation_dir = dirs
+    analyzer = FeedbackAnalyzer(feedback_dir=feedback_dir, recommendation_dir=recommendation_dir)
+
+    df = analyzer.read_feedback(f"{feedback_dir}/tuning_feedback_20260210.csv")
+
+    assert list(df.columns) == ['stock', 'Best recommendation buy day', 'note']
+    assert dict(zip(df['stock'], df['Best recommendation buy day'])) == {
+        'sh.603826': 'not recommended', 'sh.600072': '20260202', 'sz.000056': '20260204',
+        'sh.600727': '20260106', 'sz.301210': 'not recommended', 'sz.000719': 'not recommended',
+        'sh.603848': '20260129',
+    }
+
+
+def test_load_history_keeps_last_duplicate(dirs):
+    feedback_dir, _ = dirs
+    table = load_feedback_history(feedback_dir)
+
+    assert table['feedback_date'].tolist() == ['20260210'] * 7 + ['20260211'] * 3 + ['20260212']
+    day = table[table['feedback_date'] == '20260211'].set_index('stock_code')
+    assert day.loc['sz.000999', ['label', 'best_date']].tolist() == [LABEL_BUY, '20260205']
+    assert load_feedback_history(str(dirs[1])).empty
+
+
+def test_backfill_metrics_match_per_file_analysis(dirs):
+    feedback_dir, recommendation_dir = dirs
+    analyzer = FeedbackAnalyzer(feedback_dir=feedback_dir, recommendation_dir=recommendation_dir)
+
+    table = attach_recommendations(load_feedback_history(feedback_dir), analyzer)
+    metrics = compute_metrics(table)
+
+    # 没有推荐的日期不参与统计
+    assert set(table.loc[table['outcome'] == OUTCOME_NO_RECOMMENDATION, 'feedback_date']) == {'20260212'}
+    assert list(metrics.index) == ['20260210', '20260211', 'all']
+
+    columns = ['total_feedback', 'true_positives', 'false_positives', 'false_negatives', 'true_negatives',
+               'precision', 'recall', 'f1_score', 'accuracy']
+    for date_str in ('20260210', '20260211'):
+        feedback_df = analyzer.read_feedback(f"{feedback_dir}/tuning_feedback_{date_str}.csv")
+        feedback_df = feedback_df.drop_duplicates('stock', keep='last')
+        expected = analyzer.analyze_accuracy(feedback_df, date_str)
+        assert metrics.loc[date_str, columns].tolist() == pytest.approx([expected[c] for c in columns])
+
+    overall = metrics.loc['all']
+    assert overall['total_feedback'] == 10
+    assert overall['true_positives'] == metrics.loc[['20260210', '20260211'], 'true_positives'].sum()
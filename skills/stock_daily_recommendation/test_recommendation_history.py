@@ -0,0 +1,50 @@
+"""
+recommendation_history 测试：导入与重新生成报告
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import json
+import os
+from typing import Tuple
+
+from recommendation_history import RecommendationHistory, regenerate_reports
+
+RECOMMENDATION_DIR = os.path.join(os.path.dirname(__file__), 'recommendations')
+
+
+def _backfilled_db(tmp_path) -> Tuple[str, str]:
+    db_path = str(tmp_path / 'history.db')
+    with RecommendationHistory(db_path) as history:
+        history.backfill(RECOMMENDATION_DIR)
+        report_date = history.dates()[-1]
+    return db_path, report_date
+
+
+def test_regenerate_into_missing_output_dir(tmp_path):
+    """输出目录不存在时自动创建"""
+    db_path, report_date = _backfilled_db(tmp_path)
+    output_dir = tmp_path / 'missing' / 'reports'
+
+    assert regenerate_reports(report_date, db_path, str(output_dir))
+    for ext in ('json', 'csv'):
+        assert (output_dir / f'recommendation_{report_date}.{ext}').exists()
+
+
+def test_regenerated_json_matches_original(tmp_path):
+    db_path, report_date = _backfilled_db(tmp_path)
+    original_path = os.path.join(RECOMMENDATION_DIR, f'recommendation_{report_date}.json')
+
+    regenerate_reports(report_date, db_path, str(tmp_path))
+    with open(original_path, encoding='utf-8') as f:
+        original = json.load(f)
+    with open(tmp_path / f'recommendation_{report_date}.json', encoding='utf-8') as f:
+        regenerated = json.load(f)
+
+    assert [rec['stock_code'] for rec in regenerated['recommendations']] == \
+           [rec['stock_code'] for rec in original['recommendations']]
+
+
+def test_regenerate_unknown_date(tmp_path):
+    db_path, _ = _backfilled_db(tmp_path)
+    assert not regenerate_reports('19000101', db_path, str(tmp_path))
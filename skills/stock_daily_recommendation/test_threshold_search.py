@@ -0,0 +1,132 @@
+"""
+threshold_search 测试：联合搜索与步长限制、判断是否推荐与实盘筛选一致
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import Config
+from daily_recommendation import RecommendationConfig, select_recommendations
+from enhanced_feedback_analyzer import EnhancedFeedbackAnalyzer, extract_features_batch
+from feedback_analyzer import LABEL_BUY
+from stock_trend_analyzer import analyze_all_stocks
+from synthetic_market import generate_market
+from threshold_search import (MAX_STEPS, SEARCH_SPACE, confusion_matrix, current_thresholds,
+                              predict_recommended, search_thresholds)
+
+
+def _cases(n: int = 200, seed: int = 0) -> pd.DataFrame:
+    """两个阈值相互影响的案例：好股票补充特征分更高、距MA60更近（都能被检测为信号）"""
+    rng = np.random.default_rng(seed)
+    good = rng.random(n) < 0.4
+    return pd.DataFrame({
+        'macd_score': rng.integers(50, 90, n),
+        'volume_ratio': np.round(rng.uniform(2.0, 3.0, n), 2),
+        'ma60_distance': np.round(np.where(good, rng.uniform(-1.0, 0.8, n), rng.uniform(-0.5, 2.0, n)), 2),
+        'enhanced_score': np.where(good, rng.integers(22, 45, n), rng.integers(15, 35, n)),
+        'risk_passed': True,
+        'label': np.where(good, LABEL_BUY, 'not_buy'),
+    })
+
+
+THRESHOLDS = {'MA_DISTANCE_THRESHOLD': 1.0, 'MIN_ENHANCED_SCORE': 20, 'MIN_RATING': 'B'}
+
+
+def test_suggested_combination_metrics_are_joint():
+    """报告的指标就是整组建议阈值一起生效时的指标，并且优于当前配置"""
+    cases = _cases()
+    results = search_thresholds(cases, THRESHOLDS)
+    suggested = {param: result['suggested'] for param, result in results.items()}
+
+    labels = (cases['label'] == LABEL_BUY).to_numpy()
+    joint = confusion_matrix(predict_recommended(cases, suggested), labels)
+    for result in results.values():
+        assert result['suggested_thresholds'] == suggested
+        assert set(suggested) == set(SEARCH_SPACE)
+        assert result['best_metrics']['f1_score'] == round(float(joint['f1_score']), 4)
+        assert result['best_metrics']['f1_score'] > result['current_metrics']['f1_score']
+
+
+def test_steps_are_clamped():
+    results = search_thresholds(_cases(seed=1), THRESHOLDS)
+    for param, result in results.items():
+        assert abs(result['suggested'] - THRESHOLDS[param]) <= MAX_STEPS[param] + 1e-9
+
+
+def test_no_change_when_current_is_optimal():
+    """当前阈值组合已经完全区分正负样本时，所有建议值等于当前值"""
+    cases = _cases(seed=2)
+    cases['label'] = np.where(predict_recommended(cases, THRESHOLDS), LABEL_BUY, 'not_buy')
+
+    results = search_thresholds(cases, THRESHOLDS)
+    assert all(result['suggested'] == result['current'] for result in results.values())
+    assert results['MIN_ENHANCED_SCORE']['best_metrics']['f1_score'] == 1.0
+
+
+def test_too_few_cases_skips_search():
+    assert search_thresholds(_cases(n=5), THRESHOLDS) == {}
+
+
+def test_current_thresholds_reads_recommendation_config():
+    thresholds = current_thresholds({})
+    assert thresholds['MIN_ENHANCED_SCORE'] == RecommendationConfig.MIN_ENHANCED_SCORE
+    assert thresholds['MA_DISTANCE_THRESHOLD'] == RecommendationConfig.MA_DISTANCE_THRESHOLD
+    assert set(thresholds) == set(SEARCH_SPACE) | {'MIN_RATING'}
+
+    # 推荐不加载的检测阈值不会被当作"当前值"读回
+    tuned = current_thresholds({'MIN_ENHANCED_SCORE': 33, 'MACD_SCORE_THRESHOLD': 70, 'MIN_RATING': 'A'})
+    assert tuned['MIN_ENHANCED_SCORE'] == 33 and tuned['MIN_RATING'] == 'A'
+    assert 'MACD_SCORE_THRESHOLD' not in tuned
+
+
+def test_hard_filters_apply():
+    """检测器的核心条件都满足，但MA60距离超过推荐阈值或评级不够时不会被推荐"""
+    case = pd.DataFrame({'macd_score': [70, 70, 70], 'volume_ratio': [3.0, 3.0, 3.0],
+                         'ma60_distance': [1.0, 0.4, 0.4], 'enhanced_score': [30, 30, 25],
+                         'risk_passed': True})
+    thresholds = {'MA_DISTANCE_THRESHOLD': 0.4, 'MIN_ENHANCED_SCORE': 25}
+
+    assert predict_recommended(case, {**thresholds, 'MIN_RATING': 'B'}).tolist() == [False, True, True]
+    assert predict_recommended(case, {**thresholds, 'MIN_RATING': 'A'}).tolist() == [False, True, False]
+
+
+@pytest.mark.parametrize('filter_mode, ma_threshold, min_score, min_rating', [
+    ('standard', 0.5, 20, 'B'),
+    ('loose', 1.0, 25, 'A'),
+    ('loose', -0.5, 0, None),
+])
+def test_prediction_matches_select_recommendations(tmp_path, monkeypatch, filter_mode, ma_threshold,
+                                                  min_score, min_rating):
+    """同一批 (股票, 日期) 案例，predict_recommended 与实盘扫描 + select_recommendations 的结果相同"""
+    for name, value in {'MACD_SCORE_THRESHOLD': 40, 'VOLUME_RATIO_THRESHOLD': 1.2, 'MA_DISTANCE_THRESHOLD': 3.0,
+                        'FILTER_MODE': filter_mode}.items():
+        monkeypatch.setattr(Config, name, value)
+    thresholds = {'MA_DISTANCE_THRESHOLD': ma_threshold, 'MIN_ENHANCED_SCORE': min_score, 'MIN_RATING': min_rating}
+    for name, value in {**thresholds, 'SIGNAL_LOOKBACK_DAYS': 0, 'TOP_N_STOCKS': 1000}.items():
+        monkeypatch.setattr(RecommendationConfig, name, value)
+
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=12, n_days=200)
+    signal_table = analyze_all_stocks(data_dir, str(tmp_path / 'out'), enable_future_validation=False,
+                                      return_signal_table=True, use_profiles=False)['signal_table']
+
+    analyzer = EnhancedFeedbackAnalyzer(data_dir=data_dir)
+    dates = sorted(signal_table['信号日期'].unique())[-40:]
+    codes = sorted(signal_table['股票代码'].unique())
+    pairs = pd.DataFrame([(code, date.strftime('%Y%m%d')) for code in codes for date in dates],
+                         columns=['stock_code', 'target_date'])
+    cases = extract_features_batch(pairs, analyzer.load_stock_data)
+    cases = cases[cases['status'] == 'ok'].reset_index(drop=True)
+
+    predicted = predict_recommended(cases, thresholds)
+
+    expected = set()
+    for date in dates:
+        _, top = select_recommendations(signal_table, as_of=date)
+        expected |= {(code, date.strftime('%Y-%m-%d')) for code in top['股票代码']}
+    assert set(zip(cases.loc[predicted, 'stock_code'], cases.loc[predicted, 'date'])) == expected
+    # 检测器产生的信号中有一部分被推荐过滤掉
+    assert 0 < len(expected) < signal_table['信号日期'].isin(dates).sum()
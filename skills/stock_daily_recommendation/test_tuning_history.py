@@ -0,0 +1,103 @@
+"""
+tuning_history 测试：增量总结与全量重建一致、崩溃后补齐、旧格式迁移
+
+运行：python -m pytest skills/stock_daily_recommendation
+"""
+
+import json
+import os
+
+import pytest
+
+from tuning_history import TuningHistoryLog
+
+
+def _record(i: int, f1: float):
+    return {'date': f"202602{i + 1:02d}", 'timestamp': f"2026-02-{i + 1:02d} 16:00:00",
+            'metrics': {'precision': 0.4 + i / 100, 'recall': 0.9 - i / 50, 'f1_score': f1},
+            'adjustments': [], 'error_patterns': {'false_positives': i}}
+
+
+RECORDS = [_record(i, f1) for i, f1 in enumerate([0.5, 0.62, 0.41, 0.62, 0.58, 0.3])]
+
+
+def _rebuilt_summary(log_path: str) -> dict:
+    """不使用总结文件，从日志全量重建"""
+    summary_path = f"{os.path.splitext(log_path)[0]}_summary.json"
+    os.remove(summary_path)
+    return TuningHistoryLog(log_path).summary()
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'tuning_history.jsonl')
+
+
+def test_incremental_summary_matches_rebuild(log_path):
+    history = TuningHistoryLog(log_path)
+    assert history.summary() == {} and history.latest() is None
+
+    for record in RECORDS:
+        history.append(record)
+        assert TuningHistoryLog(log_path).summary() == history.summary()
+    summary = history.summary()
+
+    assert summary['total_tunings'] == len(RECORDS)
+    assert (summary['first_date'], summary['latest_date']) == ('20260201', '20260206')
+    assert (summary['best_f1_score'], summary['best_f1_date']) == (0.62, '20260202')  # 同分保留最早
+    assert summary['overall_improvement']['f1_score'] == '-20.00%'
+    assert history.latest()['error_patterns'] == {'false_positives': 5}
+    assert _rebuilt_summary(log_path) == summary
+
+
+def test_crash_before_summary_write_replays_tail(log_path):
+    history = TuningHistoryLog(log_path)
+    for record in RECORDS[:3]:
+        history.append(record)
+
+    # 追加成功、写总结前崩溃
+    with open(log_path, 'a', encoding='utf-8') as f:
+        for record in RECORDS[3:]:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    assert TuningHistoryLog(log_path).summary()['total_tunings'] == len(RECORDS)
+    assert TuningHistoryLog(log_path).summary() == _rebuilt_summary(log_path)
+
+
+def test_torn_last_line_is_skipped_and_separated(log_path):
+    history = TuningHistoryLog(log_path)
+    history.append(RECORDS[0])
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write('{"date": "202602')
+
+    TuningHistoryLog(log_path).append(RECORDS[1])
+
+    assert [r['date'] for r in TuningHistoryLog(log_path).iter_records()] == ['20260201', '20260202']
+    assert TuningHistoryLog(log_path).summary()['total_tunings'] == 2
+
+
+def test_truncated_log_rebuilds_summary(log_path):
+    history = TuningHistoryLog(log_path)
+    for record in RECORDS:
+        history.append(record)
+    with open(log_path, 'w', encoding='utf-8') as f:
+        for record in RECORDS[:2]:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    summary = TuningHistoryLog(log_path).summary()
+    assert summary['total_tunings'] == 2
+    assert summary['latest_date'] == '20260202'
+
+
+def test_legacy_json_is_migrated(log_path, tmp_path):
+    legacy_path = str(tmp_path / 'tuning_history.json')
+    with open(legacy_path, 'w', encoding='utf-8') as f:
+        json.dump({'history': RECORDS, 'summary': {}}, f)
+
+    history = TuningHistoryLog(log_path)
+
+    assert list(history.iter_records()) == RECORDS
+    assert not os.path.exists(legacy_path)
+    assert os.path.exists(f"{legacy_path}.migrated")
+    assert history.summary()['total_tunings'] == len(RECORDS)
+    assert history.summary() == _rebuilt_summary(log_path)
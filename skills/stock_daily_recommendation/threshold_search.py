@@ -0,0 +1,293 @@
+"""
+反事实阈值搜索
+
+analyze_feature_patterns 原来的阈值调整是统计"阈值附近有几个FP/FN"，再按学习率
+朝一个经验方向挪一小步。本模块改为直接度量：对全部有标签的反馈案例
+（全部反馈文件中的 (股票, 日期)，特征与Gap分析相同），重新判断每个案例"是否会被推荐"，
+一次向量化比较得到一个阈值各网格点的完整混淆矩阵。
+
+可调的是每日推荐实际加载的两个阈值（RecommendationConfig.load_tuning_config）：
+MIN_ENHANCED_SCORE 和 MA_DISTANCE_THRESHOLD（推荐阶段的MA60距离硬过滤）。MACD评分、放量倍数
+等信号检测阈值不被推荐加载，不参与搜索，核心条件按 Config 中的检测阈值计数。
+
+两个阈值按坐标下降联合搜索：轮流扫描每个阈值（其余阈值取当前组合的值），每个阈值每次
+最多偏离当前配置 MAX_STEPS 的步长，直到一轮内没有阈值再变化。建议的是整组阈值，报告的是
+这组阈值一起生效时的指标；只有组合的F1优于当前配置时才给出调整。
+
+是否会被推荐的判断与实盘一致（信号检测 + select_recommendations 的过滤）：
+    核心条件数（Config 的MACD评分、放量倍数、MA60距离阈值，实盘模式下未来涨幅条件视为满足）
+    ≥ 筛选模式的最少条件数（loose模式还要求MACD条件），且通过风险控制，
+    且评级不低于 MIN_RATING，且补充特征分 ≥ MIN_ENHANCED_SCORE，
+    且MA60距离（保留两位小数）≤ 推荐的 MA_DISTANCE_THRESHOLD
+
+案例特征矩阵缓存在 logs/feedback_case_matrix.pkl，反馈文件或指标参数变化时自动重建。
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import glob
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+from config import Config
+from technical_indicators import get_indicator_params
+from signal_detector import get_ratings
+from feedback_analyzer import LABEL_BUY
+from feedback_backfill import load_feedback_history, attach_features
+
+
+logger = logging.getLogger(__name__)
+
+# 可调阈值（推荐阶段的过滤条件）：参数名 → (特征列, 比较方向, 扫描网格)
+SEARCH_SPACE = {
+    'MA_DISTANCE_THRESHOLD': ('ma60_distance', '<=', np.round(np.arange(-1.0, 3.001, 0.05), 2)),
+    'MIN_ENHANCED_SCORE': ('enhanced_score', '>=', np.arange(0, 51, 1)),
+}
+
+# 单次调优每个阈值最多偏离当前配置的幅度（与经验规则的调整幅度相当）
+MAX_STEPS = {
+    'MA_DISTANCE_THRESHOLD': 0.5,
+    'MIN_ENHANCED_SCORE': 5,
+}
+
+MIN_CASES = 10  # 有效案例少于该数（或缺少正/负样本）时不做搜索
+MAX_ROUNDS = 10  # 坐标下降最多轮数
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'logs', 'feedback_case_matrix.pkl')
+
+
+def current_thresholds(tuning_config: Dict = None) -> Dict:
+    """
+    当前推荐过滤条件：RecommendationConfig 默认值，被 tuning_config.json 中的调优值覆盖
+
+    Returns:
+        Dict: SEARCH_SPACE 中的阈值及 MIN_RATING（不参与搜索，判断是否推荐时使用）
+    """
+    from daily_recommendation import RecommendationConfig
+
+    thresholds = {param: getattr(RecommendationConfig, param) for param in list(SEARCH_SPACE) + ['MIN_RATING']}
+    thresholds.update({param: value for param, value in (tuning_config or {}).items() if param in thresholds})
+    return thresholds
+
+
+def _compare(values: np.ndarray, op: str, threshold) -> np.ndarray:
+    """values 与阈值比较；threshold 为网格数组时返回 (网格点数, 案例数) 的二维结果"""
+    threshold = np.asarray(threshold, dtype=float)
+    if threshold.ndim == 1:
+        threshold = threshold[:, None]
+    with np.errstate(invalid='ignore'):
+        return values >= threshold if op == '>=' else values <= threshold
+
+
+def predict_recommended(cases: pd.DataFrame, thresholds: Dict, config=None) -> np.ndarray:
+    """
+    按给定阈值判断每个案例是否会被推荐（信号检测 + 推荐过滤）
+
+    thresholds 中某个参数可以是网格数组，此时返回 (网格点数, 案例数) 的布尔矩阵，
+    其余参数为标量时返回一维布尔数组。
+
+    Args:
+        cases: 案例特征矩阵（至少包含 macd_score、volume_ratio、ma60_distance、enhanced_score、
+            risk_passed 列）
+        thresholds: 参数名 → 阈值（标量或网格数组）；MIN_RATING 缺省时使用 RecommendationConfig 的值
+        config: 配置对象（检测阈值、筛选模式、评级分数线），默认使用Config
+    """
+    from daily_recommendation import RecommendationConfig
+
+    config = config or Config
+    macd_score = cases['macd_score'].to_numpy(dtype=float)
+    volume_ratio = cases['volume_ratio'].to_numpy(dtype=float)
+    ma60_distance = cases['ma60_distance'].to_numpy(dtype=float)
+    enhanced_score = cases['enhanced_score'].to_numpy(dtype=float)
+
+    # 信号检测：核心条件按检测器的阈值计数，实盘模式下未来涨幅条件视为满足
+    macd_uptrend = macd_score >= config.MACD_SCORE_THRESHOLD
+    conditions = [macd_uptrend, volume_ratio >= config.VOLUME_RATIO_THRESHOLD,
+                  ma60_distance <= config.MA_DISTANCE_THRESHOLD]
+    detected = sum(c.astype(int) for c in conditions) + 1 >= config.get_min_conditions()
+    if config.FILTER_MODE == 'loose':
+        detected = detected & macd_uptrend
+    detected = detected & cases['risk_passed'].to_numpy(dtype=bool)
+
+    # 推荐过滤：评级、补充特征分、MA60距离（信号明细表中保留两位小数）
+    allowed_ratings = {'A': ('A级',), 'B': ('A级', 'B级')}.get(
+        thresholds.get('MIN_RATING', RecommendationConfig.MIN_RATING))
+    if allowed_ratings:
+        detected = detected & np.isin(get_ratings(enhanced_score, config), allowed_ratings)
+    passed_score = _compare(enhanced_score, '>=', thresholds['MIN_ENHANCED_SCORE'])
+    passed_distance = _compare(np.round(ma60_distance, 2), '<=', thresholds['MA_DISTANCE_THRESHOLD'])
+    return detected & passed_score & passed_distance
+
+
+def confusion_matrix(predicted: np.ndarray, labels: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    向量化计算混淆矩阵及指标（predicted 可以是二维，每行一个网格点）
+
+    Returns:
+        Dict: true_positives、false_positives、false_negatives、true_negatives、
+            precision、recall、f1_score、accuracy，每项是与网格点数等长的数组（一维输入时为标量数组）
+    """
+    tp = (predicted & labels).sum(axis=-1)
+    fp = (predicted & ~labels).sum(axis=-1)
+    fn = (~predicted & labels).sum(axis=-1)
+    tn = (~predicted & ~labels).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1_score = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    accuracy = (tp + tn) / labels.size
+    return {
+        'true_positives': tp, 'false_positives': fp, 'false_negatives': fn, 'true_negatives': tn,
+        'precision': precision, 'recall': recall, 'f1_score': f1_score, 'accuracy': accuracy,
+    }
+
+
+def _metrics_at(metrics: Dict[str, np.ndarray], index: int) -> Dict:
+    return {name: (int(values[index]) if name.startswith(('true', 'false')) else round(float(values[index]), 4))
+            for name, values in metrics.items()}
+
+
+def _step_window(param: str, current) -> np.ndarray:
+    """某个阈值本次可取的值：网格中距当前配置不超过 MAX_STEPS 的点，加上当前值本身"""
+    grid = SEARCH_SPACE[param][2]
+    window = grid[np.abs(grid - current) <= MAX_STEPS[param] + 1e-9]
+    return np.union1d(window, [current])
+
+
+def _scan(cases: pd.DataFrame, thresholds: Dict, param: str, values: np.ndarray,
+          labels: np.ndarray, config=None) -> Dict[str, np.ndarray]:
+    """其余阈值固定为 thresholds，扫描 param 的各个取值"""
+    return confusion_matrix(predict_recommended(cases, {**thresholds, param: values}, config), labels)
+
+
+def search_thresholds(cases: pd.DataFrame, thresholds: Dict, config=None,
+                      objective: str = 'f1_score') -> Dict[str, Dict]:
+    """
+    坐标下降联合搜索全部阈值，返回每个参数的当前值、建议值和整组阈值的指标
+
+    每轮依次扫描各阈值在步长窗口（_step_window）内的取值，其余阈值取当前组合的值，
+    目标指标严格提高才移动；并列最优时保持不动。建议组合的目标指标不优于当前配置时，
+    所有参数的建议值都等于当前值。
+
+    Args:
+        cases: 案例特征矩阵（只含特征提取成功的行），label 列为反馈标签
+        thresholds: 当前阈值（current_thresholds 的返回值）
+        config: 配置对象，默认使用Config
+        objective: 优化目标（confusion_matrix 返回的指标名）
+
+    Returns:
+        Dict: 参数名 → current、suggested、current_metrics（当前整组阈值的指标）、
+            best_metrics（建议整组阈值的指标）、suggested_thresholds（建议的整组阈值）、
+            grid（其余阈值取建议值时，该参数每个网格点的指标表）、cases、method、reason；
+            案例不足时返回空字典
+    """
+    labels = (cases['label'] == LABEL_BUY).to_numpy()
+    if len(cases) < MIN_CASES or labels.all() or not labels.any():
+        logger.warning(f"有效反馈案例不足（{len(cases)}个，正样本{labels.sum()}个），跳过阈值搜索")
+        return {}
+
+    current = dict(thresholds)
+    current_metrics = confusion_matrix(predict_recommended(cases, current, config), labels)
+    current_score = float(current_metrics[objective])
+
+    point, score, rounds = dict(current), current_score, 0
+    for rounds in range(1, MAX_ROUNDS + 1):
+        moved = False
+        for param in SEARCH_SPACE:
+            values = _step_window(param, current[param])
+            scores = _scan(cases, point, param, values, labels, config)[objective]
+            best = int(np.argmax(scores))
+            if scores[best] > score + 1e-9:
+                point[param], score, moved = values[best].item(), float(scores[best]), True
+        if not moved:
+            break
+
+    improved = score > current_score + 1e-9
+    suggested = point if improved else current
+    best_metrics = confusion_matrix(predict_recommended(cases, suggested, config), labels)
+    current_summary = _metrics_at({k: np.atleast_1d(v) for k, v in current_metrics.items()}, 0)
+    best_summary = _metrics_at({k: np.atleast_1d(v) for k, v in best_metrics.items()}, 0)
+
+    if improved:
+        changed = ', '.join(f"{param}: {current[param]}→{suggested[param]}"
+                            for param in SEARCH_SPACE if suggested[param] != current[param])
+        reason = (f'坐标下降联合搜索（{len(cases)}个反馈案例，{rounds}轮），整组阈值F1: '
+                  f'{current_summary["f1_score"]:.2%} → {best_summary["f1_score"]:.2%}（{changed}）')
+    else:
+        reason = f'坐标下降联合搜索（{len(cases)}个反馈案例），当前阈值组合已是步长范围内的最优'
+    logger.info(f"阈值联合搜索: {reason}")
+
+    results = {}
+    for param, (_, _, grid) in SEARCH_SPACE.items():
+        results[param] = {
+            'current': current[param],
+            'suggested': suggested[param],
+            'current_metrics': current_summary,
+            'best_metrics': best_summary,
+            'suggested_thresholds': {name: suggested[name] for name in SEARCH_SPACE},
+            'grid': pd.DataFrame({'value': grid, **_scan(cases, suggested, param, grid, labels, config)}),
+            'cases': len(cases),
+            'method': 'grid_search',
+            'reason': reason,
+        }
+    return results
+
+
+def _feedback_signature(feedback_dir: str, config=None) -> Dict:
+    """反馈文件（名称、大小、修改时间）和指标参数的签名，用于判断缓存是否有效"""
+    files = sorted(glob.glob(os.path.join(feedback_dir, 'tuning_feedback_*.csv')))
+    return {
+        'files': [(os.path.basename(path), os.path.getsize(path), os.path.getmtime(path)) for path in files],
+        'indicator_params': get_indicator_params(config or Config),
+    }
+
+
+def load_case_matrix(analyzer, cache_path: str = DEFAULT_CACHE_PATH) -> pd.DataFrame:
+    """
+    读取（或构建并缓存）全部有标签反馈案例的特征矩阵
+
+    Args:
+        analyzer: EnhancedFeedbackAnalyzer（提供反馈目录和批量特征提取）
+        cache_path: 缓存文件路径，None表示不缓存
+
+    Returns:
+        pd.DataFrame: 每个反馈案例一行（feedback_date、stock_code、label 及特征列），
+            只保留特征提取成功的行
+    """
+    signature = _feedback_signature(analyzer.feedback_dir)
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached['signature'] == signature:
+                logger.info(f"使用缓存的反馈案例特征矩阵: {len(cached['cases'])} 个案例")
+                return cached['cases']
+        except Exception as e:
+            logger.warning(f"读取反馈案例缓存失败: {e}，重新构建")
+
+    table = load_feedback_history(analyzer.feedback_dir)
+    if table.empty:
+        return table
+    table = attach_features(table, analyzer)
+    cases = table[table['feature_status'] == 'ok'].reset_index(drop=True)
+    logger.info(f"构建反馈案例特征矩阵: {len(cases)}/{len(table)} 个案例特征有效")
+
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'signature': signature, 'cases': cases}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return cases
+
+
+def format_grid(result: Dict, columns: List[str] = None) -> str:
+    """把某个参数的网格扫描结果格式化为文本表（用于日志/报告）"""
+    columns = columns or ['value', 'true_positives', 'false_positives', 'false_negatives',
+                          'precision', 'recall', 'f1_score']
+    return result['grid'][columns].to_string(index=False, float_format=lambda v: f'{v:.3f}')
@@ -0,0 +1,218 @@
+"""
+调优历史日志
+
+每次反馈调优的记录只追加写入 tuning_history.jsonl（每行一条JSON记录，写入后 fsync），
+另外维护一个很小的增量总结文件 tuning_history_summary.json（首次/最新记录、最佳F1、
+总调优次数），每次调优只更新总结而不重新扫描历史，复杂度 O(1)。
+
+崩溃安全：
+    - 日志只追加不改写，写到一半崩溃最多留下最后一行不完整的记录，读取时跳过；
+      下次追加前先补一个换行，不完整的行不会和新记录粘在一起
+    - 总结文件先写临时文件再 os.replace 原子替换
+    - 总结中记录了对应的日志字节长度，与实际长度不一致（追加后、写总结前崩溃）时，
+      只重放多出来的那一段记录来补齐总结
+
+旧格式 tuning_history.json（整个文件一个JSON对象）在首次使用时自动迁移，
+原文件改名为 tuning_history.json.migrated 保留。
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(__file__), 'tuning_history.jsonl')
+
+
+def _write_json_atomic(path: str, data: Dict):
+    """写入临时文件并 fsync 后原子替换目标文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class TuningHistoryLog:
+    """只追加的调优历史日志 + 增量总结"""
+
+    def __init__(self, log_path: str = DEFAULT_LOG_PATH, legacy_path: Optional[str] = None):
+        """
+        Args:
+            log_path: JSONL日志路径，总结文件与其同目录（<名称>_summary.json）
+            legacy_path: 旧格式 tuning_history.json 路径，默认与日志同目录
+        """
+        self.log_path = log_path
+        base = os.path.splitext(log_path)[0]
+        self.summary_path = f"{base}_summary.json"
+        self.legacy_path = legacy_path or f"{base}.json"
+        self._state: Optional[Dict] = None
+
+        if not os.path.exists(self.log_path) and os.path.exists(self.legacy_path):
+            self.migrate_legacy()
+
+    # ========== 读取 ==========
+
+    def _log_size(self) -> int:
+        return os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+
+    def iter_records(self, start: int = 0) -> Iterator[Dict]:
+        """
+        按顺序读取日志中的记录（跳过不完整或损坏的行）
+
+        Args:
+            start: 起始字节偏移
+        """
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    logger.warning(f"跳过损坏的调优记录（偏移 {start} 之后第 {line_no} 行）")
+
+    def _empty_state(self) -> Dict:
+        return {'log_size': 0, 'total_tunings': 0, 'first': None, 'latest': None, 'best': None}
+
+    def _fold(self, state: Dict, record: Dict):
+        """把一条记录并入总结状态"""
+        entry = {
+            'date': record['date'],
+            'metrics': record['metrics'],
+            'error_patterns': record.get('error_patterns', {}),
+        }
+        state['total_tunings'] += 1
+        if state['first'] is None:
+            state['first'] = entry
+        state['latest'] = entry
+        f1_score = record['metrics'].get('f1_score', 0)
+        # 与旧实现的 max() 一致：F1相同时保留最早的一条
+        if state['best'] is None or f1_score > state['best']['f1_score']:
+            state['best'] = {'date': record['date'], 'f1_score': f1_score}
+
+    def _load_state(self) -> Dict:
+        """读取总结状态；与日志长度不一致时只重放缺失的部分"""
+        if self._state is not None and self._state['log_size'] == self._log_size():
+            return self._state
+
+        state = self._state
+        if state is None and os.path.exists(self.summary_path):
+            try:
+                with open(self.summary_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)['state']
+            except Exception as e:
+                logger.warning(f"读取调优总结失败: {str(e)}，将从日志重建")
+                state = None
+
+        log_size = self._log_size()
+        if state is None or state['log_size'] > log_size:
+            state = self._empty_state()
+        if state['log_size'] < log_size:
+            for record in self.iter_records(state['log_size']):
+                self._fold(state, record)
+            state['log_size'] = log_size
+            self._save_state(state)
+
+        self._state = state
+        return state
+
+    def _save_state(self, state: Dict):
+        _write_json_atomic(self.summary_path, {'summary': self._public_summary(state), 'state': state})
+
+    @staticmethod
+    def _public_summary(state: Dict) -> Dict:
+        """对外的总结格式（与旧 tuning_history.json 的 summary 相同，不足两条记录时为空）"""
+        if state['total_tunings'] < 2:
+            return {}
+        first_metrics = state['first']['metrics']
+        latest_metrics = state['latest']['metrics']
+        return {
+            'total_tunings': state['total_tunings'],
+            'first_date': state['first']['date'],
+            'latest_date': state['latest']['date'],
+            'overall_improvement': {
+                'precision': f"{(latest_metrics['precision'] - first_metrics['precision']):.2%}",
+                'recall': f"{(latest_metrics['recall'] - first_metrics['recall']):.2%}",
+                'f1_score': f"{(latest_metrics['f1_score'] - first_metrics['f1_score']):.2%}"
+            },
+            'best_f1_score': state['best']['f1_score'],
+            'best_f1_date': state['best']['date']
+        }
+
+    def latest(self) -> Optional[Dict]:
+        """最近一条记录的日期、指标和错误模式，没有记录时返回None"""
+        return self._load_state()['latest']
+
+    def summary(self) -> Dict:
+        """改进总结（不足两条记录时为空字典）"""
+        return self._public_summary(self._load_state())
+
+    # ========== 写入 ==========
+
+    def append(self, record: Dict):
+        """
+        追加一条调优记录并更新总结
+
+        Args:
+            record: 调优记录（至少包含 date、metrics）
+        """
+        state = self._load_state()
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+
+        with open(self.log_path, 'ab') as f:
+            # 上次写入中断留下的不完整行：补换行隔开，读取时跳过
+            if f.tell() > 0:
+                with open(self.log_path, 'rb') as reader:
+                    reader.seek(-1, os.SEEK_END)
+                    if reader.read(1) != b'\n':
+                        line = b'\n' + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            log_size = f.tell()
+
+        self._fold(state, record)
+        state['log_size'] = log_size
+        self._save_state(state)
+
+    def migrate_legacy(self) -> int:
+        """
+        把旧格式 tuning_history.json 转换为JSONL日志和总结文件
+
+        Returns:
+            int: 迁移的记录数
+        """
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            records = json.load(f).get('history', [])
+
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+
+        state = self._empty_state()
+        for record in records:
+            self._fold(state, record)
+        state['log_size'] = self._log_size()
+        self._save_state(state)
+        self._state = state
+
+        os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+        logger.info(f"已迁移 {len(records)} 条调优历史: {os.path.basename(self.legacy_path)} → "
+                    f"{os.path.basename(self.log_path)}")
+        return len(records)
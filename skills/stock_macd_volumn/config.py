@@ -125,9 +125,89 @@ class Config:
     VOLUME_SURGE_MIN_GAIN = 3       # 巨量滞涨：最小涨幅要求（%）
     MAX_MA20_DEVIATION = 30         # 距离20日均线最大偏离度（%）
 
+    # ============ 全库数据质量扫描参数 ============
+    QUALITY_WORKERS = None          # 并行进程数，None表示使用全部CPU核心
+    QUALITY_SPIKE_WINDOW = 20       # 跳变检测：滚动中位数/MAD窗口（交易日）
+    QUALITY_SPIKE_MAD_K = 8         # 跳变检测：偏离滚动中位数超过 K × 稳健标准差（1.4826×MAD）
+    QUALITY_SPIKE_MIN_RETURN = 0.35 # 跳变检测：单日涨跌幅绝对值还需超过该值（高于所有板块的涨跌停幅度）
+    QUALITY_SPIKE_SKIP_DAYS = 5     # 上市初期不设涨跌幅限制，前N个交易日不做跳变检测
+    QUALITY_SAMPLE_SIZE = 5         # 报告中每类问题最多列出的样本数
+    # 出现这些问题的股票进入隔离名单（分析器跳过），其余问题只记录在报告中
+    QUALITY_QUARANTINE_ISSUES = [
+        'read_error', 'missing_columns', 'bom_row', 'header_row', 'unparsable_row',
+        'high_below_low', 'close_out_of_range', 'nonpositive_price',
+        'duplicate_date', 'unordered_date',
+    ]
+    QUARANTINE_FILE = os.path.join(OUTPUT_DIR, "quarantine.json")  # 隔离名单（分析器读取）
+
+    # ============ 股票数据画像参数 ============
+    DATA_PROFILE_FILENAME = "_data_profile.json"  # 画像文件名（位于数据目录下，随数据一起提交）
+    DATA_PROFILE_TAIL_ROWS = 20     # 画像中保留最近N天的成交量/成交额（不少于预筛选用到的10天）
+
+    # ============ 合成行情与基准测试参数 ============
+    SYNTHETIC_SEED = 20261018       # 合成行情默认随机种子（固定种子保证不同提交之间数据一致）
+    SYNTHETIC_END_DATE = "2026-10-16"  # 合成行情最后一个交易日
+    SYNTHETIC_NEW_LISTING_RATIO = 0.03  # 新股比例（交易日数少于MIN_DATA_ROWS）
+    SYNTHETIC_SUSPENSION_RATIO = 0.1    # 含停牌日（成交量为空）的股票比例
+    SYNTHETIC_SURGE_PROBABILITY = 0.01  # 每个交易日开始一段3日放量的概率
+    BENCHMARK_SCALES = [(100, 250), (300, 500)]  # 默认基准规模：(股票数, 交易日数)
+
+    # ============ 运行指标参数 ============
+    METRICS_TEXTFILE = None     # Prometheus textfile 输出路径（如 node_exporter 的 textfile 目录下的 stock_analyzer.prom），None表示不输出
+
+    # ============ 内存分析参数（--profile-memory） ============
+    MEMORY_TOP_SITES = 10       # 每个阶段列出净增最多的分配位置数
+    MEMORY_TRACE_FRAMES = 1     # tracemalloc 调用栈深度：1最快（约慢4倍）；调大（如10，约慢25倍）可把pandas/numpy内部的分配归属到仓库代码的调用行
+
     # ============ 其他参数 ============
     PROGRESS_INTERVAL = 100     # 进度显示间隔（每N只股票）
     LOG_LEVEL = "INFO"          # 日志级别
+    CHECKPOINT_SUBDIR = "runs"  # 检查点运行目录（位于输出目录下）
+
+    # ============ 流水线参数 ============
+    PIPELINE_READERS = 2        # 读取线程数
+    PIPELINE_WORKERS = 2        # 计算线程数
+    PIPELINE_PREFETCH_SIZE = 32 # 预取队列容量（驻留内存的已读取文件数上限）
+
+    # ============ 组合回测参数 ============
+    BACKTEST_INITIAL_CAPITAL = 1_000_000  # 初始资金（元）
+    BACKTEST_MAX_POSITIONS = 10     # 最大同时持仓数
+    BACKTEST_POSITION_SIZE = 0.1    # 单笔仓位占总权益比例
+    BACKTEST_LOT_SIZE = 100         # 每手股数
+    BACKTEST_HOLDING_DAYS = 5       # 最长持有交易日数（到期按收盘价卖出）
+    BACKTEST_STOP_LOSS = 0.05       # 止损比例，None表示不启用
+    BACKTEST_TAKE_PROFIT = 0.10     # 止盈比例，None表示不启用
+    BACKTEST_TRAILING_STOP = None   # 移动止损（距持仓最高价回撤比例），None表示不启用
+    BACKTEST_BUY_COST = 0.0003      # 买入费率（佣金）
+    BACKTEST_SELL_COST = 0.0013     # 卖出费率（佣金 + 印花税）
+    BACKTEST_MAX_DEFER_DAYS = 20    # 停牌/跌停无法卖出时首轮查找的顺延交易日数（仍无法卖出则继续向后找到数据结束）
+
+    # 涨跌停幅度（按板块）
+    BACKTEST_PRICE_LIMITS = {
+        'main': 0.10,       # 沪深主板
+        'growth': 0.20,     # 创业板(sz.30) / 科创板(sh.68)
+        'bse': 0.30,        # 北交所(bj.)
+        'st': 0.05,         # ST股票
+    }
+
+    # ============ 参数扫描参数 ============
+    SWEEP_WORKERS = None        # 并行进程数，None表示使用全部CPU核心
+    SWEEP_MIN_SIGNALS = 30      # 参与排名的最少信号数（样本过少的组合不排名）
+
+    # 默认扫描网格（只包含阈值类参数，指标只需计算一次）
+    SWEEP_GRID = {
+        'MACD_SCORE_THRESHOLD': [40, 50, 65, 80],
+        'VOLUME_RATIO_THRESHOLD': [1.5, 2.0, 2.5, 3.0],
+        'MA_DISTANCE_THRESHOLD': [-3.0, 0.0, 0.5, 3.0],
+        'FILTER_MODE': ['strict', 'standard', 'loose'],
+        'MIN_RATING': ['C', 'B', 'A'],
+    }
+
+    # ============ 滚动验证参数 ============
+    WALK_FORWARD_TRAIN_DAYS = 120   # 训练窗口交易日数
+    WALK_FORWARD_TEST_DAYS = 20     # 测试窗口交易日数
+    WALK_FORWARD_STEP_DAYS = 20     # 窗口滚动步长（交易日）
+    WALK_FORWARD_OBJECTIVE = 'win_rate'  # 选参目标：win_rate/avg_return/avg_close_return
 
     # ============ 输出格式配置 ============
     CSV_ENCODING = "utf-8-sig"  # CSV编码（支持中文Excel）
@@ -23,10 +23,12 @@ import logging
 import pandas as pd
 import baostock as bs
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 from pathlib import Path
 
 from config import Config
+from data_profile import DataProfileStore
+from memory_tracking import mark_phase, track_memory, start_profiling, finish_profiling, default_report_path
 
 
 # 配置日志
@@ -198,13 +200,22 @@ def append_data_to_csv(file_path: str, new_data: pd.DataFrame) -> bool:
         return False
 
 
-def update_single_stock(file_path: str, target_date: str) -> Tuple[bool, str]:
+def update_single_stock(
+    file_path: str,
+    target_date: str,
+    last_date: str = None,
+    on_append: Callable[[str, pd.DataFrame], None] = None,
+    profile_store: DataProfileStore = None
+) -> Tuple[bool, str]:
     """
     更新单只股票的数据
 
     Args:
         file_path: CSV文件路径
         target_date: 目标日期
+        last_date: 已知的最后交易日（如来自常驻缓存），提供时不再读取整个CSV
+        on_append: 追加成功后的回调 on_append(file_path, 新数据)
+        profile_store: 数据画像存储，提供时从有效画像取最后交易日，并在追加后同步更新画像
 
     Returns:
         Tuple[bool, str]: (是否成功, 状态消息)
@@ -215,8 +226,14 @@ def update_single_stock(file_path: str, target_date: str) -> Tuple[bool, str]:
     if not stock_code:
         return False, "无法提取股票代码"
 
+    # 追加前的画像（文件未被外部修改时有效），可直接提供最后交易日
+    profile = profile_store.get(file_path) if profile_store is not None else None
+    if last_date is None and profile is not None:
+        last_date = profile['last_date']
+
     # 读取现有数据
-    existing_df, last_date = read_existing_csv(file_path)
+    if last_date is None:
+        existing_df, last_date = read_existing_csv(file_path)
 
     if last_date is None:
         return False, "无法读取现有数据"
@@ -235,18 +252,33 @@ def update_single_stock(file_path: str, target_date: str) -> Tuple[bool, str]:
     success = append_data_to_csv(file_path, daily_data)
 
     if success:
+        if profile_store is not None:
+            profile_store.record_append(file_path, daily_data, profile)
+        if on_append is not None:
+            on_append(file_path, daily_data)
         return True, f"成功追加数据({target_date})"
     else:
         return False, "追加数据失败"
 
 
-def update_all_stocks(data_dir: str = None, target_date: str = None) -> Dict[str, any]:
+def update_all_stocks(
+    data_dir: str = None,
+    target_date: str = None,
+    last_dates: Dict[str, str] = None,
+    on_append: Callable[[str, pd.DataFrame], None] = None,
+    maintain_profiles: bool = True
+) -> Dict[str, any]:
     """
     更新所有股票的数据
 
     Args:
         data_dir: 数据目录，默认使用Config.DATA_DIR
         target_date: 目标日期，默认使用最近交易日
+        last_dates: 已知的最后交易日 {CSV文件路径: 日期}，命中的股票不再读取整个CSV
+        on_append: 每只股票追加成功后的回调 on_append(file_path, 新数据)，
+                   单进程流水线用它把新K线同步到内存缓存
+        maintain_profiles: 是否同步维护数据画像（数据目录下的 _data_profile.json），
+                   画像有效的股票不再为了取最后日期读取整个CSV
 
     Returns:
         Dict: 更新结果统计
@@ -266,6 +298,7 @@ def update_all_stocks(data_dir: str = None, target_date: str = None) -> Dict[str
     logger.info("=" * 60)
 
     # 登录Baostock
+    mark_phase('login')
     logger.info("正在登录Baostock...")
     lg = bs.login()
     if lg.error_code != "0":
@@ -290,7 +323,9 @@ def update_all_stocks(data_dir: str = None, target_date: str = None) -> Dict[str
         }
 
     logger.info(f"找到 {len(csv_files)} 个股票文件")
+    profile_store = DataProfileStore(data_dir) if maintain_profiles else None
     logger.info("开始更新数据...")
+    mark_phase('update')
 
     # 统计
     success_count = 0
@@ -303,7 +338,13 @@ def update_all_stocks(data_dir: str = None, target_date: str = None) -> Dict[str
         filename = os.path.basename(file_path)
 
         try:
-            success, message = update_single_stock(file_path, target_date)
+            with track_memory('stock', filename):
+                success, message = update_single_stock(
+                    file_path, target_date,
+                    last_date=(last_dates or {}).get(file_path),
+                    on_append=on_append,
+                    profile_store=profile_store
+                )
 
             if success:
                 success_count += 1
@@ -331,6 +372,10 @@ def update_all_stocks(data_dir: str = None, target_date: str = None) -> Dict[str
     # 登出
     bs.logout()
 
+    if profile_store is not None:
+        mark_phase('save_profiles')
+        profile_store.save()
+
     logger.info("=" * 60)
     logger.info("更新完成!")
     logger.info(f"总文件数: {len(csv_files)}")
@@ -359,27 +404,37 @@ def main():
     parser.add_argument('--data-dir', help='数据目录路径')
     parser.add_argument('--date', help='指定日期（YYYY-MM-DD），默认为最近交易日')
     parser.add_argument('--test', action='store_true', help='测试模式：只更新前10只股票')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='内存分析：记录峰值RSS、各阶段tracemalloc分配位置和单只股票最大分配（运行变慢）')
+    parser.add_argument('--memory-report', help='内存分析报告路径，默认 logs/memory_profile_updater_<时间>.json')
 
     args = parser.parse_args()
 
-    # 测试模式
-    if args.test:
-        logger.info("⚠️  测试模式：仅更新前10只股票")
-        data_dir = args.data_dir or Config.DATA_DIR
-        csv_files = glob.glob(os.path.join(data_dir, "*.csv"))[:10]
-
-        # 临时修改数据目录为测试目录
-        test_dir = os.path.join(data_dir, "_test_update")
-        os.makedirs(test_dir, exist_ok=True)
+    if args.profile_memory:
+        start_profiling('updater', args.memory_report or default_report_path(log_dir, 'updater'))
 
-        # 复制前10个文件到测试目录
-        import shutil
-        for f in csv_files:
-            shutil.copy(f, test_dir)
-
-        result = update_all_stocks(data_dir=test_dir, target_date=args.date)
-    else:
-        result = update_all_stocks(data_dir=args.data_dir, target_date=args.date)
+    try:
+        # 测试模式
+        if args.test:
+            logger.info("⚠️  测试模式：仅更新前10只股票")
+            data_dir = args.data_dir or Config.DATA_DIR
+            csv_files = glob.glob(os.path.join(data_dir, "*.csv"))[:10]
+
+            # 临时修改数据目录为测试目录
+            test_dir = os.path.join(data_dir, "_test_update")
+            os.makedirs(test_dir, exist_ok=True)
+
+            # 复制前10个文件到测试目录
+            import shutil
+            for f in csv_files:
+                shutil.copy(f, test_dir)
+
+            result = update_all_stocks(data_dir=test_dir, target_date=args.date)
+        else:
+            result = update_all_stocks(data_dir=args.data_dir, target_date=args.date)
+    finally:
+        # 失败时也停止内存分析并写出报告
+        finish_profiling()
 
     if result['success']:
         logger.info("\n✅ 数据更新成功完成!")
@@ -0,0 +1,368 @@
+"""
+股票数据画像（增量维护）
+
+数据质量检查（check_data_quality）和预筛选（pre_filter）每次都要读取整个CSV，
+但它们只用到行数、各列缺失值数量、收盘价/成交量的最小值、最新收盘价和最近几天的
+成交量/成交额。数据每天只在末尾追加一根K线，这些统计量完全可以增量维护。
+
+本模块为每只股票维护一份画像：
+    rows、null_counts、min/max（各价格和成交量列）、first_date/last_date、last_close、
+    recent_volume/recent_amount（最近 DATA_PROFILE_TAIL_ROWS 天）
+保存在数据目录下的 _data_profile.json，并记录对应文件的大小和末尾字节校验值：
+文件被外部修改（大小或末尾内容不一致）时画像视为过期，不会被使用。
+
+维护方式：
+    - daily_data_updater.py 追加新K线时同步更新画像（不再为了取最后日期读取整个CSV）
+    - stock_trend_analyzer.py 对画像有效的股票直接用画像做质量检查和预筛选，
+      未通过的股票不再读取CSV
+    - python data_profile.py 全量构建/刷新过期画像
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import glob
+import json
+import zlib
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# 与 check_data_quality 一致的必要列
+REQUIRED_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount']
+# 记录最小值/最大值的列
+RANGE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+FINGERPRINT_BYTES = 1024  # 文件末尾参与校验的字节数
+
+
+def _to_json_number(value) -> Optional[float]:
+    """NaN 转为 None，numpy 数值转为 Python 数值"""
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+def _merge_extreme(current, new, func):
+    values = [v for v in (current, new) if v is not None]
+    return func(values) if values else None
+
+
+def file_fingerprint(file_path: str) -> Dict[str, int]:
+    """
+    文件指纹：大小 + 末尾字节的CRC32
+
+    不使用修改时间：重新检出仓库后修改时间会变，但只追加的文件内容不变。
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        f.seek(max(0, size - FINGERPRINT_BYTES))
+        tail = f.read()
+    return {'file_size': size, 'tail_crc': zlib.crc32(tail)}
+
+
+def build_profile(df: pd.DataFrame, tail_rows: int = None) -> Dict[str, Any]:
+    """
+    从完整数据构建画像
+
+    Args:
+        df: 原始日线数据
+        tail_rows: 保留的最近成交量/成交额天数，默认使用Config.DATA_PROFILE_TAIL_ROWS
+
+    Returns:
+        Dict: 画像（不含文件指纹）
+    """
+    tail_rows = tail_rows or Config.DATA_PROFILE_TAIL_ROWS
+    profile = {
+        'rows': len(df),
+        'columns': [str(col) for col in df.columns],
+        'null_counts': {col: int(df[col].isnull().sum()) for col in REQUIRED_COLUMNS if col in df.columns},
+        'min': {},
+        'max': {},
+        'first_date': str(df['date'].iloc[0]) if 'date' in df.columns and len(df) else None,
+        'last_date': str(df['date'].iloc[-1]) if 'date' in df.columns and len(df) else None,
+        'last_close': _to_json_number(df['close'].iloc[-1]) if 'close' in df.columns and len(df) else None,
+    }
+    for col in RANGE_COLUMNS:
+        if col in df.columns:
+            profile['min'][col] = _to_json_number(df[col].min())
+            profile['max'][col] = _to_json_number(df[col].max())
+    for col in ('volume', 'amount'):
+        if col in df.columns:
+            profile[f'recent_{col}'] = [_to_json_number(v) for v in df[col].iloc[-tail_rows:]]
+    return profile
+
+
+def update_profile(profile: Dict[str, Any], new_rows: pd.DataFrame, tail_rows: int = None) -> Dict[str, Any]:
+    """
+    用追加的新K线增量更新画像（结果与对追加后的完整数据调用 build_profile 相同）
+
+    Args:
+        profile: 追加前的画像（原地更新）
+        new_rows: 追加的新K线
+        tail_rows: 保留的最近成交量/成交额天数
+
+    Returns:
+        Dict: 更新后的画像
+    """
+    if new_rows.empty:
+        return profile
+    tail_rows = tail_rows or Config.DATA_PROFILE_TAIL_ROWS
+    addition = build_profile(new_rows, tail_rows)
+
+    profile['rows'] += addition['rows']
+    for col, count in addition['null_counts'].items():
+        profile['null_counts'][col] = profile['null_counts'].get(col, 0) + count
+    for col in addition['min']:
+        profile['min'][col] = _merge_extreme(profile['min'].get(col), addition['min'][col], min)
+        profile['max'][col] = _merge_extreme(profile['max'].get(col), addition['max'][col], max)
+    profile['first_date'] = profile['first_date'] or addition['first_date']
+    profile['last_date'] = addition['last_date']
+    profile['last_close'] = addition['last_close']
+    for col in ('volume', 'amount'):
+        key = f'recent_{col}'
+        if key in addition:
+            profile[key] = (profile.get(key, []) + addition[key])[-tail_rows:]
+    return profile
+
+
+def _recent_mean(values) -> float:
+    """最近若干天的均值（与 pandas mean 一致，忽略缺失值，全部缺失时为NaN）"""
+    return pd.Series([np.nan if v is None else v for v in values], dtype=float).mean()
+
+
+def check_profile_quality(profile: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    基于画像的数据质量检查（与 check_data_quality 的判断和提示相同）
+
+    Returns:
+        Tuple[bool, str]: (是否通过, 原因描述)
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in profile['columns']]
+    if missing_columns:
+        return False, f"缺少必要列: {', '.join(missing_columns)}"
+
+    if profile['rows'] < 34:  # MACD最少需要34个交易日
+        return False, f"数据不足34天({profile['rows']}行)"
+
+    null_cols = {col: count for col, count in profile['null_counts'].items() if count > 0}
+    if null_cols:
+        return False, f"存在缺失值: {null_cols}"
+
+    if profile['min']['close'] is not None and profile['min']['close'] <= 0:
+        return False, "存在无效的收盘价(<=0)"
+
+    if profile['min']['volume'] is not None and profile['min']['volume'] < 0:
+        return False, "存在无效的成交量(<0)"
+
+    return True, "数据质量检查通过"
+
+
+def pre_filter_profile(profile: Dict[str, Any], config=None) -> Tuple[bool, str]:
+    """
+    基于画像的预筛选（与 stock_trend_analyzer.pre_filter 的判断和提示相同）
+
+    Returns:
+        Tuple[bool, str]: (是否通过, 原因)
+    """
+    config = config or Config
+    rows = profile['rows']
+
+    if rows < config.MIN_DATA_ROWS:
+        return False, f"数据不足{config.MIN_DATA_ROWS}天"
+
+    if rows >= 3:
+        if sum(v == 0 for v in profile['recent_volume'][-3:]) >= 2:
+            return False, "近期停牌"
+
+    latest_price = profile['last_close']
+    if latest_price is not None and (latest_price < config.PRICE_RANGE[0] or latest_price > config.PRICE_RANGE[1]):
+        return False, f"价格({latest_price:.2f})超出范围"
+
+    if rows >= 10:
+        if _recent_mean(profile['recent_amount'][-10:]) < config.MIN_DAILY_AMOUNT:
+            return False, "流动性不足"
+
+    return True, "通过预筛选"
+
+
+class DataProfileStore:
+    """数据目录下所有股票画像的持久化存储（按文件名索引）"""
+
+    def __init__(self, data_dir: str = None, config=None):
+        """
+        Args:
+            data_dir: 数据目录，默认使用Config.DATA_DIR，画像文件位于该目录下
+            config: 配置对象，默认使用Config
+        """
+        self.config = config or Config
+        self.data_dir = data_dir or self.config.DATA_DIR
+        self.path = os.path.join(self.data_dir, self.config.DATA_PROFILE_FILENAME)
+        self.tail_rows = self.config.DATA_PROFILE_TAIL_ROWS
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                # 保留天数变少时旧画像仍可用，变多时需要重建
+                if saved.get('tail_rows', 0) >= self.tail_rows:
+                    self.profiles = saved.get('profiles', {})
+                else:
+                    logger.info("画像保留天数配置已增加，全部画像将重建")
+            except Exception as e:
+                logger.warning(f"读取数据画像失败: {self.path}, {str(e)}，将重新构建")
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        读取有效的画像（文件在画像之后被外部修改过时返回None）
+
+        Args:
+            file_path: CSV文件路径
+        """
+        profile = self.profiles.get(os.path.basename(file_path))
+        if profile is None:
+            return None
+        try:
+            fingerprint = file_fingerprint(file_path)
+        except OSError:
+            return None
+        if (profile['file_size'], profile['tail_crc']) != (fingerprint['file_size'], fingerprint['tail_crc']):
+            return None
+        return profile
+
+    def rebuild(self, file_path: str, df: pd.DataFrame = None) -> Optional[Dict[str, Any]]:
+        """
+        从文件全量构建画像
+
+        Args:
+            file_path: CSV文件路径
+            df: 已读取的完整数据（与文件当前内容一致），None时读取文件
+        """
+        try:
+            if df is None:
+                df = pd.read_csv(file_path)
+            profile = build_profile(df, self.tail_rows)
+            profile.update(file_fingerprint(file_path))
+        except Exception as e:
+            logger.warning(f"构建数据画像失败: {file_path}, {str(e)}")
+            self.profiles.pop(os.path.basename(file_path), None)
+            self._dirty = True
+            return None
+        self.profiles[os.path.basename(file_path)] = profile
+        self._dirty = True
+        return profile
+
+    def record_append(self, file_path: str, new_rows: pd.DataFrame,
+                      profile: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """
+        新K线追加到文件之后更新画像
+
+        Args:
+            file_path: CSV文件路径
+            new_rows: 刚追加的新K线
+            profile: 追加之前通过 get() 取得的有效画像；None表示追加前没有有效画像，此时全量重建
+        """
+        if profile is None:
+            return self.rebuild(file_path)
+        update_profile(profile, new_rows, self.tail_rows)
+        profile.update(file_fingerprint(file_path))
+        self.profiles[os.path.basename(file_path)] = profile
+        self._dirty = True
+        return profile
+
+    def refresh(self, csv_files: Iterable[str] = None) -> Dict[str, int]:
+        """
+        为缺失或过期的股票重建画像，并删除已不存在的文件的画像
+
+        Args:
+            csv_files: 需要检查的文件，默认为数据目录下全部CSV
+
+        Returns:
+            Dict[str, int]: valid（无需重建）、rebuilt、failed、removed 的数量
+        """
+        csv_files = sorted(glob.glob(os.path.join(self.data_dir, "*.csv"))) if csv_files is None else list(csv_files)
+        stats = {'valid': 0, 'rebuilt': 0, 'failed': 0, 'removed': 0}
+        for i, file_path in enumerate(csv_files, 1):
+            if self.get(file_path) is not None:
+                stats['valid'] += 1
+            elif self.rebuild(file_path) is not None:
+                stats['rebuilt'] += 1
+            else:
+                stats['failed'] += 1
+            if i % 1000 == 0:
+                logger.info(f"画像进度: {i}/{len(csv_files)} | 重建: {stats['rebuilt']}")
+
+        existing = {os.path.basename(f) for f in glob.glob(os.path.join(self.data_dir, "*.csv"))}
+        for name in [name for name in self.profiles if name not in existing]:
+            del self.profiles[name]
+            stats['removed'] += 1
+            self._dirty = True
+        return stats
+
+    def gate(self, file_path: str, config=None) -> Optional[Tuple[bool, str, bool]]:
+        """
+        用画像执行数据质量检查和预筛选
+
+        Returns:
+            Optional[Tuple[bool, str, bool]]: (是否通过, 原因, 是否为质量问题)；没有有效画像时返回None
+        """
+        profile = self.get(file_path)
+        if profile is None:
+            return None
+        is_valid, message = check_profile_quality(profile)
+        if not is_valid:
+            return False, message, True
+        passed, reason = pre_filter_profile(profile, config or self.config)
+        return passed, reason, False
+
+    def save(self):
+        """有变化时写入画像文件（临时文件 + 原子替换）"""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'tail_rows': self.tail_rows, 'profiles': self.profiles}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def main():
+    """主函数"""
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    parser = argparse.ArgumentParser(description='构建/刷新股票数据画像')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--rebuild', action='store_true', help='忽略现有画像，全部重建')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = DataProfileStore(args.data_dir, Config)
+    if args.rebuild:
+        store.profiles = {}
+    stats = store.refresh()
+    store.save()
+
+    logger.info(f"数据画像: {len(store)} 只股票，有效 {stats['valid']}，重建 {stats['rebuilt']}，"
+                f"失败 {stats['failed']}，删除 {stats['removed']}，耗时 {time.perf_counter() - start:.2f}秒")
+    logger.info(f"画像文件: {store.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,389 @@
+"""
+全库数据质量扫描
+
+check_data_quality 只在分析过程中逐只股票把关，坏数据要到扫描进行到一半才被发现，
+而且只检查缺失值和收盘价/成交量的正负。本模块独立于分析流程，多进程并行扫描数据目录中的
+全部股票文件，检查：
+
+    - read_error / missing_columns：文件无法解析或缺少必要列
+    - bom_row：文件中间出现的BOM（多次带BOM写入/拼接文件留下的）
+    - header_row：文件中间重复出现的表头行（追加时误写表头）
+    - unparsable_row：日期或价格缺失，或任一字段有内容但无法解析的行
+    - missing_volume：价格正常但成交量/成交额为空（多为停牌日，只报告不隔离）
+    - high_below_low：最高价低于最低价
+    - close_out_of_range：收盘价不在 [最低价, 最高价] 区间内
+    - nonpositive_price：开盘/最高/最低/收盘价为0或负数
+    - duplicate_date：重复日期
+    - unordered_date：日期早于之前出现过的日期（乱序追加）
+    - price_spike：收盘价单日涨跌幅偏离滚动中位数超过 K 倍稳健标准差（1.4826×MAD），
+      且超过所有板块的涨跌停幅度，通常是复权基准不一致（历史数据与追加数据复权方式不同）
+
+输出：
+    - data_quality_report_YYYYMMDD.json：机器可读的报告（各类问题的股票数/行数、每只问题股票的
+      问题明细和样本）
+    - quarantine.json（Config.QUARANTINE_FILE）：隔离名单，包含 QUALITY_QUARANTINE_ISSUES 中
+      任一问题的股票；stock_trend_analyzer.py 默认跳过名单中的股票
+
+使用方法:
+    python data_quality_scanner.py
+    python data_quality_scanner.py --workers 8 --output-dir output/
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import io
+import os
+import glob
+import json
+import logging
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List
+
+from config import Config
+from stock_trend_analyzer import extract_stock_info
+from parameter_sweep import pool_context
+
+
+logger = logging.getLogger(__name__)
+
+# 问题类型 → 说明
+ISSUE_TYPES = {
+    'read_error': '文件无法读取或解析',
+    'missing_columns': '缺少必要列',
+    'bom_row': '文件中间出现BOM',
+    'header_row': '文件中间出现重复表头',
+    'unparsable_row': '日期或价格缺失、字段无法解析',
+    'missing_volume': '成交量/成交额为空（停牌）',
+    'high_below_low': '最高价低于最低价',
+    'close_out_of_range': '收盘价不在[最低价, 最高价]区间内',
+    'nonpositive_price': '价格为0或负数',
+    'duplicate_date': '重复日期',
+    'unordered_date': '日期乱序',
+    'price_spike': '价格跳变（疑似复权基准不一致）',
+}
+
+REQUIRED_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+VOLUME_COLUMNS = ['volume', 'amount']
+
+BOM = b'\xef\xbb\xbf'
+
+
+def _bom_line_numbers(raw: bytes) -> List[int]:
+    """文件开头之外出现BOM的行号（从1开始）"""
+    lines = []
+    position = raw.find(BOM, 1)
+    while position != -1:
+        lines.append(raw.count(b'\n', 0, position) + 1)
+        position = raw.find(BOM, position + 1)
+    return lines
+
+
+def _price_spikes(close: np.ndarray, config) -> np.ndarray:
+    """
+    滚动MAD跳变检测
+
+    Returns:
+        np.ndarray: 与close等长的布尔数组（当日收盘相对前一日的涨跌幅为跳变）
+    """
+    spikes = np.zeros(len(close), dtype=bool)
+    if len(close) < 2:
+        return spikes
+
+    window = config.QUALITY_SPIKE_WINDOW
+    min_periods = max(2, window // 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = pd.Series(close[1:] / close[:-1] - 1)
+
+    # 只用当日之前的窗口估计中位数和MAD，跳变本身不影响基准
+    median = returns.rolling(window, min_periods=min_periods).median()
+    mad = (returns - median).abs().rolling(window, min_periods=min_periods).median()
+    median, mad = median.shift(1), mad.shift(1)
+
+    deviation = (returns - median).abs()
+    flagged = ((deviation > config.QUALITY_SPIKE_MAD_K * 1.4826 * mad)
+               & (returns.abs() > config.QUALITY_SPIKE_MIN_RETURN)).to_numpy()
+    spikes[1:] = flagged
+    spikes[:config.QUALITY_SPIKE_SKIP_DAYS + 1] = False
+    return spikes
+
+
+def scan_stock_file(file_path: str, config=None) -> Dict[str, Any]:
+    """
+    扫描单只股票文件
+
+    Args:
+        file_path: CSV文件路径
+        config: 配置对象，默认使用Config
+
+    Returns:
+        Dict: file、stock_code、stock_name、rows、last_date、
+            issues（问题类型 → {'count': 行数, 'samples': 样本（日期或行号）}，无问题时为空）
+    """
+    config = config or Config
+    stock_code, stock_name = extract_stock_info(file_path)
+    result = {
+        'file': os.path.basename(file_path),
+        'stock_code': stock_code,
+        'stock_name': stock_name,
+        'rows': 0,
+        'last_date': None,
+        'issues': {},
+    }
+
+    def add_issue(issue: str, mask_or_count, samples):
+        count = int(np.count_nonzero(mask_or_count)) if isinstance(mask_or_count, np.ndarray) else int(mask_or_count)
+        if count:
+            samples = [sample.item() if isinstance(sample, np.generic) else sample
+                       for sample in list(samples)[:config.QUALITY_SAMPLE_SIZE]]
+            result['issues'][issue] = {'count': count, 'samples': samples}
+
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        df = pd.read_csv(io.BytesIO(raw))
+    except Exception as e:
+        add_issue('read_error', 1, [str(e)])
+        return result
+
+    df.columns = [str(col).lstrip('\ufeff').strip() for col in df.columns]
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        add_issue('missing_columns', len(missing), missing)
+        return result
+    result['rows'] = len(df)
+
+    bom_lines = _bom_line_numbers(raw)
+    add_issue('bom_row', len(bom_lines), bom_lines)
+
+    # 行号：表头为第1行
+    line_numbers = np.arange(2, len(df) + 2)
+    date_text = df['date'].astype(str).str.lstrip('\ufeff').str.strip()
+    header = (date_text == 'date').to_numpy()
+    add_issue('header_row', header, line_numbers[header])
+
+    dates = pd.to_datetime(date_text, format='%Y-%m-%d', errors='coerce')
+    values = {col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+              for col in REQUIRED_COLUMNS[1:]}
+    # 空值和"有内容但无法解析"分开：停牌日的成交量/成交额为空，不算损坏
+    empty = {col: df[col].isna().to_numpy() for col in REQUIRED_COLUMNS[1:]}
+    garbled = np.column_stack([np.isnan(values[col]) & ~empty[col] for col in REQUIRED_COLUMNS[1:]]).any(axis=1)
+    price_missing = np.column_stack([empty[col] for col in PRICE_COLUMNS]).any(axis=1)
+    unparsable = ~header & (dates.isna().to_numpy() | price_missing | garbled)
+    add_issue('unparsable_row', unparsable, line_numbers[unparsable])
+
+    # 以下检查只针对可解析的行
+    valid = ~header & ~unparsable
+    missing_volume = valid & np.column_stack([empty[col] for col in VOLUME_COLUMNS]).any(axis=1)
+    add_issue('missing_volume', missing_volume, date_text[missing_volume])
+    date_text = date_text[valid].to_numpy()
+    day = dates[valid].to_numpy().astype('int64')
+    open_, high, low, close = (values[col][valid] for col in PRICE_COLUMNS)
+    if len(day):
+        result['last_date'] = date_text[-1]
+
+    high_below_low = high < low
+    add_issue('high_below_low', high_below_low, date_text[high_below_low])
+
+    out_of_range = (close < low) | (close > high)
+    add_issue('close_out_of_range', out_of_range, date_text[out_of_range])
+
+    nonpositive = (open_ <= 0) | (high <= 0) | (low <= 0) | (close <= 0)
+    add_issue('nonpositive_price', nonpositive, date_text[nonpositive])
+
+    duplicated = pd.Series(day).duplicated().to_numpy()
+    add_issue('duplicate_date', duplicated, date_text[duplicated])
+
+    unordered = np.zeros(len(day), dtype=bool)
+    if len(day) > 1:
+        unordered[1:] = day[1:] < np.maximum.accumulate(day)[:-1]
+    add_issue('unordered_date', unordered, date_text[unordered])
+
+    # 跳变检测跳过非正价格（已单独报告）
+    positive = ~nonpositive
+    spikes = np.zeros(len(day), dtype=bool)
+    spikes[positive] = _price_spikes(close[positive], config)
+    if spikes.any():
+        previous = np.concatenate([[np.nan], close[positive][:-1]])[spikes[positive]]
+        spike_samples = [f"{date}: {prev:.2f} → {price:.2f} ({price / prev - 1:+.1%})"
+                         for date, prev, price in zip(date_text[spikes], previous, close[spikes])]
+        add_issue('price_spike', spikes, spike_samples)
+
+    return result
+
+
+def scan_data_store(
+    data_dir: str = None,
+    config=None,
+    limit: int = None,
+    workers: int = None
+) -> Dict[str, Any]:
+    """
+    并行扫描数据目录中的全部股票文件
+
+    Args:
+        data_dir: 数据目录，默认使用Config.DATA_DIR
+        config: 配置对象，默认使用Config
+        limit: 只扫描前N只股票（测试用）
+        workers: 并行进程数，默认使用Config.QUALITY_WORKERS
+
+    Returns:
+        Dict: 扫描报告（issue_summary 为各类问题的股票数/行数，stocks 为有问题的股票明细）
+    """
+    config = config or Config
+    data_dir = data_dir or config.DATA_DIR
+    workers = workers or config.QUALITY_WORKERS or os.cpu_count() or 1
+
+    csv_files = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+    if limit:
+        csv_files = csv_files[:limit]
+    logger.info(f"数据质量扫描: {len(csv_files)} 只股票, {workers} 个进程")
+
+    if workers > 1 and len(csv_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as executor:
+            chunksize = max(1, len(csv_files) // (workers * 8))
+            results = list(executor.map(scan_stock_file, csv_files, itertools.repeat(config),
+                                        chunksize=chunksize))
+    else:
+        results = [scan_stock_file(file_path, config) for file_path in csv_files]
+
+    quarantine_issues = set(config.QUALITY_QUARANTINE_ISSUES)
+    issue_summary = {
+        issue: {'description': description, 'stocks': 0, 'rows': 0, 'quarantine': issue in quarantine_issues}
+        for issue, description in ISSUE_TYPES.items()
+    }
+    stocks = []
+    for result in results:
+        if not result['issues']:
+            continue
+        for issue, detail in result['issues'].items():
+            issue_summary[issue]['stocks'] += 1
+            issue_summary[issue]['rows'] += detail['count']
+        result['quarantined'] = bool(quarantine_issues & result['issues'].keys())
+        stocks.append(result)
+
+    return {
+        'scan_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'data_dir': os.path.abspath(data_dir),
+        'total_files': len(results),
+        'total_rows': int(sum(result['rows'] for result in results)),
+        'files_with_issues': len(stocks),
+        'quarantined_count': sum(stock['quarantined'] for stock in stocks),
+        'config': {
+            'spike_window': config.QUALITY_SPIKE_WINDOW,
+            'spike_mad_k': config.QUALITY_SPIKE_MAD_K,
+            'spike_min_return': config.QUALITY_SPIKE_MIN_RETURN,
+            'spike_skip_days': config.QUALITY_SPIKE_SKIP_DAYS,
+            'quarantine_issues': sorted(quarantine_issues),
+        },
+        'issue_summary': issue_summary,
+        'stocks': stocks,
+    }
+
+
+def build_quarantine(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    从扫描报告生成隔离名单
+
+    Returns:
+        Dict: generated_at、data_dir、stocks（文件名 → 股票代码、名称、隔离原因）
+    """
+    quarantine_issues = set(report['config']['quarantine_issues'])
+    return {
+        'generated_at': report['scan_time'],
+        'data_dir': report['data_dir'],
+        'stocks': {
+            stock['file']: {
+                'stock_code': stock['stock_code'],
+                'stock_name': stock['stock_name'],
+                'issues': [issue for issue in stock['issues'] if issue in quarantine_issues],
+            }
+            for stock in report['stocks'] if stock['quarantined']
+        },
+    }
+
+
+def save_quality_report(
+    report: Dict[str, Any],
+    output_dir: str = None,
+    quarantine_path: str = None,
+    config=None
+) -> Dict[str, str]:
+    """
+    保存扫描报告和隔离名单
+
+    Args:
+        report: scan_data_store 的返回值
+        output_dir: 报告输出目录，默认使用Config.OUTPUT_DIR
+        quarantine_path: 隔离名单路径，默认使用Config.QUARANTINE_FILE
+        config: 配置对象，默认使用Config
+
+    Returns:
+        Dict[str, str]: 报告和隔离名单的路径
+    """
+    config = config or Config
+    output_dir = output_dir or config.OUTPUT_DIR
+    quarantine_path = quarantine_path or config.QUARANTINE_FILE
+    os.makedirs(output_dir, exist_ok=True)
+
+    report_path = os.path.join(output_dir, f"data_quality_report_{datetime.now().strftime(config.DATE_FORMAT)}.json")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    # 先写临时文件再替换，分析器不会读到写了一半的名单
+    os.makedirs(os.path.dirname(os.path.abspath(quarantine_path)), exist_ok=True)
+    tmp_path = f"{quarantine_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(build_quarantine(report), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, quarantine_path)
+
+    return {'report': report_path, 'quarantine': quarantine_path}
+
+
+def main():
+    """主函数"""
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    parser = argparse.ArgumentParser(description='全库数据质量扫描（生成报告和隔离名单）')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--output-dir', help='报告输出目录')
+    parser.add_argument('--quarantine-file', help='隔离名单路径，默认使用Config.QUARANTINE_FILE')
+    parser.add_argument('--workers', type=int, help='并行进程数')
+    parser.add_argument('--limit', type=int, help='只扫描前N只股票（测试用）')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = scan_data_store(args.data_dir, Config, args.limit, args.workers)
+    if not report['total_files']:
+        logger.error("未找到CSV文件，请检查数据目录")
+        return 1
+    logger.info(f"扫描完成，耗时 {time.perf_counter() - start:.2f}秒")
+
+    logger.info("=" * 60)
+    logger.info(f"扫描股票: {report['total_files']} 只, {report['total_rows']} 行")
+    logger.info(f"有问题的股票: {report['files_with_issues']} 只, 隔离: {report['quarantined_count']} 只")
+    for issue, summary in report['issue_summary'].items():
+        if summary['stocks']:
+            flag = '隔离' if summary['quarantine'] else '仅报告'
+            logger.info(f"  {summary['description']}({issue}): {summary['stocks']} 只股票, "
+                        f"{summary['rows']} 行 [{flag}]")
+    logger.info("=" * 60)
+
+    paths = save_quality_report(report, args.output_dir, args.quarantine_file)
+    for name, path in paths.items():
+        logger.info(f"  {name}: {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,313 @@
+"""
+常驻行情缓存模块
+
+把全市场股票的日线数据和技术指标常驻内存，供长期运行的分析服务、
+单进程流水线等场景复用，避免每次都重新读取全部CSV、重新计算指标。
+
+增量更新：
+    CSV文件只会在末尾追加新K线（daily_data_updater.py）。refresh() 根据文件
+    大小和修改时间判断变化，只读取上次读取位置之后新增的行，并用
+    extend_indicators 增量补齐指标；文件被整体重写（变小）时才全量重新加载。
+
+数据质量隔离：
+    data_quality_scanner.py 生成的隔离名单（Config.QUARANTINE_FILE）中的股票仍然加载
+    （get() 可以查到，供特征提取等按股票查询的场景使用），但 iter_entries() 不返回，
+    因此全市场扫描、时点回放与 analyze_all_stocks 一样跳过这些股票。名单在 load()/refresh()
+    时重新读取。
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import io
+import os
+import glob
+import logging
+import threading
+import pandas as pd
+from typing import Dict, Iterator, List, Optional
+
+from config import Config
+from technical_indicators import calculate_all_indicators, extend_indicators, get_indicator_params
+from stock_trend_analyzer import load_quarantine
+
+
+logger = logging.getLogger(__name__)
+
+
+class StockEntry:
+    """单只股票的缓存条目"""
+
+    __slots__ = ('file_path', 'stock_code', 'stock_name', 'file_size', 'mtime', 'frame')
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # 文件名格式: sh.600000_浦发银行_近10年日线.csv
+        parts = os.path.basename(file_path).replace('.csv', '').split('_')
+        self.stock_code = parts[0]
+        self.stock_name = parts[1] if len(parts) >= 2 else "未知"
+        self.file_size = 0
+        self.mtime = 0.0
+        self.frame: Optional[pd.DataFrame] = None  # 原始列 + 全部技术指标
+
+    def locate(self, target_date) -> int:
+        """
+        定位不晚于目标日期的最后一个交易日所在行
+
+        Args:
+            target_date: 目标日期（字符串或Timestamp）
+
+        Returns:
+            int: 行号，目标日期早于全部数据时返回-1
+        """
+        dates = pd.to_datetime(self.frame['date']).values
+        return int(dates.searchsorted(pd.Timestamp(target_date).to_datetime64(), side='right')) - 1
+
+
+class MarketCache:
+    """全市场行情与指标的常驻缓存"""
+
+    def __init__(self, data_dir: str = None, config=None, quarantine_path: str = None,
+                 skip_quarantined: bool = True):
+        """
+        初始化缓存
+
+        Args:
+            data_dir: 数据目录，默认使用Config.DATA_DIR
+            config: 配置对象（决定指标参数），默认使用Config类
+            quarantine_path: 隔离名单路径，默认使用Config.QUARANTINE_FILE
+            skip_quarantined: 遍历（iter_entries）时是否跳过隔离名单中的股票
+        """
+        self.config = config or Config
+        self.data_dir = data_dir or self.config.DATA_DIR
+        self.indicator_params = get_indicator_params(self.config)
+        self.entries: Dict[str, StockEntry] = {}
+        self.quarantine_path = (quarantine_path or self.config.QUARANTINE_FILE) if skip_quarantined else None
+        self.quarantined: Dict[str, List[str]] = {}  # 文件名 → 隔离原因
+        self.limit = None  # 只加载前N个文件时，刷新不加载新增文件
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _list_files(self, limit: int = None) -> List[str]:
+        files = sorted(glob.glob(os.path.join(self.data_dir, "*.csv")))
+        return files[:limit] if limit else files
+
+    def _load_quarantine(self) -> int:
+        """
+        重新读取隔离名单
+
+        Returns:
+            int: 隔离状态发生变化的文件数
+        """
+        quarantined = load_quarantine(self.quarantine_path, self.data_dir) if self.quarantine_path else {}
+        changed = len(set(quarantined) ^ set(self.quarantined))
+        self.quarantined = quarantined
+        return changed
+
+    def _load_entry(self, entry: StockEntry):
+        """全量读取并计算指标"""
+        stat = os.stat(entry.file_path)
+        df = pd.read_csv(entry.file_path)
+        entry.frame = calculate_all_indicators(df, self.config)
+        entry.file_size = stat.st_size
+        entry.mtime = stat.st_mtime
+
+    def _append_entry(self, entry: StockEntry) -> int:
+        """
+        读取文件末尾新增的行并增量计算指标
+
+        Returns:
+            int: 新增行数
+        """
+        stat = os.stat(entry.file_path)
+        with open(entry.file_path, 'rb') as f:
+            header = f.readline()
+            f.seek(entry.file_size)
+            tail = f.read()
+
+        entry.file_size = stat.st_size
+        entry.mtime = stat.st_mtime
+        if not tail.strip():
+            return 0
+
+        new_rows = pd.read_csv(io.BytesIO(header + tail), encoding='utf-8-sig')
+        if new_rows.empty:
+            return 0
+
+        entry.frame = extend_indicators(entry.frame, new_rows, self.config)
+        return len(new_rows)
+
+    def load(self, limit: int = None) -> int:
+        """
+        加载全部股票数据并计算指标
+
+        Args:
+            limit: 只加载前N个文件（测试用）
+
+        Returns:
+            int: 成功加载的股票数
+        """
+        self.limit = limit
+        files = self._list_files(limit)
+        logger.info(f"加载行情缓存: {len(files)} 个文件")
+
+        entries = {}
+        for i, file_path in enumerate(files, 1):
+            entry = StockEntry(file_path)
+            try:
+                self._load_entry(entry)
+            except Exception as e:
+                logger.error(f"{file_path}: 加载失败 - {str(e)}")
+                continue
+            entries[entry.stock_code] = entry
+
+            if i % self.config.PROGRESS_INTERVAL == 0:
+                logger.info(f"加载进度: {i}/{len(files)}")
+
+        with self.lock:
+            self.entries = entries
+            self._load_quarantine()
+
+        quarantined = self.quarantined_count()
+        logger.info(f"行情缓存已就绪: {len(entries)} 只股票"
+                    + (f"（{quarantined} 只在隔离名单中，扫描时跳过）" if quarantined else ""))
+        return len(entries)
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        增量刷新：追加新K线、加载新增股票、移除已删除的股票
+
+        Returns:
+            Dict: 各类变化的数量（quarantine_changed 为隔离状态变化的文件数）
+        """
+        stats = {'appended': 0, 'new_bars': 0, 'reloaded': 0, 'added': 0, 'removed': 0, 'failed': 0,
+                 'quarantine_changed': 0}
+        files = self._list_files(self.limit)
+        seen = set()
+
+        with self.lock:
+            for file_path in files:
+                stock_code = os.path.basename(file_path).split('_')[0]
+                seen.add(stock_code)
+                entry = self.entries.get(stock_code)
+
+                try:
+                    if entry is None:
+                        entry = StockEntry(file_path)
+                        self._load_entry(entry)
+                        self.entries[stock_code] = entry
+                        stats['added'] += 1
+                        continue
+
+                    stat = os.stat(file_path)
+                    if stat.st_size == entry.file_size and stat.st_mtime == entry.mtime:
+                        continue
+
+                    if stat.st_size > entry.file_size:
+                        # 只追加了新行
+                        count = self._append_entry(entry)
+                        if count:
+                            stats['appended'] += 1
+                            stats['new_bars'] += count
+                    else:
+                        # 文件被重写，全量重新加载
+                        self._load_entry(entry)
+                        stats['reloaded'] += 1
+                except Exception as e:
+                    logger.error(f"{file_path}: 刷新失败 - {str(e)}")
+                    stats['failed'] += 1
+
+            for stock_code in set(self.entries) - seen:
+                del self.entries[stock_code]
+                stats['removed'] += 1
+
+            stats['quarantine_changed'] = self._load_quarantine()
+
+        return stats
+
+    def append_rows(self, file_path: str, new_rows: pd.DataFrame) -> bool:
+        """
+        把刚追加到CSV的新K线同步到缓存（数据更新器回调）
+
+        新行已在内存中，无需重新读取文件；同时记录文件最新的大小和修改时间，
+        避免下次 refresh() 重复读取这些行。
+
+        Args:
+            file_path: 已追加数据的CSV文件路径
+            new_rows: 追加的新行（与CSV相同的列）
+
+        Returns:
+            bool: 股票在缓存中并已同步返回True
+        """
+        stock_code = os.path.basename(file_path).split('_')[0]
+        with self.lock:
+            entry = self.entries.get(stock_code)
+            if entry is None:
+                return False
+
+            entry.frame = extend_indicators(entry.frame, new_rows, self.config)
+            stat = os.stat(file_path)
+            entry.file_size = stat.st_size
+            entry.mtime = stat.st_mtime
+        return True
+
+    def last_dates(self) -> Dict[str, str]:
+        """
+        每只股票缓存中最后一个交易日
+
+        Returns:
+            Dict[str, str]: CSV文件路径 -> 最后日期（YYYY-MM-DD）
+        """
+        with self.lock:
+            return {entry.file_path: str(entry.frame['date'].iloc[-1])
+                    for entry in self.entries.values() if len(entry.frame)}
+
+    def get(self, stock_code: str) -> Optional[StockEntry]:
+        """
+        获取股票缓存条目
+
+        Args:
+            stock_code: 股票代码，支持 'sh.600000' 或 '600000'
+
+        Returns:
+            Optional[StockEntry]: 缓存条目，不存在返回None
+        """
+        entry = self.entries.get(stock_code)
+        if entry is None and '.' not in stock_code:
+            for prefix in ('sh.', 'sz.', 'bj.'):
+                entry = self.entries.get(prefix + stock_code)
+                if entry is not None:
+                    break
+        return entry
+
+    def iter_entries(self) -> Iterator[StockEntry]:
+        """按股票代码顺序遍历缓存条目（跳过隔离名单中的股票）"""
+        for stock_code in sorted(self.entries):
+            entry = self.entries[stock_code]
+            if os.path.basename(entry.file_path) not in self.quarantined:
+                yield entry
+
+    def quarantined_count(self) -> int:
+        """缓存中被隔离（遍历时跳过）的股票数"""
+        return sum(os.path.basename(entry.file_path) in self.quarantined for entry in self.entries.values())
+
+    def get_frame(self, entry: StockEntry, config=None) -> pd.DataFrame:
+        """
+        获取指定配置下的指标DataFrame
+
+        指标参数与缓存一致时直接返回缓存；否则基于原始列重新计算（不写回缓存）。
+
+        Args:
+            entry: 缓存条目
+            config: 配置对象，None表示使用缓存配置
+
+        Returns:
+            pd.DataFrame: 包含技术指标的DataFrame
+        """
+        if config is None or get_indicator_params(config) == self.indicator_params:
+            return entry.frame
+        raw_columns = [c for c in ('date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'pctChg')
+                       if c in entry.frame.columns]
+        return calculate_all_indicators(entry.frame[raw_columns], config)
@@ -0,0 +1,359 @@
+"""
+内存分析模块
+
+小内存Runner上跑全市场扫描/回测时出现过OOM，需要知道内存到底花在哪里：
+DataFrame副本、信号列表，还是指标DataFrame。本模块为分析器、数据更新工具和反馈分析工具
+提供可选的内存分析（命令行 --profile-memory 开启，默认关闭，不影响正常运行的性能）：
+
+    - 峰值RSS：resource.getrusage 的 ru_maxrss（进程生命周期内的最大常驻内存）
+    - 阶段分配：按阶段（mark_phase 划分）记录 tracemalloc 峰值、阶段结束时的净增内存，
+      以及净增最多的分配位置（原始位置 + 归属到本仓库代码的调用行，便于区分是哪一步的副本）
+    - 逐只股票分配：每只股票（及其子阶段：读取/指标/检测等）的 tracemalloc 峰值增量，
+      记录最大的一只股票，回答"单只股票最多要多少内存"
+
+结果写入JSON报告文件。tracemalloc 会让运行变慢（调用栈深度为1时约4倍，深度10时约25倍），
+只在排查内存问题时开启。
+逐只股票的记录只在主线程进行（流水线模式下的计算线程不记录）。
+
+使用方式（各工具的 main 中）:
+    start_profiling('analyzer', report_path)
+    ...  # 工具内部用 mark_phase / track_memory 标记阶段和单只股票，未开启时为空操作
+    finish_profiling()
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import linecache
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，峰值RSS记为None
+    resource = None
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# 本仓库代码所在目录（skills/），用于把分配归属到仓库内的调用行
+_REPO_SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 当前进程中开启的内存分析器（未开启时为None，mark_phase/track_memory 为空操作）
+_active_profiler: Optional['MemoryProfiler'] = None
+
+_MB = 1024 * 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    进程峰值常驻内存（MB）
+
+    Returns:
+        float: 峰值RSS，平台不支持时返回None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return round(peak / _MB if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _short_path(filename: str) -> str:
+    """缩短文件路径：仓库内显示相对skills/的路径，第三方库显示site-packages之后的部分"""
+    if filename.startswith(_REPO_SKILLS_DIR):
+        return os.path.relpath(filename, _REPO_SKILLS_DIR)
+    marker = 'site-packages' + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _site_info(frame: tracemalloc.Frame) -> Dict[str, Any]:
+    """分配位置的描述：文件:行号 和 该行代码"""
+    return {
+        'site': f"{_short_path(frame.filename)}:{frame.lineno}",
+        'code': linecache.getline(frame.filename, frame.lineno).strip(),
+    }
+
+
+class MemoryProfiler:
+    """单次运行的内存分析器"""
+
+    def __init__(self, tool: str, report_path: str, top_n: int = None, trace_frames: int = None):
+        """
+        Args:
+            tool: 工具名（写入报告）
+            report_path: 报告文件路径
+            top_n: 每个阶段列出的分配位置数，默认使用Config.MEMORY_TOP_SITES
+            trace_frames: tracemalloc 记录的调用栈深度，默认使用Config.MEMORY_TRACE_FRAMES
+                （越深越能从pandas/numpy内部追溯到仓库代码的调用行，但越慢）
+        """
+        self.tool = tool
+        self.report_path = report_path
+        self.top_n = top_n or Config.MEMORY_TOP_SITES
+        self.trace_frames = trace_frames or Config.MEMORY_TRACE_FRAMES
+        self.phases: List[Dict[str, Any]] = []
+        self.tracked: Dict[str, Dict[str, Any]] = {}
+        self._phase = None
+        self._scopes: List[Dict[str, Any]] = []
+        self._item_label = None
+        self._started_at = None
+
+    # ---------- 启停 ----------
+
+    def start(self):
+        """开始跟踪内存分配"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        self._started_at = time.perf_counter()
+        self.rss_at_start_mb = peak_rss_mb()
+        self.mark('setup')
+
+    def stop(self) -> Dict[str, Any]:
+        """结束最后一个阶段并停止跟踪，返回报告"""
+        try:
+            self._end_phase()
+            return self.report()
+        finally:
+            tracemalloc.stop()
+
+    # ---------- 阶段 ----------
+
+    def mark(self, name: str):
+        """结束当前阶段并开始名为name的新阶段"""
+        self._end_phase()
+        # 阶段开始快照本身占用的内存会一直保留到阶段结束，从峰值中扣除
+        before = tracemalloc.get_traced_memory()[0]
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        self._fold_peak(peak)
+        tracemalloc.reset_peak()
+        self._phase = {
+            'name': name,
+            'start_time': time.perf_counter(),
+            'start_current': current,
+            'peak': current,
+            'overhead': current - before,
+            'snapshot': snapshot,
+        }
+
+    def _end_phase(self):
+        """记录当前阶段：耗时、峰值、净增内存和净增最多的分配位置"""
+        phase = self._phase
+        if phase is None:
+            return
+        self._phase = None
+        seconds = time.perf_counter() - phase['start_time']
+        current, peak = tracemalloc.get_traced_memory()
+        phase['peak'] = max(phase['peak'], peak)
+        snapshot = self._snapshot()
+        diffs = snapshot.compare_to(phase['snapshot'], 'traceback')
+
+        # 原始分配位置（最内层帧）和归属到仓库代码的调用行（最内层的仓库帧）分别汇总；
+        # Traceback 中的帧按从外到内排列
+        raw_sites: Dict[str, Dict[str, Any]] = {}
+        repo_sites: Dict[str, Dict[str, Any]] = {}
+        for stat in diffs:
+            if stat.size_diff <= 0:
+                continue
+            frames = list(stat.traceback)
+            self._add_site(raw_sites, frames[-1], stat)
+            repo_frame = next((f for f in reversed(frames) if f.filename.startswith(_REPO_SKILLS_DIR)
+                               and not f.filename.endswith('memory_tracking.py')), None)
+            if repo_frame is not None:
+                self._add_site(repo_sites, repo_frame, stat)
+
+        self.phases.append({
+            'name': phase['name'],
+            'seconds': round(seconds, 3),
+            'traced_peak_mb': round((phase['peak'] - phase['overhead']) / _MB, 2),
+            'traced_peak_above_start_mb': round((phase['peak'] - phase['start_current']) / _MB, 2),
+            'retained_mb': round((current - phase['start_current']) / _MB, 2),
+            'peak_rss_mb': peak_rss_mb(),
+            'top_sites': self._top(raw_sites),
+            'top_repo_sites': self._top(repo_sites),
+        })
+        self._fold_peak(peak)
+        tracemalloc.reset_peak()
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        """拍摄快照，排除tracemalloc和本模块自身的分配"""
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    @staticmethod
+    def _add_site(sites: Dict[str, Dict[str, Any]], frame: tracemalloc.Frame, stat):
+        info = _site_info(frame)
+        entry = sites.setdefault(info['site'], {**info, 'size_diff': 0, 'count_diff': 0})
+        entry['size_diff'] += stat.size_diff
+        entry['count_diff'] += stat.count_diff
+
+    def _top(self, sites: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ranked = sorted(sites.values(), key=lambda s: s['size_diff'], reverse=True)[:self.top_n]
+        return [{'site': s['site'], 'code': s['code'], 'size_diff_kb': round(s['size_diff'] / 1024, 1),
+                 'count_diff': s['count_diff']} for s in ranked]
+
+    # ---------- 逐项（单只股票）跟踪 ----------
+
+    def _fold_peak(self, peak: int):
+        """重置tracemalloc峰值前，把当前峰值并入所有未结束的作用域"""
+        if self._phase is not None:
+            self._phase['peak'] = max(self._phase['peak'], peak)
+        for scope in self._scopes:
+            scope['peak'] = max(scope['peak'], peak)
+
+    @contextmanager
+    def track(self, name: str, label: str = None):
+        """
+        记录一段代码的分配峰值增量（相对进入时的已分配内存）
+
+        Args:
+            name: 跟踪项名称（如 stock、read、indicators）
+            label: 项目标签（如股票文件名）；None时使用外层 stock 项的标签
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self._fold_peak(peak)
+        tracemalloc.reset_peak()
+        scope = {'base': current, 'peak': current}
+        self._scopes.append(scope)
+        outer_label = self._item_label
+        if label is not None:
+            self._item_label = label
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self._fold_peak(peak)
+            self._scopes.pop()
+            self._record(name, self._item_label, scope['peak'] - scope['base'])
+            self._item_label = outer_label
+
+    def _record(self, name: str, label: Optional[str], size: int):
+        entry = self.tracked.setdefault(name, {'count': 0, 'total': 0, 'max': -1, 'max_label': None})
+        entry['count'] += 1
+        entry['total'] += size
+        if size > entry['max']:
+            entry['max'] = size
+            entry['max_label'] = label
+
+    # ---------- 报告 ----------
+
+    def report(self) -> Dict[str, Any]:
+        """生成报告字典"""
+        tracked = {
+            name: {
+                'count': e['count'],
+                'mean_kb': round(e['total'] / e['count'] / 1024, 1),
+                'max_kb': round(e['max'] / 1024, 1),
+                'max_label': e['max_label'],
+            }
+            for name, e in self.tracked.items()
+        }
+        largest = tracked.get('stock')
+        return {
+            'tool': self.tool,
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'seconds': round(time.perf_counter() - self._started_at, 3) if self._started_at else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'rss_at_start_mb': self.rss_at_start_mb,
+            'traced_peak_mb': max((p['traced_peak_mb'] for p in self.phases), default=None),
+            'largest_stock': {'label': largest['max_label'], 'peak_kb': largest['max_kb']} if largest else None,
+            'phases': self.phases,
+            'per_item': tracked,
+        }
+
+    def save(self, report: Dict[str, Any]) -> str:
+        """写出报告文件（原子替换）"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+        tmp_path = f"{self.report_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.report_path)
+        return self.report_path
+
+
+def default_report_path(output_dir: str, tool: str) -> str:
+    """默认报告路径：<输出目录>/memory_profile_<工具名>_<时间>.json"""
+    return os.path.join(output_dir, f"memory_profile_{tool}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+
+def start_profiling(tool: str, report_path: str) -> MemoryProfiler:
+    """
+    开启内存分析（进程内同时只能有一个）
+
+    Args:
+        tool: 工具名
+        report_path: 报告文件路径
+
+    Returns:
+        MemoryProfiler: 分析器
+    """
+    global _active_profiler
+    if _active_profiler is not None:
+        raise RuntimeError("内存分析已开启")
+    _active_profiler = MemoryProfiler(tool, report_path)
+    _active_profiler.start()
+    logger.info(f"内存分析已开启（tracemalloc，运行会变慢），报告: {report_path}")
+    return _active_profiler
+
+
+def finish_profiling() -> Optional[str]:
+    """
+    结束内存分析，写出报告并输出摘要
+
+    Returns:
+        str: 报告路径，未开启时返回None
+    """
+    global _active_profiler
+    profiler, _active_profiler = _active_profiler, None
+    if profiler is None:
+        return None
+
+    report = profiler.stop()
+    path = profiler.save(report)
+    logger.info("=" * 60)
+    logger.info(f"内存分析: 峰值RSS {report['peak_rss_mb']} MB, tracemalloc峰值 {report['traced_peak_mb']} MB")
+    for phase in report['phases']:
+        top = phase['top_repo_sites'][0] if phase['top_repo_sites'] else None
+        where = f" | 主要来源 {top['site']} (+{top['size_diff_kb']:.0f} KB)" if top else ''
+        logger.info(f"  [{phase['name']}] 峰值 {phase['traced_peak_mb']} MB, "
+                    f"净增 {phase['retained_mb']} MB, {phase['seconds']:.2f}秒{where}")
+    for name, item in report['per_item'].items():
+        logger.info(f"  单项[{name}] 次数={item['count']} 平均 {item['mean_kb']} KB, "
+                    f"最大 {item['max_kb']} KB ({item['max_label']})")
+    logger.info(f"  报告: {path}")
+    logger.info("=" * 60)
+    return path
+
+
+def mark_phase(name: str):
+    """标记新阶段开始（未开启内存分析时为空操作）"""
+    if _active_profiler is not None:
+        _active_profiler.mark(name)
+
+
+def track_memory(name: str, label: str = None):
+    """
+    跟踪一段代码的分配峰值（未开启内存分析或不在主线程时返回空上下文）
+
+    Args:
+        name: 跟踪项名称
+        label: 项目标签（如股票文件名），None时沿用外层项目的标签
+    """
+    if _active_profiler is None or threading.current_thread() is not threading.main_thread():
+        return nullcontext()
+    return _active_profiler.track(name, label)
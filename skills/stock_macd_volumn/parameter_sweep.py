@@ -0,0 +1,472 @@
+"""
+并行参数扫描模块
+
+调参时每换一组阈值就重新跑一遍 stock_trend_analyzer.py，5000+只股票的CSV读取和
+指标计算要重复做很多次，而这些阈值其实并不影响指标本身。本模块把两部分拆开：
+
+1. 特征构建（只做一次）：读取CSV → 数据质量检查/预筛选 → 计算技术指标 →
+   compute_signal_features 得到每个交易日的MACD评分、放量倍数、均线距离、补充评分、
+   风险特征和未来收益，拼接成一张全市场特征表（可缓存到磁盘）
+2. 参数评估（每组参数一次）：阈值类参数只是在特征表上重新做向量化筛选，
+   多组参数分配到多个进程并行评估
+
+可扫描的参数（只影响筛选、不影响指标计算）：
+    MACD_SCORE_THRESHOLD, VOLUME_RATIO_THRESHOLD, MA_DISTANCE_THRESHOLD, FILTER_MODE,
+    RATING_THRESHOLD_A, RATING_THRESHOLD_B（对应 RATING_THRESHOLDS）,
+    MIN_RATING（只统计该评级及以上的信号）, 以及风险控制阈值
+指标周期等参数会改变指标本身，需要修改Config后重新构建特征表。
+
+评估口径：按实盘模式筛选（不使用未来涨幅作为条件），只统计未来N日数据完整的信号，
+    胜率 = 未来N日最高涨幅 >= MIN_FUTURE_RETURN 的信号占比
+
+使用方法:
+    python parameter_sweep.py                                  # 使用Config.SWEEP_GRID
+    python parameter_sweep.py --grid '{"MACD_SCORE_THRESHOLD": [50, 65], "FILTER_MODE": ["standard", "loose"]}'
+    python parameter_sweep.py --grid grid.json --feature-cache output/sweep_features.pkl
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import glob
+import json
+import pickle
+import logging
+import itertools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from technical_indicators import calculate_all_indicators, check_data_quality, get_indicator_params
+from signal_detector import compute_signal_features, match_signal_conditions
+from stock_trend_analyzer import extract_stock_info, pre_filter, load_stock_file
+
+
+logger = logging.getLogger(__name__)
+
+# 可扫描参数 → Config属性（RATING_THRESHOLD_* 写入 RATING_THRESHOLDS，MIN_RATING 为扫描专用）
+SWEEP_PARAMETERS = (
+    'MACD_SCORE_THRESHOLD',
+    'VOLUME_RATIO_THRESHOLD',
+    'MA_DISTANCE_THRESHOLD',
+    'FILTER_MODE',
+    'RATING_THRESHOLD_A',
+    'RATING_THRESHOLD_B',
+    'MIN_RATING',
+    'MAX_CONSECUTIVE_LIMIT_UP',
+    'MAX_SHORT_TERM_GAIN',
+    'VOLUME_SURGE_NO_GAIN',
+    'VOLUME_SURGE_MIN_GAIN',
+    'MAX_MA20_DEVIATION',
+)
+
+# 评级等级（用于 MIN_RATING 过滤）
+RATING_LEVELS = {'C': 0, 'B': 1, 'A': 2}
+
+# 特征表中参与筛选的数值列
+FEATURE_COLUMNS = (
+    'macd_score', 'volume_ratio', 'ma60_distance', 'future_return', 'close_return',
+    'enhanced_score', 'limit_up_days', 'gain_5d', 'price_change_3d', 'ma20_deviation',
+)
+
+# 工作进程中的特征数组（由进程池initializer设置）
+_worker_arrays: Dict[str, np.ndarray] = None
+_worker_config = None
+
+
+def _feature_fingerprint(config) -> Dict[str, Any]:
+    """影响特征值的配置（变化后磁盘缓存失效）"""
+    return {
+        'indicator_params': list(get_indicator_params(config)),
+        'macd_score_weights': config.MACD_SCORE_WEIGHTS,
+        'enhanced_score_weights': config.ENHANCED_SCORE_WEIGHTS,
+        'rsi_range': list(config.RSI_RANGE),
+        'kdj_j_threshold': config.KDJ_J_THRESHOLD,
+        'boll_width_threshold': config.BOLL_WIDTH_THRESHOLD,
+        'future_days': config.FUTURE_DAYS,
+        'min_data_rows': config.MIN_DATA_ROWS,
+        'min_daily_amount': config.MIN_DAILY_AMOUNT,
+        'price_range': list(config.PRICE_RANGE),
+    }
+
+
+def _extract_stock_features(file_path: str, config) -> Optional[pd.DataFrame]:
+    """读取单只股票并计算信号特征（与分析器使用相同的质量检查和预筛选）"""
+    try:
+        stock_code, _ = extract_stock_info(file_path)
+        df = load_stock_file(file_path)
+
+        is_valid, _ = check_data_quality(df)
+        if not is_valid:
+            return None
+        passed, _ = pre_filter(df, config)
+        if not passed:
+            return None
+
+        df = calculate_all_indicators(df, config)
+        features = compute_signal_features(df, config)
+    except Exception as e:
+        logger.error(f"{file_path}: 特征计算失败 - {str(e)}")
+        return None
+
+    # 前60天不会产生信号（与 detect_uptrend_signals 的分析范围一致）
+    features = features.iloc[60:].drop(columns=['pattern'])
+    if features.empty:
+        return None
+    features.insert(0, 'date', df['date'].iloc[60:].to_numpy())
+    features.insert(0, 'stock_code', stock_code)
+    return features
+
+
+def pool_context():
+    """优先使用fork，工作进程直接继承父进程内存中的配置和特征数组"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+
+def build_feature_store(
+    data_dir: str = None,
+    config=None,
+    limit: int = None,
+    workers: int = None
+) -> pd.DataFrame:
+    """
+    构建全市场特征表（每只股票只读取和计算一次指标）
+
+    Args:
+        data_dir: 数据目录，默认使用Config.DATA_DIR
+        config: 配置对象，默认使用Config
+        limit: 只处理前N只股票（测试用）
+        workers: 并行进程数，默认使用Config.SWEEP_WORKERS
+
+    Returns:
+        pd.DataFrame: 特征表，每行为一只股票的一个交易日（stock_code, date, 各特征列）
+    """
+    config = config or Config
+    data_dir = data_dir or config.DATA_DIR
+    workers = workers or config.SWEEP_WORKERS or os.cpu_count() or 1
+
+    csv_files = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+    if limit:
+        csv_files = csv_files[:limit]
+    logger.info(f"构建特征表: {len(csv_files)} 只股票, {workers} 个进程")
+
+    if workers > 1 and len(csv_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as executor:
+            chunksize = max(1, len(csv_files) // (workers * 8))
+            frames = list(executor.map(_extract_stock_features, csv_files,
+                                       itertools.repeat(config), chunksize=chunksize))
+    else:
+        frames = [_extract_stock_features(file_path, config) for file_path in csv_files]
+
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame(columns=['stock_code', 'date', *FEATURE_COLUMNS])
+
+    store = pd.concat(frames, ignore_index=True)
+    store['stock_code'] = store['stock_code'].astype('category')
+    logger.info(f"特征表: {store['stock_code'].nunique()} 只股票, {len(store)} 行")
+    return store
+
+
+def load_or_build_feature_store(
+    cache_path: str = None,
+    data_dir: str = None,
+    config=None,
+    limit: int = None,
+    workers: int = None
+) -> pd.DataFrame:
+    """
+    读取磁盘缓存的特征表，缓存不存在或已过期时重新构建并写入缓存
+
+    缓存在以下情况失效：影响特征的配置变化、数据目录/股票数量变化、CSV文件有更新。
+    """
+    config = config or Config
+    data_dir = data_dir or config.DATA_DIR
+    csv_files = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+    if limit:
+        csv_files = csv_files[:limit]
+
+    meta = {
+        'data_dir': os.path.abspath(data_dir),
+        'file_count': len(csv_files),
+        'latest_mtime': max((os.path.getmtime(f) for f in csv_files), default=0),
+        'fingerprint': _feature_fingerprint(config),
+    }
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('meta') == meta:
+                logger.info(f"使用特征缓存: {cache_path}")
+                return cached['store']
+            logger.info("特征缓存已过期，重新构建")
+        except Exception as e:
+            logger.warning(f"特征缓存读取失败，重新构建: {str(e)}")
+
+    store = build_feature_store(data_dir, config, limit, workers)
+
+    if cache_path:
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'meta': meta, 'store': store}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        logger.info(f"特征缓存已保存: {cache_path}")
+
+    return store
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    展开参数网格为参数组合列表
+
+    Raises:
+        ValueError: 包含不可扫描的参数或取值无效
+    """
+    unknown = [key for key in grid if key not in SWEEP_PARAMETERS]
+    if unknown:
+        raise ValueError(f"不支持扫描的参数: {', '.join(unknown)}"
+                         f"（指标参数需要修改Config后重新构建特征表）")
+    for key, values in grid.items():
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"参数 {key} 的取值应为非空列表")
+    for mode in grid.get('FILTER_MODE', []):
+        if mode not in Config.FILTER_MODES:
+            raise ValueError(f"未知的筛选模式: {mode}")
+    for rating in grid.get('MIN_RATING', []):
+        if rating not in RATING_LEVELS:
+            raise ValueError(f"未知的评级: {rating}（可选 A/B/C）")
+
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def make_sweep_config(params: Dict[str, Any], base_config=None):
+    """基于配置类派生一组扫描参数对应的配置类（不修改原配置）"""
+    base_config = base_config or Config
+    attrs = {k: v for k, v in params.items()
+             if k not in ('RATING_THRESHOLD_A', 'RATING_THRESHOLD_B', 'MIN_RATING')}
+
+    if 'RATING_THRESHOLD_A' in params or 'RATING_THRESHOLD_B' in params:
+        thresholds = dict(base_config.RATING_THRESHOLDS)
+        thresholds['A'] = params.get('RATING_THRESHOLD_A', thresholds['A'])
+        thresholds['B'] = params.get('RATING_THRESHOLD_B', thresholds['B'])
+        attrs['RATING_THRESHOLDS'] = thresholds
+
+    return type('SweepConfig', (base_config,), attrs)
+
+
+def evaluate_combination(
+    arrays: Dict[str, np.ndarray],
+    params: Dict[str, Any],
+    base_config=None
+) -> Dict[str, Any]:
+    """
+    在特征数组上评估一组参数
+
+    Args:
+        arrays: 特征列 → 数组（另含 stock_id），只包含未来收益已知的行
+        params: 参数组合
+        base_config: 未扫描参数使用的配置类
+
+    Returns:
+        Dict: 参数 + 信号数、股票数、胜率、平均收益、各评级信号数
+    """
+    config = make_sweep_config(params, base_config)
+
+    selected = match_signal_conditions(arrays, config, enable_future_validation=False)
+
+    scores = arrays['enhanced_score']
+    thresholds = config.RATING_THRESHOLDS
+    rating_level = (scores >= thresholds['A']).astype(np.int8) + (scores >= thresholds['B'])
+    min_rating = params.get('MIN_RATING')
+    if min_rating:
+        selected &= rating_level >= RATING_LEVELS[min_rating]
+
+    signal_count = int(selected.sum())
+    future_return = arrays['future_return'][selected]
+    close_return = arrays['close_return'][selected]
+    levels = rating_level[selected]
+
+    result = dict(params)
+    result.update({
+        'signal_count': signal_count,
+        'stock_count': int(np.unique(arrays['stock_id'][selected]).size),
+        'win_rate': round(float((future_return >= config.MIN_FUTURE_RETURN).mean() * 100), 2)
+        if signal_count else np.nan,
+        'avg_return': round(float(future_return.mean()), 3) if signal_count else np.nan,
+        'avg_close_return': round(float(close_return.mean()), 3) if signal_count else np.nan,
+        'a_count': int((levels == 2).sum()),
+        'b_count': int((levels == 1).sum()),
+        'c_count': int((levels == 0).sum()),
+    })
+    return result
+
+
+def _init_sweep_worker(arrays: Dict[str, np.ndarray], base_config):
+    """进程池initializer：保存特征数组，避免每个任务重复传输"""
+    global _worker_arrays, _worker_config
+    _worker_arrays = arrays
+    _worker_config = base_config
+
+
+def _evaluate_in_worker(params: Dict[str, Any]) -> Dict[str, Any]:
+    return evaluate_combination(_worker_arrays, params, _worker_config)
+
+
+def to_sweep_arrays(store: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """取出未来收益已知的行，转为评估使用的数组字典"""
+    known = store[store['future_return'].notna()]
+    arrays = {col: known[col].to_numpy() for col in FEATURE_COLUMNS}
+    arrays['stock_id'] = known['stock_code'].cat.codes.to_numpy()
+    return arrays
+
+
+def run_parameter_sweep(
+    store: pd.DataFrame,
+    grid: Dict[str, List[Any]],
+    config=None,
+    workers: int = None
+) -> pd.DataFrame:
+    """
+    在特征表上并行评估参数网格
+
+    Args:
+        store: build_feature_store 构建的特征表
+        grid: 参数网格 {参数名: [取值, ...]}
+        config: 未扫描参数使用的配置类，默认使用Config
+        workers: 并行进程数，默认使用Config.SWEEP_WORKERS
+
+    Returns:
+        pd.DataFrame: 每组参数一行的结果表（顺序与网格展开顺序一致）
+    """
+    config = config or Config
+    workers = workers or config.SWEEP_WORKERS or os.cpu_count() or 1
+    combinations = expand_grid(grid)
+    arrays = to_sweep_arrays(store)
+
+    logger.info(f"参数扫描: {len(combinations)} 组参数, {len(arrays['stock_id'])} 个候选交易日, "
+                f"{workers} 个进程")
+
+    if workers > 1 and len(combinations) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(),
+                                 initializer=_init_sweep_worker, initargs=(arrays, config)) as executor:
+            chunksize = max(1, len(combinations) // (workers * 4))
+            results = list(executor.map(_evaluate_in_worker, combinations, chunksize=chunksize))
+    else:
+        results = [evaluate_combination(arrays, params, config) for params in combinations]
+
+    return pd.DataFrame(results)
+
+
+def rank_results(results: pd.DataFrame, min_signals: int = None, top: int = 10) -> pd.DataFrame:
+    """按胜率、平均收益排序（信号数不足 min_signals 的组合不参与排名）"""
+    min_signals = Config.SWEEP_MIN_SIGNALS if min_signals is None else min_signals
+    eligible = results[results['signal_count'] >= min_signals]
+    return eligible.sort_values(['win_rate', 'avg_return'], ascending=False).head(top)
+
+
+def save_sweep_results(
+    results: pd.DataFrame,
+    grid: Dict[str, List[Any]],
+    output_dir: str = None,
+    min_signals: int = None
+) -> Dict[str, str]:
+    """
+    保存扫描结果
+
+    Returns:
+        Dict[str, str]: {'csv': 结果表路径, 'json': 报告路径}
+    """
+    output_dir = output_dir or Config.OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    csv_path = os.path.join(output_dir, f"param_sweep_{timestamp}.csv")
+    results.to_csv(csv_path, index=False, encoding=Config.CSV_ENCODING)
+
+    ranked = rank_results(results, min_signals)
+    report = {
+        'sweep_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'grid': grid,
+        'combinations': len(results),
+        'min_signals': Config.SWEEP_MIN_SIGNALS if min_signals is None else min_signals,
+        'top_results': json.loads(ranked.to_json(orient='records', force_ascii=False)),
+    }
+    json_path = os.path.join(output_dir, f"param_sweep_{timestamp}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return {'csv': csv_path, 'json': json_path}
+
+
+def load_grid(grid_arg: str = None) -> Dict[str, List[Any]]:
+    """解析 --grid 参数：JSON文件路径或JSON字符串，默认使用Config.SWEEP_GRID"""
+    if not grid_arg:
+        return dict(Config.SWEEP_GRID)
+    if os.path.exists(grid_arg):
+        with open(grid_arg, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return json.loads(grid_arg)
+
+
+def main():
+    """主函数"""
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    parser = argparse.ArgumentParser(description='并行参数扫描（指标只计算一次）')
+    parser.add_argument('--grid', help='参数网格：JSON文件路径或JSON字符串，默认使用Config.SWEEP_GRID')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--output-dir', help='输出目录路径')
+    parser.add_argument('--workers', type=int, help='并行进程数')
+    parser.add_argument('--limit', type=int, help='只处理前N只股票（测试用）')
+    parser.add_argument('--feature-cache', help='特征表缓存文件（.pkl），存在且未过期时跳过指标计算')
+    parser.add_argument('--min-signals', type=int, help='参与排名的最少信号数')
+    args = parser.parse_args()
+
+    try:
+        grid = load_grid(args.grid)
+        expand_grid(grid)
+    except (ValueError, OSError) as e:
+        logger.error(f"参数网格无效: {str(e)}")
+        return 1
+
+    start = time.perf_counter()
+    store = load_or_build_feature_store(args.feature_cache, args.data_dir, Config,
+                                        args.limit, args.workers)
+    logger.info(f"特征表就绪，耗时 {time.perf_counter() - start:.2f}秒")
+    if store.empty:
+        logger.error("特征表为空，请检查数据目录")
+        return 1
+
+    start = time.perf_counter()
+    results = run_parameter_sweep(store, grid, Config, args.workers)
+    logger.info(f"参数评估完成，耗时 {time.perf_counter() - start:.2f}秒")
+
+    ranked = rank_results(results, args.min_signals)
+    logger.info("=" * 60)
+    logger.info("胜率最高的参数组合:")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        for line in ranked.to_string(index=False).splitlines():
+            logger.info(line)
+    logger.info("=" * 60)
+
+    paths = save_sweep_results(results, grid, args.output_dir, args.min_signals)
+    for name, path in paths.items():
+        logger.info(f"  {name}: {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,243 @@
+"""
+流水线执行器模块
+
+把"读文件 → 计算指标/检测信号 → 持久化结果"拆成三个并发阶段，
+让磁盘I/O与CPU计算重叠执行：
+
+    任务队列 ──► 读取线程×R ──► 预取队列(有界) ──► 计算线程×W ──► 结果队列 ──► 写入线程×1
+
+每个阶段统计处理数量、吞吐量、忙碌时间、饥饿时间（等待上游数据）和
+阻塞时间（等待下游消费），用于根据磁盘性能调整读取线程数和计算线程数：
+- 计算阶段饥饿时间长 → 读取跟不上，增加读取线程
+- 读取阶段阻塞时间长 → 计算跟不上，增加计算线程
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_SENTINEL = object()
+
+
+class StageStats:
+    """单个流水线阶段的统计信息"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_time = 0.0      # 执行阶段函数的时间
+        self.starved_time = 0.0   # 等待上游数据的时间
+        self.blocked_time = 0.0   # 等待下游队列空位的时间
+        self._lock = threading.Lock()
+
+    def add(self, busy: float = 0.0, starved: float = 0.0, blocked: float = 0.0,
+            items: int = 0, errors: int = 0):
+        """累加统计（线程安全）"""
+        with self._lock:
+            self.busy_time += busy
+            self.starved_time += starved
+            self.blocked_time += blocked
+            self.items += items
+            self.errors += errors
+
+    def to_dict(self, wall_time: float) -> Dict[str, Any]:
+        """
+        转换为字典
+
+        Args:
+            wall_time: 流水线总耗时（秒）
+
+        Returns:
+            Dict: 阶段统计，时间均为所有线程的累计秒数
+        """
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'throughput': round(self.items / wall_time, 2) if wall_time > 0 else 0,
+            'busy_seconds': round(self.busy_time, 3),
+            'starved_seconds': round(self.starved_time, 3),
+            'blocked_seconds': round(self.blocked_time, 3),
+        }
+
+
+class PipelinedExecutor:
+    """读取/计算/写入三阶段流水线执行器"""
+
+    def __init__(self, reader_count: int = 2, worker_count: int = 2, prefetch_size: int = 32):
+        """
+        初始化执行器
+
+        Args:
+            reader_count: 读取线程数
+            worker_count: 计算线程数
+            prefetch_size: 预取队列容量（同时驻留内存的已读取文件数上限）
+        """
+        if reader_count < 1 or worker_count < 1 or prefetch_size < 1:
+            raise ValueError("读取线程数、计算线程数和预取队列容量必须 >= 1")
+
+        self.reader_count = reader_count
+        self.worker_count = worker_count
+        self.prefetch_size = prefetch_size
+        self.stats: Dict[str, StageStats] = {}
+        self.wall_time = 0.0
+
+    def run(
+        self,
+        items: Iterable[Any],
+        read_fn: Callable[[Any], Any],
+        compute_fn: Callable[[Any, Any], Any],
+        write_fn: Callable[[int, Any, Any, Optional[BaseException]], None]
+    ) -> Dict[str, Any]:
+        """
+        运行流水线
+
+        读取或计算阶段抛出的异常不会中断流水线，而是作为error传给写入阶段。
+
+        Args:
+            items: 待处理的任务（如CSV文件路径）
+            read_fn: 读取函数 read_fn(item) -> payload
+            compute_fn: 计算函数 compute_fn(item, payload) -> result
+            write_fn: 写入函数 write_fn(index, item, result, error)，在单一线程中按完成顺序调用
+
+        Returns:
+            Dict: 各阶段统计信息
+        """
+        items = list(items)
+        task_queue: queue.Queue = queue.Queue()
+        prefetch_queue: queue.Queue = queue.Queue(maxsize=self.prefetch_size)
+        result_queue: queue.Queue = queue.Queue(maxsize=self.prefetch_size)
+
+        for index, item in enumerate(items):
+            task_queue.put((index, item))
+
+        self.stats = {
+            'read': StageStats('read', self.reader_count),
+            'compute': StageStats('compute', self.worker_count),
+            'write': StageStats('write', 1),
+        }
+        read_stats = self.stats['read']
+        compute_stats = self.stats['compute']
+        write_stats = self.stats['write']
+
+        def reader():
+            while True:
+                try:
+                    index, item = task_queue.get_nowait()
+                except queue.Empty:
+                    return
+
+                start = time.perf_counter()
+                error = None
+                try:
+                    payload = read_fn(item)
+                except Exception as e:
+                    payload, error = None, e
+                busy = time.perf_counter() - start
+
+                start = time.perf_counter()
+                prefetch_queue.put((index, item, payload, error))
+                read_stats.add(busy=busy, blocked=time.perf_counter() - start,
+                               items=1, errors=1 if error else 0)
+
+        def worker():
+            while True:
+                start = time.perf_counter()
+                entry = prefetch_queue.get()
+                starved = time.perf_counter() - start
+                if entry is _SENTINEL:
+                    compute_stats.add(starved=starved)
+                    return
+
+                index, item, payload, error = entry
+                start = time.perf_counter()
+                result = None
+                if error is None:
+                    try:
+                        result = compute_fn(item, payload)
+                    except Exception as e:
+                        error = e
+                busy = time.perf_counter() - start
+                # 及时释放已读取的数据
+                payload = entry = None
+
+                start = time.perf_counter()
+                result_queue.put((index, item, result, error))
+                compute_stats.add(busy=busy, starved=starved, blocked=time.perf_counter() - start,
+                                  items=1, errors=1 if error else 0)
+
+        def writer():
+            while True:
+                start = time.perf_counter()
+                entry = result_queue.get()
+                starved = time.perf_counter() - start
+                if entry is _SENTINEL:
+                    write_stats.add(starved=starved)
+                    return
+
+                index, item, result, error = entry
+                start = time.perf_counter()
+                write_error = 0
+                try:
+                    write_fn(index, item, result, error)
+                except Exception as e:
+                    write_error = 1
+                    logger.error(f"{item}: 写入结果失败 - {str(e)}")
+                write_stats.add(busy=time.perf_counter() - start, starved=starved,
+                                items=1, errors=write_error)
+
+        wall_start = time.perf_counter()
+
+        readers = [threading.Thread(target=reader, name=f'reader-{i}', daemon=True)
+                   for i in range(self.reader_count)]
+        workers = [threading.Thread(target=worker, name=f'worker-{i}', daemon=True)
+                   for i in range(self.worker_count)]
+        writer_thread = threading.Thread(target=writer, name='writer', daemon=True)
+
+        for t in readers + workers + [writer_thread]:
+            t.start()
+
+        # 逐级关闭：读取结束 → 通知计算线程 → 计算结束 → 通知写入线程
+        for t in readers:
+            t.join()
+        for _ in workers:
+            prefetch_queue.put(_SENTINEL)
+        for t in workers:
+            t.join()
+        result_queue.put(_SENTINEL)
+        writer_thread.join()
+
+        self.wall_time = time.perf_counter() - wall_start
+        return self.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取最近一次运行的统计信息
+
+        Returns:
+            Dict: {'wall_seconds': 总耗时, 'stages': {阶段名: 阶段统计}}
+        """
+        return {
+            'wall_seconds': round(self.wall_time, 3),
+            'stages': {name: s.to_dict(self.wall_time) for name, s in self.stats.items()},
+        }
+
+    def log_stats(self):
+        """输出各阶段统计，便于调整读取线程数和计算线程数"""
+        stats = self.get_stats()
+        logger.info(f"流水线总耗时: {stats['wall_seconds']:.2f}秒")
+        for name, s in stats['stages'].items():
+            logger.info(f"  [{name}] 线程数={s['workers']} | 处理={s['items']} | "
+                        f"吞吐={s['throughput']}/秒 | 忙碌={s['busy_seconds']:.2f}秒 | "
+                        f"饥饿={s['starved_seconds']:.2f}秒 | 阻塞={s['blocked_seconds']:.2f}秒")
@@ -0,0 +1,139 @@
+"""
+时点回放模块
+
+在任意历史日期上重现"当天收盘后"的实盘模式扫描结果，不需要伪造系统时间、也不需要
+把数据截断后重新读取CSV：
+
+1. 行情和技术指标来自 MarketCache（每只股票只读取一次）
+2. 技术指标（EMA、滚动均值等）都只依赖当天及之前的数据，因此在完整数据上算出的指标，
+   截取到某个日期之前的部分与只用截至该日期的数据计算的结果相同
+3. compute_signal_features 的信号特征每只股票只计算一次；回放某个日期时只是截取
+   截至该日期的行，重新做数据质量检查/预筛选和向量化筛选（结果与在截断数据上运行
+   detect_uptrend_signals 一致），未来收益列不参与实盘模式筛选
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+from technical_indicators import check_data_quality
+from signal_detector import compute_signal_features, select_signal_rows, get_ratings
+from stock_trend_analyzer import pre_filter
+
+
+logger = logging.getLogger(__name__)
+
+
+class PointInTimeScanner:
+    """
+    基于行情缓存的时点回放扫描器
+
+    信号特征在首次扫描时按缓存当前内容计算并保留；缓存刷新后应新建扫描器。
+    """
+
+    def __init__(self, cache, config=None):
+        """
+        Args:
+            cache: 已加载的 MarketCache
+            config: 配置对象，默认使用Config
+        """
+        self.cache = cache
+        self.config = config or Config
+        # 股票代码 → (指标DataFrame, 信号特征, 交易日数组)，每只股票只计算一次
+        self._prepared: Dict[str, Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]] = {}
+
+    def _prepare(self, entry) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+        """计算（或取出已缓存的）单只股票的指标和信号特征"""
+        prepared = self._prepared.get(entry.stock_code)
+        if prepared is None:
+            frame = self.cache.get_frame(entry, self.config)
+            prepared = (frame, compute_signal_features(frame, self.config),
+                        pd.to_datetime(frame['date']).values)
+            self._prepared[entry.stock_code] = prepared
+        return prepared
+
+    def trading_dates(self, start_date=None, end_date=None) -> List[pd.Timestamp]:
+        """
+        缓存中出现过的交易日（升序）
+
+        Args:
+            start_date: 起始日期（含），None表示不限制
+            end_date: 结束日期（含），None表示不限制
+        """
+        with self.cache.lock:
+            values = [pd.to_datetime(entry.frame['date']).values for entry in self.cache.iter_entries()]
+        if not values:
+            return []
+        dates = pd.DatetimeIndex(np.unique(np.concatenate(values)))
+        if start_date is not None:
+            dates = dates[dates >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            dates = dates[dates <= pd.Timestamp(end_date)]
+        return list(dates)
+
+    def scan(self, as_of) -> Dict[str, Any]:
+        """
+        重现指定日期收盘后的实盘模式全市场扫描
+
+        Args:
+            as_of: 回放日期，只使用该日期（含）之前的数据
+
+        Returns:
+            Dict: total_stocks（截至该日期有数据的股票数）、stocks_with_signals、total_signals、
+                  signal_table（trend_signals_*.csv 列格式的信号明细表）
+        """
+        as_of = pd.Timestamp(as_of).to_datetime64()
+        config = self.config
+        tables = []
+        total_stocks = 0
+
+        with self.cache.lock:
+            for entry in self.cache.iter_entries():
+                frame, features, dates = self._prepare(entry)
+                end = int(dates.searchsorted(as_of, side='right'))
+                if end == 0:
+                    continue  # 该日期时尚未上市
+                total_stocks += 1
+
+                visible_frame = frame.iloc[:end]
+                is_valid, _ = check_data_quality(visible_frame)
+                if not is_valid:
+                    continue
+                passed, _ = pre_filter(visible_frame, config)
+                if not passed:
+                    continue
+
+                visible = features.iloc[:end]
+                mask = select_signal_rows(visible, config, enable_future_validation=False)
+                if not mask.any():
+                    continue
+
+                selected = visible[mask]
+                rows = visible_frame[mask]
+                tables.append(pd.DataFrame({
+                    '股票代码': entry.stock_code,
+                    '股票名称': entry.stock_name,
+                    '信号日期': rows['date'].to_numpy(),
+                    '收盘价': rows['close'].round(2).to_numpy(),
+                    'MACD评分': selected['macd_score'].to_numpy(),
+                    '成交量比率': selected['volume_ratio'].round(2).to_numpy(),
+                    'MA60距离%': selected['ma60_distance'].round(2).to_numpy(),
+                    '评级': get_ratings(selected['enhanced_score'].to_numpy(), config),
+                    '补充特征分': selected['enhanced_score'].to_numpy(),
+                    'MACD满足': selected['macd_score'].to_numpy() >= config.MACD_SCORE_THRESHOLD,
+                    '成交量满足': selected['volume_ratio'].to_numpy() >= config.VOLUME_RATIO_THRESHOLD,
+                    'MA60满足': selected['ma60_distance'].to_numpy() <= config.MA_DISTANCE_THRESHOLD,
+                }))
+
+        signal_table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+        return {
+            'total_stocks': total_stocks,
+            'stocks_with_signals': len(tables),
+            'total_signals': len(signal_table),
+            'signal_table': signal_table,
+        }
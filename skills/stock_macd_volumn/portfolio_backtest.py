@@ -0,0 +1,636 @@
+"""
+组合回测模块
+
+save_results 中的 future_return 统计使用未来N日最高价，结果偏乐观。本模块把检测到的
+信号放到真实的资金约束下回测：
+
+1. 信号日的下一个交易日开盘价买入
+2. 卖出规则：最长持有期、止损、止盈、移动止损
+3. 仓位管理：单笔仓位比例、最大同时持仓数、整手交易、交易费用
+4. A股约束：T+1（买入当天不能卖出）、一字/开盘涨停无法买入、
+   停牌无法交易、跌停封板无法卖出（顺延）
+
+实现方式：
+    先把行情整理成 [交易日 × 股票] 的价格矩阵；每笔候选交易未来W天的价格路径一次性
+    取出为 [交易数 × W] 矩阵，用向量运算求出止损/止盈/移动止损/到期的首次触发日和
+    成交价。只有资金分配（仓位数、现金）需要按交易日顺序推进，循环次数等于交易日数。
+
+输出：每日权益曲线（含回撤、换手率）、逐笔交易明细、汇总统计。
+
+使用方法:
+    # 先生成实盘模式信号（不含未来信息），再回测
+    python stock_trend_analyzer.py --no-future
+    python portfolio_backtest.py --signals output/trend_signals_20260209.csv
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import glob
+import json
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# 跳过原因
+SKIP_NO_DATA = 'no_data'          # 信号日之后没有行情，或买入日之后没有可卖出的交易日（数据末尾）
+SKIP_SUSPENDED = 'suspended'      # 买入日停牌
+SKIP_LIMIT_UP = 'limit_up'        # 买入日开盘涨停，无法成交
+SKIP_HOLDING = 'already_holding'  # 已持有该股票
+SKIP_NO_SLOT = 'no_slot'          # 持仓数已满
+SKIP_NO_CASH = 'no_cash'          # 现金不足一手
+
+# 卖出原因
+EXIT_STOP_LOSS = 'stop_loss'
+EXIT_TRAILING_STOP = 'trailing_stop'
+EXIT_TAKE_PROFIT = 'take_profit'
+EXIT_HOLDING_PERIOD = 'holding_period'
+EXIT_END_OF_DATA = 'end_of_data'  # 直到数据结束都无法卖出，按最后收盘价估值（未实现，不计入已平仓统计）
+
+# 信号表列名映射（trend_signals_*.csv 中文列 → 内部列名）
+SIGNAL_COLUMNS = {
+    '股票代码': 'stock_code',
+    '信号日期': 'date',
+    'MACD评分': 'macd_score',
+    '补充特征分': 'enhanced_score',
+}
+
+
+class PricePanel:
+    """[交易日 × 股票] 价格矩阵，缺失（未上市/停牌无记录）为NaN"""
+
+    def __init__(self, dates: pd.DatetimeIndex, stock_codes: List[str], stock_names: List[str],
+                 fields: Dict[str, np.ndarray]):
+        self.dates = dates
+        self.stock_codes = stock_codes
+        self.stock_names = stock_names
+        self.code_index = {code: i for i, code in enumerate(stock_codes)}
+        self.open = fields['open']
+        self.high = fields['high']
+        self.low = fields['low']
+        self.close = fields['close']
+        self.volume = fields['volume']
+
+        # 有成交才可交易；收盘价向前填充用于估值和计算涨跌停价
+        self.tradable = ~np.isnan(self.open) & (np.nan_to_num(self.volume) > 0)
+        self.close_filled = pd.DataFrame(self.close).ffill().to_numpy()
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.close.shape
+
+
+def get_price_limit(stock_code: str, stock_name: str, config=Config) -> float:
+    """
+    获取股票的涨跌停幅度
+
+    Args:
+        stock_code: 股票代码，如 sh.600000
+        stock_name: 股票名称（用于识别ST）
+        config: 配置对象
+
+    Returns:
+        float: 涨跌停幅度，如0.10
+    """
+    limits = config.BACKTEST_PRICE_LIMITS
+    if stock_code.startswith('bj.'):
+        return limits['bse']
+    if stock_code.startswith(('sz.30', 'sh.68')):
+        return limits['growth']
+    if 'ST' in stock_name.upper():
+        return limits['st']
+    return limits['main']
+
+
+def load_price_panel(data_dir: str = None, stock_codes: List[str] = None) -> PricePanel:
+    """
+    读取股票CSV并构建价格矩阵
+
+    Args:
+        data_dir: 数据目录，默认使用Config.DATA_DIR
+        stock_codes: 只加载这些股票（如有信号的股票），None表示全部
+
+    Returns:
+        PricePanel: 价格矩阵
+    """
+    data_dir = data_dir or Config.DATA_DIR
+    wanted = set(stock_codes) if stock_codes is not None else None
+
+    frames, codes, names = [], [], []
+    for file_path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        parts = os.path.basename(file_path).replace('.csv', '').split('_')
+        if wanted is not None and parts[0] not in wanted:
+            continue
+        try:
+            df = pd.read_csv(file_path, usecols=['date', 'open', 'high', 'low', 'close', 'volume'])
+        except Exception as e:
+            logger.error(f"{file_path}: 读取失败 - {str(e)}")
+            continue
+        frames.append(df)
+        codes.append(parts[0])
+        names.append(parts[1] if len(parts) >= 2 else "未知")
+
+    date_values = [pd.to_datetime(df['date']).to_numpy() for df in frames]
+    dates = pd.DatetimeIndex(np.unique(np.concatenate(date_values))) if frames else pd.DatetimeIndex([])
+
+    fields = {name: np.full((len(dates), len(frames)), np.nan)
+              for name in ('open', 'high', 'low', 'close', 'volume')}
+    for col, (df, values) in enumerate(zip(frames, date_values)):
+        rows = dates.searchsorted(values)
+        for name in fields:
+            fields[name][rows, col] = df[name].to_numpy(dtype=float)
+
+    logger.info(f"价格矩阵: {len(dates)} 个交易日 × {len(codes)} 只股票")
+    return PricePanel(dates, codes, names, fields)
+
+
+def prepare_signals(signals) -> pd.DataFrame:
+    """
+    统一信号格式
+
+    Args:
+        signals: 信号明细表（trend_signals_*.csv 的DataFrame）或信号字典列表
+
+    Returns:
+        pd.DataFrame: 包含 stock_code, date, macd_score, enhanced_score 的信号表
+    """
+    df = pd.DataFrame(signals).rename(columns=SIGNAL_COLUMNS)
+    missing = [c for c in ('stock_code', 'date') if c not in df.columns]
+    if missing:
+        raise ValueError(f"信号表缺少必要列: {', '.join(missing)}")
+
+    for col in ('macd_score', 'enhanced_score'):
+        if col not in df.columns:
+            df[col] = 0
+    df['date'] = pd.to_datetime(df['date'])
+    return df[['stock_code', 'date', 'macd_score', 'enhanced_score']]
+
+
+class PortfolioBacktester:
+    """信号组合回测器"""
+
+    def __init__(self, config=Config, **overrides):
+        """
+        初始化回测器
+
+        Args:
+            config: 配置对象，回测参数取自 BACKTEST_* 配置项
+            **overrides: 覆盖回测参数，键为去掉 BACKTEST_ 前缀的小写名，如 stop_loss=0.08；
+                         止损/止盈/移动止损传None表示不启用
+        """
+        self.config = config
+        params = {
+            'initial_capital': config.BACKTEST_INITIAL_CAPITAL,
+            'max_positions': config.BACKTEST_MAX_POSITIONS,
+            'position_size': config.BACKTEST_POSITION_SIZE,
+            'lot_size': config.BACKTEST_LOT_SIZE,
+            'holding_days': config.BACKTEST_HOLDING_DAYS,
+            'stop_loss': config.BACKTEST_STOP_LOSS,
+            'take_profit': config.BACKTEST_TAKE_PROFIT,
+            'trailing_stop': config.BACKTEST_TRAILING_STOP,
+            'buy_cost': config.BACKTEST_BUY_COST,
+            'sell_cost': config.BACKTEST_SELL_COST,
+            'max_defer_days': config.BACKTEST_MAX_DEFER_DAYS,
+        }
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"未知的回测参数: {', '.join(sorted(unknown))}")
+        params.update(overrides)
+        if params['holding_days'] < 1:
+            raise ValueError("最长持有期必须 >= 1个交易日")
+        self.params = params
+
+    # ========== 第一步：逐笔交易的买卖点（向量化） ==========
+
+    def resolve_trades(self, signals: pd.DataFrame, panel: PricePanel) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        """
+        计算每个信号的买入价、卖出日和卖出价（不考虑资金约束）
+
+        Args:
+            signals: prepare_signals 返回的信号表
+            panel: 价格矩阵
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, int]]: (可成交的候选交易, 各原因跳过的信号数)
+        """
+        p = self.params
+        T, _ = panel.shape
+        skipped = {SKIP_NO_DATA: 0, SKIP_SUSPENDED: 0, SKIP_LIMIT_UP: 0}
+
+        cols = signals['stock_code'].map(panel.code_index)
+        unknown = cols.isna()
+        skipped[SKIP_NO_DATA] += int(unknown.sum())
+        signals = signals[~unknown]
+        cols = cols[~unknown].to_numpy(dtype=int)
+
+        # 信号日的下一个交易日买入；T+1：买入日之后至少还要有一个交易日才能卖出
+        signal_rows = panel.dates.searchsorted(signals['date'].to_numpy(), side='right') - 1
+        entry_rows = signal_rows + 1
+        in_range = (signal_rows >= 0) & (entry_rows < T - 1)
+        skipped[SKIP_NO_DATA] += int((~in_range).sum())
+        signals, cols, entry_rows = signals[in_range], cols[in_range], entry_rows[in_range]
+
+        # 买入日停牌
+        tradable = panel.tradable[entry_rows, cols]
+        skipped[SKIP_SUSPENDED] += int((~tradable).sum())
+        signals, cols, entry_rows = signals[tradable], cols[tradable], entry_rows[tradable]
+
+        # 开盘涨停无法买入
+        limits = np.array([get_price_limit(panel.stock_codes[c], panel.stock_names[c], self.config)
+                           for c in range(len(panel.stock_codes))])
+        entry_open = panel.open[entry_rows, cols]
+        prev_close = panel.close_filled[entry_rows - 1, cols]
+        limit_up_price = np.round(prev_close * (1 + limits[cols]), 2)
+        limit_up = entry_open >= limit_up_price - 1e-6
+        skipped[SKIP_LIMIT_UP] += int(limit_up.sum())
+        keep = ~limit_up
+        signals, cols, entry_rows, entry_open = signals[keep], cols[keep], entry_rows[keep], entry_open[keep]
+
+        n = len(cols)
+        if n == 0:
+            return pd.DataFrame(), skipped
+
+        # 先在持有期加顺延窗口内找卖出日；窗口内一直停牌/跌停且数据未结束的，继续向后找到首个可卖出日
+        W = p['holding_days'] + p['max_defer_days']
+        has_exit, exit_rows, exit_price, exit_reason = self._resolve_exits(panel, entry_rows, cols, entry_open,
+                                                                           limits, W)
+        pending = ~has_exit & (entry_rows + W < T - 1)
+        if pending.any():
+            W_rest = int(T - 1 - entry_rows[pending].min())
+            resolved = self._resolve_exits(panel, entry_rows[pending], cols[pending], entry_open[pending],
+                                           limits, W_rest)
+            for target, values in zip((has_exit, exit_rows, exit_price, exit_reason), resolved):
+                target[pending] = values
+
+        # 直到数据结束都没有可卖出日：按最后一个交易日的收盘价估值，作为未平仓持仓报告
+        # （估值日总在买入日之后）
+        if not has_exit.all():
+            exit_rows[~has_exit] = T - 1
+            exit_price[~has_exit] = panel.close_filled[T - 1, cols[~has_exit]]
+            exit_reason[~has_exit] = EXIT_END_OF_DATA
+
+        trades = pd.DataFrame({
+            'stock_code': signals['stock_code'].to_numpy(),
+            'signal_date': signals['date'].to_numpy(),
+            'col': cols,
+            'entry_row': entry_rows,
+            'exit_row': exit_rows,
+            'entry_price': entry_open,
+            'exit_price': exit_price,
+            'exit_reason': exit_reason,
+            'priority': signals['enhanced_score'].to_numpy() * 1000 + signals['macd_score'].to_numpy(),
+        })
+        return trades, skipped
+
+    def _resolve_exits(self, panel: PricePanel, entry_rows: np.ndarray, cols: np.ndarray,
+                       entry_open: np.ndarray, limits: np.ndarray, W: int) -> Tuple[np.ndarray, ...]:
+        """
+        在买入后W个交易日内向量化求每笔交易的首个卖出日和成交价
+
+        Returns:
+            Tuple: (是否找到卖出日, 卖出行号, 卖出价, 卖出原因)；没找到卖出日的交易其余三项无意义
+        """
+        p = self.params
+        T, _ = panel.shape
+        n = len(cols)
+
+        # 取出买入后W个交易日的价格路径 [n × W]，第j列为买入后第j+1天（T+1起可卖出）
+        offsets = np.arange(1, W + 1)
+        rows = entry_rows[:, None] + offsets[None, :]
+        valid = rows < T
+        rows = np.minimum(rows, T - 1)
+        c2 = cols[:, None]
+
+        o, h, l, c = (panel.open[rows, c2], panel.high[rows, c2],
+                      panel.low[rows, c2], panel.close[rows, c2])
+        prev = panel.close_filled[rows - 1, c2]
+
+        # 跌停封板（一字跌停）无法卖出
+        limit_down_price = np.round(prev * (1 - limits[c2]), 2)
+        locked_down = (h == l) & (c <= limit_down_price + 1e-6)
+        can_sell = valid & panel.tradable[rows, c2] & ~locked_down
+
+        entry_price = entry_open[:, None]
+
+        # 止损 / 移动止损：取两者中较高的止损价；跳空低开时按开盘价成交
+        stop_level = np.full(o.shape, -np.inf)
+        if p['stop_loss'] is not None:
+            stop_level = np.broadcast_to(entry_price * (1 - p['stop_loss']), o.shape).copy()
+        trailing_level = np.full(o.shape, -np.inf)
+        if p['trailing_stop'] is not None:
+            # 截至前一交易日的最高价（含买入日），避免使用当日盘中信息
+            entry_high = panel.high[entry_rows, cols][:, None]
+            path_high = np.concatenate([entry_high, np.where(valid, h, np.nan)[:, :-1]], axis=1)
+            peak = np.fmax.accumulate(np.nan_to_num(path_high, nan=-np.inf), axis=1)
+            trailing_level = peak * (1 - p['trailing_stop'])
+        level = np.maximum(stop_level, trailing_level)
+        hit_stop = can_sell & (l <= level)
+        stop_price = np.minimum(o, level)
+        stop_reason = np.where(trailing_level > stop_level, EXIT_TRAILING_STOP, EXIT_STOP_LOSS)
+
+        # 止盈：跳空高开时按开盘价成交
+        if p['take_profit'] is not None:
+            tp_level = entry_price * (1 + p['take_profit'])
+            hit_tp = can_sell & (h >= tp_level)
+            tp_price = np.maximum(o, tp_level)
+        else:
+            hit_tp, tp_price = np.zeros_like(can_sell), c
+
+        # 持有期到期：第holding_days个交易日收盘卖出（不能卖出时顺延）
+        hit_hold = can_sell & (offsets[None, :] >= p['holding_days'])
+
+        # 同一天多个条件触发时：止损优先（保守），其次止盈，最后到期
+        hit_any = hit_stop | hit_tp | hit_hold
+        has_exit = hit_any.any(axis=1)
+        first = hit_any.argmax(axis=1)
+        idx = np.arange(n)
+
+        exit_price = np.where(hit_stop[idx, first], stop_price[idx, first],
+                              np.where(hit_tp[idx, first], tp_price[idx, first], c[idx, first]))
+        exit_reason = np.where(hit_stop[idx, first], stop_reason[idx, first],
+                               np.where(hit_tp[idx, first], EXIT_TAKE_PROFIT, EXIT_HOLDING_PERIOD))
+        exit_rows = entry_rows + first + 1
+
+        return has_exit, exit_rows, exit_price, exit_reason
+
+    # ========== 第二步：资金约束下的组合模拟 ==========
+
+    def simulate(self, trades: pd.DataFrame, panel: PricePanel, skipped: Dict[str, int]) -> Dict[str, Any]:
+        """
+        按交易日推进组合：开盘买入 → 盘中/收盘卖出 → 收盘估值
+
+        同一天的候选交易按信号优先级（补充特征分、MACD评分）从高到低分配仓位。
+
+        Returns:
+            Dict: {'equity_curve': 权益曲线, 'trades': 成交明细, 'stats': 汇总统计}
+        """
+        p = self.params
+        skipped = dict(skipped, **{SKIP_HOLDING: 0, SKIP_NO_SLOT: 0, SKIP_NO_CASH: 0})
+        if trades.empty:
+            return {'equity_curve': pd.DataFrame(), 'trades': pd.DataFrame(),
+                    'stats': self._summarize(pd.DataFrame(), pd.DataFrame(), skipped)}
+
+        trades = trades.sort_values(['entry_row', 'priority'], ascending=[True, False]).reset_index(drop=True)
+        start = int(trades['entry_row'].min())
+        end = int(trades['exit_row'].max())
+
+        entries_by_row = {row: group for row, group in trades.groupby('entry_row', sort=True)}
+        cash = float(p['initial_capital'])
+        equity_prev = cash
+        open_positions: Dict[int, Dict[str, Any]] = {}   # 股票列号 -> 持仓
+        filled = []
+        records = []
+
+        for t in range(start, end + 1):
+            bought = sold = 0.0
+
+            # 1. 开盘买入
+            group = entries_by_row.get(t)
+            if group is not None:
+                for trade in group.itertuples(index=False):
+                    if trade.col in open_positions:
+                        skipped[SKIP_HOLDING] += 1
+                        continue
+                    if len(open_positions) >= p['max_positions']:
+                        skipped[SKIP_NO_SLOT] += 1
+                        continue
+                    budget = min(equity_prev * p['position_size'], cash)
+                    unit_cost = trade.entry_price * (1 + p['buy_cost'])
+                    shares = int(budget / unit_cost / p['lot_size']) * p['lot_size']
+                    if shares <= 0:
+                        skipped[SKIP_NO_CASH] += 1
+                        continue
+                    cost = shares * unit_cost
+                    cash -= cost
+                    bought += shares * trade.entry_price
+                    open_positions[trade.col] = {'trade': trade, 'shares': shares, 'cost': cost}
+
+            # 2. 卖出（卖出日总在买入日之后，满足T+1）
+            for col in [c for c, pos in open_positions.items() if pos['trade'].exit_row == t]:
+                pos = open_positions.pop(col)
+                trade = pos['trade']
+                proceeds = pos['shares'] * trade.exit_price * (1 - p['sell_cost'])
+                cash += proceeds
+                sold += pos['shares'] * trade.exit_price
+                filled.append({
+                    'stock_code': trade.stock_code,
+                    'signal_date': pd.Timestamp(trade.signal_date).strftime('%Y-%m-%d'),
+                    'entry_date': panel.dates[trade.entry_row].strftime('%Y-%m-%d'),
+                    'exit_date': panel.dates[trade.exit_row].strftime('%Y-%m-%d'),
+                    'entry_price': round(float(trade.entry_price), 4),
+                    'exit_price': round(float(trade.exit_price), 4),
+                    'shares': pos['shares'],
+                    'holding_days': int(trade.exit_row - trade.entry_row),
+                    'pnl': round(proceeds - pos['cost'], 2),
+                    'return_pct': round((proceeds / pos['cost'] - 1) * 100, 4),
+                    'exit_reason': trade.exit_reason,
+                })
+
+            # 3. 收盘估值
+            market_value = sum(pos['shares'] * panel.close_filled[t, col]
+                               for col, pos in open_positions.items())
+            equity = cash + market_value
+            records.append({
+                'date': panel.dates[t],
+                'equity': equity,
+                'cash': cash,
+                'positions': len(open_positions),
+                'turnover': (bought + sold) / equity_prev if equity_prev > 0 else 0.0,
+            })
+            equity_prev = equity
+
+        curve = pd.DataFrame(records)
+        curve['drawdown'] = curve['equity'] / curve['equity'].cummax() - 1
+        trades_df = pd.DataFrame(filled)
+
+        return {
+            'equity_curve': curve,
+            'trades': trades_df,
+            'stats': self._summarize(curve, trades_df, skipped),
+        }
+
+    def _summarize(self, curve: pd.DataFrame, trades: pd.DataFrame, skipped: Dict[str, int]) -> Dict[str, Any]:
+        """
+        汇总回测统计
+
+        胜率、平均收益等逐笔统计只包含已平仓交易；end_of_data 的持仓按最后收盘价估值，
+        计入权益曲线，单独报告为未平仓持仓（open_position_count、open_unrealized_pnl）。
+        """
+        stats: Dict[str, Any] = {'params': dict(self.params), 'skipped_signals': skipped}
+        if curve.empty:
+            stats.update({'trade_count': 0, 'open_position_count': 0})
+            return stats
+
+        if trades.empty:
+            realized, still_open = trades, trades
+        else:
+            is_open = trades['exit_reason'] == EXIT_END_OF_DATA
+            realized, still_open = trades[~is_open], trades[is_open]
+
+        days = len(curve)
+        initial = self.params['initial_capital']
+        final = float(curve['equity'].iloc[-1])
+        daily_returns = curve['equity'].pct_change().fillna(curve['equity'].iloc[0] / initial - 1)
+        years = days / 252
+
+        stats.update({
+            'start_date': curve['date'].iloc[0].strftime('%Y-%m-%d'),
+            'end_date': curve['date'].iloc[-1].strftime('%Y-%m-%d'),
+            'trading_days': days,
+            'final_equity': round(final, 2),
+            'total_return_pct': round((final / initial - 1) * 100, 2),
+            'annual_return_pct': round(((final / initial) ** (1 / years) - 1) * 100, 2) if years > 0 and final > 0 else None,
+            'max_drawdown_pct': round(float(curve['drawdown'].min()) * 100, 2),
+            'sharpe': round(float(daily_returns.mean() / daily_returns.std() * np.sqrt(252)), 2)
+                      if daily_returns.std() > 0 else None,
+            'annual_turnover': round(float(curve['turnover'].sum()) / 2 / years, 2) if years > 0 else None,
+            'avg_positions': round(float(curve['positions'].mean()), 2),
+            'trade_count': len(realized),
+            'open_position_count': len(still_open),
+            'open_unrealized_pnl': round(float(still_open['pnl'].sum()), 2) if not still_open.empty else 0.0,
+        })
+        if not realized.empty:
+            stats.update({
+                'win_rate_pct': round(float((realized['pnl'] > 0).mean()) * 100, 2),
+                'avg_trade_return_pct': round(float(realized['return_pct'].mean()), 4),
+                'avg_holding_days': round(float(realized['holding_days'].mean()), 2),
+                'exit_reasons': realized['exit_reason'].value_counts().to_dict(),
+            })
+        return stats
+
+    def run(self, signals, panel: PricePanel = None, data_dir: str = None) -> Dict[str, Any]:
+        """
+        运行回测
+
+        Args:
+            signals: 信号明细表或信号字典列表（应为实盘模式信号，避免未来信息）
+            panel: 价格矩阵，None则按信号涉及的股票从数据目录加载
+            data_dir: 数据目录
+
+        Returns:
+            Dict: {'equity_curve': 权益曲线, 'trades': 成交明细, 'stats': 汇总统计}
+        """
+        signals = prepare_signals(signals)
+        if panel is None:
+            panel = load_price_panel(data_dir, signals['stock_code'].unique().tolist())
+
+        trades, skipped = self.resolve_trades(signals, panel)
+        logger.info(f"候选交易: {len(trades)} 笔（信号 {len(signals)} 个）")
+        return self.simulate(trades, panel, skipped)
+
+
+def save_backtest_results(result: Dict[str, Any], output_dir: str = None) -> Dict[str, str]:
+    """
+    保存回测结果
+
+    Args:
+        result: PortfolioBacktester.run 的返回值
+        output_dir: 输出目录，默认使用Config.OUTPUT_DIR
+
+    Returns:
+        Dict[str, str]: 各输出文件路径
+    """
+    output_dir = output_dir or Config.OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime(Config.DATE_FORMAT)
+
+    paths = {
+        'equity_curve': os.path.join(output_dir, f"backtest_equity_{timestamp}.csv"),
+        'trades': os.path.join(output_dir, f"backtest_trades_{timestamp}.csv"),
+        'report': os.path.join(output_dir, f"backtest_report_{timestamp}.json"),
+    }
+
+    curve = result['equity_curve'].copy()
+    if not curve.empty:
+        curve['date'] = curve['date'].dt.strftime('%Y-%m-%d')
+    curve.to_csv(paths['equity_curve'], index=False, encoding=Config.CSV_ENCODING)
+    result['trades'].to_csv(paths['trades'], index=False, encoding=Config.CSV_ENCODING)
+
+    with open(paths['report'], 'w', encoding='utf-8') as f:
+        json.dump(result['stats'], f, ensure_ascii=False, indent=2)
+
+    return paths
+
+
+def main():
+    """主函数"""
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='信号组合回测')
+    parser.add_argument('--signals', help='信号CSV（trend_signals_*.csv），默认使用输出目录中最新的文件')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--output-dir', help='输出目录路径')
+    parser.add_argument('--capital', type=float, help='初始资金')
+    parser.add_argument('--max-positions', type=int, help='最大同时持仓数')
+    parser.add_argument('--position-size', type=float, help='单笔仓位占总权益比例')
+    parser.add_argument('--holding-days', type=int, help='最长持有交易日数')
+    parser.add_argument('--stop-loss', type=float, help='止损比例，如0.05')
+    parser.add_argument('--take-profit', type=float, help='止盈比例，如0.10')
+    parser.add_argument('--trailing-stop', type=float, help='移动止损比例，如0.05')
+    args = parser.parse_args()
+
+    signals_path = args.signals
+    if not signals_path:
+        candidates = sorted(glob.glob(os.path.join(Config.OUTPUT_DIR, "trend_signals_*.csv")), reverse=True)
+        if not candidates:
+            logger.error("未找到信号文件，请先运行 stock_trend_analyzer.py --no-future")
+            return 1
+        signals_path = candidates[0]
+
+    logger.info(f"信号文件: {signals_path}")
+    signals = pd.read_csv(signals_path)
+    if '未来涨幅满足' in signals.columns:
+        logger.warning("信号来自回测模式（筛选时使用了未来涨幅），回测结果会偏乐观；"
+                       "建议使用 --no-future 生成的实盘模式信号")
+
+    overrides = {
+        'initial_capital': args.capital,
+        'max_positions': args.max_positions,
+        'position_size': args.position_size,
+        'holding_days': args.holding_days,
+        'stop_loss': args.stop_loss,
+        'take_profit': args.take_profit,
+        'trailing_stop': args.trailing_stop,
+    }
+    backtester = PortfolioBacktester(Config, **{k: v for k, v in overrides.items() if v is not None})
+
+    start = time.perf_counter()
+    result = backtester.run(signals, data_dir=args.data_dir)
+    logger.info(f"回测耗时: {time.perf_counter() - start:.2f}秒")
+
+    stats = result['stats']
+    if stats['trade_count'] == 0 and stats['open_position_count'] == 0:
+        logger.warning("没有成交的交易")
+        return 1
+
+    logger.info("=" * 60)
+    logger.info(f"回测区间: {stats['start_date']} ~ {stats['end_date']} ({stats['trading_days']}个交易日)")
+    logger.info(f"总收益率: {stats['total_return_pct']}% | 年化: {stats['annual_return_pct']}%")
+    logger.info(f"最大回撤: {stats['max_drawdown_pct']}% | 夏普: {stats['sharpe']}")
+    logger.info(f"已平仓: {stats['trade_count']}笔 | 胜率: {stats.get('win_rate_pct')}% | "
+                f"平均收益: {stats.get('avg_trade_return_pct')}%")
+    logger.info(f"未平仓: {stats['open_position_count']}笔 | 浮动盈亏: {stats['open_unrealized_pnl']}")
+    logger.info(f"年化换手: {stats['annual_turnover']}倍 | 卖出原因: {stats.get('exit_reasons')}")
+    logger.info(f"跳过信号: {stats['skipped_signals']}")
+    logger.info("=" * 60)
+
+    paths = save_backtest_results(result, args.output_dir)
+    for name, path in paths.items():
+        logger.info(f"  {name}: {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
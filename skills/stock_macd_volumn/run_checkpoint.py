@@ -0,0 +1,184 @@
+"""
+分析运行检查点模块
+
+为 analyze_all_stocks 提供断点续跑能力：每分析完一只股票，立即把该股票的
+完成记录和信号结果追加写入运行目录，进程中途被终止（OOM、Runner超时）后，
+可以通过 --resume RUN_ID 跳过已完成的股票并合并之前的结果。
+
+运行目录结构：
+    output/runs/<RUN_ID>/
+    ├── meta.json         # 运行参数（筛选模式、回测模式等）
+    └── progress.jsonl    # 每只股票一行：完成状态 + 信号列表
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# 每只股票的完成状态
+STATUS_SIGNALS = 'signals'      # 有信号
+STATUS_NO_SIGNAL = 'no_signal'  # 已分析但无信号（或被预筛选过滤）
+STATUS_FAILED = 'failed'        # 处理异常，续跑时会重新分析
+
+
+def _json_default(value):
+    """JSON序列化兜底：处理numpy标量和时间类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime('%Y-%m-%d')
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def generate_run_id() -> str:
+    """
+    生成运行ID
+
+    Returns:
+        str: 形如 20260209_213000 的运行ID
+    """
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+class RunCheckpoint:
+    """分析运行检查点"""
+
+    META_FILE = 'meta.json'
+    PROGRESS_FILE = 'progress.jsonl'
+
+    def __init__(self, output_dir: str, run_id: str = None, resume: bool = False,
+                 subdir: str = 'runs'):
+        """
+        初始化检查点
+
+        Args:
+            output_dir: 分析输出目录
+            run_id: 运行ID，None则自动生成
+            resume: 是否续跑已有运行
+            subdir: 运行目录所在的子目录名
+
+        Raises:
+            FileNotFoundError: 续跑时运行目录不存在
+        """
+        if resume and not run_id:
+            raise ValueError("续跑模式必须指定运行ID")
+
+        self.run_id = run_id or generate_run_id()
+        self.run_dir = os.path.join(output_dir, subdir, self.run_id)
+        self.meta_path = os.path.join(self.run_dir, self.META_FILE)
+        self.progress_path = os.path.join(self.run_dir, self.PROGRESS_FILE)
+
+        # 已完成股票：文件名 -> 完成记录
+        self.completed: Dict[str, Dict[str, Any]] = {}
+
+        if resume:
+            if not os.path.exists(self.run_dir):
+                raise FileNotFoundError(f"运行目录不存在: {self.run_dir}")
+            self._load_progress()
+        else:
+            os.makedirs(self.run_dir, exist_ok=True)
+
+        self._progress_file = None
+
+    def _load_progress(self):
+        """读取已有的完成记录（忽略崩溃时写了一半的最后一行）"""
+        if not os.path.exists(self.progress_path):
+            return
+
+        self._truncate_partial_line()
+
+        with open(self.progress_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"检查点第{line_no}行不完整，已忽略")
+                    continue
+
+                # 失败的股票不算完成，续跑时重新分析
+                if record.get('status') == STATUS_FAILED:
+                    self.completed.pop(record['file'], None)
+                else:
+                    self.completed[record['file']] = record
+
+        logger.info(f"检查点已加载: {len(self.completed)} 只股票已完成")
+
+    def _truncate_partial_line(self):
+        """截掉崩溃时未写完的最后一行，避免续跑追加的记录与其粘连"""
+        with open(self.progress_path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+                logger.warning("检查点末尾存在不完整记录，已截断")
+
+    def load_meta(self) -> Optional[Dict[str, Any]]:
+        """读取运行参数"""
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_meta(self, meta: Dict[str, Any]):
+        """保存运行参数"""
+        meta = {'run_id': self.run_id, **meta}
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=_json_default)
+
+    def is_completed(self, file_path: str) -> bool:
+        """判断股票文件是否已完成"""
+        return os.path.basename(file_path) in self.completed
+
+    def get_record(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """获取已完成股票的记录"""
+        return self.completed.get(os.path.basename(file_path))
+
+    def record(self, file_path: str, status: str, result: Dict[str, Any] = None):
+        """
+        追加一只股票的完成记录
+
+        每条记录写入后立即 flush + fsync，保证进程被杀时已完成的股票不丢失。
+
+        Args:
+            file_path: 股票CSV文件路径
+            status: 完成状态（STATUS_SIGNALS / STATUS_NO_SIGNAL / STATUS_FAILED）
+            result: analyze_single_stock 的返回结果
+        """
+        record = {'file': os.path.basename(file_path), 'status': status}
+        if result:
+            record.update({
+                'stock_code': result['stock_code'],
+                'stock_name': result['stock_name'],
+                'signal_count': result['signal_count'],
+                'signals': result['signals'],
+            })
+
+        if self._progress_file is None:
+            self._progress_file = open(self.progress_path, 'a', encoding='utf-8')
+
+        self._progress_file.write(
+            json.dumps(record, ensure_ascii=False, default=_json_default) + '\n'
+        )
+        self._progress_file.flush()
+        os.fsync(self._progress_file.fileno())
+
+        if status != STATUS_FAILED:
+            self.completed[record['file']] = record
+
+    def close(self):
+        """关闭进度文件"""
+        if self._progress_file is not None:
+            self._progress_file.close()
+            self._progress_file = None
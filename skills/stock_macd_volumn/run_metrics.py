@@ -0,0 +1,223 @@
+"""
+分析运行指标模块
+
+为 analyze_all_stocks 记录结构化的运行指标，回答"时间花在哪、股票在哪一步被筛掉"：
+
+    - 阶段耗时：read（读取CSV）/ profile_gate（画像筛选）/ quality / pre_filter /
+      indicators / detection / save_results，每个阶段的累计耗时、次数和单只股票 p50/p99
+    - 未通过原因：按阶段（quality / pre_filter / analyze）和原因计数，
+      原因中的具体数值（价格、行数、缺失列明细）被去掉，便于跨运行聚合
+    - 漏斗：待分析 → 隔离 → 续跑复用 → 画像/质量/预筛选未通过 → 无信号 → 有信号
+
+指标写入 analysis_report_*.json 的 run_metrics 字段，也可以写成 Prometheus textfile
+（node_exporter textfile collector 格式），供监控采集。
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import numpy as np
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from memory_tracking import track_memory
+
+
+logger = logging.getLogger(__name__)
+
+# 阶段输出顺序（未列出的阶段排在最后）
+STAGE_ORDER = ['read', 'profile_gate', 'quality', 'pre_filter', 'indicators', 'detection', 'save_results']
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = 'stock_analyzer'
+
+
+def normalize_reason(reason: str) -> str:
+    """
+    去掉原因中的具体数值，便于聚合
+
+    "价格(1.50)超出范围" → "价格超出范围"，"存在缺失值: {...}" → "存在缺失值"，
+    "数据不足34天(20行)" → "数据不足34天"
+
+    Args:
+        reason: check_data_quality / pre_filter 返回的原因
+
+    Returns:
+        str: 归一化后的原因
+    """
+    return re.sub(r'\(.*?\)', '', reason).split(':')[0].strip()
+
+
+class RunMetrics:
+    """单次分析运行的阶段耗时和未通过原因计数（线程安全，流水线模式下多线程共用）"""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: False时所有记录操作为空操作（单只股票分析函数的默认值）
+        """
+        self.enabled = enabled
+        self.durations: Dict[str, List[float]] = {}
+        self.rejects: Dict[str, Counter] = {}
+        self.funnel: Dict[str, int] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时一个阶段（单只股票的一次调用），开启内存分析时同时记录该阶段的分配峰值"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            with track_memory(name):
+                yield
+        finally:
+            self.add_duration(name, time.perf_counter() - start)
+
+    def add_duration(self, name: str, seconds: float):
+        """记录一次阶段耗时"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.durations.setdefault(name, []).append(seconds)
+
+    def reject(self, stage: str, reason: str):
+        """记录一只股票在某阶段未通过及其原因"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.rejects.setdefault(stage, Counter())[normalize_reason(reason)] += 1
+
+    def set_funnel(self, funnel: Dict[str, int]):
+        """设置漏斗计数（运行结束时由调用方汇总）"""
+        self.funnel = dict(funnel)
+
+    def stage_summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各阶段耗时汇总
+
+        Returns:
+            Dict: {阶段名: {'total_seconds', 'count', 'p50_ms', 'p99_ms', 'max_ms'}}
+        """
+        with self._lock:
+            durations = {name: list(values) for name, values in self.durations.items()}
+
+        order = {name: i for i, name in enumerate(STAGE_ORDER)}
+        summary = {}
+        for name in sorted(durations, key=lambda n: (order.get(n, len(order)), n)):
+            values = np.asarray(durations[name])
+            summary[name] = {
+                'total_seconds': round(float(values.sum()), 4),
+                'count': int(len(values)),
+                'p50_ms': round(float(np.percentile(values, 50)) * 1000, 3),
+                'p99_ms': round(float(np.percentile(values, 99)) * 1000, 3),
+                'max_ms': round(float(values.max()) * 1000, 3),
+            }
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典（写入 analysis_report_*.json 的 run_metrics 字段）
+
+        Returns:
+            Dict: {'wall_seconds', 'stages', 'rejects', 'funnel'}
+        """
+        with self._lock:
+            rejects = {stage: dict(counter.most_common()) for stage, counter in self.rejects.items()}
+        return {
+            'wall_seconds': round(time.time() - self.started_at, 3),
+            'stages': self.stage_summary(),
+            'rejects': rejects,
+            'funnel': dict(self.funnel),
+        }
+
+    def log_summary(self):
+        """输出各阶段耗时和未通过原因"""
+        metrics = self.to_dict()
+        logger.info("各阶段耗时（累计 / 单只股票p50 / p99）:")
+        for name, s in metrics['stages'].items():
+            logger.info(f"  {name:<13} {s['total_seconds']:>9.2f}秒  次数={s['count']:<6} "
+                        f"p50={s['p50_ms']:.2f}ms  p99={s['p99_ms']:.2f}ms")
+        for stage, reasons in metrics['rejects'].items():
+            detail = ', '.join(f"{reason}={count}" for reason, count in reasons.items())
+            logger.info(f"  {stage} 未通过: {detail}")
+
+    def write_prometheus(self, path: str, labels: Dict[str, str] = None) -> str:
+        """
+        写出 Prometheus textfile（原子替换，采集方不会读到半个文件）
+
+        Args:
+            path: 输出文件路径（通常以 .prom 结尾，放在 node_exporter 的 textfile 目录）
+            labels: 附加到每个指标上的标签（如 mode、filter_mode）
+
+        Returns:
+            str: 输出文件路径
+        """
+        metrics = self.to_dict()
+        base_labels = dict(labels or {})
+
+        def fmt(extra: Dict[str, Any]) -> str:
+            merged = {**base_labels, **extra}
+            if not merged:
+                return ''
+            parts = []
+            for key, value in merged.items():
+                text = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                parts.append(f'{key}="{text}"')
+            return '{' + ','.join(parts) + '}'
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds 单只股票各阶段耗时（秒）",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds summary",
+        ]
+        for name, s in metrics['stages'].items():
+            lines.append(f"{METRIC_PREFIX}_stage_seconds{fmt({'stage': name, 'quantile': '0.5'})} "
+                         f"{s['p50_ms'] / 1000:.6f}")
+            lines.append(f"{METRIC_PREFIX}_stage_seconds{fmt({'stage': name, 'quantile': '0.99'})} "
+                         f"{s['p99_ms'] / 1000:.6f}")
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_sum{fmt({'stage': name})} {s['total_seconds']:.6f}")
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_count{fmt({'stage': name})} {s['count']}")
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_rejects 各阶段未通过的股票数",
+            f"# TYPE {METRIC_PREFIX}_rejects gauge",
+        ]
+        for stage, reasons in metrics['rejects'].items():
+            for reason, count in reasons.items():
+                lines.append(f"{METRIC_PREFIX}_rejects{fmt({'stage': stage, 'reason': reason})} {count}")
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_funnel_stocks 分析漏斗各环节的股票数",
+            f"# TYPE {METRIC_PREFIX}_funnel_stocks gauge",
+        ]
+        for step, count in metrics['funnel'].items():
+            lines.append(f"{METRIC_PREFIX}_funnel_stocks{fmt({'step': step})} {count}")
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_run_seconds 本次运行总耗时（秒）",
+            f"# TYPE {METRIC_PREFIX}_run_seconds gauge",
+            f"{METRIC_PREFIX}_run_seconds{fmt({})} {metrics['wall_seconds']:.3f}",
+            f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds 本次运行结束时间（Unix时间戳）",
+            f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+            f"{METRIC_PREFIX}_last_run_timestamp_seconds{fmt({})} {time.time():.0f}",
+        ]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+        return path
+
+
+# 单只股票分析函数未传入指标对象时使用的空实现
+NULL_METRICS = RunMetrics(enabled=False)
@@ -472,6 +472,266 @@ def detect_uptrend_signals(
     return signals
 
 
+
+def compute_macd_scores(df: pd.DataFrame, config) -> np.ndarray:
+    """
+    向量化计算每个交易日的MACD评分（与 calculate_macd_score 逐行结果一致）
+
+    Args:
+        df: 包含MACD指标的DataFrame
+        config: 配置对象
+
+    Returns:
+        np.ndarray: 与df逐行对齐的MACD评分（整数）
+    """
+    position = np.arange(len(df))
+    weights = config.MACD_SCORE_WEIGHTS
+    dif, dea, hist = df['macd_dif'], df['macd_dea'], df['macd_hist']
+    dif_uptrend = (position >= 5) & np.logical_and.reduce(
+        [(dif.shift(k) < dif.shift(k - 1)).to_numpy() for k in range(4, 0, -1)]
+    )
+    hist_increasing = (position >= 3) & np.logical_and.reduce(
+        [(hist.shift(k) < hist.shift(k - 1)).to_numpy() for k in range(2, 0, -1)]
+    )
+    return (
+        (dif > dea).to_numpy() * weights['golden_cross']
+        + ((dif > 0) & (dea > 0)).to_numpy() * weights['above_zero']
+        + (hist > 0).to_numpy() * weights['positive_hist']
+        + dif_uptrend * weights['dif_uptrend']
+        + hist_increasing * weights['hist_increasing']
+    )
+
+
+def compute_signal_features(df: pd.DataFrame, config) -> pd.DataFrame:
+    """
+    向量化计算每个交易日的信号特征（逐行检测逻辑的数组版本）
+
+    与 calculate_macd_score / check_volume_surge / check_below_ma60 / check_future_rise /
+    calculate_enhanced_score / check_risk_control 的判断完全一致，但一次计算整只股票的所有行。
+    只依赖阈值的判断（MACD评分阈值、放量阈值、均线距离阈值、筛选模式、评级阈值、风险阈值）
+    不在这里固化，由 select_signal_rows 在特征上重新筛选，便于参数扫描复用同一份特征。
+
+    Args:
+        df: 包含所有技术指标的DataFrame（calculate_all_indicators 的输出）
+        config: 配置对象（MACD评分权重、补充特征参数等非阈值参数）
+
+    Returns:
+        pd.DataFrame: 与df逐行对齐的特征表，列包括：
+            macd_score, volume_ratio, ma60_distance（MA60为空时为inf）,
+            future_return（未来数据不足时为NaN）, close_return（持有FUTURE_DAYS天的收盘收益%）,
+            enhanced_score, pattern, limit_up_days, gain_5d, price_change_3d, ma20_deviation
+    """
+    n = len(df)
+    position = np.arange(n)
+    close = df['close'].astype(float)
+    high = df['high'].astype(float)
+    low = df['low'].astype(float)
+
+    # MACD评分
+    macd_score = compute_macd_scores(df, config)
+
+    # 均线距离（MA60为空时视为无穷远，与 check_below_ma60 一致）
+    ma60_distance = df['ma60_distance'].to_numpy(dtype=float, copy=True)
+    ma60_distance[df['ma60'].isna().to_numpy()] = np.inf
+
+    # 未来N日最高价涨幅与持有N日收盘收益
+    future_days = config.FUTURE_DAYS
+    future_high = high.rolling(future_days).max().shift(-future_days)
+    future_return = ((future_high - close) / close * 100).to_numpy()
+    close_return = ((close.shift(-future_days) - close) / close * 100).to_numpy()
+
+    # 补充特征评分
+    enhanced_weights = config.ENHANCED_SCORE_WEIGHTS
+    rsi = df['rsi']
+    rsi_ok = (rsi > config.RSI_RANGE[0]) & (rsi < config.RSI_RANGE[1])
+
+    k, d, j = df['kdj_k'], df['kdj_d'], df['kdj_j']
+    kdj_ok = (k.shift(1) <= d.shift(1)) & (k > d) & (j < config.KDJ_J_THRESHOLD)
+
+    boll_ok = df['boll_width'] < config.BOLL_WIDTH_THRESHOLD
+
+    volume_ratio = df['volume_ratio'].to_numpy(dtype=float)
+    price_change_3d = df['price_change_3d'].to_numpy(dtype=float)
+    volume_price_ok = (price_change_3d > 0) & (volume_ratio > 1.5)
+
+    pattern = _detect_price_patterns(close, high, low)
+
+    enhanced_score = (
+        rsi_ok.to_numpy() * enhanced_weights['rsi']
+        + kdj_ok.to_numpy() * enhanced_weights['kdj']
+        + boll_ok.to_numpy() * enhanced_weights['boll']
+        + (pattern != '').astype(int) * enhanced_weights['pattern']
+        + volume_price_ok * enhanced_weights['volume_price']
+    )
+
+    # 风险特征（阈值判断见 select_signal_rows）
+    close_5d_ago = close.shift(5)
+    gain_5d = ((close - close_5d_ago) / close_5d_ago * 100).to_numpy()
+    if 'pctChg' in df.columns:
+        limit_up_days = (df['pctChg'] > 9.5).astype(int).rolling(5).sum().to_numpy(dtype=float, copy=True)
+        limit_up_days[position < 5] = np.nan
+    else:
+        limit_up_days = np.full(n, np.nan)
+    ma20 = df['ma20']
+    ma20_deviation = ((close - ma20) / ma20 * 100).to_numpy()
+
+    return pd.DataFrame({
+        'macd_score': macd_score.astype(int),
+        'volume_ratio': volume_ratio,
+        'ma60_distance': ma60_distance,
+        'future_return': future_return,
+        'close_return': close_return,
+        'enhanced_score': enhanced_score.astype(int),
+        'pattern': pattern,
+        'limit_up_days': limit_up_days,
+        'gain_5d': gain_5d,
+        'price_change_3d': price_change_3d,
+        'ma20_deviation': ma20_deviation,
+    }, index=df.index)
+
+
+def _detect_price_patterns(close: pd.Series, high: pd.Series, low: pd.Series) -> np.ndarray:
+    """detect_price_pattern 的向量化版本，返回每行的形态名称（无形态为空字符串）"""
+    n = len(close)
+    position = np.arange(n)
+    close_values = close.to_numpy()
+
+    # 形态1: 突破平台
+    high_20 = high.rolling(20).max()
+    low_20 = low.rolling(20).min()
+    platform = (((high_20 - low_20) / low_20 < 0.10) & (close > high_20 * 0.98)).to_numpy()
+
+    # 形态2: V型反转（10日窗口内低点位于第3~7天）
+    v_reversal = np.zeros(n, dtype=bool)
+    if n >= 10:
+        windows = np.lib.stride_tricks.sliding_window_view(close_values, 10)
+        low_index = np.argmin(windows, axis=1)
+        low_value = windows[np.arange(len(windows)), low_index]
+        left_drop = (windows[:, 0] - low_value) / windows[:, 0]
+        right_rise = (windows[:, -1] - low_value) / low_value
+        v_reversal[9:] = (low_index >= 3) & (low_index <= 7) & (left_drop > 0.05) & (right_rise > 0.03)
+
+    # 形态3: 回调企稳
+    high_60 = high.rolling(60).max()
+    drawdown = (high_60 - close) / high_60
+    close_5d_ago = close.shift(5)
+    gain_5 = (close - close_5d_ago) / close_5d_ago
+    pullback = ((drawdown > 0.20) & (drawdown < 0.50) & (gain_5 > 0.02)).to_numpy() & (position >= 60)
+
+    eligible = position >= 20
+    return np.select(
+        [eligible & platform, eligible & v_reversal, eligible & pullback],
+        ['突破平台', 'V型反转', '回调企稳'],
+        default=''
+    )
+
+
+def get_ratings(enhanced_scores: np.ndarray, config) -> np.ndarray:
+    """get_rating 的向量化版本"""
+    thresholds = config.RATING_THRESHOLDS
+    return np.select(
+        [enhanced_scores >= thresholds['A'], enhanced_scores >= thresholds['B']],
+        ['A级', 'B级'],
+        default='C级'
+    )
+
+
+def check_risk_flags(features, config) -> np.ndarray:
+    """check_risk_control 的向量化版本，返回每行是否存在风险"""
+    return np.logical_or.reduce(list(compute_risk_flags(features, config).values()))
+
+
+# 风险项名称（与 check_risk_control 的四类风险对应）
+RISK_FLAG_NAMES = {
+    'limit_up': '连续涨停',
+    'short_term_gain': '短期暴涨',
+    'volume_no_gain': '巨量滞涨',
+    'ma20_deviation': '远离20日均线',
+}
+
+
+def compute_risk_flags(features, config) -> Dict[str, np.ndarray]:
+    """
+    逐项计算 check_risk_control 的四类风险（向量化）
+
+    Args:
+        features: compute_signal_features 的输出，或包含相同列的数组字典
+        config: 配置对象（风险阈值）
+
+    Returns:
+        Dict[str, np.ndarray]: 风险项（RISK_FLAG_NAMES 的键）→ 布尔数组
+    """
+    volume_ratio = np.asarray(features['volume_ratio'])
+    return {
+        'limit_up': np.asarray(features['limit_up_days']) >= config.MAX_CONSECUTIVE_LIMIT_UP,
+        'short_term_gain': np.asarray(features['gain_5d']) > config.MAX_SHORT_TERM_GAIN,
+        'volume_no_gain': ((volume_ratio > config.VOLUME_SURGE_NO_GAIN)
+                           & (np.asarray(features['price_change_3d']) < config.VOLUME_SURGE_MIN_GAIN)),
+        'ma20_deviation': np.asarray(features['ma20_deviation']) > config.MAX_MA20_DEVIATION,
+    }
+
+
+def match_signal_conditions(
+    features,
+    config,
+    enable_future_validation: bool = True
+) -> np.ndarray:
+    """
+    按阈值判断每行是否满足信号条件（核心条件数、筛选模式、风险控制）
+
+    不检查分析范围（前60天、回测模式末尾N天），可直接用于多只股票拼接后的特征表。
+
+    Args:
+        features: compute_signal_features 的输出，或包含相同列的数组字典
+        config: 配置对象（各类阈值、筛选模式）
+        enable_future_validation: 是否启用未来涨幅验证（回测模式）
+
+    Returns:
+        np.ndarray: 布尔数组，True表示该行满足信号条件
+    """
+    macd_uptrend = np.asarray(features['macd_score']) >= config.MACD_SCORE_THRESHOLD
+    pass_count = (
+        macd_uptrend.astype(int)
+        + (np.asarray(features['volume_ratio']) >= config.VOLUME_RATIO_THRESHOLD)
+        + (np.asarray(features['ma60_distance']) <= config.MA_DISTANCE_THRESHOLD)
+    )
+    if enable_future_validation:
+        pass_count = pass_count + (np.asarray(features['future_return']) >= config.MIN_FUTURE_RETURN)
+    else:
+        pass_count = pass_count + 1  # 实盘模式不验证未来涨幅
+
+    matched = pass_count >= config.get_min_conditions()
+    if config.FILTER_MODE == 'loose':
+        matched &= macd_uptrend
+
+    return matched & ~check_risk_flags(features, config)
+
+
+def select_signal_rows(
+    features: pd.DataFrame,
+    config,
+    enable_future_validation: bool = True
+) -> np.ndarray:
+    """
+    在单只股票的特征表上筛选信号行
+
+    筛选结果与 detect_uptrend_signals 对同一只股票检测到的信号行完全一致。
+
+    Args:
+        features: compute_signal_features 的输出（单只股票）
+        config: 配置对象（各类阈值、筛选模式）
+        enable_future_validation: 是否启用未来涨幅验证（回测模式）
+
+    Returns:
+        np.ndarray: 布尔数组，True表示该行产生信号
+    """
+    n = len(features)
+    position = np.arange(n)
+    end_offset = config.FUTURE_DAYS if enable_future_validation else 0
+    in_range = (position >= 60) & (position < n - end_offset)
+
+    return in_range & match_signal_conditions(features, config, enable_future_validation)
+
 if __name__ == "__main__":
     # 简单测试
     from config import Config
@@ -23,11 +23,16 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, List, Any, Tuple
+from typing import Callable, Dict, List, Any, Tuple
 
 from config import Config
 from technical_indicators import calculate_all_indicators, check_data_quality
 from signal_detector import detect_uptrend_signals
+from pipeline_executor import PipelinedExecutor
+from run_checkpoint import RunCheckpoint, generate_run_id, STATUS_SIGNALS, STATUS_NO_SIGNAL, STATUS_FAILED
+from data_profile import DataProfileStore
+from run_metrics import RunMetrics, NULL_METRICS
+from memory_tracking import mark_phase, track_memory, start_profiling, finish_profiling, default_report_path
 
 
 # 配置日志
@@ -41,6 +46,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 信号明细表的列类型（内存中传递时使用，信号日期另转为datetime64）
+SIGNAL_TABLE_DTYPES = {
+    '收盘价': 'float64',
+    'MACD评分': 'int64',
+    '成交量比率': 'float64',
+    'MA60距离%': 'float64',
+    '补充特征分': 'int64',
+    'MACD满足': 'bool',
+    '成交量满足': 'bool',
+    'MA60满足': 'bool',
+    '未来5日涨幅%': 'float64',
+    '未来涨幅满足': 'bool',
+}
+
 
 def extract_stock_info(file_path: str) -> Tuple[str, str]:
     """
@@ -113,79 +132,301 @@ def pre_filter(df: pd.DataFrame, config: Config) -> Tuple[bool, str]:
     return True, "通过预筛选"
 
 
-def analyze_single_stock(
+def load_stock_file(file_path: str) -> pd.DataFrame:
+    """
+    读取单只股票的CSV文件
+
+    Args:
+        file_path: CSV文件路径
+
+    Returns:
+        pd.DataFrame: 原始日线数据
+    """
+    return pd.read_csv(file_path)
+
+
+def load_quarantine(quarantine_path: str, data_dir: str) -> Dict[str, List[str]]:
+    """
+    读取 data_quality_scanner.py 生成的隔离名单
+
+    名单针对的数据目录与本次分析不同时忽略（避免误跳过其他数据目录的股票）。
+
+    Args:
+        quarantine_path: 隔离名单路径
+        data_dir: 本次分析的数据目录
+
+    Returns:
+        Dict[str, List[str]]: 文件名 → 隔离原因（问题类型列表），没有名单时为空
+    """
+    if not quarantine_path or not os.path.exists(quarantine_path):
+        return {}
+    try:
+        with open(quarantine_path, 'r', encoding='utf-8') as f:
+            quarantine = json.load(f)
+    except Exception as e:
+        logger.warning(f"读取隔离名单失败: {quarantine_path}, {str(e)}")
+        return {}
+
+    if os.path.abspath(quarantine.get('data_dir', '')) != os.path.abspath(data_dir):
+        logger.warning(f"隔离名单对应的数据目录({quarantine.get('data_dir')})与本次分析不同，已忽略")
+        return {}
+    return {file: entry['issues'] for file, entry in quarantine.get('stocks', {}).items()}
+
+
+def analyze_stock_frame(
+    df: pd.DataFrame,
     file_path: str,
     config: Config,
-    enable_future_validation: bool = True
+    enable_future_validation: bool = True,
+    metrics: RunMetrics = None
 ) -> Dict[str, Any]:
     """
-    分析单只股票
+    分析已读取的单只股票数据
 
     Args:
-        file_path: CSV文件路径
+        df: 原始日线数据
+        file_path: CSV文件路径（用于提取股票代码和名称）
         config: 配置对象
         enable_future_validation: 是否启用未来涨幅验证
+        metrics: 运行指标，记录各阶段耗时和未通过原因，None表示不记录
 
     Returns:
         Dict: 分析结果，包含股票信息和信号列表
     """
+    metrics = metrics or NULL_METRICS
     try:
         # 提取股票信息
         stock_code, stock_name = extract_stock_info(file_path)
 
-        # 读取数据
-        df = pd.read_csv(file_path)
-
         # 数据质量检查
-        is_valid, message = check_data_quality(df)
+        with metrics.stage('quality'):
+            is_valid, message = check_data_quality(df)
         if not is_valid:
             logger.warning(f"{stock_code} {stock_name}: {message}")
+            metrics.reject('quality', message)
             return None
 
         # 预筛选
-        passed, reason = pre_filter(df, config)
+        with metrics.stage('pre_filter'):
+            passed, reason = pre_filter(df, config)
         if not passed:
             logger.debug(f"{stock_code} {stock_name}: {reason}")
+            metrics.reject('pre_filter', reason)
             return None
 
         # 计算技术指标
-        df = calculate_all_indicators(df, config)
+        with metrics.stage('indicators'):
+            df = calculate_all_indicators(df, config)
 
-        # 检测上涨信号
-        signals = detect_uptrend_signals(df, config, enable_future_validation)
+        with metrics.stage('detection'):
+            return _detect_stock_signals(df, stock_code, stock_name, config, enable_future_validation)
 
-        if not signals:
+    except Exception as e:
+        logger.error(f"{file_path}: 处理失败 - {str(e)}")
+        metrics.reject('analyze', '处理失败')
+        return None
+
+
+def analyze_indicator_frame(
+    df: pd.DataFrame,
+    stock_code: str,
+    stock_name: str,
+    config: Config,
+    enable_future_validation: bool = True
+) -> Dict[str, Any]:
+    """
+    分析已计算好技术指标的单只股票数据（常驻缓存场景）
+
+    与 analyze_stock_frame 使用相同的数据质量检查和预筛选条件，
+    只是跳过指标计算。
+
+    Args:
+        df: 包含技术指标的DataFrame
+        stock_code: 股票代码
+        stock_name: 股票名称
+        config: 配置对象
+        enable_future_validation: 是否启用未来涨幅验证
+
+    Returns:
+        Dict: 分析结果，无信号或未通过筛选返回None
+    """
+    try:
+        is_valid, message = check_data_quality(df)
+        if not is_valid:
+            logger.warning(f"{stock_code} {stock_name}: {message}")
             return None
 
-        # 返回结果
-        return {
-            'stock_code': stock_code,
-            'stock_name': stock_name,
-            'signal_count': len(signals),
-            'signals': signals
-        }
+        passed, reason = pre_filter(df, config)
+        if not passed:
+            logger.debug(f"{stock_code} {stock_name}: {reason}")
+            return None
+
+        return _detect_stock_signals(df, stock_code, stock_name, config, enable_future_validation)
 
+    except Exception as e:
+        logger.error(f"{stock_code} {stock_name}: 处理失败 - {str(e)}")
+        return None
+
+
+def analyze_market_cache(
+    cache,
+    config: Config,
+    enable_future_validation: bool = True,
+    on_stock_result: Callable[[Dict[str, Any]], None] = None
+) -> Dict[str, Any]:
+    """
+    在常驻行情缓存（MarketCache）上分析全部股票
+
+    与 analyze_all_stocks 使用相同的筛选和检测逻辑，但不读取CSV、不写结果文件，
+    信号直接以内存结构返回，供常驻服务和单进程流水线使用。隔离名单中的股票
+    由缓存遍历时跳过（见 MarketCache 的 skip_quarantined）。
+
+    Args:
+        cache: MarketCache 实例
+        config: 配置对象，指标参数与缓存不同时会基于原始数据重新计算指标
+        enable_future_validation: 是否启用未来涨幅验证
+        on_stock_result: 每只有信号的股票分析完成后的回调（参数为单只股票的分析结果），
+            用于流式筛选推荐等下游步骤
+
+    Returns:
+        Dict: 分析汇总（与 analyze_all_stocks 一致，total_stocks 不含跳过的隔离股票），
+            并包含 all_signals（展开后的信号列表）和 stock_results（股票汇总列表）
+    """
+    all_signals = []
+    stock_results = []
+
+    with cache.lock:
+        for entry in cache.iter_entries():
+            frame = cache.get_frame(entry, config)
+            result = analyze_indicator_frame(frame, entry.stock_code, entry.stock_name,
+                                             config, enable_future_validation)
+            if not result:
+                continue
+            if on_stock_result:
+                on_stock_result(result)
+
+            stock_results.append({
+                'stock_code': result['stock_code'],
+                'stock_name': result['stock_name'],
+                'signal_count': result['signal_count']
+            })
+            for signal in result['signals']:
+                all_signals.append({
+                    'stock_code': result['stock_code'],
+                    'stock_name': result['stock_name'],
+                    **signal
+                })
+
+        quarantined_count = cache.quarantined_count()
+        total_stocks = len(cache) - quarantined_count
+
+    return {
+        'total_stocks': total_stocks,
+        'quarantined_count': quarantined_count,
+        'stocks_with_signals': len(stock_results),
+        'total_signals': len(all_signals),
+        'all_signals': all_signals,
+        'stock_results': stock_results
+    }
+
+
+def _detect_stock_signals(
+    df: pd.DataFrame,
+    stock_code: str,
+    stock_name: str,
+    config: Config,
+    enable_future_validation: bool
+) -> Dict[str, Any]:
+    """检测上涨信号并组装单只股票的分析结果"""
+    signals = detect_uptrend_signals(df, config, enable_future_validation)
+
+    if not signals:
+        return None
+
+    return {
+        'stock_code': stock_code,
+        'stock_name': stock_name,
+        'signal_count': len(signals),
+        'signals': signals
+    }
+
+
+def analyze_single_stock(
+    file_path: str,
+    config: Config,
+    enable_future_validation: bool = True,
+    metrics: RunMetrics = None
+) -> Dict[str, Any]:
+    """
+    分析单只股票
+
+    Args:
+        file_path: CSV文件路径
+        config: 配置对象
+        enable_future_validation: 是否启用未来涨幅验证
+        metrics: 运行指标，记录各阶段耗时和未通过原因，None表示不记录
+
+    Returns:
+        Dict: 分析结果，包含股票信息和信号列表
+    """
+    metrics = metrics or NULL_METRICS
+    try:
+        # 读取数据
+        with metrics.stage('read'):
+            df = load_stock_file(file_path)
     except Exception as e:
         logger.error(f"{file_path}: 处理失败 - {str(e)}")
+        metrics.reject('read', '读取失败')
         return None
 
+    return analyze_stock_frame(df, file_path, config, enable_future_validation, metrics)
+
 
 def analyze_all_stocks(
     data_dir: str = None,
     output_dir: str = None,
     config: Config = None,
     enable_future_validation: bool = True,
-    limit: int = None
+    limit: int = None,
+    run_id: str = None,
+    resume: bool = False,
+    pipeline: bool = False,
+    readers: int = None,
+    workers: int = None,
+    return_signal_table: bool = False,
+    on_stock_result: Callable[[Dict[str, Any]], None] = None,
+    quarantine_path: str = None,
+    skip_quarantined: bool = True,
+    use_profiles: bool = True,
+    metrics_textfile: str = None
 ) -> Dict[str, Any]:
     """
     批量分析所有股票
 
+    指定run_id时开启检查点：每只股票完成后立即写入 output/runs/<run_id>/，
+    配合resume=True可跳过已完成的股票并合并之前的结果。
+
     Args:
         data_dir: 数据目录，默认使用Config.DATA_DIR
         output_dir: 输出目录，默认使用Config.OUTPUT_DIR
         config: 配置对象，默认使用Config类
         enable_future_validation: 是否启用未来涨幅验证（回测模式）
         limit: 限制处理的股票数量（用于测试），None表示全部处理
+        run_id: 检查点运行ID，None表示不写检查点
+        resume: 是否续跑run_id对应的运行
+        pipeline: 是否使用流水线模式（读取与计算重叠执行）
+        readers: 流水线读取线程数，默认使用Config.PIPELINE_READERS
+        workers: 流水线计算线程数，默认使用Config.PIPELINE_WORKERS
+        return_signal_table: 是否在结果中返回内存信号明细表（signal_table，带类型），
+            供推荐等下游步骤直接使用，不再回读CSV
+        on_stock_result: 每只有信号的股票完成后的回调（参数为单只股票的分析结果，
+            续跑复用的股票同样会回调），用于在扫描过程中流式筛选推荐
+        quarantine_path: 隔离名单路径（data_quality_scanner.py 生成），默认使用Config.QUARANTINE_FILE
+        skip_quarantined: 是否跳过隔离名单中的股票
+        use_profiles: 是否使用数据画像（data_profile.py）做质量检查和预筛选，
+            画像有效且未通过的股票不再读取CSV
+        metrics_textfile: Prometheus textfile 输出路径，默认使用Config.METRICS_TEXTFILE（None表示不输出）；
+            阶段耗时、未通过原因和漏斗计数总是写入 analysis_report_*.json 的 run_metrics 字段
 
     Returns:
         Dict: 分析结果汇总
@@ -209,6 +450,8 @@ def analyze_all_stocks(
 
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
+    metrics = RunMetrics()
+    mark_phase('prepare')
 
     # 获取所有CSV文件
     csv_pattern = os.path.join(data_dir, "*.csv")
@@ -218,10 +461,49 @@ def analyze_all_stocks(
         logger.error(f"未找到CSV文件: {csv_pattern}")
         return None
 
+    # 跳过数据质量扫描隔离的股票
+    quarantine_path = quarantine_path or config.QUARANTINE_FILE
+    quarantined_count = 0
+    if skip_quarantined:
+        quarantined = load_quarantine(quarantine_path, data_dir)
+        if quarantined:
+            total_files = len(csv_files)
+            csv_files = [f for f in csv_files if os.path.basename(f) not in quarantined]
+            quarantined_count = total_files - len(csv_files)
+            if not csv_files:
+                logger.error(f"全部 {total_files} 个CSV文件都在隔离清单中，没有可分析的股票: {quarantine_path}")
+                return None
+    total_files = len(csv_files) + quarantined_count
+
     # 如果设置了limit，只处理前N个文件
     if limit:
         csv_files = csv_files[:limit]
 
+    # 检查点（断点续跑）
+    checkpoint = None
+    if run_id or resume:
+        run_meta = {
+            'data_dir': data_dir,
+            'filter_mode': config.FILTER_MODE,
+            'enable_future_validation': enable_future_validation,
+        }
+        try:
+            checkpoint = RunCheckpoint(output_dir, run_id, resume=resume,
+                                       subdir=config.CHECKPOINT_SUBDIR)
+        except (FileNotFoundError, ValueError) as e:
+            logger.error(f"检查点初始化失败: {e}")
+            return None
+
+        if resume:
+            saved_meta = checkpoint.load_meta() or {}
+            mismatched = [k for k, v in run_meta.items()
+                          if k in saved_meta and saved_meta[k] != v]
+            if mismatched:
+                logger.error(f"续跑参数与原运行不一致: {', '.join(mismatched)}")
+                return None
+        else:
+            checkpoint.save_meta({**run_meta, 'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+
     logger.info(f"=" * 60)
     logger.info(f"A股上涨趋势分析工具")
     logger.info(f"=" * 60)
@@ -230,61 +512,189 @@ def analyze_all_stocks(
     logger.info(f"筛选模式: {config.FILTER_MODE} - {config.get_filter_description()}")
     logger.info(f"回测模式: {'开启' if enable_future_validation else '关闭'}")
     logger.info(f"待分析股票数: {len(csv_files)}")
+    if quarantined_count:
+        logger.info(f"跳过隔离股票: {quarantined_count} 只（见 {quarantine_path}）")
+    if pipeline:
+        logger.info(f"流水线模式: 读取线程={readers or config.PIPELINE_READERS}, "
+                    f"计算线程={workers or config.PIPELINE_WORKERS}")
+    if checkpoint:
+        logger.info(f"检查点目录: {checkpoint.run_dir}")
+        if resume:
+            logger.info(f"续跑模式: 已完成 {len(checkpoint.completed)} 只")
     logger.info(f"=" * 60)
 
-    # 存储所有结果
-    all_signals = []
-    stock_results = []
-    processed_count = 0
-    signal_count = 0
-    fail_count = 0
-
-    # 遍历处理每只股票
-    for i, file_path in enumerate(csv_files, 1):
-        try:
-            result = analyze_single_stock(file_path, config, enable_future_validation)
-
+    # 存储所有结果（按文件顺序汇总，保证串行和流水线模式输出一致）
+    stock_outcomes: Dict[int, Dict[str, Any]] = {}
+    counters = {'done': 0, 'with_signals': 0, 'signals': 0, 'fail': 0, 'resumed': 0}
+
+    def collect(index: int, file_path: str, result: Dict[str, Any], error: Exception = None):
+        """记录单只股票的分析结果（写检查点 + 进度统计）"""
+        if error is not None:
+            logger.error(f"{file_path}: {str(error)}")
+            counters['fail'] += 1
+            if checkpoint:
+                checkpoint.record(file_path, STATUS_FAILED)
+        else:
+            if checkpoint:
+                checkpoint.record(file_path, STATUS_SIGNALS if result else STATUS_NO_SIGNAL, result)
             if result:
-                # 有信号的股票
-                stock_results.append({
-                    'stock_code': result['stock_code'],
-                    'stock_name': result['stock_name'],
-                    'signal_count': result['signal_count']
-                })
-
-                # 展开所有信号
-                for signal in result['signals']:
-                    signal_data = {
-                        'stock_code': result['stock_code'],
-                        'stock_name': result['stock_name'],
-                        **signal
-                    }
-                    all_signals.append(signal_data)
-                    signal_count += 1
-
-                processed_count += 1
-
-            # 进度显示
-            if i % config.PROGRESS_INTERVAL == 0:
-                logger.info(f"进度: {i}/{len(csv_files)} | "
-                           f"有信号: {processed_count} | "
-                           f"信号总数: {signal_count}")
+                stock_outcomes[index] = result
+                counters['with_signals'] += 1
+                counters['signals'] += result['signal_count']
+                if on_stock_result:
+                    on_stock_result(result)
+
+        counters['done'] += 1
+        # 进度显示
+        if counters['done'] % config.PROGRESS_INTERVAL == 0:
+            logger.info(f"进度: {counters['done']}/{len(csv_files)} | "
+                       f"有信号: {counters['with_signals']} | "
+                       f"信号总数: {counters['signals']}")
+
+    # 续跑：直接复用已完成股票的结果
+    pending = []
+    for i, file_path in enumerate(csv_files):
+        if checkpoint and checkpoint.is_completed(file_path):
+            record = checkpoint.get_record(file_path)
+            if record['status'] == STATUS_SIGNALS:
+                stock_outcomes[i] = record
+                counters['with_signals'] += 1
+                counters['signals'] += record['signal_count']
+                if on_stock_result:
+                    on_stock_result(record)
+            counters['done'] += 1
+            counters['resumed'] += 1
+        else:
+            pending.append((i, file_path))
+
+    # 数据画像：质量检查和预筛选只查元数据，未通过的股票不读取CSV
+    profiled_count = 0
+    profile_rejected = 0
+    if use_profiles and pending:
+        profiles = DataProfileStore(data_dir, config)
+        remaining = []
+        for i, file_path in pending:
+            with metrics.stage('profile_gate'):
+                verdict = profiles.gate(file_path, config)
+            if verdict is None:
+                remaining.append((i, file_path))
+                continue
+            profiled_count += 1
+            passed, reason, quality_issue = verdict
+            if passed:
+                remaining.append((i, file_path))
+                continue
+            stock_code, stock_name = extract_stock_info(file_path)
+            if quality_issue:
+                logger.warning(f"{stock_code} {stock_name}: {reason}")
+            else:
+                logger.debug(f"{stock_code} {stock_name}: {reason}")
+            metrics.reject('quality' if quality_issue else 'pre_filter', reason)
+            profile_rejected += 1
+            collect(i, file_path, None)
+        pending = remaining
+        logger.info(f"数据画像: {profiled_count} 只股票使用画像筛选，{profile_rejected} 只未通过（跳过读取）")
+
+    mark_phase('scan')
+    pipeline_stats = None
+    if pipeline:
+        # 流水线模式：读取线程预取文件，计算线程并发分析，写入线程记录结果
+        executor = PipelinedExecutor(
+            reader_count=readers or config.PIPELINE_READERS,
+            worker_count=workers or config.PIPELINE_WORKERS,
+            prefetch_size=config.PIPELINE_PREFETCH_SIZE
+        )
+        def read_stock(task):
+            with metrics.stage('read'):
+                return load_stock_file(task[1])
+
+        executor.run(
+            pending,
+            read_fn=read_stock,
+            compute_fn=lambda task, df: analyze_stock_frame(df, task[1], config, enable_future_validation, metrics),
+            write_fn=lambda _, task, result, error: collect(task[0], task[1], result, error)
+        )
+        executor.log_stats()
+        pipeline_stats = executor.get_stats()
+    else:
+        # 遍历处理每只股票
+        for i, file_path in pending:
+            try:
+                with track_memory('stock', os.path.basename(file_path)):
+                    result = analyze_single_stock(file_path, config, enable_future_validation, metrics)
+            except Exception as e:
+                collect(i, file_path, None, e)
+                continue
+            collect(i, file_path, result)
+
+    mark_phase('aggregate')
 
-        except Exception as e:
-            logger.error(f"{file_path}: {str(e)}")
-            fail_count += 1
+    all_signals = []
+    stock_results = []
+    for i in sorted(stock_outcomes):
+        result = stock_outcomes[i]
+        # 有信号的股票
+        stock_results.append({
+            'stock_code': result['stock_code'],
+            'stock_name': result['stock_name'],
+            'signal_count': result['signal_count']
+        })
+
+        # 展开所有信号
+        for signal in result['signals']:
+            all_signals.append({
+                'stock_code': result['stock_code'],
+                'stock_name': result['stock_name'],
+                **signal
+            })
+
+    processed_count = counters['with_signals']
+    signal_count = counters['signals']
+    fail_count = counters['fail']
+    resumed_count = counters['resumed']
+
+    if checkpoint:
+        checkpoint.close()
+
+    # 漏斗计数（未通过数包含画像筛掉的股票；无信号包含续跑复用的无信号股票）
+    rejects = metrics.to_dict()['rejects']
+    quality_rejected = sum(rejects.get('quality', {}).values())
+    pre_filter_rejected = sum(rejects.get('pre_filter', {}).values())
+    analyze_failed = fail_count + sum(rejects.get('analyze', {}).values()) + sum(rejects.get('read', {}).values())
+    metrics.set_funnel({
+        'total_files': total_files,
+        'quarantined': quarantined_count,
+        'analyzed': len(csv_files),
+        'resumed': resumed_count,
+        'profile_rejected': profile_rejected,
+        'quality_rejected': quality_rejected,
+        'pre_filter_rejected': pre_filter_rejected,
+        'failed': analyze_failed,
+        'no_signal': counters['done'] - processed_count - quality_rejected - pre_filter_rejected - analyze_failed,
+        'with_signals': processed_count,
+    })
 
     logger.info(f"=" * 60)
     logger.info(f"分析完成!")
     logger.info(f"总股票数: {len(csv_files)}")
-    logger.info(f"有信号股票: {processed_count} ({processed_count/len(csv_files)*100:.1f}%)")
+    logger.info(f"有信号股票: {processed_count} ({processed_count/max(len(csv_files), 1)*100:.1f}%)")
     logger.info(f"信号总数: {signal_count}")
     logger.info(f"失败数: {fail_count}")
+    metrics.log_summary()
+    if checkpoint:
+        logger.info(f"续跑复用: {resumed_count}")
+        logger.info(f"运行ID: {checkpoint.run_id}")
     logger.info(f"=" * 60)
 
     # 保存结果
+    mark_phase('save_results')
+    signal_table = build_signal_table(all_signals, enable_future_validation)
     if all_signals:
-        output_csv, output_json = save_results(all_signals, stock_results, output_dir, config, enable_future_validation)
+        # 报告中的run_metrics不含save_results本身的耗时（写入summary和textfile的版本包含）
+        with metrics.stage('save_results'):
+            output_csv, output_json = save_results(all_signals, stock_results, output_dir, config,
+                                                   enable_future_validation, signal_table,
+                                                   run_metrics=metrics.to_dict())
         logger.info(f"结果已保存:")
         logger.info(f"  CSV: {output_csv}")
         logger.info(f"  JSON: {output_json}")
@@ -292,42 +702,47 @@ def analyze_all_stocks(
         logger.warning("未发现任何信号")
 
     # 返回汇总结果
-    return {
+    summary = {
         'total_stocks': len(csv_files),
         'stocks_with_signals': processed_count,
         'total_signals': signal_count,
         'fail_count': fail_count,
-        'output_dir': output_dir
+        'output_dir': output_dir,
+        'run_id': checkpoint.run_id if checkpoint else None,
+        'resumed_count': resumed_count,
+        'quarantined_count': quarantined_count,
+        'profile_rejected_count': profile_rejected,
+        'pipeline_stats': pipeline_stats,
+        'run_metrics': metrics.to_dict()
     }
 
+    metrics_textfile = metrics_textfile or config.METRICS_TEXTFILE
+    if metrics_textfile:
+        try:
+            metrics.write_prometheus(metrics_textfile, {
+                'mode': 'backtest' if enable_future_validation else 'realtime',
+                'filter_mode': config.FILTER_MODE,
+            })
+            logger.info(f"  指标: {metrics_textfile}")
+        except OSError as e:
+            logger.error(f"写入Prometheus指标失败: {e}")
 
-def save_results(
-    all_signals: List[Dict],
-    stock_results: List[Dict],
-    output_dir: str,
-    config: Config,
-    enable_future_validation: bool
-) -> Tuple[str, str]:
+    if return_signal_table:
+        summary['signal_table'] = to_typed_signal_table(signal_table)
+    return summary
+
+
+def build_signal_table(all_signals: List[Dict], enable_future_validation: bool) -> pd.DataFrame:
     """
-    保存分析结果
+    把信号列表转换为信号明细表（trend_signals_*.csv 的列格式）
 
     Args:
         all_signals: 所有信号列表
-        stock_results: 股票汇总列表
-        output_dir: 输出目录
-        config: 配置对象
-        enable_future_validation: 是否启用未来验证
+        enable_future_validation: 是否包含未来涨幅列
 
     Returns:
-        Tuple[str, str]: (CSV路径, JSON路径)
+        pd.DataFrame: 信号明细表
     """
-    timestamp = datetime.now().strftime(config.DATE_FORMAT)
-
-    # 1. 保存CSV详细结果
-    csv_filename = f"trend_signals_{timestamp}.csv"
-    csv_path = os.path.join(output_dir, csv_filename)
-
-    # 构造DataFrame
     csv_data = []
     for signal in all_signals:
         row = {
@@ -354,7 +769,59 @@ def save_results(
 
         csv_data.append(row)
 
-    df_csv = pd.DataFrame(csv_data)
+    return pd.DataFrame(csv_data)
+
+
+def to_typed_signal_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    把信号明细表转换为带类型的内存表
+
+    CSV只是输出产物；在进程内传递给推荐等下游步骤时使用本函数的结果，
+    信号日期为datetime64，其他列按 SIGNAL_TABLE_DTYPES 转换，下游无需再解析。
+
+    Args:
+        df: build_signal_table 的输出
+
+    Returns:
+        pd.DataFrame: 带类型的信号明细表
+    """
+    typed = df.astype({col: dtype for col, dtype in SIGNAL_TABLE_DTYPES.items() if col in df.columns})
+    if '信号日期' in typed.columns:
+        typed['信号日期'] = pd.to_datetime(typed['信号日期'])
+    return typed
+
+
+def save_results(
+    all_signals: List[Dict],
+    stock_results: List[Dict],
+    output_dir: str,
+    config: Config,
+    enable_future_validation: bool,
+    signal_table: pd.DataFrame = None,
+    run_metrics: Dict[str, Any] = None
+) -> Tuple[str, str]:
+    """
+    保存分析结果
+
+    Args:
+        all_signals: 所有信号列表
+        stock_results: 股票汇总列表
+        output_dir: 输出目录
+        config: 配置对象
+        enable_future_validation: 是否启用未来验证
+        signal_table: 已构建的信号明细表，None时由all_signals构建
+        run_metrics: 运行指标（RunMetrics.to_dict()），写入报告的run_metrics字段
+
+    Returns:
+        Tuple[str, str]: (CSV路径, JSON路径)
+    """
+    timestamp = datetime.now().strftime(config.DATE_FORMAT)
+
+    # 1. 保存CSV详细结果
+    csv_filename = f"trend_signals_{timestamp}.csv"
+    csv_path = os.path.join(output_dir, csv_filename)
+
+    df_csv = signal_table if signal_table is not None else build_signal_table(all_signals, enable_future_validation)
     df_csv.to_csv(csv_path, index=False, encoding=config.CSV_ENCODING)
 
     # 2. 保存JSON统计报告
@@ -406,6 +873,8 @@ def save_results(
             'avg_enhanced_score': round(df_signals['enhanced_score'].mean(), 2),
         }
     }
+    if run_metrics is not None:
+        report['run_metrics'] = run_metrics
 
     with open(json_path, 'w', encoding='utf-8') as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
@@ -423,6 +892,18 @@ def main():
     parser.add_argument('--no-future', action='store_true', help='关闭未来验证（实盘模式）')
     parser.add_argument('--limit', type=int, help='限制处理的股票数量（测试用）')
     parser.add_argument('--mode', choices=['strict', 'standard', 'loose'], help='筛选模式')
+    parser.add_argument('--checkpoint', action='store_true', help='开启检查点，支持中断后续跑')
+    parser.add_argument('--resume', metavar='RUN_ID', help='续跑指定运行，跳过已完成的股票')
+    parser.add_argument('--pipeline', action='store_true', help='流水线模式：读取与计算重叠执行')
+    parser.add_argument('--readers', type=int, help='流水线读取线程数')
+    parser.add_argument('--workers', type=int, help='流水线计算线程数')
+    parser.add_argument('--quarantine-file', help='隔离名单路径，默认使用Config.QUARANTINE_FILE')
+    parser.add_argument('--no-quarantine', action='store_true', help='不跳过数据质量隔离名单中的股票')
+    parser.add_argument('--no-profile', action='store_true', help='不使用数据画像，逐只读取CSV做质量检查和预筛选')
+    parser.add_argument('--metrics-textfile', help='Prometheus textfile 输出路径（阶段耗时、未通过原因、漏斗计数）')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='内存分析：记录峰值RSS、各阶段tracemalloc分配位置和单只股票最大分配（运行变慢）')
+    parser.add_argument('--memory-report', help='内存分析报告路径，默认 输出目录/memory_profile_analyzer_<时间>.json')
 
     args = parser.parse_args()
 
@@ -430,14 +911,30 @@ def main():
     if args.mode:
         Config.FILTER_MODE = args.mode
 
-    # 运行分析
-    result = analyze_all_stocks(
-        data_dir=args.data_dir,
-        output_dir=args.output_dir,
-        config=Config,
-        enable_future_validation=not args.no_future,
-        limit=args.limit
-    )
+    if args.profile_memory:
+        start_profiling('analyzer', args.memory_report or
+                        default_report_path(args.output_dir or Config.OUTPUT_DIR, 'analyzer'))
+
+    # 运行分析（失败时也停止内存分析并写出报告）
+    try:
+        result = analyze_all_stocks(
+            data_dir=args.data_dir,
+            output_dir=args.output_dir,
+            config=Config,
+            enable_future_validation=not args.no_future,
+            limit=args.limit,
+            run_id=args.resume or (generate_run_id() if args.checkpoint else None),
+            resume=bool(args.resume),
+            pipeline=args.pipeline,
+            readers=args.readers,
+            workers=args.workers,
+            quarantine_path=args.quarantine_file,
+            skip_quarantined=not args.no_quarantine,
+            use_profiles=not args.no_profile,
+            metrics_textfile=args.metrics_textfile
+        )
+    finally:
+        finish_profiling()
 
     if result:
         logger.info("\n分析成功完成!")
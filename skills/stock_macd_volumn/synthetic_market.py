@@ -0,0 +1,309 @@
+"""
+合成行情生成器
+
+按固定随机种子生成 N 只股票 × M 个交易日的日线数据，列格式、数值精度、编码和文件名
+与真实数据目录（A股近10年日线数据）一致，供基准测试（benchmark.py）和离线调试使用。
+同一组参数（股票数、天数、种子、结束日期）生成的数据逐字节相同，可以在不同提交之间对比性能。
+
+行情模型：
+    - 收益率：三状态（下跌/震荡/上涨）马尔可夫切换的随机游走，按板块限制涨跌停幅度
+    - 成交量：基准成交量 × 对数正态噪声 × 涨跌幅放大，随机出现持续数日的放量
+    - 覆盖预筛选的各种情况：低价/高价股、流动性不足、新股（数据不足）、停牌（成交量为空）
+
+存储：
+    数据通过 MarketStore 写入和读取。目前只有 CsvMarketStore（与真实数据相同的CSV目录），
+    以后增加二进制存储时实现同样的 write_stock / paths / read 接口并登记到 MARKET_STORES 即可，
+    基准测试无需修改。
+
+使用方法:
+    python synthetic_market.py --output-dir /tmp/synthetic --stocks 500 --days 500
+    python synthetic_market.py --output-dir /tmp/synthetic --stocks 500 --days 500 --seed 7
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import glob
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Tuple
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# 真实数据的列顺序
+MARKET_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'pctChg']
+
+# 板块：(代码前缀, 起始编号, 涨跌停幅度键)，股票按序号轮流分配到各板块
+BOARDS = [
+    ('sh.', 600000, 'main'),
+    ('sz.', 0, 'main'),
+    ('sz.', 300000, 'growth'),
+    ('sh.', 688000, 'growth'),
+]
+
+# 行情状态：(日均漂移, 日波动率倍数)，依次为下跌/震荡/上涨
+REGIMES = [(-0.0025, 1.1), (0.0, 0.8), (0.003, 1.0)]
+
+# 状态转移矩阵（每日保持原状态的概率较高，形成持续数十天的趋势段）
+REGIME_TRANSITIONS = np.array([
+    [0.96, 0.03, 0.01],
+    [0.02, 0.96, 0.02],
+    [0.01, 0.03, 0.96],
+])
+
+
+def synthetic_stock_frame(
+    index: int,
+    n_days: int,
+    seed: int = None,
+    end_date: str = None,
+    config: Config = None
+) -> Tuple[str, str, pd.DataFrame]:
+    """
+    生成单只股票的日线数据
+
+    每只股票使用 (seed, index) 派生的独立随机数发生器，结果与生成顺序和并发无关。
+
+    Args:
+        index: 股票序号（决定代码、板块和随机数序列）
+        n_days: 交易日数（新股会少于该值）
+        seed: 随机种子，默认使用Config.SYNTHETIC_SEED
+        end_date: 最后一个交易日（YYYY-MM-DD），默认使用Config.SYNTHETIC_END_DATE
+        config: 配置对象，默认使用Config
+
+    Returns:
+        Tuple[str, str, pd.DataFrame]: (股票代码, 股票名称, 日线数据)
+    """
+    config = config or Config
+    seed = config.SYNTHETIC_SEED if seed is None else seed
+    rng = np.random.default_rng([seed, index])
+
+    prefix, base_number, board = BOARDS[index % len(BOARDS)]
+    stock_code = f"{prefix}{base_number + index // len(BOARDS):06d}"
+    stock_name = f"合成{index:05d}"
+    limit = config.BACKTEST_PRICE_LIMITS[board]
+
+    # 新股只有上市以来的数据
+    if rng.random() < config.SYNTHETIC_NEW_LISTING_RATIO:
+        n_days = int(rng.integers(10, max(11, config.MIN_DATA_ROWS)))
+    dates = pd.bdate_range(end=end_date or config.SYNTHETIC_END_DATE, periods=n_days)
+
+    # 收益率：马尔可夫状态切换 + 正态噪声，截断在涨跌停幅度内
+    base_vol = 0.018 if board == 'main' else 0.026
+    regime_draws = rng.random(n_days)
+    regimes = np.empty(n_days, dtype=np.int64)
+    state = int(rng.integers(len(REGIMES)))
+    cumulative = REGIME_TRANSITIONS.cumsum(axis=1)
+    for day in range(n_days):
+        state = int(np.searchsorted(cumulative[state], regime_draws[day]))
+        regimes[day] = state
+    drift = np.array([r[0] for r in REGIMES])[regimes]
+    vol_scale = np.array([r[1] for r in REGIMES])[regimes]
+    returns = np.clip(drift + rng.standard_normal(n_days) * base_vol * vol_scale, -limit, limit)
+
+    # 价格：起始价对数正态分布（少量股票低于2元或高于300元）
+    start_price = float(np.clip(np.exp(rng.normal(np.log(15), 0.9)), 1.0, 500.0))
+    close = start_price * np.cumprod(1 + returns)
+    prev_close = np.concatenate([[start_price], close[:-1]])
+    open_ = prev_close * (1 + np.clip(rng.normal(0, 0.006, n_days), -limit, limit))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, n_days)))
+    high = np.minimum(high, prev_close * (1 + limit))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, n_days)))
+    low = np.maximum(low, prev_close * (1 - limit))
+
+    # 成交量：基准成交额对数正态分布（少量股票流动性不足），涨跌幅越大成交越活跃
+    base_amount = np.exp(rng.normal(np.log(1.5e8), 1.2))
+    volume = base_amount / start_price * np.exp(rng.normal(0, 0.3, n_days)) * (1 + 15 * np.abs(returns))
+    surge_starts = np.flatnonzero(rng.random(n_days) < config.SYNTHETIC_SURGE_PROBABILITY)
+    for start in surge_starts:
+        volume[start:start + 3] *= rng.uniform(2.0, 4.0)
+    volume = np.maximum(np.round(volume), 100)
+    amount = volume * (open_ + high + low + close) / 4
+
+    df = pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d'),
+        'open': open_.round(4),
+        'high': high.round(4),
+        'low': low.round(4),
+        'close': close.round(4),
+        'volume': pd.array(volume.astype(np.int64), dtype='Int64'),
+        'amount': amount.round(4),
+        'pctChg': (returns * 100).round(6),
+    }, columns=MARKET_COLUMNS)
+
+    # 停牌：部分股票有若干天成交量/成交额为空（与真实数据中的停牌日一致）
+    if n_days > 1 and rng.random() < config.SYNTHETIC_SUSPENSION_RATIO:
+        suspended = rng.choice(n_days, size=min(n_days, int(rng.integers(1, 4))), replace=False)
+        df.loc[suspended, ['volume', 'amount']] = pd.NA
+
+    return stock_code, stock_name, df
+
+
+def iter_synthetic_market(
+    n_stocks: int,
+    n_days: int,
+    seed: int = None,
+    end_date: str = None,
+    config: Config = None
+) -> Iterator[Tuple[str, str, pd.DataFrame]]:
+    """
+    逐只生成合成行情
+
+    Args:
+        n_stocks: 股票数
+        n_days: 每只股票的交易日数
+        seed: 随机种子，默认使用Config.SYNTHETIC_SEED
+        end_date: 最后一个交易日（YYYY-MM-DD），默认使用Config.SYNTHETIC_END_DATE
+        config: 配置对象，默认使用Config
+
+    Yields:
+        Tuple[str, str, pd.DataFrame]: (股票代码, 股票名称, 日线数据)
+    """
+    for index in range(n_stocks):
+        yield synthetic_stock_frame(index, n_days, seed, end_date, config)
+
+
+class MarketStore:
+    """
+    行情存储接口
+
+    生成器通过 write_stock 写入，使用方通过 paths 列出、read 读取；
+    新的存储格式继承本类并登记到 MARKET_STORES。
+    """
+
+    def __init__(self, root: str, config: Config = None):
+        """
+        Args:
+            root: 存储根目录
+            config: 配置对象，默认使用Config
+        """
+        self.root = root
+        self.config = config or Config
+
+    def write_stock(self, stock_code: str, stock_name: str, df: pd.DataFrame) -> str:
+        """写入一只股票，返回其存储路径"""
+        raise NotImplementedError
+
+    def paths(self) -> List[str]:
+        """列出存储中的全部股票路径（按路径排序）"""
+        raise NotImplementedError
+
+    def read(self, path: str) -> pd.DataFrame:
+        """读取一只股票的原始日线数据（与 load_stock_file 的结果格式相同）"""
+        raise NotImplementedError
+
+
+class CsvMarketStore(MarketStore):
+    """CSV目录存储，文件格式与真实数据目录一致（utf-8-sig，文件名 代码_名称_近10年日线.csv）"""
+
+    def write_stock(self, stock_code: str, stock_name: str, df: pd.DataFrame) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"{stock_code}_{stock_name}_近10年日线.csv")
+        df.to_csv(path, index=False, encoding=self.config.CSV_ENCODING)
+        return path
+
+    def paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.root, "*.csv")))
+
+    def read(self, path: str) -> pd.DataFrame:
+        # 与分析器使用同一个读取函数，基准测试的读取阶段与真实运行一致
+        from stock_trend_analyzer import load_stock_file
+        return load_stock_file(path)
+
+
+# 存储格式登记表
+MARKET_STORES = {
+    'csv': CsvMarketStore,
+}
+
+
+def open_market_store(root: str, store: str = 'csv', config: Config = None) -> MarketStore:
+    """
+    按格式名打开行情存储
+
+    Args:
+        root: 存储根目录
+        store: 存储格式（MARKET_STORES 的键）
+        config: 配置对象，默认使用Config
+
+    Returns:
+        MarketStore: 存储对象
+    """
+    if store not in MARKET_STORES:
+        raise ValueError(f"未知的存储格式: {store}（可选: {', '.join(MARKET_STORES)}）")
+    return MARKET_STORES[store](root, config)
+
+
+def generate_market(
+    output_dir: str,
+    n_stocks: int,
+    n_days: int,
+    seed: int = None,
+    end_date: str = None,
+    store: str = 'csv',
+    config: Config = None
+) -> Dict:
+    """
+    生成合成行情并写入存储
+
+    Args:
+        output_dir: 存储根目录
+        n_stocks: 股票数
+        n_days: 每只股票的交易日数
+        seed: 随机种子，默认使用Config.SYNTHETIC_SEED
+        end_date: 最后一个交易日（YYYY-MM-DD），默认使用Config.SYNTHETIC_END_DATE
+        store: 存储格式（MARKET_STORES 的键）
+        config: 配置对象，默认使用Config
+
+    Returns:
+        Dict: 生成摘要（存储目录、格式、股票数、总行数、种子、结束日期）
+    """
+    config = config or Config
+    market_store = open_market_store(output_dir, store, config)
+    total_rows = 0
+    for stock_code, stock_name, df in iter_synthetic_market(n_stocks, n_days, seed, end_date, config):
+        market_store.write_stock(stock_code, stock_name, df)
+        total_rows += len(df)
+
+    return {
+        'root': output_dir,
+        'store': store,
+        'stocks': n_stocks,
+        'rows': total_rows,
+        'seed': config.SYNTHETIC_SEED if seed is None else seed,
+        'end_date': end_date or config.SYNTHETIC_END_DATE,
+    }
+
+
+def main():
+    """主函数"""
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    parser = argparse.ArgumentParser(description='生成合成行情数据（真实CSV格式）')
+    parser.add_argument('--output-dir', required=True, help='输出目录')
+    parser.add_argument('--stocks', type=int, default=100, help='股票数')
+    parser.add_argument('--days', type=int, default=250, help='每只股票的交易日数')
+    parser.add_argument('--seed', type=int, help='随机种子，默认使用Config.SYNTHETIC_SEED')
+    parser.add_argument('--end-date', help='最后一个交易日（YYYY-MM-DD），默认使用Config.SYNTHETIC_END_DATE')
+    parser.add_argument('--store', choices=sorted(MARKET_STORES), default='csv', help='存储格式')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = generate_market(args.output_dir, args.stocks, args.days, args.seed, args.end_date, args.store)
+    logger.info(f"已生成 {summary['stocks']} 只股票, {summary['rows']} 行 → {summary['root']} "
+                f"(格式={summary['store']}, 种子={summary['seed']}, 结束日期={summary['end_date']}), "
+                f"耗时 {time.perf_counter() - start:.2f}秒")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -321,6 +321,83 @@ def calculate_all_indicators(
     return result
 
 
+def get_indicator_params(config) -> tuple:
+    """
+    获取影响指标计算结果的参数组合
+
+    用于判断已缓存的指标是否可以在另一组配置下复用。
+
+    Args:
+        config: 配置对象
+
+    Returns:
+        tuple: 指标参数元组
+    """
+    return (
+        config.MACD_FAST, config.MACD_SLOW, config.MACD_SIGNAL,
+        config.MA_PERIOD, config.MA_PERIOD_FALLBACK,
+        config.VOLUME_RECENT_DAYS, config.VOLUME_BASELINE_DAYS,
+        config.RSI_PERIOD, tuple(config.KDJ_PARAMS),
+        config.BOLL_PERIOD, config.BOLL_STD,
+    )
+
+
+def extend_indicators(
+    indicator_df: pd.DataFrame,
+    new_rows: pd.DataFrame,
+    config
+) -> pd.DataFrame:
+    """
+    增量计算技术指标：在已计算指标的DataFrame后追加新K线
+
+    滚动窗口类指标（均线、成交量比率、RSI、布林带等）只在最近的窗口上计算；
+    递推类指标（MACD、KDJ）依赖完整历史，在收盘价/高低价序列上重新递推。
+    结果与对完整数据调用 calculate_all_indicators 一致。
+
+    历史行数不足MA_PERIOD时（均线周期可能切换），回退为全量计算。
+
+    Args:
+        indicator_df: 已包含全部技术指标的DataFrame（按日期排序）
+        new_rows: 新增的原始K线数据，列与原始CSV一致
+        config: 配置对象
+
+    Returns:
+        pd.DataFrame: 追加新K线并补齐指标后的DataFrame
+    """
+    if new_rows is None or new_rows.empty:
+        return indicator_df
+
+    raw_columns = list(new_rows.columns)
+    raw = pd.concat([indicator_df[raw_columns], new_rows], ignore_index=True)
+
+    if len(indicator_df) < config.MA_PERIOD:
+        return calculate_all_indicators(raw, config)
+
+    # 滚动指标所需的最长回看窗口
+    lookback = max(
+        config.MA_PERIOD,
+        config.VOLUME_RECENT_DAYS + config.VOLUME_BASELINE_DAYS,
+        config.BOLL_PERIOD,
+        config.RSI_PERIOD + 1,
+        config.KDJ_PARAMS[0],
+    )
+    window = lookback + len(new_rows)
+    tail = calculate_all_indicators(raw.iloc[-window:].reset_index(drop=True), config)
+    new_part = tail.iloc[-len(new_rows):].reset_index(drop=True)
+
+    # 递推类指标基于完整序列重新计算
+    macd_data = calculate_macd(raw, fast=config.MACD_FAST, slow=config.MACD_SLOW, signal=config.MACD_SIGNAL)
+    k, d, j = calculate_kdj(raw, n=config.KDJ_PARAMS[0], m1=config.KDJ_PARAMS[1], m2=config.KDJ_PARAMS[2])
+    new_index = raw.index[-len(new_rows):]
+    for col in macd_data.columns:
+        new_part[col] = macd_data[col].loc[new_index].values
+    new_part['kdj_k'] = k.loc[new_index].values
+    new_part['kdj_d'] = d.loc[new_index].values
+    new_part['kdj_j'] = j.loc[new_index].values
+
+    return pd.concat([indicator_df, new_part[indicator_df.columns]], ignore_index=True)
+
+
 def check_data_quality(df: pd.DataFrame) -> Tuple[bool, str]:
     """
     检查数据质量
@@ -0,0 +1,134 @@
+"""
+data_profile 测试：增量画像与全量构建一致、画像筛选与读取CSV的检查一致
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import Config
+from data_profile import DataProfileStore, build_profile, update_profile
+from stock_trend_analyzer import analyze_all_stocks, load_stock_file, pre_filter
+from synthetic_market import generate_market, synthetic_stock_frame
+from technical_indicators import check_data_quality
+
+
+def _halted(df):
+    df.loc[df.index[-2:], 'volume'] = 0
+
+
+def _expensive(df):
+    df.loc[df.index[-1], 'close'] = 999.0
+
+
+def _illiquid(df):
+    df.loc[df.index[-10:], 'amount'] = 1.0
+
+
+def _null_close(df):
+    df.loc[df.index[5], 'close'] = np.nan
+
+
+def _zero_close(df):
+    df.loc[df.index[5], 'close'] = 0.0
+
+
+def _negative_volume(df):
+    df.loc[df.index[5], 'volume'] = -1
+
+
+VARIANTS = {
+    'ok': lambda df: df,
+    'short_for_macd': lambda df: df.head(30),
+    'short_for_filter': lambda df: df.head(50),
+    'halted': _halted,
+    'expensive': _expensive,
+    'illiquid': _illiquid,
+    'null_close': _null_close,
+    'zero_close': _zero_close,
+    'negative_volume': _negative_volume,
+    'missing_column': lambda df: df.drop(columns=['amount']),
+}
+
+
+def _expected_gate(df):
+    """读取CSV后的检查：先 check_data_quality，再 pre_filter"""
+    is_valid, message = check_data_quality(df)
+    if not is_valid:
+        return False, message, True
+    passed, reason = pre_filter(df, Config)
+    return passed, reason, False
+
+
+@pytest.mark.parametrize('variant', sorted(VARIANTS))
+def test_gate_matches_csv_checks(tmp_path, variant):
+    _, _, df = synthetic_stock_frame(0, 120)
+    df = df.copy()
+    result = VARIANTS[variant](df)
+    df = df if result is None else result
+    path = str(tmp_path / 'sh.600000_测试.csv')
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+
+    store = DataProfileStore(str(tmp_path))
+    store.rebuild(path)
+
+    assert store.gate(path) == _expected_gate(load_stock_file(path))
+
+
+def test_update_profile_matches_full_build():
+    _, _, df = synthetic_stock_frame(1, 120)
+    df = df.copy()
+    df.loc[df.index[[3, 100]], 'volume'] = np.nan
+    tail_rows = Config.DATA_PROFILE_TAIL_ROWS
+
+    profile = build_profile(df.iloc[:90], tail_rows)
+    bounds = [90, 91, 95, 115, 120]
+    for start, end in zip(bounds, bounds[1:]):
+        update_profile(profile, df.iloc[start:end], tail_rows)
+
+    assert profile == build_profile(df, tail_rows)
+
+
+def test_record_append_and_stale_fingerprint(tmp_path):
+    """追加后增量更新的画像与重建一致；文件被外部修改后画像失效"""
+    _, _, df = synthetic_stock_frame(2, 120)
+    path = str(tmp_path / 'sh.600002_测试.csv')
+    df.iloc[:100].to_csv(path, index=False, encoding='utf-8-sig')
+
+    store = DataProfileStore(str(tmp_path))
+    profile = store.rebuild(path)
+    new_rows = df.iloc[100:]
+    new_rows.to_csv(path, mode='a', header=False, index=False)
+    assert store.get(path) is None
+
+    appended = dict(store.record_append(path, new_rows, profile))
+    assert appended == DataProfileStore(str(tmp_path / 'empty')).rebuild(path)
+
+    store.save()
+    reloaded = DataProfileStore(str(tmp_path))
+    assert reloaded.get(path) == appended
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f"{df['date'].iloc[-1]},1,1,1,1,1,1\n")
+    assert reloaded.get(path) is None
+
+
+def test_signals_unchanged_with_profiles(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=8, n_days=250)
+    store = DataProfileStore(data_dir)
+    store.refresh()
+    store.save()
+
+    def run(use_profiles):
+        return analyze_all_stocks(data_dir, str(tmp_path / f'out_{use_profiles}'),
+                                  return_signal_table=True, use_profiles=use_profiles)
+
+    with_profiles, without = run(True), run(False)
+
+    assert with_profiles['total_signals'] == without['total_signals'] > 0
+    pd.testing.assert_frame_equal(with_profiles['signal_table'], without['signal_table'])
+    assert with_profiles['run_metrics']['rejects'] == without['run_metrics']['rejects']
+    assert with_profiles['run_metrics']['funnel']['profile_rejected'] > 0
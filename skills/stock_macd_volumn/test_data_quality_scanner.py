@@ -0,0 +1,196 @@
+"""
+data_quality_scanner 测试：每类问题构造一个小文件，检查行数、样本和隔离名单
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import Config
+from data_quality_scanner import BOM, _price_spikes, build_quarantine, scan_data_store, scan_stock_file
+
+N_ROWS = 60
+HEADER = 'date,open,high,low,close,volume,amount,pctChg'
+
+
+def _clean_frame() -> pd.DataFrame:
+    """价格小幅波动（日涨跌幅约±1%）的正常日线"""
+    close = np.round(10 * np.cumprod(1 + 0.01 * np.sin(np.arange(N_ROWS))), 2)
+    return pd.DataFrame({
+        'date': pd.bdate_range('2026-01-05', periods=N_ROWS).strftime('%Y-%m-%d'),
+        'open': close, 'high': np.round(close * 1.01, 2), 'low': np.round(close * 0.99, 2), 'close': close,
+        'volume': 1e6, 'amount': close * 1e6, 'pctChg': 0.0,
+    })
+
+
+def _lines(df: pd.DataFrame):
+    return df.to_csv(index=False, lineterminator='\n').splitlines()
+
+
+def _date(i: int) -> str:
+    return _clean_frame()['date'].iloc[i]
+
+
+def _mid_bom():
+    lines = _lines(_clean_frame())
+    lines[11] = '﻿' + lines[11]      # 第10行数据（文件第12行）
+    return lines
+
+
+def _repeated_header():
+    lines = _lines(_clean_frame())
+    return lines[:31] + [HEADER] + lines[31:]   # 插在第30行数据之后，文件第32行
+
+
+def _garbled_row():
+    df = _clean_frame().astype({'close': object})
+    df.loc[20, 'close'] = 'abc'
+    return _lines(df)
+
+
+def _high_below_low():
+    df = _clean_frame()
+    df.loc[15, 'high'] = df.loc[15, 'low'] - 0.1
+    return _lines(df)
+
+
+def _close_above_high():
+    df = _clean_frame()
+    df.loc[25, 'close'] = round(df.loc[25, 'high'] * 1.02, 2)
+    return _lines(df)
+
+
+def _duplicate_date():
+    df = _clean_frame()
+    return _lines(pd.concat([df.iloc[:31], df.iloc[[30]], df.iloc[31:]]))
+
+
+def _out_of_order():
+    df = _clean_frame()
+    return _lines(df.iloc[list(range(40)) + [41, 40] + list(range(42, N_ROWS))])
+
+
+def _adjustment_spike():
+    """第40行起复权基准不同，价格整体减半"""
+    df = _clean_frame()
+    for column in ('open', 'high', 'low', 'close'):
+        df.loc[40:, column] = np.round(df.loc[40:, column] * 0.5, 2)
+    return _lines(df)
+
+
+def _limit_up_move():
+    """涨停（+10%）和创业板涨停（+20%）都在涨跌幅限制以内，不算跳变"""
+    df = _clean_frame()
+    for start, factor in ((30, 1.10), (45, 1.20)):
+        for column in ('open', 'high', 'low', 'close'):
+            df.loc[start:, column] = np.round(df.loc[start:, column] * factor, 2)
+    return _lines(df)
+
+
+def _missing_volume():
+    df = _clean_frame()
+    df.loc[35, ['volume', 'amount']] = np.nan
+    return _lines(df)
+
+
+CASES = {
+    'clean': (lambda: _lines(_clean_frame()), {}),
+    'mid-bom': (_mid_bom, {'bom_row': (1, [12])}),
+    'repeated-header': (_repeated_header, {'header_row': (1, [32])}),
+    'garbled-row': (_garbled_row, {'unparsable_row': (1, [22])}),
+    'high-below-low': (_high_below_low, {'high_below_low': (1, [_date(15)]),
+                                         'close_out_of_range': (1, [_date(15)])}),
+    'close-above-high': (_close_above_high, {'close_out_of_range': (1, [_date(25)])}),
+    'duplicate-date': (_duplicate_date, {'duplicate_date': (1, [_date(30)])}),
+    'out-of-order': (_out_of_order, {'unordered_date': (1, [_date(40)])}),
+    'adjustment-spike': (_adjustment_spike, {'price_spike': (1, None)}),
+    'limit-up-move': (_limit_up_move, {}),
+    'missing-volume': (_missing_volume, {'missing_volume': (1, [_date(35)])}),
+}
+
+
+def _write(directory, index: int, name: str) -> str:
+    path = directory / f"sh.6000{index:02d}_{name}_近10年日线.csv"
+    path.write_bytes(BOM + ('\n'.join(CASES[name][0]()) + '\n').encode('utf-8'))
+    return str(path)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    for index, name in enumerate(CASES):
+        _write(directory, index, name)
+    return directory
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_scan_stock_file(tmp_path, name):
+    result = scan_stock_file(_write(tmp_path, 0, name))
+    expected = CASES[name][1]
+
+    assert result['stock_code'] == 'sh.600000' and result['stock_name'] == name
+    assert set(result['issues']) == set(expected)
+    for issue, (count, samples) in expected.items():
+        assert result['issues'][issue]['count'] == count
+        if samples is not None:
+            assert result['issues'][issue]['samples'] == samples
+
+
+def test_spike_sample_shows_prices(tmp_path):
+    df = _clean_frame()
+    before, after = df.loc[39, 'close'], round(df.loc[40, 'close'] * 0.5, 2)
+
+    result = scan_stock_file(_write(tmp_path, 0, 'adjustment-spike'))
+
+    assert result['issues']['price_spike']['samples'] == [
+        f"{_date(40)}: {before:.2f} → {after:.2f} ({after / before - 1:+.1%})"]
+    assert result['last_date'] == _date(N_ROWS - 1)
+
+
+def test_price_spikes_skips_listing_days():
+    base = 10 * np.cumprod(1 + 0.01 * np.sin(np.arange(80)))
+    close = base.copy()
+    close[50:] *= 0.5
+
+    assert _price_spikes(close, Config).nonzero()[0].tolist() == [50]
+    # 上市初期（前 QUALITY_SPIKE_SKIP_DAYS 天）不检测
+    early = base.copy()
+    early[3:] *= 0.5
+    assert not _price_spikes(early, Config).any()
+    assert not _price_spikes(close[:1], Config).any()
+
+
+def test_missing_columns_and_read_error(tmp_path):
+    path = tmp_path / 'sh.600000_缺列_近10年日线.csv'
+    path.write_text('date,open,close\n2026-01-05,1,1\n', encoding='utf-8')
+    result = scan_stock_file(str(path))
+    assert result['issues'] == {'missing_columns': {'count': 4, 'samples': ['high', 'low', 'volume', 'amount']}}
+
+    path.write_bytes(b'')
+    assert set(scan_stock_file(str(path))['issues']) == {'read_error'}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_scan_data_store_and_quarantine(data_dir, workers):
+    report = scan_data_store(str(data_dir), workers=workers)
+
+    assert report['total_files'] == len(CASES)
+    flagged = {stock['stock_name']: stock for stock in report['stocks']}
+    assert set(flagged) == {name for name, (_, issues) in CASES.items() if issues}
+    for issue in ('bom_row', 'header_row', 'unparsable_row', 'high_below_low', 'duplicate_date',
+                  'unordered_date', 'price_spike', 'missing_volume'):
+        assert report['issue_summary'][issue]['stocks'] == 1
+        assert report['issue_summary'][issue]['rows'] == 1
+    assert report['issue_summary']['close_out_of_range']['stocks'] == 2
+
+    # 停牌（成交量为空）和价格跳变只报告，不隔离
+    quarantine = build_quarantine(report)
+    quarantined = {entry['stock_name'] for entry in quarantine['stocks'].values()}
+    assert quarantined == set(flagged) - {'missing-volume', 'adjustment-spike'}
+    assert report['quarantined_count'] == len(quarantined)
+    assert quarantine['data_dir'] == str(data_dir)
+    entry = next(entry for entry in quarantine['stocks'].values() if entry['stock_name'] == 'high-below-low')
+    assert entry['issues'] == ['high_below_low', 'close_out_of_range']
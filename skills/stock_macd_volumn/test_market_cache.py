@@ -0,0 +1,102 @@
+"""
+market_cache 测试：增量补齐的指标与全量计算一致、刷新识别追加/重写/新增/删除
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from config import Config
+from market_cache import MarketCache
+from stock_trend_analyzer import load_stock_file
+from synthetic_market import generate_market
+from technical_indicators import calculate_all_indicators, extend_indicators
+
+
+@pytest.fixture
+def market(tmp_path):
+    """每只股票先写入前 n-k 行，留下 k 行供追加"""
+    full_dir, data_dir = str(tmp_path / 'full'), str(tmp_path / 'data')
+    generate_market(full_dir, n_stocks=3, n_days=200)
+    os.makedirs(data_dir)
+    full = {}
+    for path in sorted(glob.glob(os.path.join(full_dir, '*.csv'))):
+        df = load_stock_file(path)
+        name = os.path.basename(path)
+        df.iloc[:-5].to_csv(os.path.join(data_dir, name), index=False, encoding=Config.CSV_ENCODING)
+        full[name] = df
+    return data_dir, full
+
+
+def _append(data_dir: str, name: str, rows: pd.DataFrame):
+    rows.to_csv(os.path.join(data_dir, name), mode='a', header=False, index=False)
+
+
+@pytest.mark.parametrize('base_rows, new_rows', [(150, 1), (150, 7), (59, 3), (30, 40)])
+def test_extend_indicators_matches_full(market, base_rows, new_rows):
+    _, full = market
+    df = next(iter(full.values())).iloc[:base_rows + new_rows]
+
+    extended = extend_indicators(calculate_all_indicators(df.iloc[:base_rows], Config),
+                                 df.iloc[base_rows:].reset_index(drop=True), Config)
+
+    pd.testing.assert_frame_equal(extended, calculate_all_indicators(df, Config))
+
+
+def test_refresh_appends_only_new_rows(market):
+    data_dir, full = market
+    cache = MarketCache(data_dir)
+    assert cache.load() == 3
+    names = sorted(full)
+
+    _append(data_dir, names[0], full[names[0]].iloc[-5:])
+    _append(data_dir, names[1], full[names[1]].iloc[-5:-3])
+    stats = cache.refresh()
+
+    assert stats == {'appended': 2, 'new_bars': 7, 'reloaded': 0, 'added': 0, 'removed': 0, 'failed': 0,
+                     'quarantine_changed': 0}
+    for name in names[:2]:
+        entry = cache.get(name.split('_')[0])
+        expected = calculate_all_indicators(load_stock_file(os.path.join(data_dir, name)), Config)
+        pd.testing.assert_frame_equal(entry.frame, expected)
+    assert cache.refresh()['appended'] == 0
+
+
+def test_append_rows_syncs_without_rereading(market):
+    data_dir, full = market
+    cache = MarketCache(data_dir)
+    cache.load()
+    name = sorted(full)[0]
+    new_rows = full[name].iloc[-5:].reset_index(drop=True)
+
+    _append(data_dir, name, new_rows)
+    assert cache.append_rows(os.path.join(data_dir, name), new_rows)
+
+    pd.testing.assert_frame_equal(cache.get(name.split('_')[0]).frame,
+                                  calculate_all_indicators(full[name], Config))
+    assert cache.refresh()['appended'] == 0
+    assert not cache.append_rows(os.path.join(data_dir, 'sh.699999_无_近10年日线.csv'), new_rows)
+
+
+def test_refresh_reloads_rewritten_and_tracks_added_removed(market, tmp_path):
+    data_dir, full = market
+    names = sorted(full)
+    cache = MarketCache(data_dir)
+    cache.load()
+
+    full[names[0]].iloc[:100].to_csv(os.path.join(data_dir, names[0]), index=False, encoding=Config.CSV_ENCODING)
+    os.remove(os.path.join(data_dir, names[1]))
+    generate_market(str(tmp_path / 'more'), n_stocks=4, n_days=100)
+    added, = set(os.listdir(tmp_path / 'more')) - set(full)
+    os.replace(tmp_path / 'more' / added, os.path.join(data_dir, added))
+
+    stats = cache.refresh()
+
+    assert (stats['reloaded'], stats['added'], stats['removed']) == (1, 1, 1)
+    assert len(cache.get(names[0].split('_')[0]).frame) == 100
+    assert cache.get(names[1].split('_')[0]) is None
+    assert cache.get(added.split('_')[0].split('.')[-1]) is not None
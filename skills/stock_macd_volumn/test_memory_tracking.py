@@ -0,0 +1,66 @@
+"""
+memory_tracking 测试：阶段/单项记录，以及运行失败时仍写出报告
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import json
+import sys
+import tracemalloc
+
+import pytest
+
+import memory_tracking
+import stock_trend_analyzer
+from memory_tracking import finish_profiling, mark_phase, start_profiling, track_memory
+
+
+@pytest.fixture(autouse=True)
+def no_leftover_profiler():
+    yield
+    assert memory_tracking._active_profiler is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_report_contains_phases_and_items(tmp_path):
+    path = str(tmp_path / 'report.json')
+    start_profiling('test', path)
+    mark_phase('work')
+    for label in ('small', 'large'):
+        with track_memory('stock', label):
+            with track_memory('read'):
+                data = [0] * (1000 if label == 'small' else 200_000)
+            del data
+    assert finish_profiling() == path
+
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    assert [phase['name'] for phase in report['phases']] == ['setup', 'work']
+    assert report['per_item']['stock']['count'] == 2
+    assert report['per_item']['read']['count'] == 2
+    assert report['largest_stock']['label'] == 'large'
+
+
+def test_inactive_profiler_is_noop():
+    mark_phase('ignored')
+    with track_memory('stock', 'x'):
+        pass
+    assert finish_profiling() is None
+
+
+def test_analyzer_failure_still_writes_report(tmp_path, monkeypatch):
+    """分析失败时 main 仍停止 tracemalloc 并写出报告"""
+    def fail(**kwargs):
+        mark_phase('scan')
+        raise RuntimeError('boom')
+
+    path = tmp_path / 'report.json'
+    monkeypatch.setattr(stock_trend_analyzer, 'analyze_all_stocks', fail)
+    monkeypatch.setattr(sys, 'argv', ['stock_trend_analyzer.py', '--profile-memory', '--memory-report', str(path)])
+
+    with pytest.raises(RuntimeError):
+        stock_trend_analyzer.main()
+
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['phases'][-1]['name'] == 'scan'
@@ -0,0 +1,77 @@
+"""
+parameter_sweep 测试：特征表上的参数评估与逐只股票检测结果一致
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from config import Config
+from parameter_sweep import build_feature_store, make_sweep_config, run_parameter_sweep
+from signal_detector import detect_uptrend_signals
+from stock_trend_analyzer import load_stock_file, pre_filter
+from synthetic_market import generate_market
+from technical_indicators import calculate_all_indicators, check_data_quality
+
+GRID = {
+    'MACD_SCORE_THRESHOLD': [40, 65],
+    'VOLUME_RATIO_THRESHOLD': [1.2, 2.0],
+    'FILTER_MODE': ['standard', 'loose'],
+    'MIN_RATING': ['C', 'B'],
+}
+
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('market'))
+    generate_market(path, n_stocks=5, n_days=250)
+    return path
+
+
+@pytest.fixture(scope='module')
+def indicator_frames(data_dir):
+    """与特征表相同的质量检查和预筛选（预筛选参数不在扫描网格中）"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+        df = load_stock_file(path)
+        if check_data_quality(df)[0] and pre_filter(df, Config)[0]:
+            frames.append(calculate_all_indicators(df, Config))
+    return frames
+
+
+def _detector_ratings(frames, params: dict) -> list:
+    """逐只股票用 detect_uptrend_signals（实盘模式）检测，返回未来收益已知的信号评级"""
+    config = make_sweep_config(params)
+    ratings = []
+    for df in frames:
+        last_known = df['date'].iloc[len(df) - config.FUTURE_DAYS - 1]
+        ratings += [signal['rating'] for signal in detect_uptrend_signals(df, config, enable_future_validation=False)
+                    if signal['date'] <= last_known]
+    return ratings
+
+
+def test_sweep_counts_match_detector(data_dir, indicator_frames):
+    results = run_parameter_sweep(build_feature_store(data_dir, Config, workers=1), GRID, Config, workers=1)
+
+    detected = {}
+    for _, row in results.iterrows():
+        key = (row['MACD_SCORE_THRESHOLD'], row['VOLUME_RATIO_THRESHOLD'], row['FILTER_MODE'])
+        if key not in detected:
+            detected[key] = _detector_ratings(indicator_frames, dict(zip(
+                ('MACD_SCORE_THRESHOLD', 'VOLUME_RATIO_THRESHOLD', 'FILTER_MODE'), key)))
+        ratings = detected[key]
+        allowed = ('A级', 'B级') if row['MIN_RATING'] == 'B' else ('A级', 'B级', 'C级')
+        assert row['signal_count'] == sum(rating in allowed for rating in ratings), dict(row)
+        assert (row['a_count'], row['b_count']) == (ratings.count('A级'), ratings.count('B级'))
+
+    assert results['signal_count'].max() > 0
+
+
+def test_parallel_matches_serial(data_dir):
+    serial = run_parameter_sweep(build_feature_store(data_dir, Config, workers=1), GRID, Config, workers=1)
+    parallel = run_parameter_sweep(build_feature_store(data_dir, Config, workers=2), GRID, Config, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,81 @@
+"""
+point_in_time 测试：时点回放与在截断数据上重新分析的结果一致
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from config import Config
+from market_cache import MarketCache
+from point_in_time import PointInTimeScanner
+from stock_trend_analyzer import analyze_all_stocks, load_stock_file
+from synthetic_market import generate_market
+
+
+@pytest.fixture(scope='module')
+def market(tmp_path_factory):
+    root = tmp_path_factory.mktemp('pit')
+    data_dir = str(root / 'data')
+    generate_market(data_dir, n_stocks=12, n_days=250)
+    cache = MarketCache(data_dir)
+    cache.load()
+    return root, data_dir, PointInTimeScanner(cache)
+
+
+def _truncated_analysis(root, data_dir: str, as_of: pd.Timestamp) -> pd.DataFrame:
+    """把每只股票截断到回放日期（含）后写入新目录，按实盘模式重新分析"""
+    truncated_dir = root / f"truncated_{as_of:%Y%m%d}"
+    truncated_dir.mkdir()
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith('.csv'):
+            continue
+        df = load_stock_file(os.path.join(data_dir, name))
+        df = df[pd.to_datetime(df['date']) <= as_of]
+        if len(df):
+            df.to_csv(truncated_dir / name, index=False, encoding=Config.CSV_ENCODING)
+
+    summary = analyze_all_stocks(str(truncated_dir), str(root / f"out_{as_of:%Y%m%d}"),
+                                 enable_future_validation=False, return_signal_table=True,
+                                 use_profiles=False)
+    return summary['signal_table']
+
+
+def _normalized(table: pd.DataFrame, columns) -> pd.DataFrame:
+    table = table[columns].assign(信号日期=pd.to_datetime(table['信号日期']))
+    return table.sort_values(['股票代码', '信号日期']).reset_index(drop=True)
+
+
+def test_trading_dates_range(market):
+    _, _, scanner = market
+    dates = scanner.trading_dates('2026-09-01', Config.SYNTHETIC_END_DATE)
+
+    assert dates == sorted(dates)
+    assert dates[0] >= pd.Timestamp('2026-09-01')
+    assert dates[-1] == pd.Timestamp(Config.SYNTHETIC_END_DATE)
+
+
+@pytest.mark.parametrize('offset', [0, 20, 90])
+def test_replay_matches_truncated_reanalysis(market, offset):
+    root, data_dir, scanner = market
+    as_of = scanner.trading_dates()[-1 - offset]
+
+    replay = scanner.scan(as_of)
+    expected = _truncated_analysis(root, data_dir, as_of)
+
+    assert replay['total_signals'] == len(expected) > 0
+    columns = list(replay['signal_table'].columns)
+    pd.testing.assert_frame_equal(_normalized(replay['signal_table'], columns),
+                                  _normalized(expected, columns), check_dtype=False)
+    assert pd.to_datetime(replay['signal_table']['信号日期']).max() <= as_of
+
+
+def test_replay_before_any_listing_is_empty(market):
+    _, _, scanner = market
+    result = scanner.scan(scanner.trading_dates()[0] - pd.Timedelta(days=1))
+
+    assert result['total_stocks'] == 0
+    assert result['total_signals'] == 0
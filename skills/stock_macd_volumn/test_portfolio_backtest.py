@@ -0,0 +1,116 @@
+"""
+portfolio_backtest 测试：T+1 卖出日、长期停牌和未平仓持仓统计
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import numpy as np
+import pandas as pd
+
+from portfolio_backtest import (PortfolioBacktester, PricePanel, prepare_signals, SKIP_NO_DATA, SKIP_NO_SLOT,
+                                EXIT_END_OF_DATA, EXIT_HOLDING_PERIOD)
+
+
+def _flat_panel(n_days: int = 12, n_stocks: int = 2) -> PricePanel:
+    """价格不变（不触发止损止盈）的价格矩阵"""
+    dates = pd.bdate_range('2026-01-05', periods=n_days)
+    prices = np.full((n_days, n_stocks), 10.0)
+    fields = {'open': prices, 'high': prices.copy(), 'low': prices.copy(), 'close': prices.copy(),
+              'volume': np.full((n_days, n_stocks), 1e6)}
+    codes = [f"sh.60000{i}" for i in range(n_stocks)]
+    return PricePanel(dates, codes, ['测试'] * n_stocks, fields)
+
+
+def _signals(panel: PricePanel, rows):
+    return pd.DataFrame({'stock_code': [panel.stock_codes[c] for c, _ in rows],
+                         'date': [panel.dates[r] for _, r in rows]})
+
+
+def test_entry_on_last_bar_is_skipped():
+    """买入日是最后一个交易日时没有可卖出日，不能同一天买卖"""
+    panel = _flat_panel()
+    T = panel.shape[0]
+    result = PortfolioBacktester(holding_days=3).run(_signals(panel, [(0, T - 2)]), panel=panel)
+
+    assert result['trades'].empty
+    assert result['stats']['skipped_signals'][SKIP_NO_DATA] == 1
+
+
+def test_exit_always_after_entry():
+    panel = _flat_panel()
+    T = panel.shape[0]
+    signals = _signals(panel, [(0, r) for r in range(T)] + [(1, r) for r in range(T)])
+    trades, _ = PortfolioBacktester(holding_days=3).resolve_trades(prepare_signals(signals), panel)
+
+    assert (trades['exit_row'] > trades['entry_row']).all()
+    assert trades['entry_row'].max() == T - 2
+
+
+def test_end_of_data_reported_as_open_position():
+    """数据末尾按收盘价估值的持仓不计入已平仓交易的胜率和平均收益"""
+    panel = _flat_panel()
+    T = panel.shape[0]
+    backtester = PortfolioBacktester(holding_days=3, stop_loss=None, take_profit=None)
+    result = backtester.run(_signals(panel, [(0, 0), (1, T - 3)]), panel=panel)
+
+    trades, stats = result['trades'], result['stats']
+    assert set(trades['exit_reason']) == {EXIT_HOLDING_PERIOD, EXIT_END_OF_DATA}
+    assert stats['trade_count'] == 1
+    assert stats['open_position_count'] == 1
+    assert stats['exit_reasons'] == {EXIT_HOLDING_PERIOD: 1}
+    realized = trades[trades['exit_reason'] == EXIT_HOLDING_PERIOD]
+    assert stats['avg_trade_return_pct'] == round(float(realized['return_pct'].mean()), 4)
+    assert stats['open_unrealized_pnl'] == round(float(trades.loc[trades['exit_reason'] == EXIT_END_OF_DATA, 'pnl'].sum()), 2)
+
+
+def test_only_open_positions_has_no_realized_stats():
+    panel = _flat_panel()
+    T = panel.shape[0]
+    result = PortfolioBacktester(holding_days=5).run(_signals(panel, [(0, T - 3)]), panel=panel)
+
+    stats = result['stats']
+    assert stats['trade_count'] == 0
+    assert stats['open_position_count'] == 1
+    assert 'win_rate_pct' not in stats
+
+
+def test_long_mid_data_suspension_holds_until_tradable():
+    """停牌超过顺延窗口但数据未结束：继续持有（按停牌前收盘价估值，不释放仓位），复牌首日卖出"""
+    panel = _flat_panel(n_days=40, n_stocks=2)
+    suspended = slice(4, 20)
+    for field in (panel.open, panel.high, panel.low, panel.close):
+        field[suspended, 0] = np.nan
+    panel.close[20:, 0] = 12.0
+    panel.open[20:, 0] = panel.high[20:, 0] = panel.low[20:, 0] = 12.0
+    panel.tradable = ~np.isnan(panel.open) & (np.nan_to_num(panel.volume) > 0)
+    panel.close_filled = pd.DataFrame(panel.close).ffill().to_numpy()
+
+    backtester = PortfolioBacktester(holding_days=3, max_defer_days=5, max_positions=1,
+                                     stop_loss=None, take_profit=None)
+    # 第二只股票的信号在停牌期间出现，唯一的仓位被占用
+    result = backtester.run(_signals(panel, [(0, 1), (1, 10)]), panel=panel)
+
+    trades, stats, curve = result['trades'], result['stats'], result['equity_curve']
+    assert len(trades) == 1
+    trade = trades.iloc[0]
+    assert trade['exit_reason'] == EXIT_HOLDING_PERIOD
+    assert trade['exit_date'] == panel.dates[20].strftime('%Y-%m-%d')
+    assert trade['exit_price'] == 12.0
+    assert stats['open_position_count'] == 0
+    assert stats['skipped_signals'][SKIP_NO_SLOT] == 1
+    assert (curve.set_index('date').loc[panel.dates[4]:panel.dates[19], 'positions'] == 1).all()
+
+
+def test_suspended_until_data_ends_is_open_position():
+    panel = _flat_panel(n_days=40, n_stocks=1)
+    for field in (panel.open, panel.high, panel.low, panel.close):
+        field[4:, 0] = np.nan
+    panel.tradable = ~np.isnan(panel.open) & (np.nan_to_num(panel.volume) > 0)
+    panel.close_filled = pd.DataFrame(panel.close).ffill().to_numpy()
+
+    result = PortfolioBacktester(holding_days=3, max_defer_days=5).run(_signals(panel, [(0, 1)]), panel=panel)
+
+    trade = result['trades'].iloc[0]
+    assert trade['exit_reason'] == EXIT_END_OF_DATA
+    assert trade['exit_date'] == panel.dates[-1].strftime('%Y-%m-%d')
+    assert result['stats']['open_position_count'] == 1
@@ -0,0 +1,94 @@
+"""
+run_metrics 测试：原因归一化、线程安全计数、Prometheus textfile、分析漏斗
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import threading
+
+import pytest
+
+from run_metrics import METRIC_PREFIX, NULL_METRICS, RunMetrics, normalize_reason
+from stock_trend_analyzer import analyze_all_stocks
+from synthetic_market import generate_market
+
+
+@pytest.mark.parametrize('reason, expected', [
+    ("价格(1.50)超出范围", "价格超出范围"),
+    ("价格(512.30)超出范围", "价格超出范围"),
+    ("存在缺失值: {'volume': 1, 'amount': 1}", "存在缺失值"),
+    ("数据不足34天(20行)", "数据不足34天"),
+    ("缺少必要列: amount", "缺少必要列"),
+    ("近期停牌", "近期停牌"),
+])
+def test_normalize_reason(reason, expected):
+    assert normalize_reason(reason) == expected
+
+
+def test_concurrent_records_are_not_lost():
+    metrics = RunMetrics()
+
+    def work():
+        for i in range(500):
+            metrics.add_duration('read', 0.001)
+            metrics.reject('pre_filter', f"价格({i}.00)超出范围")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    result = metrics.to_dict()
+    assert result['stages']['read']['count'] == 2000
+    assert result['rejects'] == {'pre_filter': {'价格超出范围': 2000}}
+
+
+def test_disabled_metrics_record_nothing():
+    with NULL_METRICS.stage('read'):
+        pass
+    NULL_METRICS.reject('quality', '近期停牌')
+
+    assert NULL_METRICS.to_dict()['stages'] == {}
+    assert NULL_METRICS.to_dict()['rejects'] == {}
+
+
+def test_stage_order_and_prometheus_textfile(tmp_path):
+    metrics = RunMetrics()
+    for name in ('detection', 'custom', 'read'):
+        metrics.add_duration(name, 0.5)
+    metrics.reject('quality', '缺少必要列: amount')
+    metrics.set_funnel({'total_files': 3, 'with_signals': 1})
+
+    assert list(metrics.stage_summary()) == ['read', 'detection', 'custom']
+
+    path = metrics.write_prometheus(str(tmp_path / 'textfile' / 'analyzer.prom'), labels={'mode': 'a"b'})
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    assert f'{METRIC_PREFIX}_stage_seconds_count{{mode="a\\"b",stage="read"}} 1' in lines
+    assert f'{METRIC_PREFIX}_rejects{{mode="a\\"b",stage="quality",reason="缺少必要列"}} 1' in lines
+    assert f'{METRIC_PREFIX}_funnel_stocks{{mode="a\\"b",step="total_files"}} 3' in lines
+    assert not (tmp_path / 'textfile' / 'analyzer.prom.tmp').exists()
+
+
+@pytest.mark.parametrize('pipeline', [False, True])
+def test_analyzer_funnel_adds_up(tmp_path, pipeline):
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=10, n_days=200)
+    textfile = str(tmp_path / 'analyzer.prom')
+
+    summary = analyze_all_stocks(data_dir, str(tmp_path / 'out'), pipeline=pipeline,
+                                 use_profiles=False, metrics_textfile=textfile)
+
+    funnel = summary['run_metrics']['funnel']
+    assert funnel['total_files'] == funnel['quarantined'] + funnel['analyzed'] == 10
+    assert funnel['analyzed'] == (funnel['resumed'] + funnel['quality_rejected'] + funnel['pre_filter_rejected']
+                                  + funnel['failed'] + funnel['no_signal'] + funnel['with_signals'])
+    assert funnel['with_signals'] == summary['stocks_with_signals']
+    rejects = summary['run_metrics']['rejects']
+    assert sum(rejects.get('quality', {}).values()) == funnel['quality_rejected']
+    assert sum(rejects.get('pre_filter', {}).values()) == funnel['pre_filter_rejected']
+    assert summary['run_metrics']['stages']['read']['count'] == funnel['analyzed']
+    with open(textfile, encoding='utf-8') as f:
+        assert f'{METRIC_PREFIX}_run_seconds' in f.read()
@@ -0,0 +1,57 @@
+"""
+signal_detector 测试：向量化特征（参数扫描使用）与逐行检测结果一致
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from config import Config
+from signal_detector import compute_signal_features, detect_uptrend_signals, get_ratings, select_signal_rows
+from stock_trend_analyzer import load_stock_file
+from synthetic_market import generate_market
+from technical_indicators import calculate_all_indicators
+
+
+@pytest.fixture(scope='module')
+def indicator_frames(tmp_path_factory):
+    data_dir = str(tmp_path_factory.mktemp('market'))
+    generate_market(data_dir, n_stocks=5, n_days=250)
+    return [calculate_all_indicators(load_stock_file(path), Config)
+            for path in sorted(glob.glob(os.path.join(data_dir, '*.csv')))]
+
+
+# 放宽阈值以产生足够多的信号，覆盖各筛选模式
+CONFIGS = [
+    {'FILTER_MODE': mode, 'MACD_SCORE_THRESHOLD': 40, 'VOLUME_RATIO_THRESHOLD': 1.2, 'MA_DISTANCE_THRESHOLD': 3.0}
+    for mode in ('strict', 'standard', 'loose')
+] + [{}]
+
+
+@pytest.mark.parametrize('overrides', CONFIGS)
+@pytest.mark.parametrize('enable_future_validation', [True, False])
+def test_vectorized_selection_matches_detector(indicator_frames, overrides, enable_future_validation):
+    config = type('TestConfig', (Config,), overrides)
+    total = 0
+    for df in indicator_frames:
+        signals = detect_uptrend_signals(df, config, enable_future_validation)
+        features = compute_signal_features(df, config)
+        selected = select_signal_rows(features, config, enable_future_validation)
+
+        assert df['date'][selected].tolist() == [signal['date'] for signal in signals]
+        rows = features[selected]
+        assert rows['macd_score'].tolist() == [signal['macd_score'] for signal in signals]
+        assert rows['enhanced_score'].tolist() == [signal['enhanced_score'] for signal in signals]
+        assert get_ratings(rows['enhanced_score'].to_numpy(), config).tolist() == \
+               [signal['rating'] for signal in signals]
+        np.testing.assert_allclose(rows['volume_ratio'], [signal['volume_ratio'] for signal in signals])
+        if enable_future_validation:
+            np.testing.assert_allclose(rows['future_return'], [signal['future_return'] for signal in signals])
+        total += len(signals)
+
+    if overrides:
+        assert total > 0
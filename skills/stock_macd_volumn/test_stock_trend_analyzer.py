@@ -0,0 +1,178 @@
+"""
+stock_trend_analyzer 测试：隔离名单过滤、流水线与串行一致、断点续跑、行情缓存分析
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from config import Config
+from market_cache import MarketCache
+from run_checkpoint import RunCheckpoint
+from stock_trend_analyzer import analyze_all_stocks, analyze_market_cache, build_signal_table
+from synthetic_market import generate_market
+
+
+@pytest.fixture
+def market(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=3, n_days=120)
+    return data_dir, sorted(os.listdir(data_dir))
+
+
+def _write_quarantine(path, data_dir, files):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'data_dir': data_dir,
+                   'stocks': {name: {'issues': ['bom_inside']} for name in files}}, f)
+
+
+def test_all_files_quarantined_returns_none(market, tmp_path):
+    """全部股票都被隔离时直接返回，不能在统计比例时除零"""
+    data_dir, files = market
+    quarantine = str(tmp_path / 'quarantine.json')
+    _write_quarantine(quarantine, data_dir, files)
+
+    assert analyze_all_stocks(data_dir, str(tmp_path / 'out'), quarantine_path=quarantine,
+                              use_profiles=False) is None
+
+
+def test_quarantined_files_are_skipped(market, tmp_path):
+    data_dir, files = market
+    quarantine = str(tmp_path / 'quarantine.json')
+    _write_quarantine(quarantine, data_dir, files[:1])
+
+    summary = analyze_all_stocks(data_dir, str(tmp_path / 'out'), quarantine_path=quarantine,
+                                 use_profiles=False)
+
+    assert summary['quarantined_count'] == 1
+    assert summary['total_stocks'] == len(files) - 1
+    assert summary['run_metrics']['funnel']['total_files'] == len(files)
+
+
+def test_quarantine_for_other_data_dir_is_ignored(market, tmp_path):
+    data_dir, files = market
+    quarantine = str(tmp_path / 'quarantine.json')
+    _write_quarantine(quarantine, str(tmp_path / 'elsewhere'), files)
+
+    summary = analyze_all_stocks(data_dir, str(tmp_path / 'out'), quarantine_path=quarantine,
+                                 use_profiles=False)
+
+    assert summary['quarantined_count'] == 0
+    assert summary['total_stocks'] == len(files)
+
+
+@pytest.mark.parametrize('enable_future_validation', [True, False])
+def test_pipeline_matches_serial(tmp_path, enable_future_validation):
+    """流水线模式（读取与计算重叠）输出的信号与串行模式完全相同"""
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=6, n_days=250)
+
+    def run(pipeline):
+        return analyze_all_stocks(data_dir, str(tmp_path / ('pipeline' if pipeline else 'serial')),
+                                  enable_future_validation=enable_future_validation,
+                                  pipeline=pipeline, readers=2, workers=3,
+                                  return_signal_table=True, use_profiles=False)
+
+    serial, piped = run(False), run(True)
+
+    assert piped['total_signals'] == serial['total_signals'] > 0
+    assert piped['stocks_with_signals'] == serial['stocks_with_signals']
+    pd.testing.assert_frame_equal(piped['signal_table'], serial['signal_table'])
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    """中断后续跑：复用已完成股票（忽略写了一半的末行），合并结果与一次跑完相同"""
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=6, n_days=250)
+    output_dir = str(tmp_path / 'out')
+
+    full = analyze_all_stocks(data_dir, str(tmp_path / 'full'), return_signal_table=True,
+                              use_profiles=False)
+
+    # 模拟中断：只跑完前3只，进度文件末尾留下一条未写完的记录
+    analyze_all_stocks(data_dir, output_dir, run_id='run1', limit=3, use_profiles=False)
+    progress = os.path.join(output_dir, Config.CHECKPOINT_SUBDIR, 'run1', RunCheckpoint.PROGRESS_FILE)
+    with open(progress, 'a', encoding='utf-8') as f:
+        f.write('{"file": "sz.0000')
+
+    resumed = analyze_all_stocks(data_dir, output_dir, run_id='run1', resume=True,
+                                 return_signal_table=True, use_profiles=False)
+
+    assert resumed['resumed_count'] == 3
+    assert resumed['total_signals'] == full['total_signals'] > 0
+    pd.testing.assert_frame_equal(resumed['signal_table'], full['signal_table'])
+    with open(progress, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 6
+
+
+def test_resume_rejects_changed_parameters(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=2, n_days=120)
+    output_dir = str(tmp_path / 'out')
+
+    analyze_all_stocks(data_dir, output_dir, run_id='run1', use_profiles=False)
+
+    assert analyze_all_stocks(data_dir, output_dir, run_id='run1', resume=True,
+                              enable_future_validation=False, use_profiles=False) is None
+
+
+def _by_stock(table: pd.DataFrame) -> pd.DataFrame:
+    table = table.assign(信号日期=pd.to_datetime(table['信号日期']))
+    return table.sort_values(['股票代码', '信号日期'], kind='stable').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('enable_future_validation', [True, False])
+def test_market_cache_matches_csv_analysis(tmp_path, enable_future_validation):
+    """常驻缓存上的分析（守护进程、单进程流水线）与逐个读取CSV的分析结果相同"""
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=8, n_days=250)
+    cache = MarketCache(data_dir)
+    cache.load()
+    streamed = []
+
+    cached = analyze_market_cache(cache, Config, enable_future_validation, on_stock_result=streamed.append)
+    expected = analyze_all_stocks(data_dir, str(tmp_path / 'out'), enable_future_validation=enable_future_validation,
+                                  return_signal_table=True, use_profiles=False)
+
+    assert cached['total_signals'] == expected['total_signals'] > 0
+    assert len(streamed) == cached['stocks_with_signals'] == expected['stocks_with_signals']
+    table = build_signal_table(cached['all_signals'], enable_future_validation)
+    pd.testing.assert_frame_equal(_by_stock(table), _by_stock(expected['signal_table']), check_dtype=False)
+
+
+def test_market_cache_skips_quarantined_like_csv_analysis(tmp_path):
+    """缓存路径（流水线、守护进程、时点回放）与CSV路径一样跳过隔离名单中的股票"""
+    data_dir = str(tmp_path / 'data')
+    generate_market(data_dir, n_stocks=8, n_days=250)
+    files = sorted(os.listdir(data_dir))
+    quarantine = str(tmp_path / 'quarantine.json')
+    _write_quarantine(quarantine, data_dir, files[:3])
+
+    cache = MarketCache(data_dir, quarantine_path=quarantine)
+    cache.load()
+    cached = analyze_market_cache(cache, Config, False)
+    expected = analyze_all_stocks(data_dir, str(tmp_path / 'out'), enable_future_validation=False,
+                                  quarantine_path=quarantine, return_signal_table=True, use_profiles=False)
+
+    assert (cached['total_stocks'], cached['quarantined_count']) == (len(files) - 3, 3)
+    assert cached['total_stocks'] == expected['total_stocks']
+    table = build_signal_table(cached['all_signals'], False)
+    pd.testing.assert_frame_equal(_by_stock(table), _by_stock(expected['signal_table']), check_dtype=False)
+    quarantined_codes = {name.split('_')[0] for name in files[:3]}
+    assert not quarantined_codes & {entry.stock_code for entry in cache.iter_entries()}
+    # 按股票查询仍可用（特征提取、补充特征明细）
+    assert all(cache.get(code) is not None for code in quarantined_codes)
+
+    # 名单变化在刷新时生效
+    _write_quarantine(quarantine, data_dir, files[:1])
+    assert cache.refresh()['quarantine_changed'] == 2
+    assert analyze_market_cache(cache, Config, False)['total_stocks'] == len(files) - 1
+
+    unfiltered = MarketCache(data_dir, quarantine_path=quarantine, skip_quarantined=False)
+    unfiltered.load()
+    assert len(list(unfiltered.iter_entries())) == len(files)
+    assert unfiltered.refresh()['quarantine_changed'] == 0
@@ -0,0 +1,65 @@
+"""
+synthetic_market 测试：同一种子输出逐字节相同、与生成顺序无关、格式与真实数据一致
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import os
+
+import pytest
+
+from stock_trend_analyzer import extract_stock_info, load_stock_file
+from synthetic_market import generate_market, open_market_store, synthetic_stock_frame
+
+# 真实数据文件（A股近10年日线数据/）的表头
+REAL_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'pctChg']
+
+
+def _read_all(root):
+    contents = {}
+    for name in sorted(os.listdir(root)):
+        with open(os.path.join(root, name), 'rb') as f:
+            contents[name] = f.read()
+    return contents
+
+
+def test_same_seed_is_byte_identical(tmp_path):
+    generate_market(str(tmp_path / 'a'), n_stocks=5, n_days=120, seed=7)
+    generate_market(str(tmp_path / 'b'), n_stocks=5, n_days=120, seed=7)
+    generate_market(str(tmp_path / 'c'), n_stocks=5, n_days=120, seed=8)
+
+    a, b, c = (_read_all(str(tmp_path / d)) for d in 'abc')
+    assert a == b
+    assert a.keys() == c.keys() and a != c
+
+
+def test_stock_independent_of_market_size(tmp_path):
+    """每只股票有独立的随机数发生器：小市场是大市场的前缀"""
+    generate_market(str(tmp_path / 'small'), n_stocks=3, n_days=120)
+    generate_market(str(tmp_path / 'large'), n_stocks=8, n_days=120)
+
+    small, large = _read_all(str(tmp_path / 'small')), _read_all(str(tmp_path / 'large'))
+    assert all(large[name] == content for name, content in small.items())
+
+    _, _, df = synthetic_stock_frame(5, 120)
+    assert synthetic_stock_frame(5, 120)[2].equals(df)
+
+
+def test_csv_matches_real_schema(tmp_path):
+    root = str(tmp_path / 'market')
+    summary = generate_market(root, n_stocks=4, n_days=60)
+    store = open_market_store(root)
+    paths = store.paths()
+
+    assert len(paths) == summary['stocks']
+    assert summary['rows'] == sum(len(store.read(p)) for p in paths)
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read(3) == b'\xef\xbb\xbf'
+        assert extract_stock_info(path)[0].startswith(('sh.', 'sz.'))
+        assert list(load_stock_file(path).columns) == REAL_COLUMNS
+
+
+def test_unknown_store_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_market_store(str(tmp_path), store='parquet')
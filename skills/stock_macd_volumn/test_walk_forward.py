@@ -0,0 +1,77 @@
+"""
+walk_forward 测试：窗口切分与标签剔除、稳定性报告、并行与串行一致
+
+运行：python -m pytest skills/stock_macd_volumn
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import Config
+from parameter_sweep import build_feature_store
+from synthetic_market import generate_market
+from walk_forward import build_stability_report, build_windows, run_walk_forward
+
+GRID = {
+    'MACD_SCORE_THRESHOLD': [40, 65],
+    'VOLUME_RATIO_THRESHOLD': [1.2, 2.0],
+    'FILTER_MODE': ['standard', 'loose'],
+}
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    data_dir = str(tmp_path_factory.mktemp('market'))
+    generate_market(data_dir, n_stocks=8, n_days=300)
+    return build_feature_store(data_dir, Config, workers=1)
+
+
+def test_windows_purge_labels_overlapping_test_period():
+    dates = pd.bdate_range('2026-01-05', periods=100).strftime('%Y-%m-%d').to_numpy()
+    windows = build_windows(dates, train_days=40, test_days=10, step_days=15, purge_days=5)
+
+    assert [w['train_range'] for w in windows] == [(0, 35), (15, 50), (30, 65), (45, 80)]
+    for w in windows:
+        train_end, test_start = w['train_range'][1], w['test_range'][0]
+        assert test_start - train_end == 5
+        assert w['test_range'][1] - test_start == 10
+        assert (w['train_end'], w['test_start']) == (dates[train_end - 1], dates[test_start])
+    assert windows[-1]['test_range'][1] <= len(dates)
+
+    with pytest.raises(ValueError):
+        build_windows(dates, train_days=5, test_days=10, step_days=5, purge_days=5)
+
+
+def test_stability_report():
+    grid = {'A': [1, 2], 'B': ['x', 'y']}
+    results = [{'params': {'A': 1, 'B': 'x'}}, {'params': None}, {'params': {'A': 2, 'B': 'x'}},
+               {'params': {'A': 1, 'B': 'x'}}]
+    report = build_stability_report(results, grid)
+
+    assert report['A'] == {'chosen': [1, 2, 1], 'most_common': 1, 'stability': 0.67,
+                           'switches': 2, 'value_counts': {'1': 2, '2': 1}}
+    assert report['B']['stability'] == 1.0 and report['B']['switches'] == 0
+    assert build_stability_report([{'params': None}], grid)['A']['most_common'] is None
+
+
+def test_train_labels_never_reach_test_period(store):
+    result = run_walk_forward(store, GRID, Config, train_days=60, test_days=20, step_days=20,
+                              min_signals=1, workers=1)
+
+    dates = np.unique(store.loc[store['future_return'].notna(), 'date'].to_numpy())
+    position = {str(date): i for i, date in enumerate(dates)}
+    assert result['summary']['windows'] == len(result['windows']) > 1
+    for window in result['windows']:
+        # 训练期最后一天的标签只用到其后 FUTURE_DAYS 个交易日，全部早于测试期
+        gap = position[window['test_start']] - position[window['train_end']]
+        assert gap == Config.FUTURE_DAYS + 1
+
+
+def test_parallel_matches_serial(store):
+    kwargs = dict(train_days=60, test_days=20, step_days=30, min_signals=1)
+    serial = run_walk_forward(store, GRID, Config, workers=1, **kwargs)
+    parallel = run_walk_forward(store, GRID, Config, workers=2, **kwargs)
+
+    assert parallel == serial
+    assert serial['summary']['windows_with_params'] > 0
@@ -0,0 +1,389 @@
+"""
+滚动样本外验证（Walk-Forward）模块
+
+反馈分析器只根据某一天的反馈微调参数，调整后的参数从未在样本外验证过。本模块在
+历史数据上做滚动验证：
+
+    |---------- 训练窗口 ----------|-- 测试窗口 --|
+              |---------- 训练窗口 ----------|-- 测试窗口 --|
+                        |---------- 训练窗口 ----------|-- 测试窗口 --|
+
+每个窗口在训练期上评估整个参数网格、选出目标指标最优的参数，再用这组参数在紧随其后
+的测试期上打分，并与当前Config参数在同一测试期上的表现对比。
+
+实现方式：
+    复用 parameter_sweep 的全市场特征表（指标和未来收益标签只计算一次，可磁盘缓存），
+    每个窗口只是按交易日截取特征数组后做向量化筛选；多个窗口分配到多个进程并行计算。
+    训练期末尾 FUTURE_DAYS 个交易日的标签会用到测试期的价格，默认从训练期剔除。
+
+输出：
+    - 每个窗口的最优参数、训练期/测试期表现、基准参数测试期表现
+    - 每个参数的稳定性报告：各窗口选中的取值、最常见取值及占比、相邻窗口切换次数
+
+使用方法:
+    python walk_forward.py
+    python walk_forward.py --train-days 120 --test-days 20 --step-days 20 --objective avg_return
+    python walk_forward.py --grid grid.json --feature-cache output/sweep_features.pkl
+
+Author: Claude
+Date: 2026-10-18
+"""
+
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List
+
+from config import Config
+from parameter_sweep import (
+    load_or_build_feature_store, to_sweep_arrays, expand_grid, evaluate_combination,
+    load_grid, pool_context
+)
+
+
+logger = logging.getLogger(__name__)
+
+# 可选的优化目标（evaluate_combination 结果中的列）
+OBJECTIVES = ('win_rate', 'avg_return', 'avg_close_return')
+
+# 工作进程中的共享数据（由进程池initializer设置）
+_worker_state: Dict[str, Any] = None
+
+
+def build_windows(
+    dates: np.ndarray,
+    train_days: int,
+    test_days: int,
+    step_days: int,
+    purge_days: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    按交易日生成滚动窗口
+
+    Args:
+        dates: 升序排列的交易日数组
+        train_days: 训练窗口交易日数
+        test_days: 测试窗口交易日数
+        step_days: 窗口每次向前滚动的交易日数
+        purge_days: 从训练期末尾剔除的交易日数（标签与测试期重叠的部分）
+
+    Returns:
+        List[Dict]: 窗口列表，含交易日下标区间 [start, end) 和起止日期
+    """
+    if train_days <= purge_days or test_days <= 0 or step_days <= 0:
+        raise ValueError("窗口参数无效：训练天数需大于剔除天数，测试天数和步长需大于0")
+
+    windows = []
+    start = 0
+    while start + train_days + test_days <= len(dates):
+        train_end = start + train_days - purge_days
+        test_start = start + train_days
+        test_end = test_start + test_days
+        windows.append({
+            'window': len(windows) + 1,
+            'train_range': (start, train_end),
+            'test_range': (test_start, test_end),
+            'train_start': str(dates[start]),
+            'train_end': str(dates[train_end - 1]),
+            'test_start': str(dates[test_start]),
+            'test_end': str(dates[test_end - 1]),
+        })
+        start += step_days
+
+    return windows
+
+
+def _slice_arrays(arrays: Dict[str, np.ndarray], date_range) -> Dict[str, np.ndarray]:
+    """截取交易日下标在 [start, end) 内的特征行"""
+    date_id = arrays['date_id']
+    mask = (date_id >= date_range[0]) & (date_id < date_range[1])
+    return {key: values[mask] for key, values in arrays.items()}
+
+
+def _metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    """取出评估指标（无信号时的NaN转为None，便于写入JSON）"""
+    return {key: None if pd.isna(result[key]) else result[key]
+            for key in ('signal_count', 'win_rate', 'avg_return', 'avg_close_return')}
+
+
+def evaluate_window(
+    arrays: Dict[str, np.ndarray],
+    window: Dict[str, Any],
+    combinations: List[Dict[str, Any]],
+    config,
+    objective: str,
+    min_signals: int
+) -> Dict[str, Any]:
+    """
+    评估一个窗口：训练期选参，测试期打分
+
+    Returns:
+        Dict: 窗口信息 + params（选中的参数，训练期无合格组合时为None）+ train/test/baseline 指标
+    """
+    train_arrays = _slice_arrays(arrays, window['train_range'])
+    test_arrays = _slice_arrays(arrays, window['test_range'])
+
+    train_results = pd.DataFrame([evaluate_combination(train_arrays, params, config)
+                                  for params in combinations])
+    eligible = train_results[train_results['signal_count'] >= min_signals]
+
+    result = {key: value for key, value in window.items() if not key.endswith('_range')}
+    result['baseline'] = _metrics(evaluate_combination(test_arrays, {}, config))
+
+    if eligible.empty:
+        result.update({'params': None, 'train': None, 'test': None})
+        return result
+
+    best_index = eligible.sort_values([objective, 'signal_count'], ascending=False).index[0]
+    params = combinations[best_index]
+    result.update({
+        'params': params,
+        'train': _metrics(train_results.loc[best_index]),
+        'test': _metrics(evaluate_combination(test_arrays, params, config)),
+    })
+    return result
+
+
+def _init_window_worker(state: Dict[str, Any]):
+    """进程池initializer：保存特征数组和参数组合，避免每个任务重复传输"""
+    global _worker_state
+    _worker_state = state
+
+
+def _evaluate_window_in_worker(window: Dict[str, Any]) -> Dict[str, Any]:
+    state = _worker_state
+    return evaluate_window(state['arrays'], window, state['combinations'], state['config'],
+                           state['objective'], state['min_signals'])
+
+
+def _pooled(results: List[Dict[str, Any]], key: str, objective: str) -> float:
+    """按信号数加权汇总多个窗口的指标"""
+    metrics = [r[key] for r in results if r.get(key) and r[key]['signal_count'] > 0]
+    total = sum(m['signal_count'] for m in metrics)
+    if total == 0:
+        return None
+    return round(sum(m[objective] * m['signal_count'] for m in metrics) / total, 3)
+
+
+def build_stability_report(results: List[Dict[str, Any]], grid: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """
+    统计每个参数在各窗口中被选中的取值
+
+    Returns:
+        Dict: {参数名: {chosen, most_common, stability, switches, value_counts}}
+              stability 为最常见取值的窗口占比，越接近1说明参数越稳定
+    """
+    chosen_windows = [r for r in results if r['params'] is not None]
+    report = {}
+    for param in grid:
+        values = [r['params'][param] for r in chosen_windows]
+        if not values:
+            report[param] = {'chosen': [], 'most_common': None, 'stability': None,
+                             'switches': 0, 'value_counts': {}}
+            continue
+        counts = Counter(values)
+        most_common, count = counts.most_common(1)[0]
+        report[param] = {
+            'chosen': values,
+            'most_common': most_common,
+            'stability': round(count / len(values), 2),
+            'switches': sum(a != b for a, b in zip(values, values[1:])),
+            'value_counts': {str(value): n for value, n in counts.items()},
+        }
+    return report
+
+
+def run_walk_forward(
+    store: pd.DataFrame,
+    grid: Dict[str, List[Any]],
+    config=None,
+    train_days: int = None,
+    test_days: int = None,
+    step_days: int = None,
+    objective: str = None,
+    min_signals: int = None,
+    workers: int = None
+) -> Dict[str, Any]:
+    """
+    运行滚动样本外验证
+
+    Args:
+        store: parameter_sweep 构建的特征表
+        grid: 参数网格
+        config: 基准配置类，默认使用Config
+        train_days/test_days/step_days: 窗口参数，默认使用Config.WALK_FORWARD_*
+        objective: 选参目标（win_rate/avg_return/avg_close_return）
+        min_signals: 训练期参与选参的最少信号数
+        workers: 并行进程数
+
+    Returns:
+        Dict: {'windows': 各窗口结果, 'stability': 参数稳定性报告, 'summary': 汇总}
+    """
+    config = config or Config
+    train_days = train_days or config.WALK_FORWARD_TRAIN_DAYS
+    test_days = test_days or config.WALK_FORWARD_TEST_DAYS
+    step_days = step_days or config.WALK_FORWARD_STEP_DAYS
+    objective = objective or config.WALK_FORWARD_OBJECTIVE
+    min_signals = config.SWEEP_MIN_SIGNALS if min_signals is None else min_signals
+    workers = workers or config.SWEEP_WORKERS or os.cpu_count() or 1
+
+    if objective not in OBJECTIVES:
+        raise ValueError(f"未知的优化目标: {objective}（可选 {', '.join(OBJECTIVES)}）")
+
+    combinations = expand_grid(grid)
+    arrays = to_sweep_arrays(store)
+    known_dates = store.loc[store['future_return'].notna(), 'date'].to_numpy()
+    dates, arrays['date_id'] = np.unique(known_dates, return_inverse=True)
+
+    windows = build_windows(dates, train_days, test_days, step_days, purge_days=config.FUTURE_DAYS)
+    if not windows:
+        raise ValueError(f"历史数据只有 {len(dates)} 个交易日，不足一个窗口"
+                         f"（训练{train_days}天 + 测试{test_days}天）")
+
+    logger.info(f"滚动验证: {len(windows)} 个窗口, 每个窗口 {len(combinations)} 组参数, "
+                f"目标 {objective}, {workers} 个进程")
+
+    state = {'arrays': arrays, 'combinations': combinations, 'config': config,
+             'objective': objective, 'min_signals': min_signals}
+    if workers > 1 and len(windows) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(windows)), mp_context=pool_context(),
+                                 initializer=_init_window_worker, initargs=(state,)) as executor:
+            results = list(executor.map(_evaluate_window_in_worker, windows))
+    else:
+        _init_window_worker(state)
+        results = [_evaluate_window_in_worker(window) for window in windows]
+
+    summary = {
+        'windows': len(results),
+        'windows_with_params': sum(r['params'] is not None for r in results),
+        'train_days': train_days,
+        'test_days': test_days,
+        'step_days': step_days,
+        'purge_days': config.FUTURE_DAYS,
+        'objective': objective,
+        'min_signals': min_signals,
+        'train_objective': _pooled(results, 'train', objective),
+        'test_objective': _pooled(results, 'test', objective),
+        'baseline_test_objective': _pooled(results, 'baseline', objective),
+    }
+
+    return {
+        'windows': results,
+        'stability': build_stability_report(results, grid),
+        'summary': summary,
+    }
+
+
+def save_walk_forward_results(result: Dict[str, Any], grid: Dict[str, List[Any]],
+                              output_dir: str = None) -> Dict[str, str]:
+    """
+    保存滚动验证结果
+
+    Returns:
+        Dict[str, str]: {'csv': 窗口明细路径, 'json': 报告路径}
+    """
+    output_dir = output_dir or Config.OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    rows = []
+    for window in result['windows']:
+        row = {key: window[key] for key in ('window', 'train_start', 'train_end', 'test_start', 'test_end')}
+        for param in grid:
+            row[param] = window['params'][param] if window['params'] else None
+        for stage in ('train', 'test', 'baseline'):
+            for key, value in (window[stage] or {}).items():
+                row[f"{stage}_{key}"] = value
+        rows.append(row)
+
+    csv_path = os.path.join(output_dir, f"walk_forward_{timestamp}.csv")
+    pd.DataFrame(rows).to_csv(csv_path, index=False, encoding=Config.CSV_ENCODING)
+
+    report = {
+        'run_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'grid': grid,
+        **result,
+    }
+    json_path = os.path.join(output_dir, f"walk_forward_{timestamp}.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=lambda v: v.item())
+
+    return {'csv': csv_path, 'json': json_path}
+
+
+def main():
+    """主函数"""
+    import argparse
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    parser = argparse.ArgumentParser(description='滚动样本外验证（训练期选参、测试期打分）')
+    parser.add_argument('--grid', help='参数网格：JSON文件路径或JSON字符串，默认使用Config.SWEEP_GRID')
+    parser.add_argument('--train-days', type=int, help='训练窗口交易日数')
+    parser.add_argument('--test-days', type=int, help='测试窗口交易日数')
+    parser.add_argument('--step-days', type=int, help='窗口滚动步长（交易日）')
+    parser.add_argument('--objective', choices=OBJECTIVES, help='选参目标')
+    parser.add_argument('--min-signals', type=int, help='训练期参与选参的最少信号数')
+    parser.add_argument('--data-dir', help='数据目录路径')
+    parser.add_argument('--output-dir', help='输出目录路径')
+    parser.add_argument('--workers', type=int, help='并行进程数')
+    parser.add_argument('--limit', type=int, help='只处理前N只股票（测试用）')
+    parser.add_argument('--feature-cache', help='特征表缓存文件（.pkl），与 parameter_sweep.py 共用')
+    args = parser.parse_args()
+
+    try:
+        grid = load_grid(args.grid)
+        expand_grid(grid)
+    except (ValueError, OSError) as e:
+        logger.error(f"参数网格无效: {str(e)}")
+        return 1
+
+    start = time.perf_counter()
+    store = load_or_build_feature_store(args.feature_cache, args.data_dir, Config,
+                                        args.limit, args.workers)
+    logger.info(f"特征表就绪，耗时 {time.perf_counter() - start:.2f}秒")
+    if store.empty:
+        logger.error("特征表为空，请检查数据目录")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        result = run_walk_forward(store, grid, Config, args.train_days, args.test_days,
+                                  args.step_days, args.objective, args.min_signals, args.workers)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    logger.info(f"滚动验证完成，耗时 {time.perf_counter() - start:.2f}秒")
+
+    summary = result['summary']
+    logger.info("=" * 60)
+    for window in result['windows']:
+        test = window['test']
+        logger.info(f"窗口{window['window']}: 训练 {window['train_start']}~{window['train_end']} | "
+                    f"测试 {window['test_start']}~{window['test_end']} | "
+                    f"参数 {window['params']} | "
+                    f"测试{summary['objective']} {test[summary['objective']] if test else '-'} "
+                    f"(基准 {window['baseline'][summary['objective']]})")
+    logger.info(f"训练期 {summary['objective']}: {summary['train_objective']} | "
+                f"测试期: {summary['test_objective']} | 基准参数测试期: {summary['baseline_test_objective']}")
+    logger.info("参数稳定性（最常见取值 / 窗口占比 / 切换次数）:")
+    for param, stats in result['stability'].items():
+        logger.info(f"  {param}: {stats['most_common']} / {stats['stability']} / {stats['switches']}")
+    logger.info("=" * 60)
+
+    paths = save_walk_forward_results(result, grid, args.output_dir)
+    for name, path in paths.items():
+        logger.info(f"  {name}: {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())